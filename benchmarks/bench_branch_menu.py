@@ -0,0 +1,114 @@
+"""Benchmark of the branch menu open latency on a repository with many branches.
+
+Compares listing the branches and resolving the current branch and its
+upstream with git processes, with the in-process references reader, with
+and without its cache.
+
+Usage:
+    python benchmarks/bench_branch_menu.py --branches 1000 --opens 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+import tornado.ioloop
+
+from jupyterlab_dvc import refs
+from jupyterlab_dvc.git import Git
+
+
+class ContentsManager:
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+
+def create_repository(path, n_branches):
+    subprocess.check_call(["git", "init", "-q", "upstream"], cwd=path)
+    upstream = os.path.join(path, "upstream")
+    subprocess.check_call(
+        [
+            "git",
+            "-c",
+            "user.name=bench",
+            "-c",
+            "user.email=bench@example.com",
+            "commit",
+            "-q",
+            "--allow-empty",
+            "-m",
+            "initial",
+        ],
+        cwd=upstream,
+    )
+    commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=upstream)
+    updates = "".join(
+        "create refs/heads/branch_{} {}\n".format(i, commit.decode().strip())
+        for i in range(n_branches)
+    )
+    subprocess.run(
+        ["git", "update-ref", "--stdin"], cwd=upstream, input=updates.encode(), check=True
+    )
+    subprocess.check_call(["git", "clone", "-q", "upstream", "clone"], cwd=path)
+    clone = os.path.join(path, "clone")
+    # Half of the branches are checked out locally, loose and tracking their upstream
+    for i in range(0, n_branches, 2):
+        subprocess.check_call(
+            ["git", "branch", "-q", "--track", "local_{}".format(i), "origin/branch_{}".format(i)],
+            cwd=clone,
+        )
+    # Let the references be older than the cache safety delay
+    time.sleep(refs.REFS_MIN_AGE_S)
+    return clone
+
+
+async def open_menu(git, n_opens):
+    latencies = []
+    for _ in range(n_opens):
+        start = time.perf_counter()
+        await git.branch("clone")
+        current = await git.get_current_branch("clone")
+        await git.get_upstream_branch("clone", current)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        "{:<20} median {:7.2f} ms - p95 {:7.2f} ms".format(
+            label,
+            statistics.median(latencies) * 1000,
+            sorted(latencies)[int(len(latencies) * 0.95)] * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--branches", type=int, default=1000, help="Remote branches")
+    parser.add_argument("--opens", type=int, default=50, help="Number of menu openings")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        create_repository(root, args.branches)
+        loop = tornado.ioloop.IOLoop.current()
+        git = Git(ContentsManager(root))
+
+        with patch.object(Git, "_read_refs", lambda self, current_path: None):
+            latencies = loop.run_sync(lambda: open_menu(git, args.opens))
+        report("git processes", latencies)
+
+        with patch.object(refs, "REFS_MIN_AGE_S", float("inf")):
+            latencies = loop.run_sync(lambda: open_menu(git, args.opens))
+        report("refs reader", latencies)
+
+        latencies = loop.run_sync(lambda: open_menu(git, args.opens))
+        report("cached refs reader", latencies)
+        git.close()
+
+
+if __name__ == "__main__":
+    main()
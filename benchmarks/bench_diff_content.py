@@ -0,0 +1,106 @@
+"""Benchmark of the diff-open latency on a repository with thousands of files.
+
+Compares reading the blobs with a `git show` process per read with the
+persistent `git cat-file --batch` processes.
+
+Usage:
+    python benchmarks/bench_diff_content.py --files 5000 --diffs 100
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+import tornado.ioloop
+
+from jupyterlab_dvc.git import Git
+
+
+class ContentsManager:
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+
+def git_commit(path, message):
+    subprocess.check_call(["git", "add", "-A"], cwd=path)
+    subprocess.check_call(
+        [
+            "git",
+            "-c",
+            "user.name=bench",
+            "-c",
+            "user.email=bench@example.com",
+            "commit",
+            "-q",
+            "-m",
+            message,
+        ],
+        cwd=path,
+    )
+
+
+def create_repository(path, n_files):
+    subprocess.check_call(["git", "init", "-q"], cwd=path)
+    for i in range(n_files):
+        folder = os.path.join(path, "folder_{}".format(i % 100))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "file_{}.py".format(i)), "w") as f:
+            f.write("".join("line {} of file {}\n".format(j, i) for j in range(200)))
+    git_commit(path, "initial")
+    files = subprocess.check_output(["git", "ls-files"], cwd=path).decode().split()
+    for filename in files:
+        with open(os.path.join(path, filename), "a") as f:
+            f.write("new line\n")
+    git_commit(path, "update")
+    return files
+
+
+async def open_diffs(git, repository, files):
+    latencies = []
+    for filename in files:
+        start = time.perf_counter()
+        await git.diff_content(
+            filename, {"git": "HEAD~1"}, {"git": "HEAD"}, repository
+        )
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        "{:<20} median {:7.2f} ms - p95 {:7.2f} ms".format(
+            label,
+            statistics.median(latencies) * 1000,
+            sorted(latencies)[int(len(latencies) * 0.95)] * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000, help="Files in the repository")
+    parser.add_argument("--diffs", type=int, default=100, help="Number of diffs to open")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as repository:
+        files = create_repository(repository, args.files)
+        sample = random.sample(files, min(args.diffs, len(files)))
+
+        loop = tornado.ioloop.IOLoop.current()
+        git = Git(ContentsManager(repository))
+
+        with patch.object(Git, "show", Git._show_command):
+            latencies = loop.run_sync(lambda: open_diffs(git, repository, sample))
+        report("git show", latencies)
+
+        latencies = loop.run_sync(lambda: open_diffs(git, repository, sample))
+        report("git cat-file --batch", latencies)
+        git._cat_file.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark of the unchanged-status check on a repository with thousands of files.
+
+Compares running `git status` with computing the repository fingerprint that
+lets the status requests be answered "not modified" without running git.
+
+Usage:
+    python benchmarks/bench_fingerprint.py --files 20000 --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from jupyterlab_dvc.repository import compute_fingerprint
+
+
+def create_repository(path, n_files):
+    subprocess.check_call(["git", "init", "-q"], cwd=path)
+    for i in range(n_files):
+        folder = os.path.join(path, "folder_{}".format(i % 200))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "file_{}.py".format(i)), "w") as f:
+            f.write("content of file {}\n".format(i))
+    subprocess.check_call(["git", "add", "-A"], cwd=path)
+    subprocess.check_call(
+        [
+            "git",
+            "-c",
+            "user.name=bench",
+            "-c",
+            "user.email=bench@example.com",
+            "commit",
+            "-q",
+            "-m",
+            "initial",
+        ],
+        cwd=path,
+    )
+
+
+def measure(function, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        "{:<20} median {:7.2f} ms - p95 {:7.2f} ms".format(
+            label,
+            statistics.median(latencies) * 1000,
+            sorted(latencies)[int(len(latencies) * 0.95)] * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000, help="Files in the repository")
+    parser.add_argument("--runs", type=int, default=20, help="Number of checks")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as repository:
+        create_repository(repository, args.files)
+        # Refresh the index so that git status does not rehash the files
+        subprocess.check_call(["git", "status", "--porcelain"], cwd=repository)
+
+        latencies = measure(
+            lambda: subprocess.check_output(
+                ["git", "status", "--porcelain", "-u", "-z"], cwd=repository
+            ),
+            args.runs,
+        )
+        report("git status", latencies)
+
+        assert compute_fingerprint(repository) is not None
+        latencies = measure(lambda: compute_fingerprint(repository), args.runs)
+        report("fingerprint", latencies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Stress benchmark of concurrent `git status` calls across several repositories.
+
+Compares the per-repository readers/writer locks with the former behavior
+of a single global lock serializing every git command.
+
+Usage:
+    python benchmarks/bench_repository_locks.py --repos 8 --calls 200
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+import tornado.ioloop
+
+from jupyterlab_dvc import git
+from jupyterlab_dvc.git import ReadWriteLock, execute
+
+
+def create_repository(path, n_files):
+    os.makedirs(path)
+    subprocess.check_call(["git", "init", "-q"], cwd=path)
+    for i in range(n_files):
+        with open(os.path.join(path, "file_{}.txt".format(i)), "w") as f:
+            f.write("content {}\n".format(i))
+    subprocess.check_call(["git", "add", "-A"], cwd=path)
+    subprocess.check_call(
+        [
+            "git",
+            "-c",
+            "user.name=bench",
+            "-c",
+            "user.email=bench@example.com",
+            "commit",
+            "-q",
+            "-m",
+            "initial",
+        ],
+        cwd=path,
+    )
+    # Leave some changes for status to report
+    for i in range(0, n_files, 10):
+        with open(os.path.join(path, "file_{}.txt".format(i)), "a") as f:
+            f.write("modified\n")
+
+
+async def run_status_calls(repositories, n_calls):
+    futures = [
+        execute(
+            ["git", "status", "--porcelain", "-u", "-z"],
+            cwd=repositories[i % len(repositories)],
+        )
+        for i in range(n_calls)
+    ]
+    start = time.perf_counter()
+    results = await tornado.gen.multi(futures)
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for code, _, _ in results if code != 0)
+    return elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=8, help="Number of repositories")
+    parser.add_argument("--files", type=int, default=200, help="Files per repository")
+    parser.add_argument("--calls", type=int, default=200, help="Number of concurrent calls")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        repositories = []
+        for i in range(args.repos):
+            path = os.path.join(root, "repo_{}".format(i))
+            create_repository(path, args.files)
+            repositories.append(path)
+
+        loop = tornado.ioloop.IOLoop.current()
+
+        global_lock = ReadWriteLock()
+        with patch.object(git, "repository_lock", lambda cwd: global_lock), patch.object(
+            git, "is_read_only", lambda cmdline: False
+        ):
+            elapsed, failures = loop.run_sync(
+                lambda: run_status_calls(repositories, args.calls)
+            )
+        print(
+            "global lock:         {:8.1f} calls/s ({} failures)".format(
+                args.calls / elapsed, failures
+            )
+        )
+
+        elapsed, failures = loop.run_sync(
+            lambda: run_status_calls(repositories, args.calls)
+        )
+        print(
+            "per-repository lock: {:8.1f} calls/s ({} failures)".format(
+                args.calls / elapsed, failures
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,74 @@
 """Initialize the backend server extension
 """
+import atexit
+
+from traitlets import Bool, Float, Int
+from traitlets.config import Configurable
+
+from jupyterlab_dvc.commitcache import COMMIT_CACHE_MAX_ENTRIES
+from jupyterlab_dvc.credentialcache import CREDENTIAL_CACHE_TTL_S
 from jupyterlab_dvc.git import Git
 from jupyterlab_dvc.handlers import setup_handlers
+from jupyterlab_dvc.repository import FINGERPRINT_MAX_AGE_S
+from jupyterlab_dvc.scheduler import (
+    MAX_CONCURRENT_COMMANDS,
+    MAX_CONCURRENT_COMMANDS_PER_REPOSITORY,
+)
+from jupyterlab_dvc.singleflight import READ_RESULT_TTL_S
+from jupyterlab_dvc.watcher import RepositoryWatchers
 
 # need this in order to show version in `jupyter serverextension list`
 from ._version import __version__
 
 
+class JupyterLabDvc(Configurable):
+    """
+    Config options for jupyterlab_dvc
+    """
+
+    commit_cache_size = Int(
+        COMMIT_CACHE_MAX_ENTRIES,
+        config=True,
+        help="Maximal number of commit metadata entries cached in memory.",
+    )
+
+    commit_cache_on_disk = Bool(
+        False,
+        config=True,
+        help="Whether to keep the commit metadata cache in the repositories git folder.",
+    )
+
+    max_concurrent_commands = Int(
+        MAX_CONCURRENT_COMMANDS,
+        config=True,
+        help="Maximal number of git commands running at the same time.",
+    )
+
+    max_concurrent_commands_per_repository = Int(
+        MAX_CONCURRENT_COMMANDS_PER_REPOSITORY,
+        config=True,
+        help="Maximal number of git commands running at the same time in a repository.",
+    )
+
+    credential_cache_ttl = Float(
+        CREDENTIAL_CACHE_TTL_S,
+        config=True,
+        help="Time in seconds during which the credentials of a remote are kept in memory; 0 to disable.",
+    )
+
+    read_result_ttl = Float(
+        READ_RESULT_TTL_S,
+        config=True,
+        help="Time in seconds during which the result of a read request (e.g. status) is reused; 0 to disable.",
+    )
+
+    status_fingerprint_max_age = Float(
+        FINGERPRINT_MAX_AGE_S,
+        config=True,
+        help="Time in seconds after which the status fingerprint expires; a file modified in place may be reported up to this time later. 0 disables the fingerprint.",
+    )
+
+
 def _jupyter_server_extension_paths():
     """Declare the Jupyter server extension paths.
     """
@@ -16,6 +78,9 @@ def _jupyter_server_extension_paths():
 def load_jupyter_server_extension(nbapp):
     """Load the Jupyter server extension.
     """
-    git = Git(nbapp.web_app.settings['contents_manager'])
+    config = JupyterLabDvc(config=nbapp.config)
+    git = Git(nbapp.web_app.settings['contents_manager'], config)
     nbapp.web_app.settings["dvc"] = git
+    atexit.register(git.close)
+    nbapp.web_app.settings["dvc_watchers"] = RepositoryWatchers(git.root_dir)
     setup_handlers(nbapp.web_app)
@@ -0,0 +1,267 @@
+"""
+Module answering the credential prompts of git commands
+
+Commands exchanging with a remote run with GIT_ASKPASS pointing to a small
+program (askpass_client.py) which requests the answer to each prompt from
+this server over a localhost socket. The same program is a git credential
+helper giving the credentials kept in memory for a time once they
+authenticated a remote operation; repeated operations therefore do not need
+the credentials again. Every command gets its own random token; the server
+answers only the requests of the commands currently running. Commands run
+without terminal, like any other command.
+"""
+import asyncio
+import contextlib
+import os
+import secrets
+import shlex
+import shutil
+import sys
+import tempfile
+
+from .askpass_client import HELPER_ARGUMENT, PORT_VARIABLE, TOKEN_VARIABLE
+from .credentialcache import (
+    CREDENTIAL_CACHE_TTL_S,
+    CredentialCache,
+    format_attributes,
+    parse_attributes,
+)
+
+# Program run by git to get the answer of a prompt
+ASKPASS_CLIENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "askpass_client.py")
+# Maximal time in seconds to receive a request from the askpass program
+ASKPASS_REQUEST_TIMEOUT_S = 10
+# git commands which may need credentials
+REMOTE_COMMANDS = {"clone", "fetch", "ls-remote", "pull", "push"}
+# `git remote` subcommands which may need credentials
+REMOTE_SUBCOMMANDS = {"prune", "update"}
+
+
+def is_remote_command(cmdline):
+    """Whether a command may need credentials to exchange with a remote.
+
+    Args:
+        cmdline (List[str]): Command line to be executed
+    Returns:
+        bool: True for git commands exchanging with a remote
+    """
+    if len(cmdline) < 2 or os.path.basename(cmdline[0]) != "git":
+        return False
+    if cmdline[1] == "remote":
+        return len(cmdline) > 2 and cmdline[2] in REMOTE_SUBCOMMANDS
+    return cmdline[1] in REMOTE_COMMANDS
+
+
+def answer_prompt(prompt, username, password):
+    """Get the answer to a git credential prompt.
+
+    Args:
+        prompt (str): Prompt; e.g. "Username for 'https://github.com': "
+        username (str): User name
+        password (str): User password
+    Returns:
+        Optional[str]: The answer or None if the prompt is not a credential prompt
+    """
+    prompt = prompt.strip().lower()
+    if prompt.startswith("username"):
+        return username
+    if prompt.startswith("password"):
+        return password
+    return None
+
+
+class AskPassServer:
+    """Server giving the credentials of the running commands to the askpass program."""
+
+    def __init__(self, credential_cache_ttl=CREDENTIAL_CACHE_TTL_S):
+        """
+        Args:
+            credential_cache_ttl (float): Time in seconds during which credentials are kept
+        """
+        self.cache = CredentialCache(credential_cache_ttl)
+        # token -> (username, password) or None for commands without credentials
+        self._credentials = {}
+        self._loop = None
+        self._server = None
+        self._folder = None
+        self.answered = 0
+        self.refused = 0
+
+    def configure(self, credential_cache_ttl):
+        """Change the time to live of the cached credentials.
+
+        Args:
+            credential_cache_ttl (float): Time in seconds during which credentials are kept
+        """
+        self.cache.ttl = credential_cache_ttl
+        if credential_cache_ttl <= 0:
+            self.cache.clear()
+
+    @contextlib.asynccontextmanager
+    async def credentials(self, env, username=None, password=None):
+        """Context in which the credential requests of a command are answered.
+
+        Without credentials, only the cached ones are given.
+
+        Args:
+            env (Optional[Dict[str, str]]): Environment variables of the command;
+                default to the server environment
+            username (Optional[str]): User name
+            password (Optional[str]): User password
+        Yields:
+            Dict[str, str]: Environment variables of the command
+        """
+        port = await self._start()
+        program = self._askpass_program()
+        token = secrets.token_urlsafe(32)
+        env = dict(os.environ if env is None else env)
+        # The helper comes after the ones of the git configuration
+        helper = _sq_quote(
+            "credential.helper=!{} {}".format(shlex.quote(program), HELPER_ARGUMENT)
+        )
+        parameters = env.get("GIT_CONFIG_PARAMETERS")
+        env.update(
+            {
+                "GIT_ASKPASS": program,
+                "GIT_CONFIG_PARAMETERS": helper if not parameters else parameters + " " + helper,
+                # There is no terminal to prompt on
+                "GIT_TERMINAL_PROMPT": "0",
+                PORT_VARIABLE: str(port),
+                TOKEN_VARIABLE: token,
+            }
+        )
+        self._credentials[token] = (
+            None if username is None or password is None else (username, password)
+        )
+        try:
+            yield env
+        finally:
+            del self._credentials[token]
+
+    def stats(self):
+        """Get the statistics."""
+        return {
+            "running": len(self._credentials),
+            "answered": self.answered,
+            "refused": self.refused,
+            "cache": self.cache.stats(),
+        }
+
+    def close(self):
+        """Stop the server, forget the credentials and remove the askpass program."""
+        self.cache.clear()
+        self._stop_server()
+        self._loop = None
+        if self._folder is not None:
+            shutil.rmtree(self._folder, ignore_errors=True)
+            self._folder = None
+
+    async def _start(self):
+        """Start the server in the current event loop if needed.
+
+        Returns:
+            int: The server port
+        """
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            # The server is bound to a single event loop
+            self._stop_server()
+            self._loop = loop
+            self._server = asyncio.ensure_future(
+                asyncio.start_server(self._answer, "127.0.0.1", 0)
+            )
+        try:
+            server = await asyncio.shield(self._server)
+        except OSError:
+            # Try again on the next command
+            self._loop = None
+            raise
+        return server.sockets[0].getsockname()[1]
+
+    def _stop_server(self):
+        """Close the listening socket of the server if it started."""
+        server, self._server = self._server, None
+        if server is not None and server.done() and server.exception() is None:
+            # The event loop of the server may be closed already
+            for sock in server.result().sockets or []:
+                sock.close()
+
+    def _askpass_program(self):
+        """Get the program git runs to get an answer.
+
+        git executes GIT_ASKPASS without shell and arguments; a script runs
+        the askpass client with the interpreter of the server.
+        """
+        if self._folder is None:
+            self._folder = tempfile.mkdtemp(prefix="jupyterlab-dvc-askpass-")
+        program = os.path.join(self._folder, "askpass.sh")
+        if not os.path.exists(program):
+            with open(program, "w") as script:
+                script.write(
+                    '#!/bin/sh\nexec {} {} "$@"\n'.format(
+                        shlex.quote(sys.executable), shlex.quote(ASKPASS_CLIENT)
+                    )
+                )
+            os.chmod(program, 0o700)
+        return program
+
+    async def _answer(self, reader, writer):
+        """Answer a request of the askpass program.
+
+        The request is the command token, then either "prompt <prompt>" or
+        "credential <operation>" followed by the attributes (see
+        https://git-scm.com/docs/git-credential). The answer to a prompt is
+        the value followed by a newline, or nothing if refused.
+        """
+        try:
+            request = await asyncio.wait_for(reader.read(), ASKPASS_REQUEST_TIMEOUT_S)
+            token, _, request = request.decode("utf-8", "replace").partition("\n")
+            kind, _, request = request.partition("\n")
+            kind, _, argument = kind.partition(" ")
+            answer = None
+            if token in self._credentials:
+                credentials = self._credentials[token]
+                if kind == HELPER_ARGUMENT:
+                    answer = self._helper(argument, parse_attributes(request), credentials)
+                elif kind == "prompt" and credentials is not None:
+                    value = answer_prompt(argument, *credentials)
+                    answer = None if value is None else value + "\n"
+            if answer is None:
+                self.refused += 1
+            else:
+                self.answered += 1
+                writer.write(answer.encode("utf-8"))
+                await writer.drain()
+        except (asyncio.TimeoutError, OSError):
+            self.refused += 1
+        finally:
+            writer.close()
+
+    def _helper(self, operation, attributes, credentials):
+        """Answer a credential helper request.
+
+        Args:
+            operation (str): "get", "store" or "erase"
+            attributes (Dict[str, str]): Attributes of the request
+            credentials (Optional[Tuple[str, str]]): (username, password) of the command
+        Returns:
+            Optional[str]: The answer attributes or None for an unknown operation
+        """
+        if operation == "get":
+            if credentials is not None:
+                username, password = credentials
+                return format_attributes({"username": username, "password": password})
+            cached = self.cache.get(attributes)
+            return "" if cached is None else format_attributes(cached)
+        elif operation == "store":
+            self.cache.store(attributes)
+            return ""
+        elif operation == "erase":
+            self.cache.erase(attributes)
+            return ""
+        return None
+
+
+def _sq_quote(value):
+    """Quote a value for GIT_CONFIG_PARAMETERS."""
+    return "'{}'".format(value.replace("'", "'\\''"))
@@ -0,0 +1,73 @@
+"""
+GIT_ASKPASS program answering the git credential prompts
+
+git runs it with the prompt as single argument and reads the answer on its
+standard output. It is also a git credential helper when its first argument
+is HELPER_ARGUMENT, followed by the operation (get, store or erase); the
+attributes of the request are read on its standard input.
+
+The answer is requested from the extension server over a local socket; the
+server address and the token of the command are read from the environment.
+This script must only depend on the standard library as it is executed for
+each prompt.
+"""
+import os
+import socket
+import sys
+
+# Environment variables giving the port of the server and the token of the command
+PORT_VARIABLE = "JUPYTERLAB_DVC_ASKPASS_PORT"
+TOKEN_VARIABLE = "JUPYTERLAB_DVC_ASKPASS_TOKEN"
+# Maximal time in seconds to get an answer from the server
+ANSWER_TIMEOUT_S = 30
+# First argument of the program run as credential helper
+HELPER_ARGUMENT = "credential"
+
+
+def main(argv):
+    """Print the answer to a prompt or a credential helper request.
+
+    The request sent to the server is the command token, then either
+    "prompt <prompt>" or "credential <operation>" followed by the attributes.
+
+    Args:
+        argv (List[str]): Command line arguments
+    Returns:
+        int: Exit status; non zero if the server did not answer the prompt
+    """
+    helper = argv[1:2] == [HELPER_ARGUMENT]
+    try:
+        address = ("127.0.0.1", int(os.environ[PORT_VARIABLE]))
+        token = os.environ[TOKEN_VARIABLE]
+    except (KeyError, ValueError):
+        # git ignores the failure of a helper
+        return 0 if helper else 1
+
+    if helper:
+        operation = argv[2] if len(argv) > 2 else ""
+        request = "{}\n{} {}\n{}".format(token, HELPER_ARGUMENT, operation, sys.stdin.read())
+    else:
+        prompt = argv[1] if len(argv) > 1 else ""
+        request = "{}\nprompt {}\n".format(token, " ".join(prompt.splitlines()))
+    answer = b""
+    try:
+        with socket.create_connection(address, timeout=ANSWER_TIMEOUT_S) as connection:
+            connection.sendall(request.encode("utf-8"))
+            connection.shutdown(socket.SHUT_WR)
+            while True:
+                chunk = connection.recv(4096)
+                if not chunk:
+                    break
+                answer += chunk
+    except OSError:
+        return 0 if helper else 1
+
+    # An empty answer means the prompt is refused; an empty value is a single newline
+    if not answer:
+        return 0 if helper else 1
+    sys.stdout.write(answer.decode("utf-8"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,238 @@
+"""
+Module streaming the content of files, at a git reference or in the working tree,
+by byte or line ranges without loading them in memory
+"""
+import os
+import re
+import subprocess
+
+import tornado
+import tornado.iostream
+import tornado.process
+
+# Size of the chunks read from a blob
+BLOB_CHUNK_SIZE = 64 * 1024
+# HTTP Range header for a single byte range; e.g. "bytes=0-499", "bytes=500-" or "bytes=-500"
+BYTE_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Line range; e.g. "1-100" or "100-"
+LINE_RANGE_PATTERN = re.compile(r"^(\d+)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    """Error raised when a range does not overlap the content."""
+
+
+def parse_byte_range(header, size):
+    """Parse an HTTP Range header.
+
+    Only single byte ranges are supported; other ranges are ignored as
+    allowed by RFC 7233.
+
+    Args:
+        header (Optional[str]): Range header value
+        size (int): Content size in bytes
+    Returns:
+        Optional[Tuple[int, int]]: (start, end) with end excluded or None to
+            send the whole content
+    Raises:
+        RangeNotSatisfiable: if the range starts after the end of the content
+    """
+    if not header:
+        return None
+    match = BYTE_RANGE_PATTERN.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range - the last bytes
+        start = max(size - int(last), 0)
+        end = size
+    else:
+        start = int(first)
+        end = size if last == "" else min(int(last) + 1, size)
+        if last != "" and end <= start:
+            return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def parse_line_range(value):
+    """Parse a range of lines.
+
+    Args:
+        value (str): Range of 1-based lines, last line included; e.g. "1-100" or "100-"
+    Returns:
+        Tuple[int, Optional[int]]: (first, last) with last None for the end of file
+    Raises:
+        ValueError: if the range is invalid
+    """
+    match = LINE_RANGE_PATTERN.match(value.strip())
+    if match is None:
+        raise ValueError("Invalid line range '{}'.".format(value))
+    first = int(match.group(1))
+    last = int(match.group(2)) if match.group(2) else None
+    if first < 1 or (last is not None and last < first):
+        raise ValueError("Invalid line range '{}'.".format(value))
+    return first, last
+
+
+async def slice_bytes(chunks, start, end):
+    """Keep a byte range of a stream.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Stream
+        start (int): First byte
+        end (Optional[int]): Byte after the last one; None for the end of the stream
+    Yields:
+        bytes: Chunks of the range
+    """
+    position = 0
+    try:
+        async for chunk in chunks:
+            chunk_start = position
+            position += len(chunk)
+            if position <= start:
+                continue
+            if end is not None and chunk_start >= end:
+                break
+            yield chunk[
+                max(start - chunk_start, 0) : None if end is None else end - chunk_start
+            ]
+            if end is not None and position >= end:
+                break
+    finally:
+        await close_stream(chunks)
+
+
+async def slice_lines(chunks, first, last):
+    """Keep a range of lines of a stream.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Stream
+        first (int): 1-based first line
+        last (Optional[int]): 1-based last line (included); None for the end of the stream
+    Yields:
+        bytes: Chunks of the range
+    """
+    # Number of the line at the start of the current chunk
+    line = 1
+    try:
+        async for chunk in chunks:
+            chunk_start = 0
+            if line < first:
+                # Skip the lines before the range
+                newlines = chunk.count(b"\n")
+                if line + newlines < first:
+                    line += newlines
+                    continue
+                while line < first:
+                    chunk_start = chunk.index(b"\n", chunk_start) + 1
+                    line += 1
+
+            if last is None:
+                yield chunk[chunk_start:]
+                continue
+
+            chunk_end = chunk_start
+            while line <= last:
+                newline = chunk.find(b"\n", chunk_end)
+                if newline < 0:
+                    chunk_end = len(chunk)
+                    break
+                chunk_end = newline + 1
+                line += 1
+            if chunk_end > chunk_start:
+                yield chunk[chunk_start:chunk_end]
+            if line > last:
+                break
+    finally:
+        await close_stream(chunks)
+
+
+async def close_stream(chunks):
+    """Close a stream which may not be consumed to its end.
+
+    The stream resources - e.g. a git process - are then released right away
+    instead of when the stream is garbage collected.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Stream
+    """
+    aclose = getattr(chunks, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+async def read_file(path, chunk_size=BLOB_CHUNK_SIZE, start=0):
+    """Stream a file.
+
+    Args:
+        path (str): File path
+        chunk_size (int): Size of the chunks
+        start (int): First byte to read
+    Yields:
+        bytes: Chunks of the file
+    """
+    loop = tornado.ioloop.IOLoop.current()
+    with open(path, "rb") as stream:
+        if start:
+            stream.seek(start)
+        while True:
+            chunk = await loop.run_in_executor(None, stream.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def read_blob(top_repo_path, sha, chunk_size=BLOB_CHUNK_SIZE):
+    """Stream a blob with `git cat-file`.
+
+    Blobs are immutable by SHA, so the stream, paced by the client, holds
+    neither the repository lock nor a slot of the command scheduler; those
+    only guard the lookup resolving the reference to the SHA. The process
+    is killed if the stream is not consumed to its end.
+
+    Args:
+        top_repo_path (str): Top Git repository path
+        sha (str): Blob SHA
+        chunk_size (int): Maximal size of the chunks
+    Yields:
+        bytes: Chunks of the blob
+    """
+    process = tornado.process.Subprocess(
+        ["git", "cat-file", "blob", sha],
+        stdout=tornado.process.Subprocess.STREAM,
+        stderr=subprocess.DEVNULL,
+        cwd=top_repo_path,
+    )
+    try:
+        while True:
+            try:
+                chunk = await process.stdout.read_bytes(chunk_size, partial=True)
+            except tornado.iostream.StreamClosedError:
+                break
+            yield chunk
+    finally:
+        process.stdout.close()
+        if process.proc.poll() is None:
+            process.proc.kill()
+        process.proc.wait()
+
+
+def working_file(root_dir, top_repo_path, filename):
+    """Resolve a file of the working tree, preventing to escape the server root.
+
+    Args:
+        root_dir (str): Server root folder
+        top_repo_path (str): Top Git repository path
+        filename (str): File path relative to the repository
+    Returns:
+        Optional[str]: The file path or None if it is not a file within the root folder
+    """
+    root = os.path.realpath(root_dir)
+    path = os.path.realpath(os.path.join(top_repo_path, filename))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
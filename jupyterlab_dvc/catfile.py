@@ -0,0 +1,430 @@
+"""
+Module managing persistent `git cat-file --batch` processes to read git objects
+and `git check-attr --stdin` processes to read the gitattributes of paths
+"""
+import collections
+import os
+import subprocess
+import time
+
+import tornado
+import tornado.locks
+import tornado.util
+
+from .repository import find_common_dir, find_git_dir
+
+# How long an unused cat-file process is kept alive
+CAT_FILE_IDLE_TIMEOUT_S = 60
+# Maximal number of cat-file processes per repository and per mode
+MAX_CAT_FILE_PROCESSES = 2
+# Maximal waiting time for the repository lock, as for the git commands
+MAX_WAIT_FOR_LOCK_S = 20
+# Pool mode of the check-attr processes, next to the cat-file batch options
+CHECK_ATTR_MODE = "check-attr"
+
+
+class CatFileError(Exception):
+    """Error raised when a cat-file process cannot answer a request."""
+
+
+def _index_stat(repository):
+    """Get the stat signature of the index file of the repository.
+
+    Args:
+        repository (str): Repository top-level folder
+    Returns:
+        Optional[Tuple[int, int, int]]: (inode, size, mtime) of the index or None
+    """
+    git_dir = os.path.join(repository, ".git")
+    if os.path.isfile(git_dir):
+        # Worktree or submodule: the gitfile points to the actual git folder
+        try:
+            with open(git_dir) as gitfile:
+                content = gitfile.read().strip()
+        except OSError:
+            return None
+        if not content.startswith("gitdir:"):
+            return None
+        git_dir = os.path.join(repository, content[len("gitdir:") :].strip())
+    try:
+        stat = os.stat(os.path.join(git_dir, "index"))
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class CatFileProcess:
+    """A `git cat-file` process answering requests over its pipes.
+
+    The requests are blocking and must be executed outside of the event loop.
+    A process serves one request at a time.
+    """
+
+    def __init__(self, repository, batch_option):
+        """
+        Args:
+            repository (str): Repository top-level folder
+            batch_option (str): "--batch" to get the content or "--batch-check"
+                to get only the object information
+        """
+        self.repository = repository
+        self.batch_option = batch_option
+        self.index_stat = _index_stat(repository)
+        self.last_used = time.monotonic()
+        self.process = subprocess.Popen(
+            ["git", "cat-file", batch_option],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=repository,
+        )
+
+    @property
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def is_stale(self, spec):
+        """Whether the process cannot answer a request.
+
+        The index is loaded once by cat-file; a process that read an older
+        version of it cannot answer index requests.
+        """
+        return spec.startswith(":") and self.index_stat != _index_stat(self.repository)
+
+    def request(self, spec):
+        """Request an object.
+
+        Args:
+            spec (str): Object specification; e.g. "HEAD:path/to/file"
+        Returns:
+            Optional[Tuple[str, str, int, Optional[bytes]]]: (sha, type, size, content)
+                or None if the object does not exist. The content is None for
+                "--batch-check" processes.
+        Raises:
+            CatFileError: if the process failed
+        """
+        try:
+            self.process.stdin.write(spec.encode("utf-8") + b"\n")
+            self.process.stdin.flush()
+            header = self.process.stdout.readline()
+            if not header:
+                raise CatFileError("git cat-file process exited unexpectedly")
+
+            fields = header.decode("utf-8").rstrip("\n").rsplit(" ", 2)
+            if len(fields) != 3 or not fields[2].isdigit():
+                # "<spec> missing" or "<spec> ambiguous"
+                return None
+
+            sha, object_type, size = fields[0], fields[1], int(fields[2])
+            content = None
+            if self.batch_option == "--batch":
+                content = self.process.stdout.read(size)
+                # Content is followed by a line feed
+                self.process.stdout.read(1)
+                if len(content) != size:
+                    raise CatFileError("Truncated git cat-file output")
+            return sha, object_type, size, content
+        except (OSError, ValueError) as error:
+            raise CatFileError(str(error)) from error
+        finally:
+            self.last_used = time.monotonic()
+
+    def close(self):
+        """Terminate the process."""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class CheckAttrProcess:
+    """A `git check-attr --stdin` process answering requests over its pipes.
+
+    The requests are blocking and must be executed outside of the event loop.
+    A process serves one request at a time.
+    """
+
+    def __init__(self, repository, attributes):
+        """
+        Args:
+            repository (str): Repository top-level folder
+            attributes (Sequence[str]): Names of the attributes to check
+        """
+        self.repository = repository
+        self.attributes = tuple(attributes)
+        self.last_used = time.monotonic()
+        git_dir = find_git_dir(repository)
+        self._info_attributes = (
+            None
+            if git_dir is None
+            else os.path.join(find_common_dir(git_dir), "info", "attributes")
+        )
+        # Attributes file -> stat signature when check-attr first used it
+        self._attributes_stats = {}
+        self.process = subprocess.Popen(
+            ["git", "check-attr", "--stdin", "-z"] + list(self.attributes),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=repository,
+            env=dict(os.environ, GIT_FLUSH="1"),
+        )
+
+    @property
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def is_stale(self, path):
+        """Whether the process cannot answer a request.
+
+        The attributes files are read once per folder by check-attr; a
+        process that read an older version of those applying to path cannot
+        answer for it.
+        """
+        return any(
+            self._attributes_stats.get(name, stat) != stat
+            for name, stat in self._stat_attributes(path)
+        )
+
+    def request(self, path):
+        """Request the attributes of a path.
+
+        Args:
+            path (str): Path relative to the repository
+        Returns:
+            str: NUL separated (path, attribute, value) triplets, as output by
+                `git check-attr -z`
+        Raises:
+            CatFileError: if the process failed
+        """
+        for name, stat in self._stat_attributes(path):
+            self._attributes_stats.setdefault(name, stat)
+        try:
+            self.process.stdin.write(path.encode("utf-8") + b"\x00")
+            self.process.stdin.flush()
+            fields = [self._read_field() for _ in range(3 * len(self.attributes))]
+            return "".join(field + "\x00" for field in fields)
+        except (OSError, ValueError) as error:
+            raise CatFileError(str(error)) from error
+        finally:
+            self.last_used = time.monotonic()
+
+    def close(self):
+        """Terminate the process."""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+    def _read_field(self):
+        field = bytearray()
+        while True:
+            byte = self.process.stdout.read(1)
+            if not byte:
+                raise CatFileError("git check-attr process exited unexpectedly")
+            if byte == b"\x00":
+                return field.decode("utf-8")
+            field += byte
+
+    def _stat_attributes(self, path):
+        """Get the stat signature of the attributes files applying to path."""
+        names = [] if self._info_attributes is None else [self._info_attributes]
+        folder = os.path.dirname(path)
+        while True:
+            names.append(os.path.join(self.repository, folder, ".gitattributes"))
+            if not folder:
+                break
+            folder = os.path.dirname(folder)
+
+        signatures = []
+        for name in names:
+            try:
+                stat = os.stat(name)
+                signatures.append((name, (stat.st_ino, stat.st_size, stat.st_mtime_ns)))
+            except OSError:
+                signatures.append((name, None))
+        return signatures
+
+
+class CatFilePool:
+    """Pool of persistent `git cat-file` and `git check-attr` processes per repository.
+
+    Reading an object or the attributes of a path is then a round trip
+    through a pipe instead of spawning a git process. Processes unused for
+    longer than the idle timeout are terminated.
+
+    Like the git commands, the requests hold the repository lock for reading
+    and run in a slot of the command scheduler, in the scheduling class of
+    the current context.
+    """
+
+    def __init__(
+        self,
+        scheduler,
+        repository_lock,
+        idle_timeout=CAT_FILE_IDLE_TIMEOUT_S,
+        max_processes=MAX_CAT_FILE_PROCESSES,
+        attributes=(),
+    ):
+        """
+        Args:
+            scheduler (CommandScheduler): Scheduler granting the execution slots
+            repository_lock (Callable[[str], ReadWriteLock]): Get the lock of a repository
+            idle_timeout (float): Time in seconds after which an unused process is terminated
+            max_processes (int): Maximal number of processes per repository and mode
+            attributes (Sequence[str]): Names of the attributes read by check_attr
+        """
+        self.idle_timeout = idle_timeout
+        self.max_processes = max_processes
+        self.attributes = tuple(attributes)
+        self._scheduler = scheduler
+        self._repository_lock = repository_lock
+        # (repository, mode) -> idle processes
+        self._idle = {}
+        # (repository, mode) -> semaphore limiting the number of processes;
+        # it is dropped once no request is using it
+        self._semaphores = {}
+        # (repository, mode) -> number of requests using the semaphore
+        self._requests = collections.Counter()
+        self._eviction = None
+
+    async def read(self, repository, spec):
+        """Read an object content.
+
+        Args:
+            repository (str): Repository top-level folder
+            spec (str): Object specification; e.g. "HEAD:path/to/file"
+        Returns:
+            Optional[Tuple[str, str, int, bytes]]: (sha, type, size, content)
+                or None if the object does not exist
+        Raises:
+            CatFileError: if the object cannot be read through cat-file
+        """
+        return await self._request(repository, "--batch", spec)
+
+    async def info(self, repository, spec):
+        """Read an object information.
+
+        Args:
+            repository (str): Repository top-level folder
+            spec (str): Object specification; e.g. "HEAD:path/to/file"
+        Returns:
+            Optional[Tuple[str, str, int]]: (sha, type, size) or None if
+                the object does not exist
+        Raises:
+            CatFileError: if the object cannot be queried through cat-file
+        """
+        result = await self._request(repository, "--batch-check", spec)
+        return None if result is None else result[:3]
+
+    async def check_attr(self, repository, path):
+        """Read the attributes of a path.
+
+        Args:
+            repository (str): Repository top-level folder
+            path (str): Path relative to the repository
+        Returns:
+            str: NUL separated (path, attribute, value) triplets, as output by
+                `git check-attr -z`
+        Raises:
+            CatFileError: if the attributes cannot be read through check-attr
+        """
+        return await self._request(repository, CHECK_ATTR_MODE, path)
+
+    def close(self):
+        """Terminate all idle processes."""
+        if self._eviction is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._eviction)
+            self._eviction = None
+        for processes in self._idle.values():
+            for process in processes:
+                process.close()
+        self._idle.clear()
+
+    async def _request(self, repository, mode, spec):
+        if "\n" in spec or "\x00" in spec:
+            raise CatFileError("Object specification cannot contain a line feed or NUL")
+
+        key = (os.path.realpath(repository), mode)
+        lock = self._repository_lock(repository)
+        try:
+            await lock.acquire_read(timeout=MAX_WAIT_FOR_LOCK_S)
+        except tornado.util.TimeoutError:
+            raise CatFileError("Unable to get the lock on the directory")
+
+        semaphore = self._semaphores.setdefault(
+            key, tornado.locks.Semaphore(self.max_processes)
+        )
+        self._requests[key] += 1
+        try:
+            async with semaphore, self._scheduler.slot(key[0]):
+                process = self._checkout(key, spec)
+                loop = tornado.ioloop.IOLoop.current()
+                try:
+                    result = await loop.run_in_executor(
+                        self._scheduler.executor, process.request, spec
+                    )
+                except CatFileError:
+                    process.close()
+                    raise
+                self._idle.setdefault(key, []).append(process)
+                self._schedule_eviction()
+                return result
+        finally:
+            self._requests[key] -= 1
+            if self._requests[key] <= 0:
+                del self._requests[key]
+                del self._semaphores[key]
+            lock.release_read()
+
+    def _checkout(self, key, spec):
+        """Take an idle process for key or start a new one."""
+        repository, mode = key
+        idle = self._idle.get(key, [])
+        while idle:
+            process = idle.pop()
+            if process.is_alive and not process.is_stale(spec):
+                return process
+            process.close()
+
+        try:
+            if mode == CHECK_ATTR_MODE:
+                return CheckAttrProcess(repository, self.attributes)
+            return CatFileProcess(repository, mode)
+        except OSError as error:
+            raise CatFileError(str(error)) from error
+
+    def _schedule_eviction(self):
+        if self._eviction is None:
+            self._eviction = tornado.ioloop.IOLoop.current().call_later(
+                self.idle_timeout, self._evict
+            )
+
+    def _evict(self):
+        """Terminate the processes idle for longer than the timeout."""
+        self._eviction = None
+        now = time.monotonic()
+        for key in list(self._idle):
+            processes = self._idle[key]
+            for process in [
+                p for p in processes if now - p.last_used >= self.idle_timeout
+            ]:
+                processes.remove(process)
+                process.close()
+            if not processes:
+                del self._idle[key]
+
+        if self._idle:
+            self._schedule_eviction()
@@ -0,0 +1,117 @@
+"""
+Module classifying the content of blobs as binary or text
+
+Blobs are immutable, so a verdict keyed by blob SHA and path (the
+gitattributes apply to paths) only needs to be computed once.
+"""
+import collections
+
+# Number of bytes sniffed for a NUL byte, like git does
+BINARY_SNIFF_SIZE = 8000
+# Maximal number of verdicts kept in memory
+CLASSIFICATION_CACHE_MAX_ENTRIES = 10000
+# Attributes deciding whether git diffs a file as binary or text
+CLASSIFICATION_ATTRIBUTES = ("binary", "diff", "text")
+
+
+def parse_check_attr(output):
+    """Parse the output of `git check-attr -z`.
+
+    Args:
+        output (str): NUL separated (path, attribute, value) triplets
+    Returns:
+        Dict[str, str]: Attribute -> value ("set", "unset", "unspecified" or a value)
+    """
+    fields = output.split("\x00")
+    return {
+        fields[index + 1]: fields[index + 2] for index in range(0, len(fields) - 2, 3)
+    }
+
+
+def classify(content, attributes=None):
+    """Classify a content as binary or text.
+
+    The gitattributes take precedence; otherwise the content is binary if a NUL
+    byte is found within its first BINARY_SNIFF_SIZE bytes.
+
+    Args:
+        content (bytes): Content
+        attributes (Optional[Dict[str, str]]): Attributes of the file path
+    Returns:
+        dict: {
+            "binary": bool,
+            "size": int, # in bytes
+            "encoding": Optional[str] # None if the content is not UTF-8
+        }
+    """
+    attributes = attributes or {}
+    if attributes.get("binary") == "set" or attributes.get("diff") == "unset":
+        binary = True
+    elif attributes.get("text") == "set" or attributes.get("diff") == "set":
+        binary = False
+    else:
+        binary = b"\x00" in content[:BINARY_SNIFF_SIZE]
+
+    encoding = None
+    if not binary:
+        try:
+            content.decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            pass
+    return {"binary": binary, "size": len(content), "encoding": encoding}
+
+
+class ClassificationCache:
+    """Least recently used cache of blob classifications."""
+
+    def __init__(self, max_entries=CLASSIFICATION_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            max_entries (int): Maximal number of entries
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def get(self, sha, path):
+        """Get the classification of a blob.
+
+        Args:
+            sha (str): Blob SHA
+            path (str): Blob path
+        Returns:
+            Optional[dict]: The classification or None if not cached
+        """
+        key = (sha, path)
+        verdict = self._entries.get(key)
+        if verdict is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return verdict
+
+    def put(self, sha, path, verdict):
+        """Cache the classification of a blob.
+
+        Args:
+            sha (str): Blob SHA
+            path (str): Blob path
+            verdict (dict): Classification
+        """
+        key = (sha, path)
+        self._entries[key] = verdict
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Get the cache statistics."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,263 @@
+"""
+Module caching the parsed metadata of commits
+
+Commits are immutable, so the entries keyed by commit SHA never expire; they
+are only evicted from memory when the cache is full.
+"""
+import collections
+import dbm
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado
+import tornado.ioloop
+
+from .repository import find_common_dir, find_git_dir
+
+# Default maximal number of entries kept in memory
+COMMIT_CACHE_MAX_ENTRIES = 10000
+# Name of the on-disk store, in the repository git folder
+COMMIT_STORE_NAME = "jupyterlab-dvc-commits"
+
+
+class CommitCache:
+    """Least recently used cache of commit metadata.
+
+    Entries are keyed by (kind, sha); the kind distinguishes the data cached
+    for a commit (e.g. its log entry and its numstat). The cache may be
+    spilled to a store in the git folder of each repository, to survive
+    server restarts.
+
+    The stores are only accessed on a thread of their own, never on the event
+    loop. New entries are written in batches, after the request that put them.
+    """
+
+    def __init__(self, max_entries=COMMIT_CACHE_MAX_ENTRIES, on_disk=False):
+        """
+        Args:
+            max_entries (int): Maximal number of entries kept in memory
+            on_disk (bool): Whether to keep the entries in a store on disk
+        """
+        self.max_entries = max_entries
+        self.on_disk = on_disk
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        # Repository top-level folder -> on-disk store or None if not available
+        self._stores = {}
+        # Repository top-level folder -> store key -> encoded entry not written yet
+        self._pending = {}
+        self._flush_scheduled = False
+        # Last batch submitted to the store thread; the batches are written in order
+        self._last_write = None
+        self._executor = None
+
+    async def get(self, top_repo_path, kind, sha):
+        """Get a cached entry.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+            kind (str): Kind of entry
+            sha (str): Commit SHA
+        Returns:
+            Optional[Any]: The entry or None if not cached
+        """
+        values = await self.get_many(top_repo_path, kind, [sha])
+        return values[sha]
+
+    async def get_many(self, top_repo_path, kind, shas):
+        """Get cached entries; the store is read once for all the missing ones.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+            kind (str): Kind of entry
+            shas (List[str]): Commit SHAs
+        Returns:
+            Dict[str, Optional[Any]]: The entries by SHA; None if not cached
+        """
+        values = {}
+        for sha in shas:
+            key = (kind, sha)
+            values[sha] = self._entries.get(key)
+            if values[sha] is not None:
+                self._entries.move_to_end(key)
+
+        missing = [sha for sha, value in values.items() if value is None]
+        if missing and self.on_disk and top_repo_path is not None:
+            pending = self._pending.get(top_repo_path, {})
+            raws = await tornado.ioloop.IOLoop.current().run_in_executor(
+                self._store_executor,
+                self._read,
+                top_repo_path,
+                [store_key(kind, sha) for sha in missing],
+            )
+            for sha, raw in zip(missing, raws):
+                raw = pending.get(store_key(kind, sha), raw)
+                if raw is not None:
+                    values[sha] = json.loads(raw.decode("utf-8"))
+                    self._remember((kind, sha), values[sha])
+
+        for value in values.values():
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return values
+
+    def put(self, top_repo_path, kind, sha, value):
+        """Cache an entry.
+
+        The entry is written to the store later, with the other new entries.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+            kind (str): Kind of entry
+            sha (str): Commit SHA
+            value (Any): JSON serializable entry
+        """
+        self._remember((kind, sha), value)
+        if self.on_disk and top_repo_path is not None:
+            self._pending.setdefault(top_repo_path, {})[
+                store_key(kind, sha)
+            ] = json.dumps(value).encode("utf-8")
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                tornado.ioloop.IOLoop.current().add_callback(self.flush)
+
+    async def flush(self):
+        """Write the new entries to the stores.
+
+        It returns once the entries taken by a flush in progress are written too.
+        """
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        if pending:
+            self._last_write = tornado.ioloop.IOLoop.current().run_in_executor(
+                self._store_executor, self._write, pending
+            )
+        if self._last_write is not None:
+            await self._last_write
+
+    def stats(self):
+        """Get the cache statistics."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "on_disk": self.on_disk,
+        }
+
+    def close(self):
+        """Write the new entries and close the on-disk stores."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._last_write = None
+        pending, self._pending = self._pending, {}
+        self._write(pending)
+        for store in self._stores.values():
+            if store is not None:
+                store.close()
+        self._stores.clear()
+
+    @property
+    def _store_executor(self):
+        # A single thread; the stores are not thread-safe
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="jupyterlab-dvc-commits"
+            )
+        return self._executor
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read(self, top_repo_path, keys):
+        store = self._store(top_repo_path)
+        if store is None:
+            return [None] * len(keys)
+        return [store.get(key) for key in keys]
+
+    def _write(self, pending):
+        for top_repo_path, entries in pending.items():
+            store = self._store(top_repo_path)
+            if store is not None:
+                for key, raw in entries.items():
+                    store[key] = raw
+
+    def _store(self, top_repo_path):
+        if top_repo_path not in self._stores:
+            store = None
+            git_dir = find_git_dir(top_repo_path)
+            if git_dir is not None:
+                path = os.path.join(find_common_dir(git_dir), COMMIT_STORE_NAME)
+                try:
+                    store = dbm.open(path, "c")
+                except (OSError, dbm.error):
+                    store = None
+            self._stores[top_repo_path] = store
+        return self._stores[top_repo_path]
+
+
+def store_key(kind, sha):
+    """Get the key of an entry in the on-disk stores.
+
+    Args:
+        kind (str): Kind of entry
+        sha (str): Commit SHA
+    Returns:
+        str: The store key; e.g. "log:<sha>"
+    """
+    return "{}:{}".format(kind, sha)
+
+
+def relative_date(timestamp, now):
+    """Format a date relatively to now, like git --date=relative.
+
+    Args:
+        timestamp (int): Date as a Unix timestamp
+        now (int): Current Unix timestamp
+    Returns:
+        str: The relative date, e.g. "3 hours ago"
+    """
+
+    def plural(value, unit):
+        return "{} {}{}".format(value, unit, "" if value == 1 else "s")
+
+    if now < timestamp:
+        return "in the future"
+    diff = now - timestamp
+    if diff < 90:
+        return plural(diff, "second") + " ago"
+    # Turn it into minutes
+    diff = (diff + 30) // 60
+    if diff < 90:
+        return plural(diff, "minute") + " ago"
+    # Turn it into hours
+    diff = (diff + 30) // 60
+    if diff < 36:
+        return plural(diff, "hour") + " ago"
+    # We deal with number of days from here on
+    diff = (diff + 12) // 24
+    if diff < 14:
+        return plural(diff, "day") + " ago"
+    # Say weeks for the past 10 weeks or so
+    if diff < 70:
+        return plural((diff + 3) // 7, "week") + " ago"
+    # Say months for the past 12 months or so
+    if diff < 365:
+        return plural((diff + 15) // 30, "month") + " ago"
+    # Give years and months for 5 years or so
+    if diff < 1825:
+        total_months = (diff * 12 * 2 + 365) // (365 * 2)
+        years, months = divmod(total_months, 12)
+        if months:
+            return "{}, {} ago".format(plural(years, "year"), plural(months, "month"))
+        return plural(years, "year") + " ago"
+    # Otherwise, just years
+    return plural((diff + 183) // 365, "year") + " ago"
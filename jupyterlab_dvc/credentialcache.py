@@ -0,0 +1,125 @@
+"""
+Module caching the credentials of the remotes in memory
+
+The cache acts like git `credential-cache`: git stores the credentials which
+authenticated a remote operation and erases the rejected ones, through the
+credential helper protocol (see https://git-scm.com/docs/git-credential).
+Entries expire after a time to live and never leave the server memory.
+"""
+import collections
+import time
+
+# Default time in seconds during which credentials are kept; 0 disables the cache
+CREDENTIAL_CACHE_TTL_S = 900
+# Attributes identifying the remote of credentials
+KEY_ATTRIBUTES = ("protocol", "host", "path")
+
+
+def parse_attributes(content):
+    """Parse the attributes of a credential helper request.
+
+    Args:
+        content (str): "key=value" lines
+    Returns:
+        Dict[str, str]: Attributes
+    """
+    attributes = {}
+    for line in content.splitlines():
+        key, separator, value = line.partition("=")
+        if separator:
+            attributes[key] = value
+    return attributes
+
+
+def format_attributes(attributes):
+    """Format the attributes of a credential helper answer.
+
+    Args:
+        attributes (Dict[str, str]): Attributes
+    Returns:
+        str: "key=value" lines
+    """
+    return "".join("{}={}\n".format(key, value) for key, value in attributes.items())
+
+
+class CredentialCache:
+    """Cache of credentials, expiring after a time to live."""
+
+    def __init__(self, ttl=CREDENTIAL_CACHE_TTL_S):
+        """
+        Args:
+            ttl (float): Time in seconds during which credentials are kept
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # (protocol, host, path, username) -> (password, expiry); most recent last
+        self._entries = collections.OrderedDict()
+
+    def get(self, attributes):
+        """Get the credentials of a remote.
+
+        Args:
+            attributes (Dict[str, str]): Attributes of the remote; the
+                username is optional
+        Returns:
+            Optional[Dict[str, str]]: {"username", "password"} or None if not cached
+        """
+        self._expire()
+        remote = _remote(attributes)
+        username = attributes.get("username")
+        for key in reversed(self._entries):
+            if key[:-1] == remote and username in (None, key[-1]):
+                self.hits += 1
+                return {"username": key[-1], "password": self._entries[key][0]}
+        self.misses += 1
+        return None
+
+    def store(self, attributes):
+        """Store the credentials of a remote.
+
+        Args:
+            attributes (Dict[str, str]): Attributes of the remote, including
+                the username and the password
+        """
+        if self.ttl <= 0 or "username" not in attributes or "password" not in attributes:
+            return
+        key = _remote(attributes) + (attributes["username"],)
+        self._entries.pop(key, None)
+        self._entries[key] = (attributes["password"], time.monotonic() + self.ttl)
+
+    def erase(self, attributes):
+        """Erase the credentials of a remote.
+
+        Args:
+            attributes (Dict[str, str]): Attributes of the remote; without
+                username, the credentials of all users are erased
+        """
+        remote = _remote(attributes)
+        username = attributes.get("username")
+        for key in list(self._entries):
+            if key[:-1] == remote and username in (None, key[-1]):
+                del self._entries[key]
+
+    def clear(self):
+        """Forget all credentials."""
+        self._entries.clear()
+
+    def stats(self):
+        """Get the cache statistics."""
+        self._expire()
+        return {
+            "entries": len(self._entries),
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [key for key, (_, expiry) in self._entries.items() if expiry <= now]:
+            del self._entries[key]
+
+
+def _remote(attributes):
+    return tuple(attributes.get(name, "") for name in KEY_ATTRIBUTES)
@@ -1,15 +1,59 @@
 """
 Module for executing git commands, sending results back to the handlers
 """
+import asyncio
+import collections
 import os
 import re
 import subprocess
+import threading
+import time
+import weakref
 from urllib.parse import unquote
 
-import pexpect
 import tornado
 import tornado.locks
-import datetime
+
+from .askpass import AskPassServer, is_remote_command
+from .blob import read_blob, read_file, slice_bytes, slice_lines, working_file
+from .catfile import CatFileError, CatFilePool
+from .classification import (
+    CLASSIFICATION_ATTRIBUTES,
+    ClassificationCache,
+    classify,
+    parse_check_attr,
+)
+from .commitcache import COMMIT_CACHE_MAX_ENTRIES, CommitCache, relative_date
+from .credentialcache import CREDENTIAL_CACHE_TTL_S
+from .indexlock import IndexLockWaiter, needs_index
+from .pathspec import (
+    PATHSPEC_FROM_STDIN_VERSION,
+    PathspecBatcher,
+    parse_git_version,
+    pathspec_argv_commands,
+    pathspec_command,
+    pathspec_input,
+)
+from .progress import Operations, parse_progress
+from .refs import RefReader, UnsupportedRepository
+from .repository import (
+    FINGERPRINT_MAX_AGE_S,
+    IgnoredFolders,
+    RepositoryResolver,
+    compute_fingerprint,
+    find_repository,
+    ignore_signature,
+    read_index_header,
+)
+from .scheduler import (
+    BACKGROUND,
+    MAX_CONCURRENT_COMMANDS,
+    MAX_CONCURRENT_COMMANDS_PER_REPOSITORY,
+    MUTATION,
+    CommandScheduler,
+    scheduling_class,
+)
+from .singleflight import READ_RESULT_TTL_S, SingleFlight, single_flight
 
 
 # Git configuration options exposed through the REST API
@@ -18,14 +62,308 @@ ALLOWED_OPTIONS = ['user.name', 'user.email']
 # See https://git-scm.com/docs/git-config#_syntax for git var syntax
 CONFIG_PATTERN = re.compile(r"(?:^|\n)([\w\-\.]+)\=")
 DEFAULT_REMOTE_NAME = "origin"
+# Maximal number of commits returned by a batch detailed log of a range
+MAX_DETAILED_LOG_COMMITS = 500
+# Error of git commands executed outside of a repository
+NOT_A_REPOSITORY_MESSAGE = (
+    "fatal: not a git repository (or any of the parent directories): .git\n"
+)
+# Orders of the branches list
+BRANCH_SORT_KEYS = ("name", "committerdate")
+# Ways to filter the branches list by name
+BRANCH_MATCH_MODES = ("substring", "prefix")
+# Maximal number of branches of a page; larger limits are lowered to it
+MAX_BRANCH_PAGE_LIMIT = 1000
+# Commits of a git log continuation token
+LOG_TOKEN_PATTERN = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
 # How long to wait to be executed or finished your execution before timing out
 MAX_WAIT_FOR_EXECUTE_S = 20
-# Ensure on NFS or similar, that we give the .git/index.lock time to be removed
-MAX_WAIT_FOR_LOCK_S = 5
-# How often should we check for the lock above to be free? This comes up more on things like NFS
-CHECK_LOCK_INTERVAL_S = 0.1
 
-execution_lock = tornado.locks.Lock()
+# Number of unchanged lines shown around the changes of a diff
+DIFF_CONTEXT_LINES = 3
+# Diff algorithms supported by git diff
+DIFF_ALGORITHMS = ("myers", "minimal", "patience", "histogram")
+DEFAULT_DIFF_ALGORITHM = "histogram"
+# Header of a unified diff hunk
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Number of index entries above which the accelerated status is offered
+LARGE_REPOSITORY_FILES = 100000
+# Git options set by the accelerated status mode (core.fsmonitor only if supported)
+ACCELERATED_STATUS_OPTIONS = ("core.untrackedCache", "feature.manyFiles", "core.fsmonitor")
+# Configuration section recording the values replaced by the accelerated status
+# mode, restored when it is disabled
+ACCELERATED_STATUS_SECTION = "jupyterlab-dvc"
+# Marker of the repositories accelerated by the extension
+ACCELERATED_STATUS_MARKER = ACCELERATED_STATUS_SECTION + ".accelerated"
+# Index version replaced by the accelerated status mode
+PREVIOUS_INDEX_VERSION = ACCELERATED_STATUS_SECTION + ".previous-index-version"
+# How long to wait for the fsmonitor daemons to stop when closing
+FSMONITOR_STOP_TIMEOUT_S = 5
+# First git version with the builtin fsmonitor daemon
+FSMONITOR_DAEMON_VERSION = (2, 36)
+
+# Git sub-commands which never modify the repository; they are allowed to run concurrently
+READ_ONLY_COMMANDS = frozenset(
+    [
+        "cat-file",
+        "check-attr",
+        "check-ignore",
+        "describe",
+        "diff",
+        "for-each-ref",
+        "log",
+        "ls-files",
+        "rev-list",
+        "rev-parse",
+        "show",
+        "status",
+    ]
+)
+# Options of the symbolic-ref read form; it writes given a second argument
+SYMBOLIC_REF_READ_OPTIONS = frozenset(["-q", "--quiet", "--short", "--no-recurse"])
+
+
+class ReadWriteLock:
+    """Readers/writer lock for coroutines.
+
+    Any number of readers may hold the lock at the same time, while a writer
+    holds it exclusively. Waiting writers take precedence over new readers so
+    that a steady stream of reads cannot starve a mutation.
+    """
+
+    def __init__(self):
+        self._condition = tornado.locks.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def __repr__(self):
+        return "<{} readers={} writer={} waiting_writers={}>".format(
+            self.__class__.__name__,
+            self._readers,
+            self._writer,
+            self._waiting_writers,
+        )
+
+    @property
+    def locked(self):
+        """Whether the lock is held, either for reading or for writing."""
+        return self._writer or self._readers > 0
+
+    async def acquire_read(self, timeout=None):
+        """Acquire the lock for reading.
+
+        Args:
+            timeout (Optional[float]): Maximal waiting time in seconds
+        Raises:
+            tornado.util.TimeoutError: if the lock was not acquired in time
+        """
+        deadline = self._deadline(timeout)
+        while self._writer or self._waiting_writers:
+            if not await self._condition.wait(deadline):
+                raise tornado.util.TimeoutError()
+        self._readers += 1
+
+    async def acquire_write(self, timeout=None):
+        """Acquire the lock for writing.
+
+        Args:
+            timeout (Optional[float]): Maximal waiting time in seconds
+        Raises:
+            tornado.util.TimeoutError: if the lock was not acquired in time
+        """
+        deadline = self._deadline(timeout)
+        self._waiting_writers += 1
+        try:
+            while self._writer or self._readers:
+                if not await self._condition.wait(deadline):
+                    raise tornado.util.TimeoutError()
+        finally:
+            self._waiting_writers -= 1
+            # Readers blocked only by this writer may proceed if it gave up
+            self._condition.notify_all()
+        self._writer = True
+
+    def release_read(self):
+        """Release a read acquisition."""
+        if self._readers <= 0:
+            raise RuntimeError("release_read called on an unlocked ReadWriteLock")
+        self._readers -= 1
+        if self._readers == 0:
+            self._condition.notify_all()
+
+    def release_write(self):
+        """Release the write acquisition."""
+        if not self._writer:
+            raise RuntimeError("release_write called on an unlocked ReadWriteLock")
+        self._writer = False
+        self._condition.notify_all()
+
+    @staticmethod
+    def _deadline(timeout):
+        if timeout is None:
+            return None
+        return tornado.ioloop.IOLoop.current().time() + timeout
+
+
+# Locks of the repositories currently in use, keyed by repository top-level
+# The entries vanish as soon as no coroutine is holding or waiting for them
+_repository_locks = weakref.WeakValueDictionary()
+# Scheduler of the git commands of all repositories
+command_scheduler = CommandScheduler()
+# Waiter for the index lock of the repositories, held by external git processes
+index_lock_waiter = IndexLockWaiter()
+# Server answering the credential prompts of the authenticated commands
+askpass_server = AskPassServer()
+# Ignored folders of the repositories, skipped when inspecting the working trees
+ignored_folders = IgnoredFolders()
+
+
+def repository_key(cwd):
+    """Get the key identifying the repository in which cwd lies.
+
+    Folders outside of any repository (e.g. the target of a clone) are
+    their own key.
+
+    Args:
+        cwd (str): Working directory of a git command
+    Returns:
+        str: The repository top-level folder or the real path of cwd
+    """
+    return find_repository(cwd) or os.path.realpath(cwd)
+
+
+def repository_lock(cwd):
+    """Get the lock guarding the repository in which cwd lies.
+
+    Folders outside of any repository (e.g. the target of a clone) are
+    locked on their own.
+
+    Args:
+        cwd (str): Working directory of a git command
+    Returns:
+        ReadWriteLock: The repository lock
+    """
+    key = repository_key(cwd)
+    lock = _repository_locks.get(key)
+    if lock is None:
+        lock = ReadWriteLock()
+        _repository_locks[key] = lock
+    return lock
+
+
+def is_natural(value):
+    """Whether a JSON value is a non-negative integer.
+
+    Args:
+        value (Any): Value to check
+    Returns:
+        bool: True for non-negative integers, booleans excluded
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def is_read_only(cmdline):
+    """Whether a command line only reads the repository.
+
+    Args:
+        cmdline (List[str]): Command line to be executed
+    Returns:
+        bool: True for git read-only commands
+    """
+    if len(cmdline) < 2 or os.path.basename(cmdline[0]) != "git":
+        return False
+    subcommand, arguments = cmdline[1], cmdline[2:]
+    if subcommand == "config":
+        return arguments in (["--list"], ["-l"]) or any(
+            argument in ("--get", "--get-all", "--get-regexp") for argument in arguments
+        )
+    if subcommand == "branch":
+        return arguments in ([], ["-a"], ["--list"])
+    if subcommand == "fsmonitor--daemon":
+        return arguments == ["status"]
+    if subcommand == "symbolic-ref":
+        names = [argument for argument in arguments if not argument.startswith("-")]
+        options = [argument for argument in arguments if argument.startswith("-")]
+        return len(names) == 1 and all(
+            option in SYMBOLIC_REF_READ_OPTIONS for option in options
+        )
+    return subcommand in READ_ONLY_COMMANDS
+
+
+def previous_option_key(option):
+    """Get the configuration key recording the value replaced by the accelerated status.
+
+    Args:
+        option (str): One of ACCELERATED_STATUS_OPTIONS
+    Returns:
+        str: The key in the ACCELERATED_STATUS_SECTION; e.g.
+            "jupyterlab-dvc.previous-core-untrackedcache"
+    """
+    return "{}.previous-{}".format(
+        ACCELERATED_STATUS_SECTION, option.replace(".", "-").lower()
+    )
+
+
+def restore_options_commands(options, index_version):
+    """Get the commands restoring the options replaced by the accelerated status.
+
+    Args:
+        options (Dict[str, Optional[str]]): Value of the ACCELERATED_STATUS_OPTIONS;
+            None if unset
+        index_version (Optional[str]): Index version to restore; None to keep it
+    Returns:
+        List[List[str]]: The commands
+    """
+    commands = [
+        ["git", "config", option, value]
+        if value is not None
+        else ["git", "config", "--unset", option]
+        for option, value in options.items()
+    ]
+    if options["core.untrackedCache"] != "true":
+        commands.append(["git", "update-index", "--no-untracked-cache"])
+    if index_version is not None:
+        commands.append(["git", "update-index", "--index-version", index_version])
+    return commands
+
+
+async def list_ignored_folders(top_repo_path):
+    """Get the ignored folders of a working tree.
+
+    They are listed by git once and cached until the ignore_signature of the
+    repository changes.
+
+    Args:
+        top_repo_path (str): Repository top-level folder
+    Returns:
+        FrozenSet[str]: Ignored folders relative to top_repo_path, "/" separated;
+            empty if they cannot be listed
+    """
+    signature = ignore_signature(top_repo_path)
+    if signature is None:
+        return frozenset()
+    folders = ignored_folders.get(top_repo_path, signature)
+    if folders is None:
+        cmd = [
+            "git",
+            "ls-files",
+            "--others",
+            "--ignored",
+            "--exclude-standard",
+            "--directory",
+            "-z",
+        ]
+        code, output, _ = await execute(cmd, cwd=top_repo_path)
+        if code != 0:
+            return frozenset()
+        folders = frozenset(
+            path[:-1] for path in output.split("\0") if path.endswith("/")
+        )
+        ignored_folders.put(top_repo_path, signature, folders)
+    return folders
+
 
 async def execute(
     cmdline: "List[str]",
@@ -33,6 +371,8 @@ async def execute(
     env: "Optional[Dict[str, str]]" = None,
     username: "Optional[str]" = None,
     password: "Optional[str]" = None,
+    progress: "Optional[Operation]" = None,
+    input: "Optional[bytes]" = None,
 ) -> "Tuple[int, str, str]":
     """Asynchronously execute a command.
 
@@ -40,92 +380,150 @@ async def execute(
         cmdline (List[str]): Command line to be executed
         cwd (Optional[str]): Current working directory
         env (Optional[Dict[str, str]]): Defines the environment variables for the new process
-        username (Optional[str]): User name
-        password (Optional[str]): User password
+        username (Optional[str]): User name answered to git prompts
+        password (Optional[str]): User password answered to git prompts
+        progress (Optional[Operation]): Operation to which the progress lines
+            printed on stderr are reported as they come; it may kill the process.
+            The progress lines are not part of the returned stderr.
+        input (Optional[bytes]): Data sent to the command standard input; not
+            supported with progress
     Returns:
         (int, str, str): (return code, stdout, stderr)
     """
 
-    async def call_subprocess_with_authentication(
+    def call_subprocess(
         cmdline: "List[str]",
-        username: "str",
-        password: "str",
         cwd: "Optional[str]" = None,
         env: "Optional[Dict[str, str]]" = None,
     ) -> "Tuple[int, str, str]":
-        try:
-            p = pexpect.spawn(
-                cmdline[0], cmdline[1:], cwd=cwd, env=env, encoding="utf-8", timeout=None
-            )
-
-            # We expect a prompt from git
-            # In most of cases git will prompt for username and
-            #  then for password
-            # In some cases (Bitbucket) username is included in
-            #  remote URL, so git will not ask for username
-            i = await p.expect(["Username for .*: ", "Password for .*:"], async_=True)
-            if i == 0:  # ask for username then password
-                p.sendline(username)
-                await p.expect("Password for .*:", async_=True)
-                p.sendline(password)
-            elif i == 1:  # only ask for password
-                p.sendline(password)
-
-            await p.expect(pexpect.EOF, async_=True)
-            response = p.before
-
-            returncode = p.wait()
-            p.close()
-            return returncode, "", response
-        except pexpect.exceptions.EOF:  # In case of pexpect failure
-            response = p.before
-            returncode = p.exitstatus
-            p.close()  # close process
-            return returncode, "", response
+        kwargs = {} if input is None else {"stdin": subprocess.PIPE}
+        process = subprocess.Popen(
+            cmdline,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            **kwargs
+        )
+        output, error = process.communicate(input)
+        return (process.returncode, output.decode("utf-8"), error.decode("utf-8"))
 
-    def call_subprocess(
+    def call_subprocess_with_progress(
         cmdline: "List[str]",
+        loop: "tornado.ioloop.IOLoop",
         cwd: "Optional[str]" = None,
         env: "Optional[Dict[str, str]]" = None,
     ) -> "Tuple[int, str, str]":
         process = subprocess.Popen(
             cmdline, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd, env=env
         )
-        output, error = process.communicate()
-        return (process.returncode, output.decode("utf-8"), error.decode("utf-8"))
-
-    try:
-        await execution_lock.acquire(timeout=datetime.timedelta(seconds=MAX_WAIT_FOR_EXECUTE_S))
-    except  tornado.util.TimeoutError:
-        return (1, "", "Unable to get the lock on the directory")
-
-    try:
-        # Ensure our execution operation will succeed by first checking and waiting for the lock to be removed
-        time_slept = 0
-        lockfile = os.path.join(cwd, '.git', 'index.lock')
-        while os.path.exists(lockfile) and time_slept < MAX_WAIT_FOR_LOCK_S:
-            await tornado.gen.sleep(CHECK_LOCK_INTERVAL_S)
-            time_slept += CHECK_LOCK_INTERVAL_S
-
-        # If the lock still exists at this point, we will likely fail anyway, but let's try anyway
-
-        if username is not None and password is not None:
-            code, output, error = await call_subprocess_with_authentication(
+        loop.add_callback(progress.attach, process.kill)
+
+        # Read stdout aside so that the process never blocks on a full pipe
+        output = []
+        reader = threading.Thread(target=lambda: output.append(process.stdout.read()))
+        reader.start()
+
+        # Progress lines are terminated by \r while they are updated
+        errors = []
+        pending = b""
+        while True:
+            chunk = os.read(process.stderr.fileno(), 4096)
+            lines = re.split(b"[\r\n]", pending + chunk)
+            pending = lines.pop() if chunk else b""
+            for line in lines:
+                line = line.decode("utf-8", "replace")
+                update = parse_progress(line)
+                if update is not None:
+                    loop.add_callback(progress.report, update)
+                elif line:
+                    errors.append(line)
+            if not chunk:
+                break
+
+        reader.join()
+        process.stderr.close()
+        process.wait()
+        return (process.returncode, output[0].decode("utf-8"), "\n".join(errors))
+
+    async def run_subprocess(
+        env: "Optional[Dict[str, str]]",
+    ) -> "Tuple[int, str, str]":
+        current_loop = tornado.ioloop.IOLoop.current()
+        if progress is not None:
+            return await current_loop.run_in_executor(
+                command_scheduler.executor,
+                call_subprocess_with_progress,
                 cmdline,
-                username,
-                password,
+                current_loop,
                 cwd,
                 env,
             )
         else:
-            current_loop = tornado.ioloop.IOLoop.current()
-            code, output, error = await current_loop.run_in_executor(
-                None, call_subprocess, cmdline, cwd, env
+            return await current_loop.run_in_executor(
+                command_scheduler.executor, call_subprocess, cmdline, cwd, env
             )
-    finally:
-        execution_lock.release()
 
-    return code, output, error
+    async def run_command(
+        priority: "str", started: "Optional[Callable[[], None]]" = None
+    ) -> "Tuple[int, str, str]":
+        if needs_index(cmdline):
+            # Wait for an external git process to release the index before
+            # queueing; if it is still locked, the command will likely fail
+            # but let's try anyway
+            await index_lock_waiter.wait(repository_key(cwd))
+
+        lock = repository_lock(cwd)
+        try:
+            if read_only:
+                await lock.acquire_read(timeout=MAX_WAIT_FOR_EXECUTE_S)
+            else:
+                await lock.acquire_write(timeout=MAX_WAIT_FOR_EXECUTE_S)
+        except tornado.util.TimeoutError:
+            return (1, "", "Unable to get the lock on the directory")
+
+        try:
+            async with command_scheduler.slot(repository_key(cwd), priority):
+                if started is not None:
+                    started()
+                authenticated = username is not None and password is not None
+                if authenticated or is_remote_command(cmdline):
+                    # Credential requests are answered by the askpass server,
+                    # from the given or cached credentials
+                    async with askpass_server.credentials(
+                        env, username, password
+                    ) as command_env:
+                        return await run_subprocess(command_env)
+                else:
+                    return await run_subprocess(env)
+        finally:
+            if read_only:
+                lock.release_read()
+            else:
+                lock.release_write()
+                command_scheduler.mutations += 1
+
+    read_only = is_read_only(cmdline)
+    # Mutations are executed before any waiting read
+    priority = scheduling_class.get() if read_only else MUTATION
+    if priority != BACKGROUND or username is not None or progress is not None:
+        return await run_command(priority)
+
+    # Identical background commands waiting to run share their result
+    key = (
+        repository_key(cwd),
+        tuple(cmdline),
+        None if env is None else tuple(sorted(env.items())),
+        input,
+    )
+    waiting = command_scheduler.waiting_command(key)
+    if waiting is not None:
+        return await asyncio.shield(waiting)
+    with command_scheduler.coalescing(key) as result:
+        result.set_result(
+            await run_command(priority, lambda: command_scheduler.started(key, result))
+        )
+        return result.result()
 
 
 def strip_and_split(s):
@@ -135,14 +533,177 @@ def strip_and_split(s):
     return s.strip("\x00").split("\x00")
 
 
+def parse_status(output):
+    """Parse the output of `git status --porcelain -z`.
+
+    Returns:
+        List[dict]: Files status {"x": str, "y": str, "to": str, "from": str}
+    """
+    result = []
+    line_iterable = (line for line in strip_and_split(output) if line)
+    for line in line_iterable:
+        result.append({
+            "x": line[0],
+            "y": line[1],
+            "to": line[3:],
+            # if file was renamed, next line contains original path
+            "from": next(line_iterable) if line[0]=='R' else line[3:]
+        })
+    return result
+
+
+def parse_numstat(line_iterable):
+    """Parse the entries of `git log --numstat -z` for one commit.
+
+    Args:
+        line_iterable (Iterator[str]): NUL separated numstat entries
+    Returns:
+        dict: Files changed by the commit and their number of insertions & deletions
+    """
+    total_insertions = 0
+    total_deletions = 0
+    result = []
+    for line in line_iterable:
+        insertions, deletions, file = line.split('\t')
+        insertions = insertions.replace('-', '0')
+        deletions = deletions.replace('-', '0')
+
+        if file == '':
+            # file was renamed or moved, we need next two lines of output
+            from_path = next(line_iterable)
+            to_path = next(line_iterable)
+            modified_file_name = from_path + " => " + to_path
+            modified_file_path = to_path
+        else:
+            modified_file_name = file.split("/")[-1]
+            modified_file_path = file
+
+        result.append({
+                    "modified_file_path": modified_file_path,
+                    "modified_file_name": modified_file_name,
+                    "insertion": insertions,
+                    "deletion": deletions,
+        })
+        total_insertions += int(insertions)
+        total_deletions += int(deletions)
+
+    modified_file_note = "{num_files} files changed, {insertions} insertions(+), {deletions} deletions(-)".format(
+        num_files=len(result),
+        insertions=total_insertions,
+        deletions=total_deletions)
+
+    return {
+        "code": 0,
+        "modified_file_note": modified_file_note,
+        "modified_files_count": str(len(result)),
+        "number_of_insertions": str(total_insertions),
+        "number_of_deletions": str(total_deletions),
+        "modified_files": result,
+    }
+
+
+def parse_hunks(output):
+    """Parse the hunks of the unified diff of a single file.
+
+    Args:
+        output (str): Output of git diff
+    Returns:
+        Optional[List[dict]]: The hunks or None if the file is binary
+    """
+    hunks = []
+    hunk = None
+    for line in output.splitlines():
+        match = HUNK_HEADER_PATTERN.match(line)
+        if match is not None:
+            prev_start, prev_lines, curr_start, curr_lines = match.groups()
+            hunk = {
+                "prev_start": int(prev_start),
+                "prev_lines": 1 if prev_lines is None else int(prev_lines),
+                "curr_start": int(curr_start),
+                "curr_lines": 1 if curr_lines is None else int(curr_lines),
+                "lines": [],
+            }
+            hunks.append(hunk)
+        elif hunk is None:
+            if line.startswith("Binary files ") or line == "GIT binary patch":
+                return None
+        elif line[:1] in (" ", "+", "-"):
+            hunk["lines"].append(line)
+        # Lines such as "\ No newline at end of file" are ignored
+    return hunks
+
+
 class Git:
     """
     A single parent class containing all of the individual git methods in it.
     """
 
-    def __init__(self, contents_manager):
+    def __init__(self, contents_manager, config=None):
         self.contents_manager = contents_manager
         self.root_dir = os.path.expanduser(contents_manager.root_dir)
+        self._cat_file = CatFilePool(
+            command_scheduler, repository_lock, attributes=CLASSIFICATION_ATTRIBUTES
+        )
+        self._commit_cache = CommitCache(
+            getattr(config, "commit_cache_size", COMMIT_CACHE_MAX_ENTRIES),
+            getattr(config, "commit_cache_on_disk", False),
+        )
+        self._classifications = ClassificationCache()
+        self._repositories = RepositoryResolver()
+        self._refs = RefReader()
+        self._pathspec_batcher = PathspecBatcher()
+        self._single_flight = SingleFlight(
+            lambda: command_scheduler.mutations,
+            getattr(config, "read_result_ttl", READ_RESULT_TTL_S),
+        )
+        askpass_server.configure(
+            getattr(config, "credential_cache_ttl", CREDENTIAL_CACHE_TTL_S)
+        )
+        command_scheduler.configure(
+            getattr(config, "max_concurrent_commands", MAX_CONCURRENT_COMMANDS),
+            getattr(
+                config,
+                "max_concurrent_commands_per_repository",
+                MAX_CONCURRENT_COMMANDS_PER_REPOSITORY,
+            ),
+        )
+        self.operations = Operations()
+        # Repositories whose fsmonitor daemon was started by the extension
+        self._fsmonitor_repositories = set()
+        # (major, minor) version of git, read once; None if unknown
+        self._git_version = None
+        self._fingerprint_max_age = getattr(
+            config, "status_fingerprint_max_age", FINGERPRINT_MAX_AGE_S
+        )
+
+    def close(self):
+        """Release the git processes held by the extension."""
+        self._cat_file.close()
+        self._commit_cache.close()
+        askpass_server.close()
+        # Stop the daemons started by the extension, within a common timeout
+        processes = []
+        for top_repo_path in self._fsmonitor_repositories:
+            try:
+                processes.append(
+                    subprocess.Popen(
+                        ["git", "fsmonitor--daemon", "stop"],
+                        cwd=top_repo_path,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                    )
+                )
+            except OSError:
+                # The repository vanished
+                pass
+        self._fsmonitor_repositories.clear()
+        deadline = time.monotonic() + FSMONITOR_STOP_TIMEOUT_S
+        for process in processes:
+            try:
+                process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
 
     async def config(self, top_repo_path, **kwargs):
         """Get or set Git options.
@@ -230,45 +791,110 @@ class Git:
 
         return response
 
-    async def clone(self, current_path, repo_url, auth=None):
+    async def clone(self, current_path, repo_url, auth=None, operation_id=None):
         """
         Execute `git clone`.
         When no auth is provided, disables prompts for the password to avoid the terminal hanging.
-        When auth is provided, await prompts for username/passwords and sends them
+        When auth is provided, the git prompts for username/password are answered with it.
         :param current_path: the directory where the clone will be performed.
         :param repo_url: the URL of the repository to be cloned.
         :param auth: OPTIONAL dictionary with 'username' and 'password' fields
+        :param operation_id: OPTIONAL identifier of the operation reporting the progress
         :return: response with status code and error message.
         """
         env = os.environ.copy()
-        if auth:
-            env["GIT_TERMINAL_PROMPT"] = "1"
-            code, _, error = await execute(
-                ["git", "clone", unquote(repo_url), "-q"],
-                username=auth["username"],
-                password=auth["password"],
-                cwd=os.path.join(self.root_dir, current_path),
-                env=env,
-            )
-        else:
-            env["GIT_TERMINAL_PROMPT"] = "0"
-            code, _, error = await execute(
-                ["git", "clone", unquote(repo_url)],
-                cwd=os.path.join(self.root_dir, current_path),
-                env=env,
-            )
+        with self.operations.run(operation_id) as operation:
+            kwargs = {} if operation is None else {"progress": operation}
+            if auth:
+                env["GIT_TERMINAL_PROMPT"] = "1"
+                code, _, error = await execute(
+                    ["git", "clone", unquote(repo_url), "-q"] + self._progress_flag(operation),
+                    username=auth["username"],
+                    password=auth["password"],
+                    cwd=os.path.join(self.root_dir, current_path),
+                    env=env,
+                    **kwargs
+                )
+            else:
+                env["GIT_TERMINAL_PROMPT"] = "0"
+                code, _, error = await execute(
+                    ["git", "clone", unquote(repo_url)] + self._progress_flag(operation),
+                    cwd=os.path.join(self.root_dir, current_path),
+                    env=env,
+                    **kwargs
+                )
+
+        return self._remote_response(code, error, operation)
+
+    def _progress_flag(self, operation):
+        """Arguments forcing git to report its progress if an operation is tracked."""
+        return [] if operation is None else ["--progress"]
 
+    def _remote_response(self, code, error, operation=None):
+        """Response of a command exchanging with a remote."""
         response = {"code": code}
 
-        if code != 0:
+        if operation is not None and operation.cancelled:
+            response["cancelled"] = True
+            response["message"] = "The operation was cancelled."
+        elif code != 0:
             response["message"] = error.strip()
 
         return response
 
-    async def status(self, current_path):
+    async def _if_modified(self, current_path, fingerprint, operation, variant=""):
+        """
+        Run operation unless the repository did not change since fingerprint.
+
+        Args:
+            current_path (str): Path inside the repository
+            fingerprint (str): Fingerprint returned by the previous call
+            operation (Callable[[], Awaitable[dict]]): Operation to run
+            variant (str): Operation parameters affecting its result
+        Returns:
+            dict: {"code": 0, "not_modified": True, "fingerprint": fingerprint} if
+                the repository is unchanged, otherwise the operation result with the
+                new fingerprint (None if the repository changed during the operation)
+        """
+        top_repo_path = find_repository(os.path.join(self.root_dir, current_path))
+        if top_repo_path is None:
+            return await operation()
+
+        ignored = await list_ignored_folders(top_repo_path)
+
+        async def current_fingerprint():
+            value = await tornado.ioloop.IOLoop.current().run_in_executor(
+                None,
+                compute_fingerprint,
+                top_repo_path,
+                ignored,
+                self._fingerprint_max_age,
+            )
+            return value if value is None else "{}-{}".format(value, variant)
+
+        before = await current_fingerprint()
+        if before is not None and before == fingerprint:
+            return {"code": 0, "not_modified": True, "fingerprint": before}
+
+        result = await operation()
+        if result["code"] == 0:
+            after = await current_fingerprint()
+            result["fingerprint"] = before if before == after else None
+        return result
+
+    @single_flight
+    async def status(self, current_path, fingerprint=None):
         """
         Execute git status command & return the result.
+
+        If a fingerprint is provided, the status is only computed if the
+        repository changed since that fingerprint was returned.
         """
+        if fingerprint is not None:
+            return await self._if_modified(
+                current_path, fingerprint, lambda: self.status(current_path)
+            )
+
         cmd = ["git", "status", "--porcelain", "-u", "-z"]
         code, my_output, my_error = await execute(
             cmd, cwd=os.path.join(self.root_dir, current_path),
@@ -281,116 +907,668 @@ class Git:
                 "message": my_error,
             }
 
-        result = []
-        line_iterable = (line for line in strip_and_split(my_output) if line)
-        for line in line_iterable:
-            result.append({
-                "x": line[0],
-                "y": line[1],
-                "to": line[3:],
-                # if file was renamed, next line contains original path
-                "from": next(line_iterable) if line[0]=='R' else line[3:]
-            })
-        return {"code": code, "files": result}
+        return {"code": code, "files": parse_status(my_output)}
 
-    async def log(self, current_path, history_count=10):
+    async def with_status(self, response, top_repo_path):
         """
-        Execute git log command & return the result.
+        Add the repository status to the response of a successful mutation.
+
+        The status comes with its fingerprint, like the status requested
+        with a fingerprint, so that the client needs no extra round trip.
+
+        Returns:
+            dict -- The response with the "status" entry on success
         """
+        if response["code"] == 0:
+            # No fingerprint matches an empty one; the status is computed
+            response["status"] = await self.status(top_repo_path, "")
+        return response
+
+    def metrics(self):
+        """Get the extension caches statistics."""
+        return {
+            "code": 0,
+            "commit_cache": self._commit_cache.stats(),
+            "classification_cache": self._classifications.stats(),
+            "repository_resolver": self._repositories.stats(),
+            "refs": self._refs.stats(),
+            "askpass": askpass_server.stats(),
+            "ignored_folders": ignored_folders.stats(),
+            "pathspec_batches": self._pathspec_batcher.stats(),
+            "scheduler": command_scheduler.stats(),
+            "single_flight": self._single_flight.stats(),
+        }
+
+    async def status_acceleration(self, current_path):
+        """
+        Get whether the accelerated status mode is advised and enabled.
+
+        The number of files is read from the index header; a repository with
+        more than LARGE_REPOSITORY_FILES files is large.
+
+        Returns:
+            dict -- {
+                "code": int,
+                "files": Optional[int], # Number of files in the index
+                "index_version": Optional[int],
+                "large": bool, # Whether the accelerated mode is advised
+                "fsmonitor": bool, # Whether the builtin fsmonitor daemon is supported
+                "options": Dict[str, Optional[str]], # Acceleration options value
+                "enabled": bool # Whether the accelerated mode is enabled
+            }
+        """
+        cwd = os.path.join(self.root_dir, current_path)
+        top_repo_path = find_repository(cwd)
+        if top_repo_path is None:
+            return {
+                "code": 128,
+                "message": "fatal: not a git repository: {}".format(cwd),
+            }
+
+        header = await tornado.ioloop.IOLoop.current().run_in_executor(
+            None, read_index_header, top_repo_path
+        )
+        index_version, n_files = header if header is not None else (None, None)
+
         cmd = [
             "git",
-            "log",
-            "--pretty=format:%H%n%an%n%ar%n%s",
-            ("-%d" % history_count),
+            "config",
+            "-z",
+            "--get-regexp",
+            "^({})$".format(
+                "|".join(re.escape(k.lower()) for k in ACCELERATED_STATUS_OPTIONS)
+            ),
+        ]
+        (code, output, error), fsmonitor = await tornado.gen.multi(
+            [
+                execute(cmd, cwd=top_repo_path),
+                self._fsmonitor_supported(top_repo_path),
+            ]
+        )
+        # Exit code 1 means no option is set
+        if code not in (0, 1):
+            return {"code": code, "command": " ".join(cmd), "message": error}
+
+        values = dict(
+            entry.split("\n", 1) for entry in strip_and_split(output) if entry
+        )
+        options = {k: values.get(k.lower()) for k in ACCELERATED_STATUS_OPTIONS}
+        expected = [k for k in ACCELERATED_STATUS_OPTIONS if k != "core.fsmonitor" or fsmonitor]
+        return {
+            "code": 0,
+            "files": n_files,
+            "index_version": index_version,
+            "large": n_files is not None and n_files > LARGE_REPOSITORY_FILES,
+            "fsmonitor": fsmonitor,
+            "options": options,
+            "enabled": all(options[k] == "true" for k in expected),
+        }
+
+    async def accelerate_status(self, current_path, enable=True):
+        """
+        Enable or disable the accelerated status mode of a repository.
+
+        The mode turns on the untracked cache, the index version 4 (through
+        feature.manyFiles) and the builtin fsmonitor daemon if it is
+        supported on this platform and git version. The daemons started here are stopped when
+        the extension is closed.
+
+        The option values and the index version replaced by the mode are
+        recorded in the ACCELERATED_STATUS_SECTION of the repository
+        configuration and restored when it is disabled, or when a step of
+        enabling it fails. The options of a repository not accelerated by the
+        extension are left alone.
+
+        The status duration is measured before and after the change; the
+        status is executed once before measuring to fill in the caches.
+
+        Returns:
+            dict -- status_acceleration result with the additional keys
+                "before_s" and "after_s" holding the status durations
+        """
+        cwd = os.path.join(self.root_dir, current_path)
+        top_repo_path = find_repository(cwd)
+        if top_repo_path is None:
+            return {
+                "code": 128,
+                "message": "fatal: not a git repository: {}".format(cwd),
+            }
+
+        before = await self._time_status(top_repo_path)
+        current = await self.status_acceleration(current_path)
+        if current["code"] != 0:
+            return current
+        fsmonitor = current["fsmonitor"]
+
+        cmd = [
+            "git",
+            "config",
+            "-z",
+            "--get-regexp",
+            "^{}\\.".format(ACCELERATED_STATUS_SECTION),
         ]
+        code, output, error = await execute(cmd, cwd=top_repo_path)
+        # Exit code 1 means no option is set
+        if code not in (0, 1):
+            return {"code": code, "command": " ".join(cmd), "message": error}
+        recorded = dict(
+            entry.split("\n", 1) for entry in strip_and_split(output) if entry
+        )
+        accelerated = recorded.get(ACCELERATED_STATUS_MARKER) == "true"
+        if accelerated:
+            previous = {
+                option: recorded.get(previous_option_key(option))
+                for option in ACCELERATED_STATUS_OPTIONS
+            }
+        else:
+            previous = current["options"]
+
+        if enable:
+            commands = []
+            if not accelerated:
+                commands += [
+                    ["git", "config", previous_option_key(option), value]
+                    for option, value in previous.items()
+                    if value is not None
+                ]
+                if current["index_version"] is not None:
+                    commands.append(
+                        [
+                            "git",
+                            "config",
+                            PREVIOUS_INDEX_VERSION,
+                            str(current["index_version"]),
+                        ]
+                    )
+                commands.append(["git", "config", ACCELERATED_STATUS_MARKER, "true"])
+            commands += [
+                ["git", "config", "core.untrackedCache", "true"],
+                ["git", "config", "feature.manyFiles", "true"],
+                ["git", "update-index", "--index-version", "4", "--untracked-cache"],
+            ]
+            if fsmonitor:
+                commands += [
+                    ["git", "config", "core.fsmonitor", "true"],
+                    ["git", "fsmonitor--daemon", "start"],
+                ]
+        elif accelerated:
+            commands = restore_options_commands(
+                previous, recorded.get(PREVIOUS_INDEX_VERSION)
+            )
+            if fsmonitor and previous["core.fsmonitor"] != "true":
+                commands.append(["git", "fsmonitor--daemon", "stop"])
+            commands.append(
+                ["git", "config", "--remove-section", ACCELERATED_STATUS_SECTION]
+            )
+        else:
+            # The options were not set by the extension
+            commands = []
+
+        for cmd in commands:
+            code, _, error = await execute(cmd, cwd=top_repo_path)
+            if code == 0:
+                continue
+            # Unsetting a missing option (5) or stopping a stopped daemon is fine
+            if cmd[1:3] == ["config", "--unset"] and code == 5:
+                continue
+            if cmd[1:3] == ["fsmonitor--daemon", "stop"]:
+                continue
+            if enable:
+                # Roll back to the configuration found, whatever step failed
+                index_version = current["index_version"]
+                rollback = restore_options_commands(
+                    current["options"],
+                    None if index_version is None else str(index_version),
+                )
+                if not accelerated:
+                    rollback.append(
+                        [
+                            "git",
+                            "config",
+                            "--remove-section",
+                            ACCELERATED_STATUS_SECTION,
+                        ]
+                    )
+                for rollback_cmd in rollback:
+                    await execute(rollback_cmd, cwd=top_repo_path)
+            return {"code": code, "command": " ".join(cmd), "message": error}
+
+        # Only the daemons started by the extension are stopped when closing
+        if fsmonitor and enable and previous["core.fsmonitor"] != "true":
+            self._fsmonitor_repositories.add(top_repo_path)
+        elif not enable:
+            self._fsmonitor_repositories.discard(top_repo_path)
+
+        after = await self._time_status(top_repo_path, warm_up=True)
+        result = await self.status_acceleration(current_path)
+        result.update({"before_s": before, "after_s": after})
+        return result
+
+    async def _fsmonitor_supported(self, top_repo_path):
+        """Whether the builtin fsmonitor daemon is supported for a repository.
+
+        Older git versions fail with 1 as well, fsmonitor--daemon being unknown.
+        """
+        if await self._get_git_version() < FSMONITOR_DAEMON_VERSION:
+            return False
+        code, _, error = await execute(
+            ["git", "fsmonitor--daemon", "status"], cwd=top_repo_path
+        )
+        # The status fails with 1 if the daemon is not running
+        return code == 0 or (code == 1 and "not supported" not in error)
+
+    async def _time_status(self, top_repo_path, warm_up=False):
+        """Measure the duration in seconds of git status."""
+        cmd = ["git", "status", "--porcelain", "-u", "-z"]
+        if warm_up:
+            await execute(cmd, cwd=top_repo_path)
+        start = time.monotonic()
+        await execute(cmd, cwd=top_repo_path)
+        return time.monotonic() - start
+
+    async def all_history(self, current_path, history_count=25, fingerprint=None):
+        """
+        Get the top level path, branches, log & status of the repository.
+
+        The independent git commands are executed concurrently. Branches are
+        built from a single 'git for-each-ref' and the branch headers of
+        'git status --porcelain=v2 --branch', which also provides the status.
+
+        If a fingerprint is provided, the result is only computed if the
+        repository changed since that fingerprint was returned.
+        """
+        if fingerprint is not None:
+            return await self._if_modified(
+                current_path,
+                fingerprint,
+                lambda: self.all_history(current_path, history_count),
+                variant=str(history_count),
+            )
+
+        show_top_level, refs, log, (status, head) = await tornado.gen.multi(
+            [
+                self.show_top_level(current_path),
+                self._for_each_ref(current_path),
+                self.log(current_path, history_count),
+                self._status_with_branch(current_path),
+            ]
+        )
+        if show_top_level["code"] != 0:
+            return show_top_level
+
+        if refs["code"] != 0:
+            branch = refs
+        elif head is None:
+            branch = {
+                "code": status["code"],
+                "command": status["command"],
+                "message": status["message"],
+            }
+        else:
+            try:
+                branch = await self._branch_from_refs(current_path, refs["refs"], head)
+            except Exception as downstream_error:
+                branch = {
+                    "code": -1,
+                    "command": refs["command"],
+                    "message": str(downstream_error),
+                }
+
+        return {
+            "code": show_top_level["code"],
+            "data": {
+                "show_top_level": show_top_level,
+                "branch": branch,
+                "log": log,
+                "status": status,
+            },
+        }
+
+    @single_flight
+    async def _status_with_branch(self, current_path):
+        """
+        Execute git status command with porcelain v2 format & return the
+        status as 'status' does and the branch headers.
+        """
+        cmd = ["git", "status", "--porcelain=v2", "--branch", "-u", "-z"]
         code, my_output, my_error = await execute(
             cmd, cwd=os.path.join(self.root_dir, current_path),
         )
+
         if code != 0:
-            return {"code": code, "command": " ".join(cmd), "message": my_error}
+            return (
+                {"code": code, "command": " ".join(cmd), "message": my_error},
+                None,
+            )
 
-        result = []
-        line_array = my_output.splitlines()
-        i = 0
-        PREVIOUS_COMMIT_OFFSET = 4
-        while i < len(line_array):
-            if i + PREVIOUS_COMMIT_OFFSET < len(line_array):
-                result.append(
+        files = []
+        head = {}
+        line_iterable = (line for line in strip_and_split(my_output) if line)
+        for line in line_iterable:
+            if line.startswith("# "):
+                key, _, value = line[2:].partition(" ")
+                head[key] = value
+            elif line[0] in "?!":
+                files.append(
+                    {"x": line[0], "y": line[0], "to": line[2:], "from": line[2:]}
+                )
+            else:
+                # Ordinary (1), renamed or copied (2) and unmerged (u) entries
+                # differ by the number of fields preceding the path
+                n_fields = {"1": 8, "2": 9, "u": 10}[line[0]]
+                fields = line.split(" ", n_fields)
+                x, y = (c if c != "." else " " for c in fields[1])
+                path = fields[n_fields]
+                files.append(
                     {
-                        "commit": line_array[i],
-                        "author": line_array[i + 1],
-                        "date": line_array[i + 2],
-                        "commit_msg": line_array[i + 3],
-                        "pre_commit": line_array[i + PREVIOUS_COMMIT_OFFSET],
+                        "x": x,
+                        "y": y,
+                        "to": path,
+                        # renamed or copied entries are followed by the original path
+                        "from": next(line_iterable) if line[0] == "2" else path,
                     }
                 )
+        return {"code": code, "files": files}, head
+
+    @single_flight
+    async def _for_each_ref(self, current_path):
+        """
+        Execute 'git for-each-ref' command on refs/heads and refs/remotes & return the result.
+        """
+        # Format reference: https://git-scm.com/docs/git-for-each-ref#_field_names
+        formats = ["refname", "refname:short", "objectname", "upstream:short", "HEAD"]
+        cmd = [
+            "git",
+            "for-each-ref",
+            "--format=" + "%09".join("%({})".format(f) for f in formats),
+            "refs/heads/",
+            "refs/remotes/",
+        ]
+
+        refs = self._list_refs(current_path, formats, cmd[3:])
+        if refs is None:
+            code, output, error = await execute(
+                cmd, cwd=os.path.join(self.root_dir, current_path)
+            )
+            if code != 0:
+                return {"code": code, "command": " ".join(cmd), "message": error}
+            refs = [line.split("\t") for line in output.splitlines()]
+
+        return {"code": 0, "command": " ".join(cmd), "refs": refs}
+
+    def _read_refs(self, current_path):
+        """
+        Read the references of the repository of current_path without git.
+
+        Returns:
+            Optional[Refs]: The references or None if only git can read them
+        """
+        resolved = self._repositories.resolve(os.path.join(self.root_dir, current_path))
+        if resolved is None or resolved[0] is None:
+            return None
+        return self._refs.read(resolved[0])
+
+    def _list_refs(self, current_path, fields, prefixes):
+        """
+        List the references as 'git for-each-ref' does, without git.
+
+        Returns:
+            Optional[List[List[str]]]: The fields of the references or None
+                if only git can list them
+        """
+        refs = self._read_refs(current_path)
+        if refs is None:
+            return None
+        try:
+            return refs.for_each_ref(fields, prefixes)
+        except UnsupportedRepository:
+            return None
+
+    async def _branch_from_refs(self, current_path, refs, head):
+        """
+        Build the 'branch' result from the references and the branch headers
+        of 'git status --porcelain=v2 --branch'.
+        """
+        heads = []
+        remotes = []
+        current_branch = None
+        for refname, name, commit_sha, upstream_name, is_current_branch in refs:
+            if refname.startswith("refs/heads/"):
+                branch = {
+                    "is_current_branch": bool(is_current_branch.strip()),
+                    "is_remote_branch": False,
+                    "name": name,
+                    "upstream": upstream_name if upstream_name else None,
+                    "top_commit": commit_sha,
+                    "tag": None,
+                }
+                heads.append(branch)
+                if branch["is_current_branch"]:
+                    current_branch = branch
             else:
-                result.append(
+                remotes.append(
                     {
-                        "commit": line_array[i],
-                        "author": line_array[i + 1],
-                        "date": line_array[i + 2],
-                        "commit_msg": line_array[i + 3],
-                        "pre_commit": "",
+                        "is_current_branch": False,
+                        "is_remote_branch": True,
+                        "name": name,
+                        "upstream": None,
+                        "top_commit": commit_sha,
+                        "tag": None,
                     }
                 )
-            i += PREVIOUS_COMMIT_OFFSET
-        return {"code": code, "commits": result}
+
+        # No current branch for an empty repository or a detached HEAD
+        if not current_branch:
+            current_name = head.get("branch.head")
+            if current_name == "(detached)":
+                current_name = await self._get_current_branch_detached(current_path)
+            current_branch = {
+                "is_current_branch": True,
+                "is_remote_branch": False,
+                "name": current_name,
+                "upstream": None,
+                "top_commit": None,
+                "tag": None,
+            }
+            heads.append(current_branch)
+
+        return {
+            "code": 0,
+            "branches": heads + remotes,
+            "current_branch": current_branch,
+        }
+
+    @single_flight
+    async def log(self, current_path, history_count=10, after=None):
+        """
+        Execute git log command & return the result.
+
+        The history is paginated: the result holds a continuation token
+        "next" (None on the last page) to pass as `after` to get the
+        following page. The token is the list of commits from which the
+        history walk resumes, so a page costs O(history_count) whatever its
+        position in the history.
+
+        Args:
+            current_path (str): Path inside the repository
+            history_count (int): Maximal number of commits to return
+            after (Optional[str]): Continuation token of the previous page
+        """
+        if after is None:
+            tips = []
+        else:
+            tips = after.split(",")
+            if not all(LOG_TOKEN_PATTERN.fullmatch(tip) for tip in tips):
+                return {
+                    "code": -1,
+                    "message": "Invalid continuation token: {}".format(after),
+                }
+
+        # Walk one more commit to know the previous commit of the last one
+        cmd = [
+            "git",
+            "log",
+            "--pretty=format:%H %P",
+            ("-%d" % (history_count + 1)),
+        ] + tips
+        cwd = os.path.join(self.root_dir, current_path)
+        code, my_output, my_error = await execute(cmd, cwd=cwd)
+        if code != 0:
+            return {"code": code, "command": " ".join(cmd), "message": my_error}
+
+        walk = [line.split() for line in my_output.splitlines() if line]
+        page = walk[:history_count]
+
+        # Only the commits never seen before are read from git
+        top_repo_path = find_repository(cwd)
+        metadata = await self._commit_cache.get_many(
+            top_repo_path, "log", [shas[0] for shas in page]
+        )
+        missing = [sha for sha, value in metadata.items() if value is None]
+        if missing:
+            cmd = [
+                "git",
+                "log",
+                "--no-walk=unsorted",
+                "-z",
+                "--pretty=format:%H%n%an%n%at%n%s",
+            ] + missing
+            code, my_output, my_error = await execute(cmd, cwd=cwd)
+            if code != 0:
+                return {"code": code, "command": " ".join(cmd), "message": my_error}
+            for record in strip_and_split(my_output):
+                sha, author, timestamp, subject = record.split("\n", 3)
+                value = {"author": author, "timestamp": int(timestamp), "commit_msg": subject}
+                self._commit_cache.put(top_repo_path, "log", sha, value)
+                metadata[sha] = value
+
+        now = int(time.time())
+        result = []
+        for index, shas in enumerate(page):
+            value = metadata[shas[0]]
+            result.append(
+                {
+                    "commit": shas[0],
+                    "author": value["author"],
+                    "date": relative_date(value["timestamp"], now),
+                    "commit_msg": value["commit_msg"],
+                    "pre_commit": walk[index + 1][0] if index + 1 < len(walk) else "",
+                }
+            )
+
+        next_token = None
+        if len(walk) > history_count:
+            # The walk resumes from the pending tips and from the parents
+            # of the returned commits that were not returned
+            shown = set(shas[0] for shas in page)
+            pending = dict.fromkeys(tips + [sha for shas in page for sha in shas[1:]])
+            next_token = ",".join(sha for sha in pending if sha not in shown) or None
+
+        return {"code": code, "commits": result, "next": next_token}
 
     async def detailed_log(self, selected_hash, current_path):
         """
         Execute git log -1 --numstat --oneline -z command (used to get
         insertions & deletions per file) & return the result.
         """
-        cmd = ["git", "log", "-1", "--numstat", "--oneline", "-z", selected_hash]
-        code, my_output, my_error = await execute(
-            cmd, cwd=os.path.join(self.root_dir, current_path),
-        )
+        cwd = os.path.join(self.root_dir, current_path)
+        # Only full SHAs are immutable; other revisions may move
+        top_repo_path = None
+        if LOG_TOKEN_PATTERN.fullmatch(selected_hash):
+            top_repo_path = find_repository(cwd)
+            cached = await self._commit_cache.get(
+                top_repo_path, "numstat", selected_hash
+            )
+            if cached is not None:
+                return cached
+
+        cmd = ["git", "log", "-1", "--numstat", "--oneline", "-z", selected_hash]
+        code, my_output, my_error = await execute(cmd, cwd=cwd)
 
         if code != 0:
             return {"code": code, "command": " ".join(cmd), "message": my_error}
 
-        total_insertions = 0
-        total_deletions = 0
-        result = []
-        line_iterable = iter(strip_and_split(my_output)[1:])
-        for line in line_iterable:
-            insertions, deletions, file = line.split('\t')
-            insertions = insertions.replace('-', '0')
-            deletions = deletions.replace('-', '0')
-
-            if file == '':
-                # file was renamed or moved, we need next two lines of output
-                from_path = next(line_iterable)
-                to_path = next(line_iterable)
-                modified_file_name = from_path + " => " + to_path
-                modified_file_path = to_path
-            else:
-                modified_file_name = file.split("/")[-1]
-                modified_file_path = file
-
-            result.append({
-                        "modified_file_path": modified_file_path,
-                        "modified_file_name": modified_file_name,
-                        "insertion": insertions,
-                        "deletion": deletions,
-            })
-            total_insertions += int(insertions)
-            total_deletions += int(deletions)
-
-        modified_file_note = "{num_files} files changed, {insertions} insertions(+), {deletions} deletions(-)".format(
-            num_files=len(result),
-            insertions=total_insertions,
-            deletions=total_deletions)
+        response = parse_numstat(iter(strip_and_split(my_output)[1:]))
+        if top_repo_path is not None:
+            self._commit_cache.put(top_repo_path, "numstat", selected_hash, response)
+        return response
 
-        return {
-            "code": code,
-            "modified_file_note": modified_file_note,
-            "modified_files_count": str(len(result)),
-            "number_of_insertions": str(total_insertions),
-            "number_of_deletions": str(total_deletions),
-            "modified_files": result,
-        }
+    async def detailed_logs(self, current_path, selected_hashes=None, revision_range=None):
+        """
+        Get the files changed by many commits with a single git log command.
+
+        The commits are either listed or given as a revision range (e.g.
+        "v1.0..HEAD"); a range yields at most MAX_DETAILED_LOG_COMMITS commits.
+        Commits already in the cache are not read again.
+
+        Returns:
+            dict -- {
+                "code": int,
+                "commits": [{"commit": sha, ...detailed_log result}]
+            }
+        """
+        revisions = list(dict.fromkeys(selected_hashes or []))
+        if revision_range is not None:
+            revisions.append(revision_range)
+        if any(not revision or revision.startswith("-") for revision in revisions):
+            return {
+                "code": -1,
+                "message": "Invalid revisions: {}".format(" ".join(revisions)),
+            }
+
+        cwd = os.path.join(self.root_dir, current_path)
+        top_repo_path = find_repository(cwd)
+        cached = {}
+        if revision_range is None:
+            values = await self._commit_cache.get_many(
+                top_repo_path,
+                "numstat",
+                [sha for sha in revisions if LOG_TOKEN_PATTERN.fullmatch(sha)],
+            )
+            cached = {sha: value for sha, value in values.items() if value is not None}
+        missing = [revision for revision in revisions if revision not in cached]
+
+        parsed = {}
+        order = []
+        if missing:
+            cmd = ["git", "log", "--numstat", "-z", "--format=%x01%H"]
+            if revision_range is None:
+                cmd.append("--no-walk=unsorted")
+            else:
+                cmd.append("-%d" % MAX_DETAILED_LOG_COMMITS)
+            cmd += missing
+            code, my_output, my_error = await execute(cmd, cwd=cwd)
+            if code != 0:
+                return {"code": code, "command": " ".join(cmd), "message": my_error}
+
+            # Each commit starts with \x01SHA, followed by its numstat entries
+            entries = None
+            for token in my_output.split("\x00") + ["\x01"]:
+                if token.startswith("\x01"):
+                    if entries is not None:
+                        sha = entries.pop(0)
+                        parsed[sha] = parse_numstat(iter(entries))
+                        self._commit_cache.put(top_repo_path, "numstat", sha, parsed[sha])
+                        order.append(sha)
+                    entries = [token[1:]]
+                elif entries is not None:
+                    token = token.lstrip("\n")
+                    if token:
+                        entries.append(token)
+
+        if revision_range is None:
+            # Abbreviated hashes are resolved in the order of the request
+            resolved = iter(order)
+            order = [
+                revision if revision in cached else next(resolved, None)
+                for revision in revisions
+            ]
+        commits = []
+        for sha in order:
+            value = cached.get(sha) or parsed.get(sha)
+            if value is not None:
+                commits.append(dict(value, commit=sha))
+        return {"code": 0, "commits": commits}
 
     async def diff(self, top_repo_path):
         """
@@ -415,10 +1593,53 @@ class Git:
             )
         return {"code": code, "result": result}
 
-    async def branch(self, current_path):
+    async def branch(
+        self,
+        current_path,
+        name_filter=None,
+        match="substring",
+        sort="name",
+        offset=0,
+        limit=None,
+    ):
         """
         Execute 'git for-each-ref' command & return the result.
+
+        Without filter, order nor pagination, all the branches are returned.
+        Otherwise the first page starts with the current branch and its
+        upstream, whatever the filter; the other branches matching the filter
+        are sorted and paginated.
+
+        Args:
+            current_path (str): Path in the repository
+            name_filter (Optional[str]): Text the branch names contain or start with
+            match (str): How names are matched; one of BRANCH_MATCH_MODES
+            sort (str): Order of the branches; one of BRANCH_SORT_KEYS. Branches
+                are sorted by name or by decreasing committer date.
+            offset (int): Number of matching branches to skip
+            limit (Optional[int]): Maximal number of matching branches to return
+        Returns:
+            dict: {
+                "code": int,
+                "branches": List[dict],
+                "current_branch": dict,
+                # Only if paginated
+                "total": int, # Number of matching branches; the current branch
+                              # and its upstream excluded
+                "next": Optional[int] # Offset of the next page
+            }
         """
+        if match not in BRANCH_MATCH_MODES:
+            raise tornado.web.HTTPError(
+                400, log_message="Unknown branch match mode '{}'.".format(match)
+            )
+        if sort not in BRANCH_SORT_KEYS:
+            raise tornado.web.HTTPError(
+                400, log_message="Unknown branch order '{}'.".format(sort)
+            )
+        if not is_natural(offset) or (limit is not None and not is_natural(limit)):
+            raise tornado.web.HTTPError(400, log_message="Invalid branch page.")
+
         heads = await self.branch_heads(current_path)
         if heads["code"] != 0:
             # error; bail
@@ -429,11 +1650,61 @@ class Git:
             # error; bail
             return remotes
 
-        # all's good; concatenate results and return
+        branches = heads["branches"] + remotes["branches"]
+        current_branch = heads["current_branch"]
+        if not name_filter and sort == "name" and offset == 0 and limit is None:
+            # all's good; concatenate results and return
+            return {
+                "code": 0,
+                "branches": branches,
+                "current_branch": current_branch,
+            }
+
+        if sort == "committerdate":
+            cmd = [
+                "git",
+                "for-each-ref",
+                "--sort=-committerdate",
+                "--format=%(refname:short)",
+                "refs/heads/",
+                "refs/remotes/",
+            ]
+            code, output, error = await execute(
+                cmd, cwd=os.path.join(self.root_dir, current_path)
+            )
+            if code != 0:
+                return {"code": code, "command": " ".join(cmd), "message": error}
+            ranks = {name: rank for rank, name in enumerate(output.splitlines())}
+            branches.sort(key=lambda branch: ranks.get(branch["name"], len(ranks)))
+
+        pinned = [current_branch]
+        upstream = current_branch.get("upstream")
+        pinned.extend(
+            branch
+            for branch in remotes["branches"]
+            if upstream is not None and branch["name"] == upstream
+        )
+
+        def matches(name):
+            if not name_filter:
+                return True
+            if match == "prefix":
+                return name.startswith(name_filter)
+            return name_filter in name
+
+        matching = [
+            branch
+            for branch in branches
+            if matches(branch["name"]) and not any(branch is other for other in pinned)
+        ]
+
+        end = len(matching) if limit is None else offset + limit
         return {
             "code": 0,
-            "branches": heads["branches"] + remotes["branches"],
-            "current_branch": heads["current_branch"],
+            "branches": (pinned if offset == 0 else []) + matching[offset:end],
+            "current_branch": current_branch,
+            "total": len(matching),
+            "next": end if end < len(matching) else None,
         }
 
     async def branch_heads(self, current_path):
@@ -449,18 +1720,20 @@ class Git:
             "refs/heads/",
         ]
 
-        code, output, error = await execute(
-            cmd, cwd=os.path.join(self.root_dir, current_path)
-        )
-        if code != 0:
-            return {"code": code, "command": " ".join(cmd), "message": error}
+        code = 0
+        refs = self._list_refs(current_path, formats, cmd[3:])
+        if refs is None:
+            code, output, error = await execute(
+                cmd, cwd=os.path.join(self.root_dir, current_path)
+            )
+            if code != 0:
+                return {"code": code, "command": " ".join(cmd), "message": error}
+            refs = (line.split("\t") for line in output.splitlines())
 
         current_branch = None
         results = []
         try:
-            for name, commit_sha, upstream_name, is_current_branch in (
-                line.split("\t") for line in output.splitlines()
-            ):
+            for name, commit_sha, upstream_name, is_current_branch in refs:
                 is_current_branch = bool(is_current_branch.strip())
 
                 branch = {
@@ -517,17 +1790,19 @@ class Git:
             "refs/remotes/",
         ]
 
-        code, output, error = await execute(
-            cmd, cwd=os.path.join(self.root_dir, current_path)
-        )
-        if code != 0:
-            return {"code": code, "command": " ".join(cmd), "message": error}
+        code = 0
+        refs = self._list_refs(current_path, formats, cmd[3:])
+        if refs is None:
+            code, output, error = await execute(
+                cmd, cwd=os.path.join(self.root_dir, current_path)
+            )
+            if code != 0:
+                return {"code": code, "command": " ".join(cmd), "message": error}
+            refs = (line.split("\t") for line in output.splitlines())
 
         results = []
         try:
-            for name, commit_sha in (
-                line.split("\t") for line in output.splitlines()
-            ):
+            for name, commit_sha in refs:
                 results.append(
                     {
                         "is_current_branch": False,
@@ -546,11 +1821,25 @@ class Git:
                 "message": str(downstream_error),
             }
 
+    @single_flight
     async def show_top_level(self, current_path):
         """
         Execute git --show-toplevel command & return the result.
+
+        The repository is resolved without git, unless the resolution is ambiguous.
         """
         cmd = ["git", "rev-parse", "--show-toplevel"]
+        resolved = self._repositories.resolve(os.path.join(self.root_dir, current_path))
+        if resolved is not None:
+            top_repo_path, _ = resolved
+            if top_repo_path is None:
+                return {
+                    "code": 128,
+                    "command": " ".join(cmd),
+                    "message": NOT_A_REPOSITORY_MESSAGE,
+                }
+            return {"code": 0, "top_repo_path": top_repo_path}
+
         code, my_output, my_error = await execute(
             cmd,
             cwd=os.path.join(self.root_dir, current_path),
@@ -564,11 +1853,25 @@ class Git:
                 "message": my_error,
             }
 
+    @single_flight
     async def show_prefix(self, current_path):
         """
         Execute git --show-prefix command & return the result.
+
+        The repository is resolved without git, unless the resolution is ambiguous.
         """
         cmd = ["git", "rev-parse", "--show-prefix"]
+        resolved = self._repositories.resolve(os.path.join(self.root_dir, current_path))
+        if resolved is not None:
+            top_repo_path, prefix = resolved
+            if top_repo_path is None:
+                return {
+                    "code": 128,
+                    "command": " ".join(cmd),
+                    "message": NOT_A_REPOSITORY_MESSAGE,
+                }
+            return {"code": 0, "under_repo_path": prefix}
+
         code, my_output, my_error = await execute(
             cmd,
             cwd=os.path.join(self.root_dir, current_path),
@@ -586,17 +1889,70 @@ class Git:
     async def add(self, filename, top_repo_path):
         """
         Execute git add<filename> command & return the result.
+
+        filename may be a list of files, of any length.
         """
-        if not isinstance(filename, str):
-            # assume filename is a sequence of str
-            cmd = ["git", "add"] + list(filename)
-        else:
-            cmd = ["git", "add", filename]
-        code, _, error = await execute(cmd, cwd=top_repo_path)
+        return await self._pathspec_command("add", filename, top_repo_path)
 
-        if code != 0:
-            return {"code": code, "command": " ".join(cmd), "message": error}
-        return {"code": code}
+    async def _get_git_version(self):
+        """Get the (major, minor) version of git; (0, 0) if unknown.
+
+        The git version is read once.
+        """
+        if self._git_version is None:
+            code, output, _ = await execute(["git", "--version"], cwd=self.root_dir)
+            self._git_version = (code == 0 and parse_git_version(output)) or (0, 0)
+        return self._git_version
+
+    async def _pathspec_from_stdin(self):
+        """Whether git reads the files of the index mutations on its standard input."""
+        return await self._get_git_version() >= PATHSPEC_FROM_STDIN_VERSION
+
+    async def _pathspec_command(self, operation, filename, top_repo_path):
+        """
+        Execute an index mutation over files.
+
+        The files are literal paths, not patterns. They are given as arguments
+        unless they exceed PATHSPEC_ARGV_MAX_BYTES; they are then given to git
+        on its standard input, or split in several commands if git does not
+        support it. The identical mutations of the same event loop iteration
+        run as a single command.
+
+        Args:
+            operation (str): "add", "checkout" or "reset"
+            filename (Union[str, List[str]]): File or files relative to top_repo_path
+            top_repo_path (str): Top Git repository path
+        Returns:
+            dict -- {"code": int, "command": Optional[str], "message": Optional[str]}
+        """
+        paths = [filename] if isinstance(filename, str) else list(filename)
+        if not paths:
+            return {"code": 0}
+
+        env = dict(os.environ, GIT_LITERAL_PATHSPECS="1")
+
+        async def run(paths):
+            commands = pathspec_argv_commands(operation, paths)
+            if len(commands) > 1 and await self._pathspec_from_stdin():
+                cmd = pathspec_command(operation)
+                code, _, error = await execute(
+                    cmd, cwd=top_repo_path, env=env, input=pathspec_input(paths),
+                )
+                if code != 0:
+                    return {"code": code, "command": " ".join(cmd), "message": error}
+                return {"code": code}
+
+            for cmd in commands:
+                code, _, error = await execute(cmd, cwd=top_repo_path, env=env)
+                if code != 0:
+                    return {
+                        "code": code,
+                        "command": " ".join(cmd[: cmd.index("--")]),
+                        "message": error,
+                    }
+            return {"code": 0}
+
+        return await self._pathspec_batcher.run((operation, top_repo_path), paths, run)
 
     async def add_all(self, top_repo_path):
         """
@@ -638,13 +1994,10 @@ class Git:
     async def reset(self, filename, top_repo_path):
         """
         Execute git reset <filename> command & return the result.
-        """
-        cmd = ["git", "reset", "--", filename]
-        code, _, error = await execute(cmd, cwd=top_repo_path)
 
-        if code != 0:
-            return {"code": code, "command": " ".join(cmd), "message": error}
-        return {"code": code}
+        filename may be a list of files, of any length.
+        """
+        return await self._pathspec_command("reset", filename, top_repo_path)
 
     async def reset_all(self, top_repo_path):
         """
@@ -739,13 +2092,10 @@ class Git:
     async def checkout(self, filename, top_repo_path):
         """
         Execute git checkout command for the filename & return the result.
-        """
-        cmd = ["git", "checkout", "--", filename]
-        code, _, error = await execute(cmd, cwd=top_repo_path)
 
-        if code != 0:
-            return {"code": code, "command": " ".join(cmd), "message": error}
-        return {"code": code}
+        filename may be a list of files, of any length.
+        """
+        return await self._pathspec_command("checkout", filename, top_repo_path)
 
     async def checkout_all(self, top_repo_path):
         """
@@ -769,28 +2119,36 @@ class Git:
             return {"code": code, "command": " ".join(cmd), "message": error}
         return {"code": code}
 
-    async def pull(self, curr_fb_path, auth=None, cancel_on_conflict=False):
+    async def pull(self, curr_fb_path, auth=None, cancel_on_conflict=False, operation_id=None):
         """
         Execute git pull --no-commit.  Disables prompts for the password to avoid the terminal hanging while waiting
         for auth.
         """
         env = os.environ.copy()
-        if auth:
-            env["GIT_TERMINAL_PROMPT"] = "1"
-            code, output, error = await execute(
-                ["git", "pull", "--no-commit"],
-                username=auth["username"],
-                password=auth["password"],
-                cwd=os.path.join(self.root_dir, curr_fb_path),
-                env=env,
-            )
-        else:
-            env["GIT_TERMINAL_PROMPT"] = "0"
-            code, output, error = await execute(
-                ["git", "pull", "--no-commit"],
-                env=env,
-                cwd=os.path.join(self.root_dir, curr_fb_path),
-            )
+        with self.operations.run(operation_id) as operation:
+            kwargs = {} if operation is None else {"progress": operation}
+            cmd = ["git", "pull", "--no-commit"] + self._progress_flag(operation)
+            if auth:
+                env["GIT_TERMINAL_PROMPT"] = "1"
+                code, output, error = await execute(
+                    cmd,
+                    username=auth["username"],
+                    password=auth["password"],
+                    cwd=os.path.join(self.root_dir, curr_fb_path),
+                    env=env,
+                    **kwargs
+                )
+            else:
+                env["GIT_TERMINAL_PROMPT"] = "0"
+                code, output, error = await execute(
+                    cmd,
+                    env=env,
+                    cwd=os.path.join(self.root_dir, curr_fb_path),
+                    **kwargs
+                )
+
+        if operation is not None and operation.cancelled:
+            return self._remote_response(code, error, operation)
 
         response = {"code": code}
 
@@ -813,34 +2171,34 @@ class Git:
 
         return response
 
-    async def push(self, remote, branch, curr_fb_path, auth=None):
+    async def push(self, remote, branch, curr_fb_path, auth=None, operation_id=None):
         """
         Execute `git push $UPSTREAM $BRANCH`. The choice of upstream and branch is up to the caller.
         """
         env = os.environ.copy()
-        if auth:
-            env["GIT_TERMINAL_PROMPT"] = "1"
-            code, _, error = await execute(
-                ["git", "push", remote, branch],
-                username=auth["username"],
-                password=auth["password"],
-                cwd=os.path.join(self.root_dir, curr_fb_path),
-                env=env,
-            )
-        else:
-            env["GIT_TERMINAL_PROMPT"] = "0"
-            code, _, error = await execute(
-                ["git", "push", remote, branch],
-                env=env,
-                cwd=os.path.join(self.root_dir, curr_fb_path),
-            )
-
-        response = {"code": code}
-
-        if code != 0:
-            response["message"] = error.strip()
+        with self.operations.run(operation_id) as operation:
+            kwargs = {} if operation is None else {"progress": operation}
+            cmd = ["git", "push"] + self._progress_flag(operation) + [remote, branch]
+            if auth:
+                env["GIT_TERMINAL_PROMPT"] = "1"
+                code, _, error = await execute(
+                    cmd,
+                    username=auth["username"],
+                    password=auth["password"],
+                    cwd=os.path.join(self.root_dir, curr_fb_path),
+                    env=env,
+                    **kwargs
+                )
+            else:
+                env["GIT_TERMINAL_PROMPT"] = "0"
+                code, _, error = await execute(
+                    cmd,
+                    env=env,
+                    cwd=os.path.join(self.root_dir, curr_fb_path),
+                    **kwargs
+                )
 
-        return response
+        return self._remote_response(code, error, operation)
 
     async def init(self, current_path):
         """
@@ -866,7 +2224,13 @@ class Git:
         failure, assume that the HEAD is currently detached, and fall back
         to the `branch` command to get the name.
         See https://git-blame.blogspot.com/2013/06/checking-current-branch-programatically.html
+
+        HEAD is read without git if possible.
         """
+        refs = self._read_refs(current_path)
+        if refs is not None and refs.head is not None:
+            return refs.head.split("/")[-1]
+
         command = ["git", "symbolic-ref", "HEAD"]
         code, output, error = await execute(
             command, cwd=os.path.join(self.root_dir, current_path)
@@ -906,7 +2270,20 @@ class Git:
         """Execute 'git rev-parse --abbrev-ref branch_name@{upstream}' to get
         upstream branch name tracked by given local branch.
         Reference : https://git-scm.com/docs/git-rev-parse#git-rev-parse-emltbranchnamegtupstreamemegemmasterupstreamememuem
+
+        The configuration and the references are read without git if possible.
         """
+        refs = self._read_refs(current_path)
+        if refs is not None and "refs/heads/" + branch_name in refs.refs:
+            try:
+                upstream = refs.upstream(branch_name)
+            except UnsupportedRepository:
+                pass
+            else:
+                if upstream is None or upstream not in refs.refs:
+                    return None
+                return refs.shorten(upstream)
+
         command = [
             "git",
             "rev-parse",
@@ -952,6 +2329,33 @@ class Git:
             )
 
     async def show(self, filename, ref, top_repo_path):
+        """
+        Read the content of <ref:filename> & return it.
+
+        The blob is read through the persistent `git cat-file --batch` processes
+        of the repository; `git show` is used if they cannot serve it.
+        """
+        try:
+            blob = await self._cat_file.read(
+                top_repo_path, "{}:{}".format(ref, filename)
+            )
+        except CatFileError:
+            blob = False
+
+        if blob is None:
+            # Path not in ref
+            return ""
+        elif blob and blob[1] == "blob":
+            try:
+                return blob[3].decode("utf-8")
+            except UnicodeDecodeError:
+                raise tornado.web.HTTPError(
+                    log_message="Error occurred while executing command to retrieve plaintext diff as file is not UTF-8."
+                )
+
+        return await self._show_command(filename, ref, top_repo_path)
+
+    async def _show_command(self, filename, ref, top_repo_path):
         """
         Execute git show <ref:filename> command & return the result.
         """
@@ -994,32 +2398,260 @@ class Git:
         """
         Collect get content of prev and curr and return.
         """
-        is_binary = await self._is_binary(filename, prev_ref["git"], top_repo_path)
-        if is_binary:
+        prev_content = await self._ref_content(filename, prev_ref, top_repo_path)
+        curr_content = await self._ref_content(filename, curr_ref, top_repo_path)
+        return {"prev_content": prev_content, "curr_content": curr_content}
+
+    async def diff_hunks(
+        self,
+        filename,
+        prev_ref,
+        curr_ref,
+        top_repo_path,
+        context=DIFF_CONTEXT_LINES,
+        algorithm=DEFAULT_DIFF_ALGORITHM,
+    ):
+        """Compute the diff of a file between two versions.
+
+        Only the hunks are returned; the unchanged regions between them can be
+        fetched with `diff_lines`.
+
+        Args:
+            filename (str): File path relative to the repository
+            prev_ref (dict): Previous version {"git": ref}
+            curr_ref (dict): Current version {"git": ref} or {"special": "WORKING" | "INDEX"}
+            top_repo_path (str): Top Git repository path
+            context (int): Number of unchanged lines around the changes
+            algorithm (str): Diff algorithm; one of DIFF_ALGORITHMS
+        Returns:
+            dict: {
+                "hunks": [
+                    {
+                        "prev_start": int, # 1-based first line in previous version
+                        "prev_lines": int,
+                        "curr_start": int, # 1-based first line in current version
+                        "curr_lines": int,
+                        "lines": [str] # Lines prefixed by " ", "-" or "+"
+                    }
+                ]
+            }
+        """
+        if algorithm not in DIFF_ALGORITHMS:
+            raise tornado.web.HTTPError(
+                status_code=400,
+                log_message="Unknown diff algorithm '{}'.".format(algorithm),
+            )
+
+        command = [
+            "git",
+            "diff",
+            "--no-color",
+            "--no-ext-diff",
+            "--diff-algorithm={}".format(algorithm),
+            "-U{}".format(int(context)),
+        ]
+        special = curr_ref.get("special")
+        refs = [prev_ref["git"]] + ([curr_ref["git"]] if special is None else [])
+        # A reference starting with "-" would be taken as a git diff option
+        if any(not ref or ref.startswith("-") for ref in refs):
+            raise tornado.web.HTTPError(
+                status_code=400,
+                log_message="Invalid references: {}".format(" ".join(refs)),
+            )
+
+        if special is None:
+            command.extend([prev_ref["git"], curr_ref["git"]])
+        elif special == "WORKING":
+            command.append(prev_ref["git"])
+        elif special == "INDEX":
+            command.extend(["--cached", prev_ref["git"]])
+        else:
+            raise tornado.web.HTTPError(
+                log_message="Error while retrieving plaintext diff, unknown special ref '{}'.".format(special)
+            )
+        command.extend(["--", filename])
+
+        code, output, error = await execute(command, cwd=top_repo_path)
+        if code != 0:
+            raise tornado.web.HTTPError(
+                log_message="Error while computing the diff '{}'.".format(error)
+            )
+
+        hunks = parse_hunks(output)
+        if hunks is None:
+            raise tornado.web.HTTPError(log_message="Error occurred while executing command to retrieve plaintext diff as file is not UTF-8.")
+        return {"hunks": hunks}
+
+    async def diff_lines(self, filename, ref, top_repo_path, start=1, end=None):
+        """Get a range of lines of a file version.
+
+        The file is streamed and the reading stops at the last line of the range.
+
+        Args:
+            filename (str): File path relative to the repository
+            ref (dict): File version {"git": ref} or {"special": "WORKING" | "INDEX"}
+            top_repo_path (str): Top Git repository path
+            start (int): 1-based first line
+            end (Optional[int]): 1-based last line (included); None for the end of file
+        Returns:
+            dict: {
+                "lines": [str],
+                "total": int # Number of lines of the file; only if the range reaches its end
+            }
+        """
+        blob = await self.blob(filename, ref, top_repo_path)
+        if blob is None:
+            # Path not in ref
+            return {"lines": [], "total": 0}
+        _, _, read = blob
+
+        first = max(start, 1)
+        if end is not None and end < first:
+            return {"lines": []}
+        content = b"".join(
+            [chunk async for chunk in slice_lines(read(0, None), first, end)]
+        )
+        try:
+            lines = content.decode("utf-8").splitlines()
+        except UnicodeDecodeError:
             raise tornado.web.HTTPError(log_message="Error occurred while executing command to retrieve plaintext diff as file is not UTF-8.")
 
-        prev_content = await self.show(filename, prev_ref["git"], top_repo_path)
-        if "special" in curr_ref:
-            if curr_ref["special"] == "WORKING":
-                curr_content = self.get_content(filename, top_repo_path)
-            elif curr_ref["special"] == "INDEX":
-                is_binary = await self._is_binary(filename, "", top_repo_path)
-                if is_binary:
-                    raise tornado.web.HTTPError(log_message="Error occurred while executing command to retrieve plaintext diff as file is not UTF-8.")
+        response = {"lines": lines}
+        if lines and (end is None or len(lines) < end - first + 1):
+            # The end of file was reached
+            response["total"] = first - 1 + len(lines)
+        return response
+
+    async def blob(self, filename, ref, top_repo_path):
+        """Open a file version to stream its content.
+
+        Args:
+            filename (str): File path relative to the repository
+            ref (dict): File version {"git": ref} or {"special": "WORKING" | "INDEX"}
+            top_repo_path (str): Top Git repository path
+        Returns:
+            Optional[Tuple[int, Optional[str], Callable[[int, Optional[int]], AsyncIterator[bytes]]]]:
+                (size, sha, read) or None if the file does not exist. The blob
+                SHA is None for the working tree. read(start, end) streams the
+                bytes from start to end (excluded).
+        """
+        special = ref.get("special")
+        if special == "WORKING":
+            path = working_file(self.root_dir, top_repo_path, filename)
+            if path is None:
+                return None
+
+            def read(start=0, end=None):
+                return slice_bytes(
+                    read_file(path, start=start),
+                    0,
+                    None if end is None else end - start,
+                )
+
+            return os.path.getsize(path), None, read
+        elif special == "INDEX":
+            git_ref = ""
+        elif special is not None:
+            raise tornado.web.HTTPError(
+                400, log_message="Unknown special ref '{}'.".format(special)
+            )
+        else:
+            git_ref = ref["git"]
+
+        try:
+            info = await self._cat_file.info(
+                top_repo_path, "{}:{}".format(git_ref, filename)
+            )
+        except CatFileError as error:
+            raise tornado.web.HTTPError(
+                log_message="Error while reading blob '{}'.".format(error)
+            )
+        if info is None or info[1] != "blob":
+            return None
+
+        sha, _, size = info
+
+        def read(start=0, end=None):
+            return slice_bytes(read_blob(top_repo_path, sha), start, end)
 
-                curr_content = await self.show(filename, "", top_repo_path)
+        return size, sha, read
+
+    async def _ref_content(self, filename, ref, top_repo_path):
+        """
+        Get the content of a file version; raise an error if it is binary.
+        """
+        if "special" in ref:
+            if ref["special"] == "WORKING":
+                return self.get_content(filename, top_repo_path)
+            elif ref["special"] == "INDEX":
+                git_ref = ""
             else:
                 raise tornado.web.HTTPError(
-                    log_message="Error while retrieving plaintext diff, unknown special ref '{}'.".format(curr_ref["special"])
+                    log_message="Error while retrieving plaintext diff, unknown special ref '{}'.".format(ref["special"])
                 )
         else:
-            is_binary = await self._is_binary(filename, curr_ref["git"], top_repo_path)
+            git_ref = ref["git"]
+
+        try:
+            verdict, content = await self._classify(filename, git_ref, top_repo_path)
+        except CatFileError:
+            # Fall back on git commands
+            is_binary = await self._is_binary(filename, git_ref, top_repo_path)
             if is_binary:
                 raise tornado.web.HTTPError(log_message="Error occurred while executing command to retrieve plaintext diff as file is not UTF-8.")
+            return await self._show_command(filename, git_ref, top_repo_path)
 
-            curr_content = await self.show(filename, curr_ref["git"], top_repo_path)
+        if verdict is None:
+            # Path not in ref
+            return ""
+        if verdict["binary"] or verdict["encoding"] is None:
+            raise tornado.web.HTTPError(log_message="Error occurred while executing command to retrieve plaintext diff as file is not UTF-8.")
+        return content.decode(verdict["encoding"])
 
-        return {"prev_content": prev_content, "curr_content": curr_content}
+    async def _classify(self, filename, ref, top_repo_path):
+        """Classify a blob as binary or text and read it.
+
+        The verdict comes from the gitattributes of the path or from sniffing
+        the content; it is cached by blob SHA and path. The content of a blob
+        known to be binary is not read.
+
+        Args:
+            filename (str): File path relative to the repository
+            ref (str): Git reference; "" for the index
+            top_repo_path (str): Top Git repository path
+        Returns:
+            Tuple[Optional[dict], Optional[bytes]]: (verdict, content) - see
+                `classification.classify` for the verdict. (None, None) if the
+                path is not in ref; the content is None for binary blobs.
+        Raises:
+            CatFileError: if the blob cannot be read through cat-file
+        """
+        spec = "{}:{}".format(ref, filename)
+        info = await self._cat_file.info(top_repo_path, spec)
+        if info is None:
+            return None, None
+        sha, object_type, _ = info
+        if object_type != "blob":
+            raise CatFileError("'{}' is a {}".format(spec, object_type))
+
+        verdict = self._classifications.get(sha, filename)
+        if verdict is not None and verdict["binary"]:
+            return verdict, None
+
+        blob = await self._cat_file.read(top_repo_path, sha)
+        if blob is None:
+            raise CatFileError("Blob '{}' not found".format(sha))
+        content = blob[3]
+
+        if verdict is None:
+            try:
+                output = await self._cat_file.check_attr(top_repo_path, filename)
+            except CatFileError:
+                output = None
+            attributes = None if output is None else parse_check_attr(output)
+            verdict = classify(content, attributes)
+            self._classifications.put(sha, filename, verdict)
+        return verdict, content
 
     async def _is_binary(self, filename, ref, top_repo_path):
         """
@@ -1047,7 +2679,62 @@ class Git:
 
         return False
 
-    def remote_add(self, top_repo_path, url, name=DEFAULT_REMOTE_NAME):
+    async def remote_list(self, top_repo_path):
+        """List the remotes with their fetch and push URLs.
+
+        The URLs are the configured ones, read from the repository
+        configuration without git when possible.
+
+        Args:
+            top_repo_path (str): Top Git repository path
+        Returns:
+            dict -- {
+                "code": int,
+                "remotes": List[{
+                    "name": str,
+                    "url": str, # Fetch URL
+                    "push_urls": List[str]
+                }]
+            }
+        """
+        refs = self._read_refs(top_repo_path)
+        if refs is not None:
+            remotes = refs.remotes()
+        else:
+            cmd = [
+                "git",
+                "config",
+                "--local",
+                "-z",
+                "--get-regexp",
+                r"^remote\..*\.(url|pushurl)$",
+            ]
+            code, output, error = await execute(cmd, cwd=top_repo_path)
+            # Exit code 1 means that there is no remote
+            if code not in (0, 1):
+                return {"code": code, "command": " ".join(cmd), "message": error}
+            remotes = collections.OrderedDict()
+            for entry in strip_and_split(output):
+                key, _, value = entry.partition("\n")
+                if not key:
+                    continue
+                name, _, option = key[len("remote.") :].rpartition(".")
+                remotes.setdefault(name, {"url": [], "pushurl": []})[option].append(value)
+            remotes = [
+                (name, urls["url"], urls["pushurl"])
+                for name, urls in remotes.items()
+                if urls["url"]
+            ]
+
+        return {
+            "code": 0,
+            "remotes": [
+                {"name": name, "url": urls[0], "push_urls": push_urls or urls}
+                for name, urls, push_urls in remotes
+            ],
+        }
+
+    async def remote_add(self, top_repo_path, url, name=DEFAULT_REMOTE_NAME):
         """Handle call to `git remote add` command.
 
         top_repo_path: str
@@ -1057,17 +2744,72 @@ class Git:
         name: str
             Remote name; default "origin"
         """
-        cmd = ["git", "remote", "add", name, url]
-        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=top_repo_path)
-        _, my_error = p.communicate()
-        if p.returncode == 0:
-            return {
-                "code": p.returncode,
-                "command": " ".join(cmd)
-            }
-        else:
-            return {
-                "code": p.returncode,
-                "command": " ".join(cmd),
-                "message": my_error.decode("utf-8").strip()
-            }
+        return await self._remote_command(["git", "remote", "add", name, url], top_repo_path)
+
+    async def remote_remove(self, top_repo_path, name):
+        """Handle call to `git remote remove` command.
+
+        The remote-tracking branches and the configuration of the remote are removed.
+
+        top_repo_path: str
+            Top Git repository path
+        name: str
+            Remote name
+        """
+        return await self._remote_command(["git", "remote", "remove", name], top_repo_path)
+
+    async def remote_rename(self, top_repo_path, name, new_name):
+        """Handle call to `git remote rename` command.
+
+        top_repo_path: str
+            Top Git repository path
+        name: str
+            Remote name
+        new_name: str
+            New remote name
+        """
+        return await self._remote_command(
+            ["git", "remote", "rename", name, new_name], top_repo_path
+        )
+
+    async def remote_set_url(self, top_repo_path, name, url, push=False):
+        """Handle call to `git remote set-url` command.
+
+        top_repo_path: str
+            Top Git repository path
+        name: str
+            Remote name
+        url: str
+            New remote URL
+        push: bool
+            Whether to set the push URL instead of the fetch URL
+        """
+        cmd = ["git", "remote", "set-url"] + (["--push"] if push else []) + [name, url]
+        return await self._remote_command(cmd, top_repo_path)
+
+    async def remote_prune(self, top_repo_path, name, auth=None):
+        """Handle call to `git remote prune` command.
+
+        The remote-tracking branches whose branch was deleted on the remote are removed.
+
+        top_repo_path: str
+            Top Git repository path
+        name: str
+            Remote name
+        auth: dict
+            OPTIONAL dictionary with 'username' and 'password' fields
+        """
+        kwargs = {}
+        if auth:
+            kwargs = {"username": auth["username"], "password": auth["password"]}
+        return await self._remote_command(
+            ["git", "remote", "prune", name], top_repo_path, **kwargs
+        )
+
+    async def _remote_command(self, cmd, top_repo_path, **kwargs):
+        """Execute a `git remote` command."""
+        code, _, error = await execute(cmd, cwd=top_repo_path, **kwargs)
+        response = {"code": code, "command": " ".join(cmd)}
+        if code != 0:
+            response["message"] = error.strip()
+        return response
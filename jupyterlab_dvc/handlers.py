@@ -5,12 +5,21 @@ import json
 import os
 from pathlib import Path
 
-from notebook.base.handlers import APIHandler
+from notebook.base.handlers import APIHandler, IPythonHandler
+from notebook.base.zmqhandlers import WebSocketMixin
 from notebook.utils import url2path
 from notebook.utils import url_path_join as ujoin
-from tornado import web
+from tornado import iostream, web, websocket
 
-from .git import DEFAULT_REMOTE_NAME
+from .blob import RangeNotSatisfiable, parse_byte_range, parse_line_range, slice_lines
+from .git import (
+    DEFAULT_DIFF_ALGORITHM,
+    DEFAULT_REMOTE_NAME,
+    DIFF_CONTEXT_LINES,
+    MAX_BRANCH_PAGE_LIMIT,
+    is_natural,
+)
+from .scheduler import BACKGROUND, scheduled_as
 
 
 class GitHandler(APIHandler):
@@ -35,12 +44,16 @@ class GitCloneHandler(GitHandler):
               'repo_url': 'https://github.com/path/to/myrepo',
               OPTIONAL 'auth': '{ 'username': '<username>',
                                   'password': '<password>'
-                                }'
+                                }',
+              OPTIONAL 'operation_id': 'id-of-the-operation-reporting-the-progress'
             }
         """
         data = self.get_json_body()
         response = await self.git.clone(
-            data["current_path"], data["clone_url"], data.get("auth", None)
+            data["current_path"],
+            data["clone_url"],
+            data.get("auth", None),
+            data.get("operation_id", None),
         )
         self.finish(json.dumps(response))
 
@@ -58,31 +71,19 @@ class GitAllHistoryHandler(GitHandler):
     @web.authenticated
     async def post(self):
         """
-        POST request handler, calls individual handlers for
+        POST request handler, fetches concurrently the results of
         'git show_top_level', 'git branch', 'git log', and 'git status'
         """
         body = self.get_json_body()
         current_path = body["current_path"]
         history_count = body["history_count"]
 
-        show_top_level = await self.git.show_top_level(current_path)
-        if show_top_level["code"] != 0:
-            self.finish(json.dumps(show_top_level))
-        else:
-            branch = await self.git.branch(current_path)
-            log = await self.git.log(current_path, history_count)
-            status = await self.git.status(current_path)
-
-            result = {
-                "code": show_top_level["code"],
-                "data": {
-                    "show_top_level": show_top_level,
-                    "branch": branch,
-                    "log": log,
-                    "status": status,
-                },
-            }
-            self.finish(json.dumps(result))
+        # Periodic refresh; yield to the interactive requests
+        with scheduled_as(BACKGROUND):
+            result = await self.git.all_history(
+                current_path, history_count, body.get("fingerprint")
+            )
+        self.finish(json.dumps(result))
 
 
 class GitShowTopLevelHandler(GitHandler):
@@ -128,12 +129,158 @@ class GitStatusHandler(GitHandler):
     async def post(self):
         """
         POST request handler, fetches the git status.
+
+        If the request provides the fingerprint returned by a previous call and
+        the repository did not change since, the response is
+        `{"code": 0, "not_modified": true, "fingerprint": fingerprint}`.
         """
-        current_path = self.get_json_body()["current_path"]
-        result = await self.git.status(current_path)
+        body = self.get_json_body()
+        # Periodic refresh; yield to the interactive requests
+        with scheduled_as(BACKGROUND):
+            result = await self.git.status(
+                body["current_path"], body.get("fingerprint")
+            )
         self.finish(json.dumps(result))
 
 
+class GitAccelerateStatusHandler(GitHandler):
+    """
+    Handler for the accelerated status mode of large repositories.
+    """
+
+    @web.authenticated
+    async def post(self):
+        """
+        POST request handler, reports the accelerated status mode of a repository.
+
+        If the request provides `enable`, the mode is turned on or off and the
+        status durations before and after are reported.
+        """
+        body = self.get_json_body()
+        current_path = body["current_path"]
+        if "enable" in body:
+            result = await self.git.accelerate_status(
+                current_path, bool(body["enable"])
+            )
+        else:
+            result = await self.git.status_acceleration(current_path)
+
+        if result["code"] != 0:
+            self.set_status(500)
+        self.finish(json.dumps(result))
+
+
+class GitWebSocketHandler(WebSocketMixin, IPythonHandler, websocket.WebSocketHandler):
+    """
+    Top-level parent class of the WebSocket handlers.
+    """
+
+    @property
+    def git(self):
+        return self.settings["dvc"]
+
+    def get(self, *args, **kwargs):
+        if self.get_current_user() is None:
+            raise web.HTTPError(403)
+        return super().get(*args, **kwargs)
+
+
+class GitWatchHandler(GitWebSocketHandler):
+    """
+    WebSocket pushing the status changes of a repository.
+
+    The client subscribes to a repository by sending `{"subscribe": "current_path"}`.
+    The server then sends:
+    - `{"type": "status", "files": [...]}`: the complete status, on subscription
+    - `{"type": "status_delta", "changed": [...], "removed": [...]}`: the status
+      entries that changed and the paths no longer in the status
+    - `{"type": "head"}`: HEAD or the references changed
+    - `{"type": "error", "message": str}`: the path is not in a repository
+    """
+
+    @property
+    def watchers(self):
+        return self.settings["dvc_watchers"]
+
+    def open(self, *args, **kwargs):
+        super().open(*args, **kwargs)
+        self._top_repo_path = None
+
+    async def on_message(self, message):
+        try:
+            current_path = json.loads(message)["subscribe"]
+        except (ValueError, KeyError, TypeError):
+            self.write_message({"type": "error", "message": "Invalid message."})
+            return
+
+        self._unsubscribe()
+        top_repo_path = await self.watchers.subscribe(current_path, self._send)
+        if top_repo_path is None:
+            self.write_message(
+                {"type": "error", "message": "Not in a git repository."}
+            )
+        self._top_repo_path = top_repo_path
+
+    def on_close(self):
+        self._unsubscribe()
+
+    def _send(self, message):
+        try:
+            self.write_message(message)
+        except websocket.WebSocketClosedError:
+            self._unsubscribe()
+
+    def _unsubscribe(self):
+        if self._top_repo_path is not None:
+            self.watchers.unsubscribe(self._top_repo_path, self._send)
+            self._top_repo_path = None
+
+
+class GitProgressHandler(GitWebSocketHandler):
+    """
+    WebSocket reporting the progress of clone, pull and push operations.
+
+    The client chooses an `operation_id`, sends `{"subscribe": operation_id}`
+    and then the request starting the operation with the same `operation_id`.
+    The operation is cancelled by sending `{"cancel": operation_id}`.
+    The server sends:
+    - `{"type": "progress", "operation_id": str, "phase": str, "percent": int,
+       "current": int, "total": int, "bytes": int|null, "throughput": int|null}`
+    - `{"type": "done", "operation_id": str, "cancelled": bool}`
+    """
+
+    def open(self, *args, **kwargs):
+        super().open(*args, **kwargs)
+        self._subscriptions = set()
+
+    def on_message(self, message):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            message = {}
+        if "subscribe" in message:
+            operation_id = str(message["subscribe"])
+            self.git.operations.get(operation_id).listeners.add(self._send)
+            self._subscriptions.add(operation_id)
+        elif "cancel" in message:
+            self.git.operations.get(str(message["cancel"])).cancel()
+        else:
+            self.write_message({"type": "error", "message": "Invalid message."})
+
+    def on_close(self):
+        for operation_id in self._subscriptions:
+            self.git.operations.unsubscribe(operation_id, self._send)
+        self._subscriptions.clear()
+
+    def _send(self, message):
+        try:
+            self.write_message(message)
+        except websocket.WebSocketClosedError:
+            pass
+        if message["type"] == "done":
+            self._subscriptions.discard(message["operation_id"])
+
+
 class GitLogHandler(GitHandler):
     """
     Handler for 'git log --pretty=format:%H-%an-%ar-%s'.
@@ -145,11 +292,14 @@ class GitLogHandler(GitHandler):
         """
         POST request handler,
         fetches Commit SHA, Author Name, Commit Date & Commit Message.
+
+        The history is paginated; the `next` token of the result is to be
+        sent as `after` to get the following page.
         """
         body = self.get_json_body()
         current_path = body["current_path"]
         history_count = body.get("history_count", 25)
-        result = await self.git.log(current_path, history_count)
+        result = await self.git.log(current_path, history_count, body.get("after"))
         self.finish(json.dumps(result))
 
 
@@ -165,11 +315,18 @@ class GitDetailedLogHandler(GitHandler):
         """
         POST request handler, fetches file names of committed files, Number of
         insertions & deletions in that commit.
+
+        Many commits are fetched at once by providing either a list of
+        `selected_hashes` or a revision `range` instead of `selected_hash`.
         """
         data = self.get_json_body()
-        selected_hash = data["selected_hash"]
         current_path = data["current_path"]
-        result = await self.git.detailed_log(selected_hash, current_path)
+        if "selected_hashes" in data or "range" in data:
+            result = await self.git.detailed_logs(
+                current_path, data.get("selected_hashes"), data.get("range")
+            )
+        else:
+            result = await self.git.detailed_log(data["selected_hash"], current_path)
         self.finish(json.dumps(result))
 
 
@@ -198,9 +355,28 @@ class GitBranchHandler(GitHandler):
     async def post(self):
         """
         POST request handler, fetches all branches in current repository.
+
+        The branches may be filtered by name, sorted and paginated; the `next`
+        offset of the result is to be sent as `offset` to get the following page.
+        The limit is lowered to MAX_BRANCH_PAGE_LIMIT.
         """
-        current_path = self.get_json_body()["current_path"]
-        result = await self.git.branch(current_path)
+        body = self.get_json_body()
+        offset = body.get("offset", 0)
+        limit = body.get("limit")
+        if not is_natural(offset) or (limit is not None and not is_natural(limit)):
+            raise web.HTTPError(
+                400, log_message="offset and limit must be non-negative integers."
+            )
+        if limit is not None:
+            limit = min(limit, MAX_BRANCH_PAGE_LIMIT)
+        result = await self.git.branch(
+            body["current_path"],
+            body.get("filter"),
+            body.get("match", "substring"),
+            body.get("sort", "name"),
+            offset,
+            limit,
+        )
         self.finish(json.dumps(result))
 
 
@@ -213,7 +389,10 @@ class GitAddHandler(GitHandler):
     @web.authenticated
     async def post(self):
         """
-        POST request handler, adds one or all files into the staging area.
+        POST request handler, adds one, several or all files into the staging area.
+
+        The filename may be a list of files. If the request status field is
+        true, the response includes the resulting repository status.
         """
         data = self.get_json_body()
         top_repo_path = data["top_repo_path"]
@@ -222,6 +401,8 @@ class GitAddHandler(GitHandler):
         else:
             filename = data["filename"]
             body = await self.git.add(filename, top_repo_path)
+        if data.get("status", False):
+            body = await self.git.with_status(body, top_repo_path)
 
         if body["code"] != 0:
             self.set_status(500)
@@ -262,16 +443,30 @@ class GitAddAllUntrackedHandler(GitHandler):
         self.finish(json.dumps(body))
 
 
+class GitRemoteListHandler(GitHandler):
+    """Handler listing the remotes with their URLs."""
+
+    @web.authenticated
+    async def post(self):
+        """POST request handler to list the remotes."""
+        data = self.get_json_body()
+        output = await self.git.remote_list(data["top_repo_path"])
+        if output["code"] != 0:
+            self.set_status(500)
+        self.finish(json.dumps(output))
+
+
 class GitRemoteAddHandler(GitHandler):
     """Handler for 'git remote add <name> <url>'."""
 
-    def post(self):
+    @web.authenticated
+    async def post(self):
         """POST request handler to add a remote."""
         data = self.get_json_body()
         top_repo_path = data["top_repo_path"]
         name = data.get("name", DEFAULT_REMOTE_NAME)
         url = data["url"]
-        output = self.git.remote_add(top_repo_path, url, name)
+        output = await self.git.remote_add(top_repo_path, url, name)
         if output["code"] == 0:
             self.set_status(201)
         else:
@@ -279,6 +474,64 @@ class GitRemoteAddHandler(GitHandler):
         self.finish(json.dumps(output))
 
 
+class GitRemoteRemoveHandler(GitHandler):
+    """Handler for 'git remote remove <name>'."""
+
+    @web.authenticated
+    async def post(self):
+        """POST request handler to remove a remote."""
+        data = self.get_json_body()
+        output = await self.git.remote_remove(data["top_repo_path"], data["name"])
+        if output["code"] != 0:
+            self.set_status(500)
+        self.finish(json.dumps(output))
+
+
+class GitRemoteRenameHandler(GitHandler):
+    """Handler for 'git remote rename <name> <new_name>'."""
+
+    @web.authenticated
+    async def post(self):
+        """POST request handler to rename a remote."""
+        data = self.get_json_body()
+        output = await self.git.remote_rename(
+            data["top_repo_path"], data["name"], data["new_name"]
+        )
+        if output["code"] != 0:
+            self.set_status(500)
+        self.finish(json.dumps(output))
+
+
+class GitRemoteSetUrlHandler(GitHandler):
+    """Handler for 'git remote set-url [--push] <name> <url>'."""
+
+    @web.authenticated
+    async def post(self):
+        """POST request handler to change the URL of a remote."""
+        data = self.get_json_body()
+        output = await self.git.remote_set_url(
+            data["top_repo_path"], data["name"], data["url"], data.get("push", False)
+        )
+        if output["code"] != 0:
+            self.set_status(500)
+        self.finish(json.dumps(output))
+
+
+class GitRemotePruneHandler(GitHandler):
+    """Handler for 'git remote prune <name>'."""
+
+    @web.authenticated
+    async def post(self):
+        """POST request handler to delete the stale remote-tracking branches."""
+        data = self.get_json_body()
+        output = await self.git.remote_prune(
+            data["top_repo_path"], data["name"], data.get("auth", None)
+        )
+        if output["code"] != 0:
+            self.set_status(500)
+        self.finish(json.dumps(output))
+
+
 class GitResetHandler(GitHandler):
     """
     Handler for 'git reset <filename>'.
@@ -289,7 +542,10 @@ class GitResetHandler(GitHandler):
     async def post(self):
         """
         POST request handler,
-        moves one or all files from the staged to the unstaged area.
+        moves one, several or all files from the staged to the unstaged area.
+
+        The filename may be a list of files. If the request status field is
+        true, the response includes the resulting repository status.
         """
         data = self.get_json_body()
         top_repo_path = data["top_repo_path"]
@@ -298,6 +554,8 @@ class GitResetHandler(GitHandler):
         else:
             filename = data["filename"]
             body = await self.git.reset(filename, top_repo_path)
+        if data.get("status", False):
+            body = await self.git.with_status(body, top_repo_path)
 
         if body["code"] != 0:
             self.set_status(500)
@@ -359,10 +617,13 @@ class GitCheckoutHandler(GitHandler):
                 )
             else:
                 body = await self.git.checkout_branch(data["branchname"], top_repo_path)
-        elif data["checkout_all"]:
-            body = await self.git.checkout_all(top_repo_path)
         else:
-            body = await self.git.checkout(data["filename"], top_repo_path)
+            if data["checkout_all"]:
+                body = await self.git.checkout_all(top_repo_path)
+            else:
+                body = await self.git.checkout(data["filename"], top_repo_path)
+            if data.get("status", False):
+                body = await self.git.with_status(body, top_repo_path)
 
         if body["code"] != 0:
             self.set_status(500)
@@ -422,6 +683,7 @@ class GitPullHandler(GitHandler):
             data["current_path"],
             data.get("auth", None),
             data.get("cancel_on_conflict", False),
+            data.get("operation_id", None),
         )
 
         self.finish(json.dumps(response))
@@ -459,7 +721,11 @@ class GitPushHandler(GitHandler):
                 branch = ":".join(["HEAD", upstream[1]])
 
             response = await self.git.push(
-                remote, branch, current_path, data.get("auth", None)
+                remote,
+                branch,
+                current_path,
+                data.get("auth", None),
+                data.get("operation_id", None),
             )
 
         else:
@@ -524,6 +790,10 @@ class GitDiffContentHandler(GitHandler):
     """
     Handler for plain text diffs. Uses git show $REF:$FILE
     Returns `prev_content` and `curr_content` with content of given file.
+
+    With `"mode": "hunks"`, the diff is computed by the server and only its
+    hunks are returned; with `"mode": "lines"`, a range of lines of one
+    version is returned to expand the regions between the hunks.
     """
 
     @web.authenticated
@@ -531,15 +801,108 @@ class GitDiffContentHandler(GitHandler):
         cm = self.contents_manager
         data = self.get_json_body()
         filename = data["filename"]
-        prev_ref = data["prev_ref"]
-        curr_ref = data["curr_ref"]
         top_repo_path = os.path.join(cm.root_dir, url2path(data["top_repo_path"]))
-        response = await self.git.diff_content(
-            filename, prev_ref, curr_ref, top_repo_path
-        )
+        mode = data.get("mode", "content")
+        if mode == "hunks":
+            response = await self.git.diff_hunks(
+                filename,
+                data["prev_ref"],
+                data["curr_ref"],
+                top_repo_path,
+                data.get("context", DIFF_CONTEXT_LINES),
+                data.get("algorithm", DEFAULT_DIFF_ALGORITHM),
+            )
+        elif mode == "lines":
+            response = await self.git.diff_lines(
+                filename,
+                data["ref"],
+                top_repo_path,
+                data.get("start", 1),
+                data.get("end"),
+            )
+        elif mode == "content":
+            response = await self.git.diff_content(
+                filename, data["prev_ref"], data["curr_ref"], top_repo_path
+            )
+        else:
+            raise web.HTTPError(
+                400, log_message="Unknown diff mode '{}'.".format(mode)
+            )
         self.finish(json.dumps(response))
 
 
+class GitBlobHandler(GitHandler):
+    """
+    Handler streaming the content of a file at a git reference or in the
+    working tree. A byte range may be requested with the HTTP Range header or
+    a range of lines with the `lines` query argument; e.g. `lines=1-100`.
+    """
+
+    @web.authenticated
+    async def get(self):
+        cm = self.contents_manager
+        top_repo_path = os.path.join(
+            cm.root_dir, url2path(self.get_query_argument("top_repo_path"))
+        )
+        filename = self.get_query_argument("filename")
+        special = self.get_query_argument("special", None)
+        if special is None:
+            ref = {"git": self.get_query_argument("ref", "HEAD")}
+        else:
+            ref = {"special": special}
+
+        blob = await self.git.blob(filename, ref, top_repo_path)
+        if blob is None:
+            raise web.HTTPError(404, log_message="File '{}' not found.".format(filename))
+        size, sha, read = blob
+
+        self.set_header("Content-Type", "application/octet-stream")
+        self.set_header("Accept-Ranges", "bytes")
+        if sha is not None:
+            # Blobs are immutable
+            self.set_header("Etag", '"{}"'.format(sha))
+            if self.check_etag_header():
+                self.set_status(304)
+                return self.finish()
+
+        lines = self.get_query_argument("lines", None)
+        if lines is not None:
+            try:
+                first, last = parse_line_range(lines)
+            except ValueError as error:
+                raise web.HTTPError(400, log_message=str(error))
+            chunks = slice_lines(read(0, None), first, last)
+        else:
+            try:
+                byte_range = parse_byte_range(self.request.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                self.set_status(416)
+                self.set_header("Content-Range", "bytes */{}".format(size))
+                return self.finish()
+            if byte_range is None:
+                start, end = 0, size
+            else:
+                start, end = byte_range
+                self.set_status(206)
+                self.set_header(
+                    "Content-Range", "bytes {}-{}/{}".format(start, end - 1, size)
+                )
+            self.set_header("Content-Length", end - start)
+            chunks = read(start, end)
+
+        try:
+            async for chunk in chunks:
+                self.write(chunk)
+                await self.flush()
+            await self.flush()
+        except iostream.StreamClosedError:
+            # The client went away
+            return
+        finally:
+            await chunks.aclose()
+        self.finish()
+
+
 class GitServerRootHandler(GitHandler):
     @web.authenticated
     async def get(self):
@@ -549,6 +912,16 @@ class GitServerRootHandler(GitHandler):
         self.finish(json.dumps({"server_root": server_root}))
 
 
+class GitMetricsHandler(GitHandler):
+    """
+    Handler for the statistics of the extension caches.
+    """
+
+    @web.authenticated
+    async def get(self):
+        self.finish(json.dumps(self.git.metrics()))
+
+
 def setup_handlers(web_app):
     """
     Setups all of the git command handlers.
@@ -556,10 +929,12 @@ def setup_handlers(web_app):
     """
 
     git_handlers = [
+        ("/git/accelerate_status", GitAccelerateStatusHandler),
         ("/git/add", GitAddHandler),
         ("/git/add_all_unstaged", GitAddAllUnstagedHandler),
         ("/git/add_all_untracked", GitAddAllUntrackedHandler),
         ("/git/all_history", GitAllHistoryHandler),
+        ("/git/blob", GitBlobHandler),
         ("/git/branch", GitBranchHandler),
         ("/git/changed_files", GitChangedFilesHandler),
         ("/git/checkout", GitCheckoutHandler),
@@ -572,9 +947,16 @@ def setup_handlers(web_app):
         ("/git/diffcontent", GitDiffContentHandler),
         ("/git/init", GitInitHandler),
         ("/git/log", GitLogHandler),
+        ("/git/metrics", GitMetricsHandler),
+        ("/git/progress", GitProgressHandler),
         ("/git/pull", GitPullHandler),
         ("/git/push", GitPushHandler),
         ("/git/remote/add", GitRemoteAddHandler),
+        ("/git/remote/list", GitRemoteListHandler),
+        ("/git/remote/prune", GitRemotePruneHandler),
+        ("/git/remote/remove", GitRemoteRemoveHandler),
+        ("/git/remote/rename", GitRemoteRenameHandler),
+        ("/git/remote/set_url", GitRemoteSetUrlHandler),
         ("/git/reset", GitResetHandler),
         ("/git/reset_to_commit", GitResetToCommitHandler),
         ("/git/server_root", GitServerRootHandler),
@@ -582,6 +964,7 @@ def setup_handlers(web_app):
         ("/git/show_top_level", GitShowTopLevelHandler),
         ("/git/status", GitStatusHandler),
         ("/git/upstream", GitUpstreamHandler),
+        ("/git/watch", GitWatchHandler),
     ]
 
     # add the baseurl to our paths
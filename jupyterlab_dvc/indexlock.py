@@ -0,0 +1,156 @@
+"""
+Module waiting for the index of a repository to be unlocked
+
+Git refuses to run a command writing the index while another process holds
+`index.lock` in the git folder. Commands needing the index wait for the lock
+removal, signaled by inotify when available; the lock file is also checked
+periodically as notifications are not delivered on all file systems (e.g. NFS).
+"""
+import os
+
+import tornado
+import tornado.ioloop
+import tornado.locks
+
+from . import inotify
+from .repository import find_git_dir
+
+# Maximal time waited for the index.lock of a repository to be removed
+MAX_WAIT_FOR_LOCK_S = 5
+# How often the lock is checked if no notification signals its removal
+CHECK_LOCK_INTERVAL_S = 0.1
+# Git sub-commands writing the index; they fail if it is locked
+INDEX_COMMANDS = frozenset(
+    [
+        "add",
+        "checkout",
+        "cherry-pick",
+        "commit",
+        "merge",
+        "mv",
+        "pull",
+        "rebase",
+        "reset",
+        "restore",
+        "revert",
+        "rm",
+        "stash",
+        "switch",
+        "update-index",
+    ]
+)
+
+
+def needs_index(cmdline):
+    """Whether a command line writes the index.
+
+    Args:
+        cmdline (List[str]): Command line to be executed
+    Returns:
+        bool: True for git commands writing the index
+    """
+    return (
+        len(cmdline) >= 2
+        and os.path.basename(cmdline[0]) == "git"
+        and cmdline[1] in INDEX_COMMANDS
+    )
+
+
+class IndexLockWaiter:
+    """Wait for the index lock of the repositories to be released."""
+
+    def __init__(self):
+        # Repository top-level folder -> index lock file
+        self._lock_files = {}
+
+    def lock_file(self, top_repo_path):
+        """Get the index lock file of a repository.
+
+        The git folder is resolved once per repository; it is not the
+        `.git` folder of worktrees and submodules.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+        Returns:
+            Optional[str]: The index lock file or None if the git folder is unknown
+        """
+        lock_file = self._lock_files.get(top_repo_path)
+        if lock_file is None:
+            git_dir = find_git_dir(top_repo_path)
+            if git_dir is None:
+                return None
+            lock_file = os.path.join(git_dir, "index.lock")
+            self._lock_files[top_repo_path] = lock_file
+        return lock_file
+
+    async def wait(self, top_repo_path, timeout=MAX_WAIT_FOR_LOCK_S):
+        """Wait for the index of a repository to be unlocked.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+            timeout (float): Maximal waiting time in seconds
+        Returns:
+            bool: False if the index is still locked after the timeout
+        """
+        lock_file = self.lock_file(top_repo_path)
+        if lock_file is None or not os.path.exists(lock_file):
+            return True
+
+        loop = tornado.ioloop.IOLoop.current()
+        deadline = loop.time() + timeout
+        removed = tornado.locks.Event()
+        fd = _watch_removal(lock_file, removed)
+        try:
+            while True:
+                # Clear before checking so that no removal is missed
+                removed.clear()
+                if not os.path.exists(lock_file):
+                    return True
+                now = loop.time()
+                if now >= deadline:
+                    return False
+                try:
+                    await removed.wait(min(deadline, now + CHECK_LOCK_INTERVAL_S))
+                except tornado.util.TimeoutError:
+                    pass
+        finally:
+            if fd >= 0:
+                loop.remove_handler(fd)
+                os.close(fd)
+
+
+def _watch_removal(lock_file, removed):
+    """Set an event whenever a lock file may have been removed.
+
+    Args:
+        lock_file (str): Lock file
+        removed (tornado.locks.Event): Event to set
+    Returns:
+        int: The inotify file descriptor to close or -1 if inotify is not available
+    """
+    if inotify.libc is None:
+        return -1
+    fd = inotify.libc.inotify_init1(inotify.IN_NONBLOCK | inotify.IN_CLOEXEC)
+    if fd < 0:
+        return -1
+    folder, name = os.path.split(lock_file)
+    mask = inotify.IN_DELETE | inotify.IN_MOVED_FROM | inotify.IN_DELETE_SELF
+    if inotify.libc.inotify_add_watch(fd, os.fsencode(folder), mask) < 0:
+        os.close(fd)
+        return -1
+
+    def handle_events(fd, events):
+        try:
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return
+        for _, event_mask, event_name in inotify.parse_events(data):
+            if event_name == name or event_mask & (
+                inotify.IN_Q_OVERFLOW | inotify.IN_DELETE_SELF
+            ):
+                removed.set()
+
+    tornado.ioloop.IOLoop.current().add_handler(
+        fd, handle_events, tornado.ioloop.IOLoop.READ
+    )
+    return fd
@@ -0,0 +1,56 @@
+"""
+Module binding the Linux inotify API - see inotify(7)
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def load_libc():
+    """Load the C library exposing inotify; None if not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+libc = load_libc()
+
+
+def parse_events(data):
+    """Parse the events read from an inotify file descriptor.
+
+    Args:
+        data (bytes): Content read from the file descriptor
+    Yields:
+        (int, int, str): (watch descriptor, event mask, name of the file in
+            the watched folder - empty for the folder itself)
+    """
+    offset = 0
+    while offset < len(data):
+        wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset : offset + length].rstrip(b"\0")
+        offset += length
+        yield wd, mask, os.fsdecode(name)
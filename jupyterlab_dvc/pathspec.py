@@ -0,0 +1,145 @@
+"""
+Module running the index mutations over lists of files
+
+Short lists of files are given on the command line, after "--". Longer ones
+are given to git on its standard input, NUL separated, so that any number of
+files fits in a single command whatever the command line length limit; git
+older than 2.26 cannot read them so the files are split in several commands.
+The mutations of the same kind in the same repository requested within the
+same event loop iteration are merged into a single command.
+"""
+import asyncio
+import re
+
+# git command of the mutations over a list of files
+PATHSPEC_COMMANDS = {
+    "add": ["git", "add"],
+    "checkout": ["git", "checkout"],
+    "reset": ["git", "reset"],
+}
+# Options reading the NUL separated files on the standard input
+PATHSPEC_FROM_STDIN = ["--pathspec-from-file=-", "--pathspec-file-nul"]
+# First git version supporting PATHSPEC_FROM_STDIN
+PATHSPEC_FROM_STDIN_VERSION = (2, 26)
+# Maximal size in bytes of the files given on the command line; above it they
+# are given on the standard input, or split in several commands for older git
+PATHSPEC_ARGV_MAX_BYTES = 32 * 1024
+
+
+def pathspec_command(operation):
+    """Get the command line of a mutation reading its files on stdin.
+
+    Args:
+        operation (str): Mutation; one of PATHSPEC_COMMANDS
+    Returns:
+        List[str]: The command line
+    """
+    return PATHSPEC_COMMANDS[operation] + PATHSPEC_FROM_STDIN
+
+
+def pathspec_argv_commands(operation, paths, max_bytes=PATHSPEC_ARGV_MAX_BYTES):
+    """Get the command lines of a mutation giving its files as arguments.
+
+    Args:
+        operation (str): Mutation; one of PATHSPEC_COMMANDS
+        paths (List[str]): Files
+        max_bytes (int): Maximal size of the files of a command line
+    Returns:
+        List[List[str]]: The command lines; one unless the files are too long
+    """
+    commands = []
+    chunk, size = [], 0
+    for path in paths:
+        length = len(path.encode("utf-8")) + 1
+        if chunk and size + length > max_bytes:
+            commands.append(PATHSPEC_COMMANDS[operation] + ["--"] + chunk)
+            chunk, size = [], 0
+        chunk.append(path)
+        size += length
+    if chunk:
+        commands.append(PATHSPEC_COMMANDS[operation] + ["--"] + chunk)
+    return commands
+
+
+def parse_git_version(output):
+    """Parse the output of git --version.
+
+    Args:
+        output (str): Output; e.g. "git version 2.25.1"
+    Returns:
+        Optional[Tuple[int, int]]: (major, minor) version or None if unknown
+    """
+    match = re.search(r"(\d+)\.(\d+)", output)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def pathspec_input(paths):
+    """Encode the files of a mutation for its standard input.
+
+    Args:
+        paths (Iterable[str]): Files
+    Returns:
+        bytes: NUL separated files
+    """
+    return b"".join(path.encode("utf-8") + b"\x00" for path in paths)
+
+
+class PathspecBatcher:
+    """Merge the mutations requested within the same event loop iteration."""
+
+    def __init__(self):
+        # key -> [(paths, future)] of the requests waiting for the next iteration
+        self._pending = {}
+        self.requests = 0
+        self.batches = 0
+        self.retried = 0
+
+    async def run(self, key, paths, operation):
+        """Run a mutation, merged with the identical ones of the same iteration.
+
+        If the merged mutation fails, e.g. because a file does not exist, each
+        request is run on its own so that it gets its own result.
+
+        Args:
+            key (Hashable): Mutation kind and repository
+            paths (List[str]): Files of the request
+            operation (Callable[[List[str]], Awaitable[dict]]): Mutation over files
+        Returns:
+            dict: The mutation result
+        """
+        self.requests += 1
+        future = asyncio.get_event_loop().create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = []
+            asyncio.get_event_loop().call_soon(self._flush, key, operation)
+        batch.append((list(paths), future))
+        return dict(await future)
+
+    def stats(self):
+        """Get the statistics."""
+        return {"requests": self.requests, "batches": self.batches, "retried": self.retried}
+
+    def _flush(self, key, operation):
+        batch = self._pending.pop(key)
+        self.batches += 1
+        asyncio.ensure_future(self._execute(batch, operation))
+
+    async def _execute(self, batch, operation):
+        try:
+            # Files requested several times are given once
+            paths = list(dict.fromkeys(path for request, _ in batch for path in request))
+            result = await operation(paths)
+            if result["code"] == 0 or len(batch) == 1:
+                results = [result] * len(batch)
+            else:
+                self.retried += len(batch)
+                results = [await operation(request) for request, _ in batch]
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
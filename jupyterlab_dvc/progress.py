@@ -0,0 +1,155 @@
+"""
+Module tracking the progress of long running git operations (clone, pull, push)
+"""
+import contextlib
+import re
+
+# Progress line printed by git on stderr with --progress, e.g.
+#  "remote: Counting objects: 100% (10/10), done."
+#  "Receiving objects:  45% (450/1000), 1.20 MiB | 2.40 MiB/s"
+PROGRESS_PATTERN = re.compile(
+    r"^(?:remote: )?(?P<phase>[A-Za-z][A-Za-z ]*):\s+(?P<percent>\d+)%\s+"
+    r"\((?P<current>\d+)/(?P<total>\d+)\)"
+    r"(?:,\s+(?P<bytes>[\d.]+ (?:[KMGT]iB|bytes?)))?"
+    r"(?:\s+\|\s+(?P<throughput>[\d.]+ (?:[KMGT]iB|bytes?))/s)?"
+)
+_UNITS = {"byte": 1, "bytes": 1, "KiB": 1 << 10, "MiB": 1 << 20, "GiB": 1 << 30, "TiB": 1 << 40}
+
+
+def _parse_size(size):
+    value, unit = size.split(" ")
+    return int(float(value) * _UNITS[unit])
+
+
+def parse_progress(line):
+    """Parse a git progress line.
+
+    Args:
+        line (str): Line printed by git on stderr
+    Returns:
+        Optional[dict]: {
+            "type": "progress",
+            "phase": str, # e.g. "Receiving objects"
+            "percent": int,
+            "current": int, # Number of objects processed
+            "total": int,
+            "bytes": Optional[int], # Amount of data transferred
+            "throughput": Optional[int] # Transfer rate in bytes/s
+        } or None if line is not a progress line
+    """
+    match = PROGRESS_PATTERN.match(line.strip())
+    if match is None:
+        return None
+    return {
+        "type": "progress",
+        "phase": match.group("phase").strip(),
+        "percent": int(match.group("percent")),
+        "current": int(match.group("current")),
+        "total": int(match.group("total")),
+        "bytes": _parse_size(match.group("bytes")) if match.group("bytes") else None,
+        "throughput": _parse_size(match.group("throughput"))
+        if match.group("throughput")
+        else None,
+    }
+
+
+class Operation:
+    """A long running git operation reporting its progress to listeners."""
+
+    def __init__(self, operation_id):
+        """
+        Args:
+            operation_id (str): Identifier chosen by the client
+        """
+        self.id = operation_id
+        self.listeners = set()
+        self.started = False
+        self.cancelled = False
+        self._kill = None
+
+    def attach(self, kill):
+        """Attach the process executing the operation.
+
+        Args:
+            kill (Callable[[], None]): Function killing the process
+        """
+        self._kill = kill
+        if self.cancelled:
+            kill()
+
+    def report(self, message):
+        """Send a message to the listeners.
+
+        Args:
+            message (dict): Message
+        """
+        for listener in list(self.listeners):
+            listener(dict(message, operation_id=self.id))
+
+    def cancel(self):
+        """Cancel the operation, killing its process."""
+        self.cancelled = True
+        if self._kill is not None:
+            self._kill()
+
+
+class Operations:
+    """Registry of the running operations.
+
+    Listeners may subscribe to an operation (and cancel it) before it starts,
+    as the client subscribes before sending the request starting it.
+    """
+
+    def __init__(self):
+        self._operations = {}
+
+    def get(self, operation_id):
+        """Get or create an operation.
+
+        Args:
+            operation_id (str): Operation identifier
+        Returns:
+            Operation: The operation
+        """
+        operation = self._operations.get(operation_id)
+        if operation is None:
+            operation = Operation(operation_id)
+            self._operations[operation_id] = operation
+        return operation
+
+    def unsubscribe(self, operation_id, listener):
+        """Stop listening to an operation.
+
+        Args:
+            operation_id (str): Operation identifier
+            listener (Callable[[dict], None]): Listener
+        """
+        operation = self._operations.get(operation_id)
+        if operation is None:
+            return
+        operation.listeners.discard(listener)
+        if not operation.started and not operation.listeners:
+            del self._operations[operation_id]
+
+    @contextlib.contextmanager
+    def run(self, operation_id):
+        """Context in which an operation runs.
+
+        The listeners receive {"type": "done"} once the operation is over.
+
+        Args:
+            operation_id (Optional[str]): Operation identifier
+        Yields:
+            Optional[Operation]: The operation or None if operation_id is None
+        """
+        if operation_id is None:
+            yield None
+            return
+
+        operation = self.get(operation_id)
+        operation.started = True
+        try:
+            yield operation
+        finally:
+            self._operations.pop(operation_id, None)
+            operation.report({"type": "done", "cancelled": operation.cancelled})
@@ -0,0 +1,418 @@
+"""
+Module reading the references of repositories without spawning git
+
+HEAD, the loose and packed references and the branches configuration are
+read from the git folder. Repositories using another references storage
+(e.g. reftable) or configuration features this reader does not handle are
+left to git.
+"""
+import collections
+import os
+import re
+import time
+
+from .repository import find_common_dir, find_git_dir, stat_signature
+
+# Maximal number of repositories whose references are cached
+REFS_CACHE_MAX_ENTRIES = 100
+# References modified less than this time ago may change again within their
+# timestamp granularity; they are not cached
+REFS_MIN_AGE_S = 2
+# Maximal depth of symbolic references
+MAX_SYMREF_DEPTH = 5
+# Rules git applies to expand a short reference name, by increasing precedence
+# The last rule `refs/remotes/%s/HEAD` is not used to shorten names.
+SHORTEN_RULES = ("{}", "refs/{}", "refs/tags/{}", "refs/heads/{}", "refs/remotes/{}")
+# Configuration sections which may hold or change the branches configuration
+UNSUPPORTED_CONFIG_SECTIONS = ("include", "includeif")
+
+OBJECT_NAME_PATTERN = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})$")
+PSEUDOREF_PATTERN = re.compile(r"^[A-Z_]+$")
+CONFIG_SECTION_PATTERN = re.compile(
+    r'^\[\s*([A-Za-z0-9-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\](.*)$'
+)
+CONFIG_KEY_PATTERN = re.compile(r"^([A-Za-z][A-Za-z0-9-]*)\s*(?:=(.*))?$")
+
+
+class UnsupportedRepository(Exception):
+    """The repository references cannot be read without git."""
+
+
+def parse_config(content):
+    """Parse a git configuration file.
+
+    Args:
+        content (str): Configuration file content
+    Returns:
+        Dict[Tuple[str, Optional[str], str], List[str]]: The values keyed by
+            (section, subsection, key); section and key are lower case
+    Raises:
+        UnsupportedRepository: if the configuration uses an unsupported syntax
+    """
+    values = collections.defaultdict(list)
+    section = None
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith("["):
+            match = CONFIG_SECTION_PATTERN.match(line)
+            if match is None:
+                # e.g. deprecated [section.subsection] syntax
+                raise UnsupportedRepository("Unsupported configuration section " + line)
+            name, subsection, line = match.groups()
+            section = (
+                name.lower(),
+                None if subsection is None else re.sub(r"\\(.)", r"\1", subsection),
+            )
+            if section[0] in UNSUPPORTED_CONFIG_SECTIONS:
+                raise UnsupportedRepository("Configuration includes other files")
+            line = line.strip()
+        if not line or line[0] in "#;":
+            continue
+
+        match = CONFIG_KEY_PATTERN.match(line)
+        if match is None or section is None:
+            raise UnsupportedRepository("Unsupported configuration line " + line)
+        key, value = match.groups()
+        values[section + (key.lower(),)].append(
+            "true" if value is None else _parse_config_value(value)
+        )
+    return values
+
+
+def _parse_config_value(raw):
+    if not any(character in raw for character in '"\\#;'):
+        return raw.strip()
+    value = []
+    pending_spaces = ""
+    quoted = False
+    characters = iter(raw.strip())
+    for character in characters:
+        if not quoted:
+            if character.isspace():
+                # Kept only if followed by another character
+                pending_spaces += character
+                continue
+            if character in "#;":
+                break
+        value.append(pending_spaces)
+        pending_spaces = ""
+        if character == '"':
+            quoted = not quoted
+        elif character == "\\":
+            escaped = next(characters, None)
+            if escaped is None:
+                raise UnsupportedRepository("Configuration value continued on next line")
+            value.append({"n": "\n", "t": "\t", "b": "\b"}.get(escaped, escaped))
+        else:
+            value.append(character)
+    return "".join(value)
+
+
+def parse_packed_refs(content):
+    """Parse a packed-refs file.
+
+    Args:
+        content (str): packed-refs file content
+    Returns:
+        Dict[str, str]: Object name keyed by reference name
+    """
+    refs = {}
+    for line in content.splitlines():
+        if not line or line[0] in "#^":
+            # Header and peeled tags
+            continue
+        name, _, refname = line.partition(" ")
+        refs[refname] = name
+    return refs
+
+
+def _read_ref_file(path):
+    """Read a loose reference; None if it is not valid."""
+    try:
+        with open(path) as ref:
+            content = ref.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if content.startswith("ref:"):
+        return content
+    return content if OBJECT_NAME_PATTERN.match(content) else None
+
+
+class Refs:
+    """Snapshot of the references of a repository."""
+
+    def __init__(self, git_dir, head, refs, config):
+        """
+        Args:
+            git_dir (str): Git folder
+            head (str): HEAD content - an object name or `ref: <refname>`
+            refs (Dict[str, str]): Object names or symbolic references keyed
+                by reference name
+            config (Dict[Tuple[str, Optional[str], str], List[str]]): Configuration
+        """
+        self._git_dir = git_dir
+        self._config = config
+        # The snapshot does not change; short names are computed once
+        self._short_names = {}
+        self.head = head[len("ref:") :].strip() if head.startswith("ref:") else None
+        self.refs = {}
+        for refname in sorted(refs):
+            name = self._resolve(refs, refname)
+            if name is not None:
+                self.refs[refname] = name
+
+    @staticmethod
+    def _resolve(refs, refname):
+        value = refs.get(refname)
+        for _ in range(MAX_SYMREF_DEPTH):
+            if value is None or not value.startswith("ref:"):
+                return value
+            value = refs.get(value[len("ref:") :].strip())
+        return None
+
+    def shorten(self, refname):
+        """Shorten a reference name unambiguously, as git does.
+
+        Args:
+            refname (str): Full reference name
+        Returns:
+            str: The short name
+        """
+        short_name = self._short_names.get(refname)
+        if short_name is None:
+            short_name = self._short_names[refname] = self._shorten(refname)
+        return short_name
+
+    def _shorten(self, refname):
+        for index in range(len(SHORTEN_RULES) - 1, 0, -1):
+            prefix, suffix = SHORTEN_RULES[index].split("{}")
+            if not (refname.startswith(prefix) and refname.endswith(suffix)):
+                continue
+            short_name = refname[len(prefix) : len(refname) - len(suffix)]
+            if not short_name:
+                continue
+            candidates = [
+                rule.format(short_name)
+                for other, rule in enumerate(SHORTEN_RULES + ("refs/remotes/{}/HEAD",))
+                if other != index
+            ]
+            if not any(self._exists(candidate) for candidate in candidates):
+                return short_name
+        return refname
+
+    def _exists(self, refname):
+        if refname in self.refs:
+            return True
+        if PSEUDOREF_PATTERN.match(refname):
+            return _read_ref_file(os.path.join(self._git_dir, refname)) is not None
+        return False
+
+    def upstream(self, branch):
+        """Get the remote-tracking reference configured as upstream of a branch.
+
+        Args:
+            branch (str): Branch name
+        Returns:
+            Optional[str]: The upstream reference name, which may not exist,
+                or None if no upstream is configured
+        Raises:
+            UnsupportedRepository: if the upstream is configured in a way not handled
+        """
+        merge = self._config.get(("branch", branch, "merge"))
+        if not merge:
+            return None
+        remote = self._config.get(("branch", branch, "remote"))
+        if not remote:
+            raise UnsupportedRepository("Branch {} has no remote".format(branch))
+        remote, merge = remote[-1], merge[0]
+        if remote == ".":
+            return merge
+
+        for refspec in self._config.get(("remote", remote, "fetch"), []):
+            source, _, destination = refspec.lstrip("+").partition(":")
+            if source.startswith("^") or source.count("*") != destination.count("*"):
+                raise UnsupportedRepository("Unsupported refspec " + refspec)
+            if "*" not in source:
+                if source == merge:
+                    return destination
+                continue
+            source_prefix, source_suffix = source.split("*", 1)
+            if (
+                merge.startswith(source_prefix)
+                and merge.endswith(source_suffix)
+                and len(merge) >= len(source_prefix) + len(source_suffix)
+            ):
+                match = merge[len(source_prefix) : len(merge) - len(source_suffix)]
+                return destination.replace("*", match, 1)
+        raise UnsupportedRepository("Upstream of {} is not tracked".format(branch))
+
+    def remotes(self):
+        """List the remotes configured in the repository.
+
+        The URLs are the configured ones, before any `url.<base>.insteadOf`
+        rewriting.
+
+        Returns:
+            List[Tuple[str, List[str], List[str]]]: (name, URLs, push URLs) of
+                the remotes having a URL, in configuration order
+        """
+        remotes = collections.OrderedDict()
+        for (section, name, key), values in self._config.items():
+            if section == "remote" and name is not None and key in ("url", "pushurl"):
+                remotes.setdefault(name, {"url": [], "pushurl": []})[key].extend(values)
+        return [
+            (name, urls["url"], urls["pushurl"])
+            for name, urls in remotes.items()
+            if urls["url"]
+        ]
+
+    def for_each_ref(self, fields, prefixes):
+        """List the references as git for-each-ref does.
+
+        Args:
+            fields (List[str]): Fields among refname, refname:short, objectname,
+                upstream:short and HEAD
+            prefixes (List[str]): Reference name prefixes to list
+        Returns:
+            List[List[str]]: The fields of the references, sorted by name
+        Raises:
+            UnsupportedRepository: if a field cannot be computed
+        """
+        getters = {
+            "refname": lambda refname: refname,
+            "refname:short": self.shorten,
+            "objectname": self.refs.get,
+            "upstream:short": self._upstream_short,
+            "HEAD": lambda refname: "*" if refname == self.head else " ",
+        }
+        return [
+            [getters[field](refname) for field in fields]
+            for refname in self.refs
+            if any(refname.startswith(prefix) for prefix in prefixes)
+        ]
+
+    def _upstream_short(self, refname):
+        if not refname.startswith("refs/heads/"):
+            return ""
+        upstream = self.upstream(refname[len("refs/heads/") :])
+        return "" if upstream is None else self.shorten(upstream)
+
+
+class RefReader:
+    """Least recently used cache of the repositories references.
+
+    A snapshot is valid as long as HEAD, packed-refs, the configuration and
+    the references folders are unchanged; git replaces all of them by a
+    rename when updating a reference, changing their folder timestamp.
+    """
+
+    def __init__(self, max_entries=REFS_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            max_entries (int): Maximal number of entries
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.unsupported = 0
+        self._entries = collections.OrderedDict()
+
+    def read(self, top_repo_path):
+        """Read the references of a repository.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+        Returns:
+            Optional[Refs]: The references or None if only git can read them
+        """
+        entry = self._entries.get(top_repo_path)
+        if entry is not None:
+            refs, signatures = entry
+            if all(stat_signature(path) == signature for path, signature in signatures):
+                self.hits += 1
+                self._entries.move_to_end(top_repo_path)
+                return refs
+            del self._entries[top_repo_path]
+
+        self.misses += 1
+        try:
+            refs, signatures = _read_refs(top_repo_path)
+        except (UnsupportedRepository, OSError, UnicodeDecodeError):
+            self.unsupported += 1
+            return None
+
+        limit = (time.time() - REFS_MIN_AGE_S) * 1e9
+        if all(signature is None or signature[2] < limit for _, signature in signatures):
+            self._entries[top_repo_path] = (refs, signatures)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return refs
+
+    def stats(self):
+        """Get the cache statistics."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "unsupported": self.unsupported,
+        }
+
+
+def _read_refs(top_repo_path):
+    """Read the references of a repository from its git folder.
+
+    Returns:
+        (Refs, List[Tuple[str, Optional[Tuple[int, int, int]]]]): The references
+            and the stat signatures of the files and folders read
+    Raises:
+        UnsupportedRepository: if the repository cannot be read without git
+    """
+    git_dir = find_git_dir(top_repo_path)
+    if git_dir is None:
+        raise UnsupportedRepository("No git folder")
+    common_dir = find_common_dir(git_dir)
+    if os.path.exists(os.path.join(common_dir, "reftable")):
+        raise UnsupportedRepository("Unsupported references storage")
+
+    # Get the signatures first; a change while reading invalidates the snapshot
+    config_file = os.path.join(common_dir, "config")
+    packed_refs_file = os.path.join(common_dir, "packed-refs")
+    head_file = os.path.join(git_dir, "HEAD")
+    signatures = [
+        (path, stat_signature(path)) for path in (config_file, packed_refs_file, head_file)
+    ]
+    refs_folders = []
+    for folder, _, files in os.walk(os.path.join(common_dir, "refs")):
+        refs_folders.append((folder, files))
+        signatures.append((folder, stat_signature(folder)))
+
+    with open(config_file) as config_content:
+        config = parse_config(config_content.read())
+    if any(
+        key[0] == "extensions"
+        and key[2] in ("refstorage", "worktreeconfig")
+        and value[-1].lower() not in ("files", "false")
+        for key, value in config.items()
+    ):
+        raise UnsupportedRepository("Unsupported repository extension")
+
+    head = _read_ref_file(head_file)
+    if head is None:
+        raise UnsupportedRepository("Unsupported HEAD")
+
+    try:
+        with open(packed_refs_file) as packed_refs:
+            refs = parse_packed_refs(packed_refs.read())
+    except FileNotFoundError:
+        refs = {}
+    for folder, files in refs_folders:
+        prefix = os.path.relpath(folder, common_dir).replace(os.sep, "/") + "/"
+        for name in files:
+            if name.endswith(".lock"):
+                continue
+            value = _read_ref_file(os.path.join(folder, name))
+            if value is not None:
+                refs[prefix + name] = value
+
+    return Refs(git_dir, head, refs, config), signatures
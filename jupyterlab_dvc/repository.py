@@ -0,0 +1,436 @@
+"""
+Module inspecting git repositories on the file system, without spawning git
+"""
+import collections
+import hashlib
+import os
+import re
+import struct
+import time
+
+# Maximal number of working tree folders inspected to fingerprint a repository
+MAX_FINGERPRINT_FOLDERS = 10000
+# Period after which a repository fingerprint changes even if no change is detected
+# Modifications in place of a file do not change the folder timestamps.
+FINGERPRINT_MAX_AGE_S = 30
+# Git folder files whose changes may modify the status or the branches; the
+# index holds the untracked cache and the fsmonitor token
+FINGERPRINT_GIT_FILES = ("index", "HEAD", "packed-refs", "config", "MERGE_HEAD")
+# Maximal number of repositories whose ignored folders are cached
+IGNORED_FOLDERS_CACHE_MAX_ENTRIES = 100
+# Maximal number of paths whose repository resolution is cached
+RESOLUTION_CACHE_MAX_ENTRIES = 1000
+# Folders modified less than this time ago may change again within their
+# timestamp granularity; their resolution is not cached
+RESOLUTION_MIN_AGE_S = 2
+# Environment variables changing how git discovers the repository of a folder
+GIT_DISCOVERY_VARIABLES = (
+    "GIT_DIR",
+    "GIT_WORK_TREE",
+    "GIT_COMMON_DIR",
+    "GIT_CEILING_DIRECTORIES",
+    "GIT_DISCOVERY_ACROSS_FILESYSTEM",
+)
+# Configuration moving the working tree away from the folder holding `.git`
+WORKTREE_CONFIG_PATTERN = re.compile(
+    r"^\s*(worktree\s*=|bare\s*=\s*(true|yes|on|1)\s*$)", re.IGNORECASE | re.MULTILINE
+)
+
+
+def find_repository(path):
+    """Find the top-level folder of the repository containing path.
+
+    The lookup walks up the folder tree looking for a `.git` folder or
+    gitfile; it does not spawn git.
+
+    Args:
+        path (str): Path inside the repository
+    Returns:
+        Optional[str]: Repository top-level folder or None if not in a repository
+    """
+    current = os.path.realpath(path)
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def find_git_dir(top_repo_path):
+    """Find the git folder of a repository.
+
+    Worktrees and submodules have a gitfile pointing to their git folder
+    instead of a `.git` folder.
+
+    Args:
+        top_repo_path (str): Repository top-level folder
+    Returns:
+        Optional[str]: The git folder or None if it cannot be determined
+    """
+    git_dir = os.path.join(top_repo_path, ".git")
+    if os.path.isdir(git_dir):
+        return git_dir
+    try:
+        with open(git_dir) as gitfile:
+            content = gitfile.read().strip()
+    except OSError:
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    return os.path.normpath(
+        os.path.join(top_repo_path, content[len("gitdir:") :].strip())
+    )
+
+
+def find_common_dir(git_dir):
+    """Find the folder holding the references shared by the worktrees.
+
+    Args:
+        git_dir (str): Git folder of a repository
+    Returns:
+        str: The common folder; git_dir itself except for linked worktrees
+    """
+    try:
+        with open(os.path.join(git_dir, "commondir")) as commondir:
+            return os.path.normpath(os.path.join(git_dir, commondir.read().strip()))
+    except OSError:
+        return git_dir
+
+
+def is_git_dir(folder):
+    """Whether a folder is a git folder, as git checks it.
+
+    Args:
+        folder (str): Folder
+    Returns:
+        bool: True if the folder has a HEAD and (shared) objects and references
+    """
+    if not os.path.isfile(os.path.join(folder, "HEAD")):
+        return False
+    common_dir = find_common_dir(folder)
+    return os.path.isdir(os.path.join(common_dir, "objects")) and os.path.isdir(
+        os.path.join(common_dir, "refs")
+    )
+
+
+def discover_repository(path):
+    """Find the repository of a folder and the prefix of the folder in it.
+
+    It mimics the discovery of git: the folder tree is walked up looking for
+    a `.git` folder or gitfile, stopping at the file system boundaries. The
+    cases in which git may answer differently - bare repositories, custom
+    working tree, not owned repository... - are ambiguous.
+
+    Args:
+        path (str): Real path of a folder
+    Returns:
+        Optional[Tuple[Tuple[Optional[str], str], List[Tuple[str, Tuple[int, int, int]]]]]:
+            ((top-level folder or None if not in a repository, prefix), stat
+            signatures of the inspected paths) or None if ambiguous
+    """
+    try:
+        device = os.stat(path).st_dev
+    except OSError:
+        return None
+    if not os.path.isdir(path):
+        return None
+
+    signatures = []
+    current = path
+    while True:
+        signature = stat_signature(current)
+        if signature is None or is_git_dir(current):
+            return None
+        signatures.append((current, signature))
+
+        dot_git = os.path.join(current, ".git")
+        if os.path.lexists(dot_git):
+            git_dir = find_git_dir(current)
+            if git_dir is None or not is_git_dir(git_dir):
+                return None
+            if git_dir != dot_git:
+                signatures.append((dot_git, stat_signature(dot_git)))
+            # The configuration is replaced by a rename, changing the folder timestamp
+            signatures.append((git_dir, stat_signature(git_dir)))
+            try:
+                with open(os.path.join(find_common_dir(git_dir), "config")) as config:
+                    if WORKTREE_CONFIG_PATTERN.search(config.read()):
+                        return None
+            except FileNotFoundError:
+                pass
+            except OSError:
+                return None
+            try:
+                if hasattr(os, "geteuid") and os.stat(current).st_uid != os.geteuid():
+                    return None
+            except OSError:
+                return None
+            prefix = os.path.relpath(path, current)
+            prefix = "" if prefix == os.curdir else prefix.replace(os.sep, "/") + "/"
+            return (current, prefix), signatures
+
+        parent = os.path.dirname(current)
+        if parent == current:
+            return (None, ""), signatures
+        try:
+            if os.stat(parent).st_dev != device:
+                return (None, ""), signatures
+        except OSError:
+            return None
+        current = parent
+
+
+class RepositoryResolver:
+    """Least recently used cache of the repository resolution of folders.
+
+    A resolution is valid as long as the inspected folders timestamps are
+    unchanged; a `.git` appearing or vanishing modifies its parent folder.
+    """
+
+    def __init__(self, max_entries=RESOLUTION_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            max_entries (int): Maximal number of entries
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.ambiguous = 0
+        self._entries = collections.OrderedDict()
+
+    def resolve(self, path):
+        """Resolve the repository of a folder.
+
+        Args:
+            path (str): Folder
+        Returns:
+            Optional[Tuple[Optional[str], str]]: (top-level folder or None if not
+                in a repository, prefix of the folder in the repository) or None
+                if only git can tell
+        """
+        if any(name in os.environ for name in GIT_DISCOVERY_VARIABLES):
+            self.ambiguous += 1
+            return None
+
+        path = os.path.realpath(path)
+        entry = self._entries.get(path)
+        if entry is not None:
+            result, signatures = entry
+            if all(stat_signature(name) == signature for name, signature in signatures):
+                self.hits += 1
+                self._entries.move_to_end(path)
+                return result
+            del self._entries[path]
+
+        self.misses += 1
+        discovery = discover_repository(path)
+        if discovery is None:
+            self.ambiguous += 1
+            return None
+        result, signatures = discovery
+        limit = (time.time() - RESOLUTION_MIN_AGE_S) * 1e9
+        if all(signature is not None and signature[2] < limit for _, signature in signatures):
+            self._entries[path] = discovery
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        """Get the cache statistics."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "ambiguous": self.ambiguous,
+        }
+
+
+def stat_signature(path):
+    """Get the stat signature of a file or folder.
+
+    Args:
+        path (str): File or folder
+    Returns:
+        Optional[Tuple[int, int, int]]: (inode, size, mtime) or None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def read_index_header(top_repo_path):
+    """Read the version and the number of entries of the index of a repository.
+
+    Only the 12 bytes header is read, so this is cheap even for large indexes.
+
+    Args:
+        top_repo_path (str): Repository top-level folder
+    Returns:
+        Optional[Tuple[int, int]]: (version, number of entries) or None if the
+            index does not exist or is not valid
+    """
+    git_dir = find_git_dir(top_repo_path)
+    if git_dir is None:
+        return None
+    try:
+        with open(os.path.join(git_dir, "index"), "rb") as index:
+            header = index.read(12)
+    except OSError:
+        return None
+    if len(header) != 12 or header[:4] != b"DIRC":
+        return None
+    return struct.unpack(">II", header[4:])
+
+
+def compute_fingerprint(top_repo_path, ignored=frozenset(), max_age=FINGERPRINT_MAX_AGE_S):
+    """Compute a fingerprint of the repository state.
+
+    The fingerprint covers the index, HEAD, the references, the exclusions and
+    the working tree folders timestamps (that change when a file is created,
+    deleted or saved atomically), ignored folders excluded. It also changes
+    every max_age seconds to catch files modified in place.
+
+    Args:
+        top_repo_path (str): Repository top-level folder
+        ignored (Set[str]): Ignored folders, relative to top_repo_path and "/"
+            separated; they are not inspected
+        max_age (float): Validity period of the fingerprint; 0 to disable it
+    Returns:
+        Optional[str]: The fingerprint or None if disabled, the repository is
+            too large or cannot be inspected
+    """
+    if max_age <= 0:
+        return None
+    git_dir = find_git_dir(top_repo_path)
+    if git_dir is None:
+        return None
+
+    signature = hashlib.sha1()
+
+    def update(*items):
+        signature.update(repr(items).encode("utf-8"))
+
+    common_dir = find_common_dir(git_dir)
+
+    update(int(time.time() // max_age))
+    for name in FINGERPRINT_GIT_FILES:
+        update(name, stat_signature(os.path.join(git_dir, name)))
+    if common_dir != git_dir:
+        update(stat_signature(os.path.join(common_dir, "packed-refs")))
+    update(stat_signature(os.path.join(common_dir, "info", "exclude")))
+    for folder, _, files in os.walk(os.path.join(common_dir, "refs")):
+        for name in files:
+            path = os.path.join(folder, name)
+            update(path, stat_signature(path))
+
+    n_folders = 0
+    # (folder, path relative to top_repo_path with a trailing "/")
+    pending = [(top_repo_path, "")]
+    while pending:
+        folder, prefix = pending.pop()
+        n_folders += 1
+        if n_folders > MAX_FINGERPRINT_FOLDERS:
+            return None
+        update(prefix, stat_signature(folder))
+        try:
+            # The entry types come with the folder listing, only folders are stat'ed
+            with os.scandir(folder) as entries:
+                subfolders = sorted(
+                    entry.name
+                    for entry in entries
+                    if entry.is_dir(follow_symlinks=False)
+                )
+        except OSError:
+            continue
+        for name in subfolders:
+            # Nested repositories are not part of the working tree
+            relative = prefix + name
+            if name != ".git" and relative not in ignored:
+                pending.append((os.path.join(folder, name), relative + "/"))
+
+    return signature.hexdigest()
+
+
+def ignore_signature(top_repo_path):
+    """Get the stat signature of what decides the ignored folders of a repository.
+
+    The nested .gitignore files are not covered: a folder ignored by them is
+    only noticed once the top-level folder or exclusions change.
+
+    Args:
+        top_repo_path (str): Repository top-level folder
+    Returns:
+        Optional[tuple]: Signature of the top-level folder, .gitignore and
+            info/exclude or None if not in a repository
+    """
+    git_dir = find_git_dir(top_repo_path)
+    if git_dir is None:
+        return None
+    return (
+        stat_signature(top_repo_path),
+        stat_signature(os.path.join(top_repo_path, ".gitignore")),
+        stat_signature(os.path.join(find_common_dir(git_dir), "info", "exclude")),
+    )
+
+
+class IgnoredFolders:
+    """Least recently used cache of the ignored folders of repositories.
+
+    The folders of a repository are valid as long as its ignore_signature is
+    unchanged.
+    """
+
+    def __init__(self, max_entries=IGNORED_FOLDERS_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            max_entries (int): Maximal number of entries
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # top_repo_path -> (signature, folders)
+        self._entries = collections.OrderedDict()
+
+    def get(self, top_repo_path, signature):
+        """Get the ignored folders of a repository.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+            signature (tuple): Current ignore_signature of the repository
+        Returns:
+            Optional[FrozenSet[str]]: The folders or None if unknown or outdated
+        """
+        entry = self._entries.get(top_repo_path)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            self._entries.move_to_end(top_repo_path)
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, top_repo_path, signature, folders):
+        """Store the ignored folders of a repository.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+            signature (tuple): ignore_signature when the folders were listed
+            folders (FrozenSet[str]): Ignored folders
+        """
+        self._entries[top_repo_path] = (signature, folders)
+        self._entries.move_to_end(top_repo_path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Get the cache statistics."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,245 @@
+"""
+Module scheduling the execution of git commands
+
+Commands run on a thread pool dedicated to the extension, within global and
+per repository concurrency limits. Commands waiting for a slot are queued by
+scheduling class: mutations go first, then interactive requests are preferred
+over background polling, which still gets a fair share of the slots.
+"""
+import asyncio
+import collections
+import contextlib
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Scheduling classes, by decreasing priority
+MUTATION = "mutation"
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+SCHEDULING_CLASSES = (MUTATION, INTERACTIVE, BACKGROUND)
+# Maximal number of commands running at the same time
+MAX_CONCURRENT_COMMANDS = 8
+# Maximal number of commands running at the same time in a repository
+MAX_CONCURRENT_COMMANDS_PER_REPOSITORY = 4
+# One slot out of BACKGROUND_SHARE goes to background commands if any is waiting
+BACKGROUND_SHARE = 4
+
+# Scheduling class of the commands executed in the current context
+scheduling_class = contextvars.ContextVar("scheduling_class", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def scheduled_as(priority):
+    """Context in which the commands are executed with a scheduling class.
+
+    Args:
+        priority (str): Scheduling class; one of SCHEDULING_CLASSES
+    """
+    token = scheduling_class.set(priority)
+    try:
+        yield
+    finally:
+        scheduling_class.reset(token)
+
+
+class CommandScheduler:
+    """Grant execution slots to commands within concurrency limits."""
+
+    def __init__(
+        self,
+        max_commands=MAX_CONCURRENT_COMMANDS,
+        max_commands_per_repository=MAX_CONCURRENT_COMMANDS_PER_REPOSITORY,
+    ):
+        """
+        Args:
+            max_commands (int): Maximal number of concurrent commands
+            max_commands_per_repository (int): Maximal number of concurrent commands in a repository
+        """
+        self.max_commands = max_commands
+        self.max_commands_per_repository = max_commands_per_repository
+        self._executor = None
+        self._running = 0
+        self._running_per_repository = collections.Counter()
+        # Scheduling class -> waiting (repository, future) in arrival order
+        self._waiting = {priority: collections.deque() for priority in SCHEDULING_CLASSES}
+        self._grants = 0
+        self._executed = collections.Counter()
+        self._wait_time = collections.Counter()
+        self._max_queued = 0
+        # Background commands waiting to run -> future of their result
+        self._waiting_commands = {}
+        self.coalesced = 0
+        # Number of commands which modified a repository
+        self.mutations = 0
+
+    @property
+    def executor(self):
+        """Thread pool on which the blocking command calls run."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_commands, thread_name_prefix="jupyterlab-dvc"
+            )
+        return self._executor
+
+    def configure(self, max_commands, max_commands_per_repository):
+        """Change the concurrency limits.
+
+        Args:
+            max_commands (int): Maximal number of concurrent commands
+            max_commands_per_repository (int): Maximal number of concurrent commands in a repository
+        """
+        if max_commands != self.max_commands and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.max_commands = max_commands
+        self.max_commands_per_repository = max_commands_per_repository
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, repository, priority=None):
+        """Context holding an execution slot.
+
+        Args:
+            repository (str): Repository in which the command runs
+            priority (Optional[str]): Scheduling class; default to the class of the current context
+        """
+        priority = priority or scheduling_class.get()
+        future = asyncio.get_event_loop().create_future()
+        waiting = self._waiting[priority]
+        waiting.append((repository, future))
+        self._max_queued = max(self._max_queued, self.queued)
+        start = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                with contextlib.suppress(ValueError):
+                    waiting.remove((repository, future))
+            else:
+                # The slot was granted in the meantime
+                self._release(repository)
+            raise
+        self._wait_time[priority] += time.monotonic() - start
+        self._executed[priority] += 1
+        try:
+            yield
+        finally:
+            self._release(repository)
+
+    @property
+    def queued(self):
+        """Number of commands waiting for a slot."""
+        return sum(len(waiting) for waiting in self._waiting.values())
+
+    def stats(self):
+        """Get the scheduler statistics."""
+        return {
+            "max_commands": self.max_commands,
+            "max_commands_per_repository": self.max_commands_per_repository,
+            "running": self._running,
+            "queued": {
+                priority: len(waiting) for priority, waiting in self._waiting.items()
+            },
+            "max_queued": self._max_queued,
+            "executed": {priority: self._executed[priority] for priority in SCHEDULING_CLASSES},
+            "wait_time_s": {
+                priority: round(self._wait_time[priority], 3)
+                for priority in SCHEDULING_CLASSES
+            },
+            "coalesced": self.coalesced,
+        }
+
+    def waiting_command(self, key):
+        """Get the result of an identical background command waiting to run.
+
+        A command waiting for its lock or slot has not read the repository
+        yet; its result is as fresh as a new execution would be.
+
+        Args:
+            key (Hashable): Command key - repository, command line and environment
+        Returns:
+            Optional[asyncio.Future]: The future result or None if no such command is waiting
+        """
+        future = self._waiting_commands.get(key)
+        if future is not None:
+            self.coalesced += 1
+        return future
+
+    @contextlib.contextmanager
+    def coalescing(self, key):
+        """Context of a background command whose result may be shared.
+
+        The command sets the result of the future and calls `started` once
+        it starts reading the repository.
+
+        Args:
+            key (Hashable): Command key - repository, command line and environment
+        Yields:
+            asyncio.Future: Future receiving the command result
+        """
+        future = asyncio.get_event_loop().create_future()
+        self._waiting_commands[key] = future
+        try:
+            yield future
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            if not future.done():
+                future.set_exception(error)
+                # Do not warn if no identical command retrieved the error
+                future.exception()
+            raise
+        finally:
+            self.started(key, future)
+
+    def started(self, key, future):
+        """Stop sharing the result of a command once it runs.
+
+        Args:
+            key (Hashable): Command key
+            future (asyncio.Future): Future of the command result
+        """
+        if self._waiting_commands.get(key) is future:
+            del self._waiting_commands[key]
+
+    def _release(self, repository):
+        self._running -= 1
+        self._running_per_repository[repository] -= 1
+        if self._running_per_repository[repository] <= 0:
+            del self._running_per_repository[repository]
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant the free slots to the waiting commands."""
+        while self._running < self.max_commands:
+            entry = self._next()
+            if entry is None:
+                break
+            repository, future = entry
+            self._running += 1
+            self._running_per_repository[repository] += 1
+            self._grants += 1
+            future.set_result(None)
+
+    def _next(self):
+        """Pop the next command to execute."""
+        if self._grants % BACKGROUND_SHARE == BACKGROUND_SHARE - 1:
+            order = (MUTATION, BACKGROUND, INTERACTIVE)
+        else:
+            order = (MUTATION, INTERACTIVE, BACKGROUND)
+        for priority in order:
+            waiting = self._waiting[priority]
+            for entry in waiting:
+                repository, future = entry
+                if future.done():
+                    continue
+                if (
+                    self._running_per_repository[repository]
+                    < self.max_commands_per_repository
+                ):
+                    waiting.remove(entry)
+                    return entry
+        return None
@@ -0,0 +1,107 @@
+"""
+Module sharing the result of identical concurrent read operations
+
+Identical calls made while one is in flight wait for it instead of running
+git again. Optionally, results are reused for a short time after they
+completed, as long as no git command modified a repository in the meantime.
+"""
+import asyncio
+import copy
+import functools
+import time
+
+# Default time in seconds during which a read result is reused; 0 disables it
+READ_RESULT_TTL_S = 0
+
+
+class SingleFlight:
+    """Registry of the in-flight and recent read operations."""
+
+    def __init__(self, generation, ttl=READ_RESULT_TTL_S):
+        """
+        Args:
+            generation (Callable[[], int]): Counter increasing whenever a
+                repository is modified; results of an older generation are stale
+            ttl (float): Time in seconds during which a result is reused
+        """
+        self.ttl = ttl
+        self._generation = generation
+        # key -> (generation, future)
+        self._calls = {}
+        # key -> (generation, expiry, result)
+        self._results = {}
+        self.calls = 0
+        self.shared = 0
+        self.cached = 0
+
+    async def run(self, key, operation):
+        """Run an operation or share the result of an identical one.
+
+        Args:
+            key (Hashable): Operation and arguments
+            operation (Callable[[], Awaitable[Any]]): Operation
+        Returns:
+            Any: The operation result; the calls sharing it get their own deep
+                copy so that a caller mutating its result does not affect others
+        """
+        generation = self._generation()
+        cached = self._results.get(key)
+        if cached is not None:
+            if cached[0] == generation and cached[1] > time.monotonic():
+                self.cached += 1
+                return copy.deepcopy(cached[2])
+            del self._results[key]
+
+        call = self._calls.get(key)
+        if call is not None and call[0] == generation:
+            self.shared += 1
+            return copy.deepcopy(await asyncio.shield(call[1]))
+
+        self.calls += 1
+        future = asyncio.get_event_loop().create_future()
+        self._calls[key] = (generation, future)
+        try:
+            result = await operation()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Do not warn if no identical call retrieved the error
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if self.ttl > 0:
+                self._results[key] = (
+                    generation,
+                    time.monotonic() + self.ttl,
+                    copy.deepcopy(result),
+                )
+            return result
+        finally:
+            if self._calls.get(key, (None, None))[1] is future:
+                del self._calls[key]
+
+    def stats(self):
+        """Get the statistics."""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "cached": self.cached,
+            "ttl_s": self.ttl,
+        }
+
+
+def single_flight(method):
+    """Share the result of identical concurrent calls of a `Git` read method.
+
+    The method arguments must be hashable.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return await self._single_flight.run(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,10 @@
+import pytest
+
+from .testutils import run_git
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Empty repository; test modules override it to add their content."""
+    run_git(tmp_path, "init")
+    return tmp_path
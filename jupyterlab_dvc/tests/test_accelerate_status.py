@@ -0,0 +1,176 @@
+# python lib
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+# local lib
+from jupyterlab_dvc import git as git_module
+from jupyterlab_dvc.git import Git
+
+from .testutils import FakeContentManager, run_git
+
+
+def get_option(cwd, option):
+    return subprocess.run(
+        ["git", "config", "--get", option],
+        cwd=str(cwd),
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repository(repository):
+    for i in range(3):
+        (repository / "file{}.txt".format(i)).write_text("content")
+    run_git(repository, "add", "-A")
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_status_acceleration(repository):
+    # Given
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    # When
+    with patch.object(git_module, "LARGE_REPOSITORY_FILES", 2):
+        result = await git.status_acceleration(repository.name)
+
+    # Then
+    assert result == {
+        "code": 0,
+        "files": 3,
+        "index_version": 2,
+        "large": True,
+        "fsmonitor": result["fsmonitor"],
+        "options": {
+            "core.untrackedCache": None,
+            "feature.manyFiles": None,
+            "core.fsmonitor": None,
+        },
+        "enabled": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_accelerate_status(repository):
+    # Given
+    git = Git(FakeContentManager(str(repository)))
+
+    # When
+    enabled = await git.accelerate_status("")
+    options = {
+        option: get_option(repository, option)
+        for option in ("core.untrackedCache", "feature.manyFiles")
+    }
+    disabled = await git.accelerate_status("", enable=False)
+    git.close()
+
+    # Then
+    assert enabled["code"] == 0
+    assert enabled["enabled"]
+    assert enabled["index_version"] == 4
+    assert enabled["before_s"] >= 0 and enabled["after_s"] >= 0
+    assert options == {"core.untrackedCache": "true", "feature.manyFiles": "true"}
+    assert disabled["code"] == 0
+    assert not disabled["enabled"]
+    assert disabled["options"]["core.untrackedCache"] is None
+    assert disabled["index_version"] == 2
+    assert get_option(repository, "jupyterlab-dvc.accelerated") == ""
+
+
+@pytest.mark.asyncio
+async def test_accelerate_status_restores_previous_options(repository):
+    # Given
+    run_git(repository, "config", "core.untrackedCache", "false")
+    git = Git(FakeContentManager(str(repository)))
+
+    # When
+    await git.accelerate_status("")
+    enabled_again = await git.accelerate_status("")
+    disabled = await git.accelerate_status("", enable=False)
+    git.close()
+
+    # Then
+    assert enabled_again["enabled"]
+    assert disabled["code"] == 0
+    assert disabled["options"]["core.untrackedCache"] == "false"
+    assert disabled["options"]["feature.manyFiles"] is None
+
+
+@pytest.mark.asyncio
+async def test_disable_keeps_options_set_by_user(repository):
+    # Given
+    run_git(repository, "config", "core.untrackedCache", "true")
+    run_git(repository, "config", "feature.manyFiles", "true")
+    git = Git(FakeContentManager(str(repository)))
+
+    # When
+    disabled = await git.accelerate_status("", enable=False)
+    git.close()
+
+    # Then
+    assert disabled["code"] == 0
+    assert disabled["options"]["core.untrackedCache"] == "true"
+    assert disabled["options"]["feature.manyFiles"] == "true"
+
+
+@pytest.mark.asyncio
+async def test_accelerate_status_rolls_back_on_failure(repository):
+    # Given
+    run_git(repository, "config", "core.untrackedCache", "false")
+    git = Git(FakeContentManager(str(repository)))
+    execute = git_module.execute
+
+    async def failing_execute(cmdline, cwd, *args, **kwargs):
+        if cmdline[:3] == ["git", "update-index", "--index-version"] and cmdline[3] == "4":
+            return 128, "", "fatal: Unable to write new index file"
+        return await execute(cmdline, cwd, *args, **kwargs)
+
+    # When
+    with patch.object(git_module, "execute", failing_execute):
+        result = await git.accelerate_status("")
+    current = await git.status_acceleration("")
+    git.close()
+
+    # Then
+    assert result["code"] == 128
+    assert "--index-version 4" in result["command"]
+    assert current["options"] == {
+        "core.untrackedCache": "false",
+        "feature.manyFiles": None,
+        "core.fsmonitor": None,
+    }
+    assert current["index_version"] == 2
+    assert get_option(repository, "jupyterlab-dvc.accelerated") == ""
+
+
+@pytest.mark.asyncio
+async def test_fsmonitor_not_supported_by_old_git(repository):
+    # Given
+    git = Git(FakeContentManager(str(repository)))
+    git._git_version = (2, 35)
+    execute = git_module.execute
+    commands = []
+
+    async def recording_execute(cmdline, cwd, *args, **kwargs):
+        commands.append(cmdline)
+        return await execute(cmdline, cwd, *args, **kwargs)
+
+    # When
+    with patch.object(git_module, "execute", recording_execute):
+        result = await git.status_acceleration("")
+
+    # Then
+    assert result["fsmonitor"] is False
+    assert ["git", "fsmonitor--daemon", "status"] not in commands
+
+
+@pytest.mark.asyncio
+async def test_status_acceleration_not_a_repository(tmp_path):
+    # When
+    result = await Git(FakeContentManager(str(tmp_path))).status_acceleration("")
+
+    # Then
+    assert result["code"] == 128
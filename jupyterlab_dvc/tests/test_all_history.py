@@ -0,0 +1,290 @@
+# python lib
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+import tornado
+
+# local lib
+from jupyterlab_dvc.git import Git
+
+from .testutils import FakeContentManager
+
+
+def fake_execute(outputs):
+    """Answer each git sub-command with the corresponding (code, output, error)."""
+
+    def execute(cmdline, cwd):
+        command = cmdline[1]
+        if command == "rev-parse":
+            command = cmdline[2]
+        elif "--no-walk=unsorted" in cmdline:
+            command = "log-metadata"
+        return tornado.gen.maybe_future(outputs[command])
+
+    return execute
+
+
+LOG_OUTPUT = "abcdefghijklmnopqrstuvwxyz01234567890123 01234567899999abcdefghijklmnopqrstuvwxyz"
+LOG_METADATA_OUTPUT = "\n".join(
+    [
+        "abcdefghijklmnopqrstuvwxyz01234567890123",
+        "John Snow",
+        str(int(time.time()) - 2 * 3600),
+        "Winter is coming",
+    ]
+)
+LOG_RESULT = {
+    "code": 0,
+    "commits": [
+        {
+            "commit": "abcdefghijklmnopqrstuvwxyz01234567890123",
+            "author": "John Snow",
+            "date": "2 hours ago",
+            "commit_msg": "Winter is coming",
+            "pre_commit": "",
+        }
+    ],
+    "next": None,
+}
+
+
+@pytest.mark.asyncio
+async def test_all_history():
+    # Given
+    root = "/bin"
+    repository = "test_curr_path"
+    status = "\x00".join(
+        [
+            "# branch.oid abcdefghijklmnopqrstuvwxyz01234567890123",
+            "# branch.head feature-foo",
+            "# branch.upstream origin/feature-foo",
+            "# branch.ab +0 -0",
+            "1 A. N... 000000 100644 100644 0000 1234 notebook with spaces.ipynb",
+            "1 .M N... 100644 100644 100644 1234 1234 notebook with λ.ipynb",
+            "2 R. N... 100644 100644 100644 1234 1234 R100 renamed_to_θ.py",
+            "originally_named_π.py",
+            "u UU N... 100644 100644 100644 100644 1234 5678 9012 conflict.py",
+            "? untracked.ipynb",
+        ]
+    ) + "\x00"
+    refs = "\n".join(
+        [
+            "refs/heads/feature-foo\tfeature-foo\tabcdefghijklmnopqrstuvwxyz01234567890123\torigin/feature-foo\t*",
+            "refs/heads/master\tmaster\t01234567899999abcdefghijklmnopqrstuvwxyz\t\t ",
+            "refs/remotes/origin/feature-foo\torigin/feature-foo\tabcdefghijklmnopqrstuvwxyz01234567890123\t\t ",
+        ]
+    )
+
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        mock_execute.side_effect = fake_execute(
+            {
+                "--show-toplevel": (0, "/bin/test_curr_path\n", ""),
+                "for-each-ref": (0, refs, ""),
+                "log": (0, LOG_OUTPUT, ""),
+                "log-metadata": (0, LOG_METADATA_OUTPUT, ""),
+                "status": (0, status, ""),
+            }
+        )
+
+        # When
+        actual_response = await Git(FakeContentManager(root)).all_history(
+            repository, 10
+        )
+
+        # Then
+        cwd = os.path.join(root, repository)
+        assert mock_execute.call_count == 5
+        mock_execute.assert_any_call(
+            ["git", "status", "--porcelain=v2", "--branch", "-u", "-z"], cwd=cwd
+        )
+        mock_execute.assert_any_call(
+            [
+                "git",
+                "for-each-ref",
+                "--format=%(refname)%09%(refname:short)%09%(objectname)%09%(upstream:short)%09%(HEAD)",
+                "refs/heads/",
+                "refs/remotes/",
+            ],
+            cwd=cwd,
+        )
+
+    current_branch = {
+        "is_current_branch": True,
+        "is_remote_branch": False,
+        "name": "feature-foo",
+        "upstream": "origin/feature-foo",
+        "top_commit": "abcdefghijklmnopqrstuvwxyz01234567890123",
+        "tag": None,
+    }
+    assert actual_response == {
+        "code": 0,
+        "data": {
+            "show_top_level": {"code": 0, "top_repo_path": "/bin/test_curr_path"},
+            "branch": {
+                "code": 0,
+                "branches": [
+                    current_branch,
+                    {
+                        "is_current_branch": False,
+                        "is_remote_branch": False,
+                        "name": "master",
+                        "upstream": None,
+                        "top_commit": "01234567899999abcdefghijklmnopqrstuvwxyz",
+                        "tag": None,
+                    },
+                    {
+                        "is_current_branch": False,
+                        "is_remote_branch": True,
+                        "name": "origin/feature-foo",
+                        "upstream": None,
+                        "top_commit": "abcdefghijklmnopqrstuvwxyz01234567890123",
+                        "tag": None,
+                    },
+                ],
+                "current_branch": current_branch,
+            },
+            "log": LOG_RESULT,
+            "status": {
+                "code": 0,
+                "files": [
+                    {
+                        "x": "A",
+                        "y": " ",
+                        "to": "notebook with spaces.ipynb",
+                        "from": "notebook with spaces.ipynb",
+                    },
+                    {
+                        "x": " ",
+                        "y": "M",
+                        "to": "notebook with λ.ipynb",
+                        "from": "notebook with λ.ipynb",
+                    },
+                    {
+                        "x": "R",
+                        "y": " ",
+                        "to": "renamed_to_θ.py",
+                        "from": "originally_named_π.py",
+                    },
+                    {"x": "U", "y": "U", "to": "conflict.py", "from": "conflict.py"},
+                    {
+                        "x": "?",
+                        "y": "?",
+                        "to": "untracked.ipynb",
+                        "from": "untracked.ipynb",
+                    },
+                ],
+            },
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_all_history_empty_repository():
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        mock_execute.side_effect = fake_execute(
+            {
+                "--show-toplevel": (0, "/bin/test_curr_path\n", ""),
+                "for-each-ref": (0, "", ""),
+                "log": (
+                    128,
+                    "",
+                    "fatal: your current branch 'master' does not have any commits yet",
+                ),
+                "status": (
+                    0,
+                    "# branch.oid (initial)\x00# branch.head master\x00",
+                    "",
+                ),
+            }
+        )
+
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).all_history(
+            "test_curr_path", 10
+        )
+
+    # Then
+    current_branch = {
+        "is_current_branch": True,
+        "is_remote_branch": False,
+        "name": "master",
+        "upstream": None,
+        "top_commit": None,
+        "tag": None,
+    }
+    assert actual_response["data"]["branch"] == {
+        "code": 0,
+        "branches": [current_branch],
+        "current_branch": current_branch,
+    }
+    assert actual_response["data"]["status"] == {"code": 0, "files": []}
+    assert actual_response["data"]["log"]["code"] == 128
+
+
+@pytest.mark.asyncio
+async def test_all_history_detached_head():
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        mock_execute.side_effect = fake_execute(
+            {
+                "--show-toplevel": (0, "/bin/test_curr_path\n", ""),
+                "for-each-ref": (
+                    0,
+                    "refs/heads/master\tmaster\t01234567899999abcdefghijklmnopqrstuvwxyz\t\t ",
+                    "",
+                ),
+                "log": (0, LOG_OUTPUT, ""),
+                "log-metadata": (0, LOG_METADATA_OUTPUT, ""),
+                "status": (
+                    0,
+                    "# branch.oid abcdefghijklmnopqrstuvwxyz01234567890123\x00# branch.head (detached)\x00",
+                    "",
+                ),
+                "branch": (0, "* (HEAD detached at abcdefg)\n  master\n", ""),
+            }
+        )
+
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).all_history(
+            "test_curr_path", 10
+        )
+
+    # Then
+    assert actual_response["data"]["branch"]["current_branch"] == {
+        "is_current_branch": True,
+        "is_remote_branch": False,
+        "name": "(HEAD detached at abcdefg)",
+        "upstream": None,
+        "top_commit": None,
+        "tag": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_all_history_not_a_repository():
+    error = "fatal: not a git repository (or any of the parent directories): .git"
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        mock_execute.side_effect = fake_execute(
+            {
+                "--show-toplevel": (128, "", error),
+                "for-each-ref": (128, "", error),
+                "log": (128, "", error),
+                "status": (128, "", error),
+            }
+        )
+
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).all_history(
+            "test_curr_path", 10
+        )
+
+    # Then
+    assert actual_response == {
+        "code": 128,
+        "command": "git rev-parse --show-toplevel",
+        "message": error,
+    }
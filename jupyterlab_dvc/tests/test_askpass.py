@@ -0,0 +1,172 @@
+import os
+import subprocess
+
+import pytest
+import tornado
+
+from jupyterlab_dvc.askpass import AskPassServer, answer_prompt, is_remote_command
+from jupyterlab_dvc.askpass_client import TOKEN_VARIABLE
+from jupyterlab_dvc.git import askpass_server, execute
+
+from .testutils import run_git
+
+REMOTE = "protocol=https\nhost=example.com\n"
+
+
+def credential(env, operation, attributes=REMOTE):
+    """Run a git credential operation, through the configured helpers."""
+    return subprocess.run(
+        ["git", "credential", operation],
+        input=attributes + "\n",
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        universal_newlines=True,
+    )
+
+
+async def run_credential(server, operation, username=None, password=None, **kwargs):
+    loop = tornado.ioloop.IOLoop.current()
+    # Ignore the credential helpers of the user configuration
+    env = dict(os.environ, GIT_CONFIG_NOSYSTEM="1", HOME=os.devnull)
+    async with server.credentials(env, username, password) as command_env:
+        return await loop.run_in_executor(
+            None, lambda: credential(command_env, operation, **kwargs)
+        )
+
+
+@pytest.mark.parametrize(
+    "prompt, answer",
+    [
+        ("Username for 'https://github.com': ", "user"),
+        ("Password for 'https://user@github.com': ", "secret"),
+        ("Enter passphrase for key '/home/user/.ssh/id_rsa': ", None),
+    ],
+)
+def test_answer_prompt(prompt, answer):
+    assert answer_prompt(prompt, "user", "secret") == answer
+
+
+@pytest.mark.parametrize(
+    "cmdline, expected",
+    [
+        (["git", "push", "origin", "master"], True),
+        (["git", "clone", "https://github.com/org/repo"], True),
+        (["git", "remote", "prune", "origin"], True),
+        (["git", "remote", "add", "origin", "https://github.com/org/repo"], False),
+        (["git", "commit", "-m", "push"], False),
+        (["echo", "push"], False),
+    ],
+)
+def test_is_remote_command(cmdline, expected):
+    assert is_remote_command(cmdline) == expected
+
+
+@pytest.mark.asyncio
+async def test_askpass_gives_credentials():
+    server = AskPassServer()
+    try:
+        process = await run_credential(server, "fill", "user", "pass word")
+
+        assert process.returncode == 0
+        assert "username=user\npassword=pass word\n" in process.stdout
+        assert server.stats()["running"] == 0
+        assert server.stats()["refused"] == 0
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_askpass_refuses_unknown_token():
+    server = AskPassServer()
+    loop = tornado.ioloop.IOLoop.current()
+    try:
+        async with server.credentials(None, "user", "password") as env:
+            pass
+        # The credentials are forgotten once the command completed
+        process = await loop.run_in_executor(
+            None, lambda: credential(dict(env, HOME=os.devnull), "fill")
+        )
+
+        assert process.returncode != 0
+        assert "password=" not in process.stdout
+        assert server.stats()["refused"] >= 1
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_askpass_caches_credentials():
+    server = AskPassServer()
+    approved = REMOTE + "username=user\npassword=secret\n"
+    try:
+        # Without credentials, git cannot authenticate
+        assert (await run_credential(server, "fill")).returncode != 0
+
+        # git stores the credentials which authenticated an operation
+        await run_credential(server, "approve", "user", "secret", attributes=approved)
+        process = await run_credential(server, "fill")
+        assert process.returncode == 0
+        assert "username=user\npassword=secret\n" in process.stdout
+        # The credentials are only given for the same remote
+        other = "protocol=https\nhost=example.org\n"
+        assert (await run_credential(server, "fill", attributes=other)).returncode != 0
+
+        # git erases the credentials rejected by the remote
+        await run_credential(server, "reject", attributes=approved)
+        assert (await run_credential(server, "fill")).returncode != 0
+        assert server.stats()["cache"]["entries"] == 0
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_askpass_cache_disabled():
+    server = AskPassServer(credential_cache_ttl=0)
+    approved = REMOTE + "username=user\npassword=secret\n"
+    try:
+        await run_credential(server, "approve", "user", "secret", attributes=approved)
+
+        assert (await run_credential(server, "fill")).returncode != 0
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_execute_with_authentication(tmp_path):
+    code, output, _ = await execute(
+        ["sh", "-c", '"$GIT_ASKPASS" "Password for \'https://host\': "'],
+        cwd=str(tmp_path),
+        env={"PATH": "/usr/bin:/bin"},
+        username="user",
+        password="secret",
+    )
+
+    assert (code, output) == (0, "secret\n")
+    assert askpass_server.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_without_authentication_has_no_askpass(tmp_path):
+    code, output, _ = await execute(
+        ["sh", "-c", 'echo "${}"'.format(TOKEN_VARIABLE)],
+        cwd=str(tmp_path),
+        env={"PATH": "/usr/bin:/bin"},
+    )
+
+    assert (code, output) == (0, "\n")
+
+
+@pytest.mark.asyncio
+async def test_execute_remote_command(tmp_path):
+    remote = tmp_path / "remote.git"
+    run_git(tmp_path, "init", "--bare", str(remote))
+
+    code, _, error = await execute(
+        ["git", "clone", remote.as_uri(), "clone"],
+        cwd=str(tmp_path),
+        env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+    )
+
+    assert code == 0, error
+    assert (tmp_path / "clone" / ".git").is_dir()
@@ -0,0 +1,198 @@
+import datetime
+import os
+import tempfile
+
+import pytest
+import tornado
+
+from jupyterlab_dvc.blob import (
+    RangeNotSatisfiable,
+    parse_byte_range,
+    parse_line_range,
+    slice_bytes,
+    slice_lines,
+)
+from jupyterlab_dvc.git import Git, command_scheduler, repository_lock
+
+from .testutils import FakeContentManager, run_git, ServerTest
+
+
+CONTENT = b"".join(b"line %d\n" % i for i in range(1, 1001))
+
+
+def make_repository(path):
+    run_git(path, "init")
+    with open(os.path.join(str(path), "data.txt"), "wb") as f:
+        f.write(CONTENT)
+    run_git(path, "add", "data.txt")
+    run_git(path, "commit", "-m", "Add data")
+    with open(os.path.join(str(path), "data.txt"), "ab") as f:
+        f.write(b"working\n")
+
+
+async def chunked(content, size):
+    for start in range(0, len(content), size):
+        yield content[start : start + size]
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-99", (0, 100)),
+        ("bytes=100-", (100, 1000)),
+        ("bytes=-100", (900, 1000)),
+        ("bytes=900-2000", (900, 1000)),
+        ("bytes=-2000", (0, 1000)),
+        ("bytes=10-5", None),
+        ("bytes=0-1,5-10", None),
+        ("items=0-10", None),
+    ],
+)
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, 1000) == expected
+
+
+def test_parse_byte_range_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range("bytes=1000-", 1000)
+
+
+def test_parse_line_range():
+    assert parse_line_range("1-10") == (1, 10)
+    assert parse_line_range("5-") == (5, None)
+    for value in ("0-10", "10-5", "a-b", "-5"):
+        with pytest.raises(ValueError):
+            parse_line_range(value)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+@pytest.mark.parametrize("start, end", [(0, None), (0, 10), (95, 1200), (5000, None)])
+async def test_slice_bytes(chunk_size, start, end):
+    actual = await collect(slice_bytes(chunked(CONTENT, chunk_size), start, end))
+
+    assert actual == CONTENT[start:end]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+@pytest.mark.parametrize("first, last", [(1, None), (1, 1), (10, 20), (999, 2000)])
+async def test_slice_lines(chunk_size, first, last):
+    lines = CONTENT.splitlines(keepends=True)
+
+    actual = await collect(slice_lines(chunked(CONTENT, chunk_size), first, last))
+
+    assert actual == b"".join(lines[first - 1 : last])
+
+
+@pytest.mark.asyncio
+async def test_blob(tmp_path):
+    # Given
+    make_repository(tmp_path)
+    git = Git(FakeContentManager(str(tmp_path)))
+
+    # When
+    size, sha, read = await git.blob("data.txt", {"git": "HEAD"}, str(tmp_path))
+    head = await collect(read(10, 30))
+    working_size, working_sha, working_read = await git.blob(
+        "data.txt", {"special": "WORKING"}, str(tmp_path)
+    )
+    working_tail = await collect(working_read(len(CONTENT), None))
+    missing = await git.blob("missing.txt", {"git": "HEAD"}, str(tmp_path))
+    escaping = await git.blob("../data.txt", {"special": "WORKING"}, str(tmp_path))
+
+    # Then
+    assert size == len(CONTENT)
+    assert len(sha) == 40
+    assert head == CONTENT[10:30]
+    assert working_size == len(CONTENT) + len(b"working\n")
+    assert working_sha is None
+    assert working_tail == b"working\n"
+    assert missing is None
+    assert escaping is None
+    git.close()
+
+
+@pytest.mark.asyncio
+async def test_blob_streams_without_repository_lock(tmp_path):
+    # Given
+    make_repository(tmp_path)
+    git = Git(FakeContentManager(str(tmp_path)))
+    _, _, read = await git.blob("data.txt", {"git": "HEAD"}, str(tmp_path))
+    lock = repository_lock(str(tmp_path))
+    executed = command_scheduler.stats()["executed"]["interactive"]
+
+    # When
+    await lock.acquire_write()
+    try:
+        result = await tornado.gen.with_timeout(
+            datetime.timedelta(seconds=5), collect(read(0, 10))
+        )
+    finally:
+        lock.release_write()
+
+    # Then
+    assert result == CONTENT[:10]
+    assert command_scheduler.stats()["executed"]["interactive"] == executed
+    git.close()
+
+
+class TestBlob(ServerTest):
+    def setUp(self):
+        super().setUp()
+        self.repository = tempfile.mkdtemp(dir=self.notebook_dir)
+        make_repository(self.repository)
+
+    def get_blob(self, headers=None, **params):
+        params = dict(
+            {
+                "top_repo_path": os.path.basename(self.repository),
+                "filename": "data.txt",
+            },
+            **params
+        )
+        return self.request("GET", "/git/blob", params=params, headers=headers or {})
+
+    def test_blob(self):
+        response = self.get_blob(ref="HEAD")
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["Accept-Ranges"] == "bytes"
+        etag = response.headers["Etag"]
+
+        response = self.get_blob(headers={"If-None-Match": etag}, ref="HEAD")
+
+        assert response.status_code == 304
+
+    def test_blob_range(self):
+        response = self.get_blob(headers={"Range": "bytes=-8"}, special="WORKING")
+
+        assert response.status_code == 206
+        assert response.content == b"working\n"
+        size = len(CONTENT) + len(b"working\n")
+        assert response.headers["Content-Range"] == "bytes {}-{}/{}".format(
+            size - 8, size - 1, size
+        )
+
+    def test_blob_range_not_satisfiable(self):
+        response = self.get_blob(headers={"Range": "bytes=100000-"}, ref="HEAD")
+
+        assert response.status_code == 416
+        assert response.headers["Content-Range"] == "bytes */{}".format(len(CONTENT))
+
+    def test_blob_lines(self):
+        response = self.get_blob(ref="HEAD", lines="2-3")
+
+        assert response.status_code == 200
+        assert response.content == b"line 2\nline 3\n"
+
+    def test_blob_not_found(self):
+        response = self.get_blob(ref="HEAD", filename="missing.txt")
+
+        assert response.status_code == 404
@@ -829,3 +829,115 @@ async def test_branch_success_detached_head():
         )
 
         assert expected_response == actual_response
+
+
+BRANCHES_HEADS_OUTPUT = "\n".join(
+    [
+        "feature-bar\t01234567899999abcdefghijklmnopqrstuvwxyz\t\t ",
+        "feature-foo\tabcdefghijklmnopqrstuvwxyz01234567890123\torigin/feature-foo\t ",
+        "fix-foo\tabcdefghijklmnopqrstuvwxyz01234567890123\t\t ",
+        "master\tabcdefghijklmnopqrstuvwxyz01234567890123\torigin/master\t*",
+    ]
+)
+BRANCHES_REMOTES_OUTPUT = "\n".join(
+    [
+        "origin/feature-foo\tabcdefghijklmnopqrstuvwxyz01234567890123",
+        "origin/master\tabcdefghijklmnopqrstuvwxyz01234567890123",
+    ]
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "kwargs, names, total, next_offset",
+    [
+        (
+            {"limit": 2},
+            ["master", "origin/master", "feature-bar", "feature-foo"],
+            4,
+            2,
+        ),
+        ({"offset": 2, "limit": 2}, ["fix-foo", "origin/feature-foo"], 4, None),
+        ({"limit": 0}, ["master", "origin/master"], 4, 0),
+        (
+            {"name_filter": "foo"},
+            ["master", "origin/master", "feature-foo", "fix-foo", "origin/feature-foo"],
+            3,
+            None,
+        ),
+        (
+            {"name_filter": "feature", "match": "prefix"},
+            ["master", "origin/master", "feature-bar", "feature-foo"],
+            2,
+            None,
+        ),
+    ],
+)
+async def test_branch_page(kwargs, names, total, next_offset):
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        mock_execute.side_effect = [
+            tornado.gen.maybe_future((0, BRANCHES_HEADS_OUTPUT, "")),
+            tornado.gen.maybe_future((0, BRANCHES_REMOTES_OUTPUT, "")),
+        ]
+
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).branch(
+            "test_curr_path", **kwargs
+        )
+
+    # Then
+    # The current branch and its upstream always come first
+    assert [branch["name"] for branch in actual_response["branches"]] == names
+    assert actual_response["current_branch"]["name"] == "master"
+    assert actual_response["total"] == total
+    assert actual_response["next"] == next_offset
+
+
+@pytest.mark.asyncio
+async def test_branch_sort_by_committer_date():
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        dates_output = "\n".join(
+            ["fix-foo", "origin/feature-foo", "master", "feature-foo", "origin/master", "feature-bar"]
+        )
+        mock_execute.side_effect = [
+            tornado.gen.maybe_future((0, BRANCHES_HEADS_OUTPUT, "")),
+            tornado.gen.maybe_future((0, BRANCHES_REMOTES_OUTPUT, "")),
+            tornado.gen.maybe_future((0, dates_output, "")),
+        ]
+
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).branch(
+            "test_curr_path", sort="committerdate", limit=10
+        )
+
+    # Then
+    mock_execute.assert_called_with(
+        [
+            "git",
+            "for-each-ref",
+            "--sort=-committerdate",
+            "--format=%(refname:short)",
+            "refs/heads/",
+            "refs/remotes/",
+        ],
+        cwd=os.path.join("/bin", "test_curr_path"),
+    )
+    assert [branch["name"] for branch in actual_response["branches"]] == [
+        "master",
+        "origin/master",
+        "fix-foo",
+        "origin/feature-foo",
+        "feature-foo",
+        "feature-bar",
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "kwargs", [{"sort": "author"}, {"offset": -1}, {"offset": "1"}, {"limit": 2.5}]
+)
+async def test_branch_invalid_page(kwargs):
+    with pytest.raises(tornado.web.HTTPError):
+        await Git(FakeContentManager("/bin")).branch("test_curr_path", **kwargs)
@@ -0,0 +1,210 @@
+from unittest.mock import patch
+
+import pytest
+import tornado
+
+from jupyterlab_dvc.catfile import (
+    CatFileError,
+    CatFilePool,
+    CatFileProcess,
+    CheckAttrProcess,
+)
+from jupyterlab_dvc.git import Git, command_scheduler, repository_lock
+
+from .testutils import FakeContentManager, run_git
+
+
+@pytest.fixture
+def repository(repository):
+    (repository / "file.txt").write_text("first version\n")
+    (repository / "folder").mkdir()
+    (repository / "folder" / "λ.txt").write_text("unicode\n")
+    run_git(repository, "add", "-A")
+    run_git(repository, "commit", "-m", "Initial commit")
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_read(repository):
+    pool = CatFilePool(command_scheduler, repository_lock)
+    try:
+        sha, object_type, size, content = await pool.read(
+            str(repository), "HEAD:file.txt"
+        )
+        assert object_type == "blob"
+        assert size == len(b"first version\n")
+        assert content == b"first version\n"
+        assert len(sha) == 40
+
+        _, _, _, content = await pool.read(str(repository), "HEAD:folder/λ.txt")
+        assert content == "unicode\n".encode("utf-8")
+
+        assert await pool.read(str(repository), "HEAD:absent.txt") is None
+        assert await pool.read(str(repository), "unknown_ref:file.txt") is None
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_info(repository):
+    pool = CatFilePool(command_scheduler, repository_lock)
+    try:
+        _, object_type, size = await pool.info(str(repository), "HEAD:file.txt")
+        assert object_type == "blob"
+        assert size == len(b"first version\n")
+
+        _, object_type, _ = await pool.info(str(repository), "HEAD:folder")
+        assert object_type == "tree"
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_process_is_reused(repository):
+    pool = CatFilePool(command_scheduler, repository_lock)
+    try:
+        with patch(
+            "jupyterlab_dvc.catfile.CatFileProcess", wraps=CatFileProcess
+        ) as factory:
+            for _ in range(3):
+                await pool.read(str(repository), "HEAD:file.txt")
+        assert factory.call_count == 1
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_read_index_after_staging(repository):
+    pool = CatFilePool(command_scheduler, repository_lock)
+    try:
+        _, _, _, content = await pool.read(str(repository), ":file.txt")
+        assert content == b"first version\n"
+
+        (repository / "file.txt").write_text("second version\n")
+        run_git(repository, "add", "file.txt")
+
+        _, _, _, content = await pool.read(str(repository), ":file.txt")
+        assert content == b"second version\n"
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_check_attr(repository):
+    (repository / ".gitattributes").write_text("*.txt diff\n")
+    pool = CatFilePool(
+        command_scheduler, repository_lock, attributes=("binary", "diff")
+    )
+    try:
+        with patch(
+            "jupyterlab_dvc.catfile.CheckAttrProcess", wraps=CheckAttrProcess
+        ) as factory:
+            first = await pool.check_attr(str(repository), "file.txt")
+            second = await pool.check_attr(str(repository), "folder/λ.txt")
+        assert factory.call_count == 1
+    finally:
+        pool.close()
+
+    assert first == "file.txt\x00binary\x00unspecified\x00file.txt\x00diff\x00set\x00"
+    assert second == (
+        "folder/λ.txt\x00binary\x00unspecified\x00folder/λ.txt\x00diff\x00set\x00"
+    )
+
+
+@pytest.mark.asyncio
+async def test_check_attr_after_attributes_change(repository):
+    pool = CatFilePool(command_scheduler, repository_lock, attributes=("diff",))
+    try:
+        first = await pool.check_attr(str(repository), "folder/λ.txt")
+        (repository / "folder" / ".gitattributes").write_text("*.txt -diff\n")
+        second = await pool.check_attr(str(repository), "folder/λ.txt")
+    finally:
+        pool.close()
+
+    assert first == "folder/λ.txt\x00diff\x00unspecified\x00"
+    assert second == "folder/λ.txt\x00diff\x00unset\x00"
+
+
+@pytest.mark.asyncio
+async def test_idle_processes_are_evicted(repository):
+    pool = CatFilePool(command_scheduler, repository_lock, idle_timeout=0.05)
+    await pool.read(str(repository), "HEAD:file.txt")
+    (process,) = pool._idle[(str(repository.resolve()), "--batch")]
+    assert process.is_alive
+
+    await tornado.gen.sleep(0.2)
+
+    assert not process.is_alive
+    assert pool._idle == {}
+
+
+@pytest.mark.asyncio
+async def test_line_feed_in_spec_is_rejected(repository):
+    pool = CatFilePool(command_scheduler, repository_lock)
+    with pytest.raises(CatFileError):
+        await pool.read(str(repository), "HEAD:file\n.txt")
+
+
+@pytest.mark.asyncio
+async def test_git_show_reads_through_pool(repository):
+    git = Git(FakeContentManager(str(repository)))
+    try:
+        with patch("jupyterlab_dvc.git.execute") as mock_execute:
+            assert await git.show("file.txt", "HEAD", str(repository)) == "first version\n"
+            assert await git.show("absent.txt", "HEAD", str(repository)) == ""
+            mock_execute.assert_not_called()
+    finally:
+        git._cat_file.close()
+
+
+@pytest.mark.asyncio
+async def test_git_show_falls_back_on_git_show(repository):
+    git = Git(FakeContentManager(str(repository)))
+    with patch.object(git._cat_file, "read") as mock_read, patch(
+        "jupyterlab_dvc.git.execute"
+    ) as mock_execute:
+        mock_read.side_effect = CatFileError("broken pipe")
+        mock_execute.return_value = tornado.gen.maybe_future((0, "content", ""))
+
+        assert await git.show("file.txt", "HEAD", str(repository)) == "content"
+        mock_execute.assert_called_once_with(
+            ["git", "show", "HEAD:file.txt"], cwd=str(repository)
+        )
+
+
+@pytest.mark.asyncio
+async def test_request_waits_for_repository_write_lock(repository):
+    pool = CatFilePool(command_scheduler, repository_lock)
+    lock = repository_lock(str(repository))
+    await lock.acquire_write()
+    try:
+        results = []
+
+        async def read():
+            results.append(await pool.read(str(repository), "HEAD:file.txt"))
+
+        tornado.ioloop.IOLoop.current().spawn_callback(read)
+        await tornado.gen.sleep(0.1)
+        assert results == []
+    finally:
+        lock.release_write()
+    try:
+        while not results:
+            await tornado.gen.sleep(0.01)
+        assert results[0][3] == b"first version\n"
+        assert not lock.locked
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_request_runs_in_scheduler_slot(repository):
+    pool = CatFilePool(command_scheduler, repository_lock)
+    try:
+        executed = command_scheduler.stats()["executed"]["interactive"]
+        await pool.info(str(repository), "HEAD:file.txt")
+        assert command_scheduler.stats()["executed"]["interactive"] == executed + 1
+        assert pool._semaphores == {}
+        assert not pool._requests
+    finally:
+        pool.close()
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+import pytest
+import tornado
+
+from jupyterlab_dvc import git as git_module
+from jupyterlab_dvc.classification import (
+    BINARY_SNIFF_SIZE,
+    ClassificationCache,
+    classify,
+    parse_check_attr,
+)
+from jupyterlab_dvc.git import Git
+
+from .testutils import FakeContentManager, run_git
+
+
+def test_parse_check_attr():
+    output = "data.csv\x00binary\x00unspecified\x00data.csv\x00diff\x00unset\x00data.csv\x00text\x00auto\x00"
+
+    assert parse_check_attr(output) == {
+        "binary": "unspecified",
+        "diff": "unset",
+        "text": "auto",
+    }
+
+
+@pytest.mark.parametrize(
+    "content, attributes, expected",
+    [
+        (b"text", None, {"binary": False, "size": 4, "encoding": "utf-8"}),
+        (b"te\x00xt", None, {"binary": True, "size": 5, "encoding": None}),
+        (
+            b" " * BINARY_SNIFF_SIZE + b"\x00",
+            None,
+            {"binary": False, "size": BINARY_SNIFF_SIZE + 1, "encoding": "utf-8"},
+        ),
+        (b"caf\xe9", None, {"binary": False, "size": 4, "encoding": None}),
+        (b"text", {"binary": "set"}, {"binary": True, "size": 4, "encoding": None}),
+        (b"text", {"diff": "unset"}, {"binary": True, "size": 4, "encoding": None}),
+        (b"te\x00xt", {"text": "set"}, {"binary": False, "size": 5, "encoding": "utf-8"}),
+    ],
+)
+def test_classify(content, attributes, expected):
+    assert classify(content, attributes) == expected
+
+
+def test_classification_cache():
+    cache = ClassificationCache(max_entries=2)
+    verdict = {"binary": False, "size": 1, "encoding": "utf-8"}
+
+    cache.put("sha1", "a.txt", verdict)
+    cache.put("sha2", "a.txt", verdict)
+    assert cache.get("sha1", "a.txt") == verdict
+    cache.put("sha3", "a.txt", verdict)
+
+    assert cache.get("sha2", "a.txt") is None
+    assert cache.get("sha1", "b.txt") is None
+    assert cache.stats() == {"entries": 2, "max_entries": 2, "hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_diff_content_classification(repository):
+    # Given
+    (repository / "notes.txt").write_text("first\n")
+    (repository / "image.png").write_bytes(b"\x89PNG\x00\x01")
+    run_git(repository, "add", ".")
+    run_git(repository, "commit", "-m", "First")
+    (repository / "notes.txt").write_text("second\n")
+    run_git(repository, "commit", "-am", "Second")
+    git = Git(FakeContentManager(str(repository)))
+    execute = git_module.execute
+
+    with patch("jupyterlab_dvc.git.execute", side_effect=execute) as mock_execute:
+        # When
+        first = await git.diff_content(
+            "notes.txt", {"git": "HEAD~1"}, {"git": "HEAD"}, str(repository)
+        )
+        second = await git.diff_content(
+            "notes.txt", {"git": "HEAD~1"}, {"git": "HEAD"}, str(repository)
+        )
+        with pytest.raises(tornado.web.HTTPError, match="not UTF-8"):
+            await git.diff_content(
+                "image.png", {"git": "HEAD~1"}, {"git": "HEAD"}, str(repository)
+            )
+
+        # Then
+        assert first == {"prev_content": "first\n", "curr_content": "second\n"}
+        assert second == first
+        # The attributes are read by a persistent check-attr process
+        assert mock_execute.call_count == 0
+        (process,) = git._cat_file._idle[(str(repository.resolve()), "check-attr")]
+        assert process.is_alive
+    git.close()
@@ -0,0 +1,100 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from jupyterlab_dvc.commitcache import CommitCache, relative_date
+
+
+@pytest.mark.asyncio
+async def test_commit_cache_lru():
+    # Given
+    cache = CommitCache(max_entries=2)
+    cache.put(None, "log", "a", {"author": "John Snow"})
+    cache.put(None, "log", "b", {"author": "Arya Stark"})
+
+    # When
+    await cache.get(None, "log", "a")
+    cache.put(None, "log", "c", {"author": "Sansa Stark"})
+
+    # Then
+    assert await cache.get(None, "log", "a") == {"author": "John Snow"}
+    assert await cache.get(None, "log", "b") is None
+    assert await cache.get(None, "numstat", "a") is None
+    assert cache.stats() == {
+        "entries": 2,
+        "max_entries": 2,
+        "hits": 2,
+        "misses": 2,
+        "on_disk": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_commit_cache_on_disk(repository):
+    # Given
+    cache = CommitCache(on_disk=True)
+    cache.put(str(repository), "log", "a", {"author": "John Snow"})
+    cache.put(str(repository), "log", "b", {"author": "Arya Stark"})
+    cache.close()
+
+    # When
+    other = CommitCache(on_disk=True)
+    values = await other.get_many(str(repository), "log", ["a", "b", "c"])
+    other.close()
+
+    # Then
+    assert values == {
+        "a": {"author": "John Snow"},
+        "b": {"author": "Arya Stark"},
+        "c": None,
+    }
+    assert (other.hits, other.misses) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_commit_cache_writes_in_batches_off_the_event_loop(repository):
+    # Given
+    cache = CommitCache(max_entries=1, on_disk=True)
+    threads = []
+    write = cache._write
+
+    def record_write(pending):
+        threads.append(threading.current_thread())
+        write(pending)
+
+    # When
+    with patch.object(cache, "_write", record_write):
+        cache.put(str(repository), "log", "a", {"author": "John Snow"})
+        cache.put(str(repository), "log", "b", {"author": "Arya Stark"})
+        opened = dict(cache._stores)
+        # "a" is evicted from memory but not written yet
+        evicted = await cache.get(str(repository), "log", "a")
+        await cache.flush()
+    cache.close()
+
+    # Then
+    assert opened == {}
+    assert evicted == {"author": "John Snow"}
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
+
+
+@pytest.mark.parametrize(
+    "diff,expected",
+    [
+        (-10, "in the future"),
+        (1, "1 second ago"),
+        (89, "89 seconds ago"),
+        (90, "2 minutes ago"),
+        (2 * 3600, "2 hours ago"),
+        (36 * 3600, "2 days ago"),
+        (20 * 86400, "3 weeks ago"),
+        (100 * 86400, "3 months ago"),
+        (365 * 86400, "1 year ago"),
+        (500 * 86400, "1 year, 4 months ago"),
+        (3000 * 86400, "8 years ago"),
+    ],
+)
+def test_relative_date(diff, expected):
+    assert relative_date(1500000000 - diff, 1500000000) == expected
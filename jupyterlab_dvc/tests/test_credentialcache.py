@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from jupyterlab_dvc.credentialcache import (
+    CredentialCache,
+    format_attributes,
+    parse_attributes,
+)
+
+REMOTE = {"protocol": "https", "host": "github.com"}
+
+
+def test_parse_attributes():
+    assert parse_attributes("protocol=https\nhost=github.com\npassword=a=b\n") == {
+        "protocol": "https",
+        "host": "github.com",
+        "password": "a=b",
+    }
+    assert format_attributes({"username": "user", "password": "pwd"}) == (
+        "username=user\npassword=pwd\n"
+    )
+
+
+def test_credential_cache_usernames():
+    cache = CredentialCache()
+    cache.store(dict(REMOTE, username="first", password="1"))
+    cache.store(dict(REMOTE, username="second", password="2"))
+
+    # Most recent credentials first, unless the username is known
+    assert cache.get(REMOTE) == {"username": "second", "password": "2"}
+    assert cache.get(dict(REMOTE, username="first")) == {"username": "first", "password": "1"}
+    assert cache.get(dict(REMOTE, path="org/repo.git")) is None
+
+    cache.erase(dict(REMOTE, username="second"))
+    assert cache.get(REMOTE) == {"username": "first", "password": "1"}
+    cache.erase(REMOTE)
+    assert cache.get(REMOTE) is None
+    assert cache.stats() == {"entries": 0, "ttl_s": 900, "hits": 3, "misses": 2}
+
+
+def test_credential_cache_expiry():
+    cache = CredentialCache(ttl=60)
+    with patch("jupyterlab_dvc.credentialcache.time.monotonic", return_value=1000):
+        cache.store(dict(REMOTE, username="user", password="pwd"))
+    with patch("jupyterlab_dvc.credentialcache.time.monotonic", return_value=1059):
+        assert cache.get(REMOTE) is not None
+    with patch("jupyterlab_dvc.credentialcache.time.monotonic", return_value=1060):
+        assert cache.get(REMOTE) is None
+        assert cache.stats()["entries"] == 0
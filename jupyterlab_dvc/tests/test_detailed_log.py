@@ -8,7 +8,7 @@ import tornado
 # local lib
 from jupyterlab_dvc.git import Git
 
-from .testutils import FakeContentManager
+from .testutils import FakeContentManager, run_git
 
 
 @pytest.mark.asyncio
@@ -109,3 +109,78 @@ async def test_detailed_log():
         )
 
         assert expected_response == actual_response
+
+
+@pytest.fixture
+def repository(repository):
+    (repository / "a.txt").write_text("a\n")
+    (repository / "b.txt").write_text("b\n")
+    run_git(repository, "add", "-A")
+    run_git(repository, "commit", "-m", "first")
+    run_git(repository, "mv", "a.txt", "c.txt")
+    (repository / "b.txt").write_text("b\nb\n")
+    run_git(repository, "commit", "-a", "-m", "second")
+    run_git(repository, "commit", "--allow-empty", "-m", "empty")
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_detailed_logs(repository):
+    # Given
+    git = Git(FakeContentManager(str(repository)))
+    shas = run_git(repository, "log", "--format=%H").split()
+
+    # When
+    batch = await git.detailed_logs("", shas)
+    single = [await Git(git.contents_manager).detailed_log(sha, "") for sha in shas]
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        cached = await git.detailed_logs("", shas[1:2])
+
+    # Then
+    assert batch == {
+        "code": 0,
+        "commits": [dict(log, commit=sha) for sha, log in zip(shas, single)],
+    }
+    assert batch["commits"][1]["modified_files"] == [
+        {
+            "modified_file_path": "b.txt",
+            "modified_file_name": "b.txt",
+            "insertion": "1",
+            "deletion": "0",
+        },
+        {
+            "modified_file_path": "c.txt",
+            "modified_file_name": "a.txt => c.txt",
+            "insertion": "0",
+            "deletion": "0",
+        },
+    ]
+    mock_execute.assert_not_called()
+    assert cached == {"code": 0, "commits": [batch["commits"][1]]}
+
+
+@pytest.mark.asyncio
+async def test_detailed_logs_range(repository):
+    # Given
+    git = Git(FakeContentManager(str(repository)))
+    shas = run_git(repository, "log", "--format=%H").split()
+
+    # When
+    result = await git.detailed_logs("", revision_range="HEAD~2..HEAD")
+
+    # Then
+    assert [commit["commit"] for commit in result["commits"]] == shas[:2]
+    assert result["commits"][0]["modified_files_count"] == "0"
+
+
+@pytest.mark.asyncio
+async def test_detailed_logs_invalid_revision():
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # When
+        result = await Git(FakeContentManager("/bin")).detailed_logs(
+            "test_curr_path", ["--output=/tmp/log"]
+        )
+
+        # Then
+        mock_execute.assert_not_called()
+        assert result["code"] == -1
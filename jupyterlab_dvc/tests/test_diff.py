@@ -5,9 +5,11 @@ from unittest.mock import Mock, call, patch
 import pytest
 import tornado
 
+from jupyterlab_dvc import blob
+from jupyterlab_dvc import git as git_module
 from jupyterlab_dvc.git import Git
 
-from .testutils import FakeContentManager
+from .testutils import FakeContentManager, run_git
 
 
 @pytest.mark.asyncio
@@ -122,3 +124,197 @@ async def test_changed_files_git_diff_error():
             ["git", "diff", "HEAD", "origin/HEAD", "--name-only", "-z"], cwd="/bin"
         )
         assert {"code": 128, "message": "error message"} == actual_response
+
+
+def test_parse_hunks():
+    output = "\n".join(
+        [
+            "diff --git a/file.txt b/file.txt",
+            "index 3b18e51..e69de29 100644",
+            "--- a/file.txt",
+            "+++ b/file.txt",
+            "@@ -2,3 +2,3 @@ def f():",
+            " a",
+            "-b",
+            "+c",
+            " d",
+            "@@ -10 +10,0 @@",
+            "-z",
+            "\\ No newline at end of file",
+        ]
+    )
+
+    assert git_module.parse_hunks(output) == [
+        {
+            "prev_start": 2,
+            "prev_lines": 3,
+            "curr_start": 2,
+            "curr_lines": 3,
+            "lines": [" a", "-b", "+c", " d"],
+        },
+        {
+            "prev_start": 10,
+            "prev_lines": 1,
+            "curr_start": 10,
+            "curr_lines": 0,
+            "lines": ["-z"],
+        },
+    ]
+
+
+def test_parse_hunks_binary():
+    output = "diff --git a/img.png b/img.png\nindex 1..2 100644\nBinary files a/img.png and b/img.png differ\n"
+
+    assert git_module.parse_hunks(output) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "curr_ref, refs",
+    [
+        ({"git": "current"}, ["previous", "current"]),
+        ({"special": "WORKING"}, ["previous"]),
+        ({"special": "INDEX"}, ["--cached", "previous"]),
+    ],
+)
+async def test_diff_hunks_command(curr_ref, refs):
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        mock_execute.return_value = tornado.gen.maybe_future(
+            (0, "@@ -1 +1 @@\n-a\n+b\n", "")
+        )
+
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).diff_hunks(
+            "file.txt", {"git": "previous"}, curr_ref, "/bin", 5, "patience"
+        )
+
+        # Then
+        mock_execute.assert_called_once_with(
+            [
+                "git",
+                "diff",
+                "--no-color",
+                "--no-ext-diff",
+                "--diff-algorithm=patience",
+                "-U5",
+            ]
+            + refs
+            + ["--", "file.txt"],
+            cwd="/bin",
+        )
+        assert actual_response == {
+            "hunks": [
+                {
+                    "prev_start": 1,
+                    "prev_lines": 1,
+                    "curr_start": 1,
+                    "curr_lines": 1,
+                    "lines": ["-a", "+b"],
+                }
+            ]
+        }
+
+
+@pytest.mark.asyncio
+async def test_diff_hunks_invalid_algorithm():
+    with pytest.raises(tornado.web.HTTPError):
+        await Git(FakeContentManager("/bin")).diff_hunks(
+            "file.txt", {"git": "previous"}, {"git": "current"}, "/bin", 3, "fancy"
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "prev_ref, curr_ref",
+    [
+        ({"git": "--output=/tmp/diff"}, {"git": "HEAD"}),
+        ({"git": "HEAD"}, {"git": "--output=/tmp/diff"}),
+        ({"git": "-R"}, {"special": "WORKING"}),
+        ({"git": ""}, {"special": "INDEX"}),
+    ],
+)
+async def test_diff_hunks_invalid_ref(prev_ref, curr_ref):
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        with pytest.raises(tornado.web.HTTPError) as error:
+            await Git(FakeContentManager("/bin")).diff_hunks(
+                "file.txt", prev_ref, curr_ref, "/bin"
+            )
+
+    assert error.value.status_code == 400
+    mock_execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_diff_hunks_and_lines(repository):
+    # Given
+    lines = ["line {}".format(i) for i in range(1, 101)]
+    path = repository / "file.txt"
+    path.write_text("\n".join(lines) + "\n")
+    run_git(repository, "add", "file.txt")
+    run_git(repository, "commit", "-m", "First")
+    lines[49] = "changed"
+    path.write_text("\n".join(lines) + "\n")
+    run_git(repository, "commit", "-am", "Second")
+    git = Git(FakeContentManager(str(repository)))
+
+    # When
+    hunks = await git.diff_hunks(
+        "file.txt", {"git": "HEAD~1"}, {"git": "HEAD"}, str(repository), 2
+    )
+    region = await git.diff_lines(
+        "file.txt", {"git": "HEAD~1"}, str(repository), 46, 47
+    )
+    tail = await git.diff_lines(
+        "file.txt", {"special": "WORKING"}, str(repository), 99, None
+    )
+
+    # Then
+    assert hunks == {
+        "hunks": [
+            {
+                "prev_start": 48,
+                "prev_lines": 5,
+                "curr_start": 48,
+                "curr_lines": 5,
+                "lines": [
+                    " line 48",
+                    " line 49",
+                    "-line 50",
+                    "+changed",
+                    " line 51",
+                    " line 52",
+                ],
+            }
+        ]
+    }
+    assert region == {"lines": ["line 46", "line 47"]}
+    assert tail == {"lines": ["line 99", "line 100"], "total": 100}
+    git.close()
+
+
+@pytest.mark.asyncio
+async def test_diff_lines_stops_at_range_end(repository):
+    # Given
+    (repository / "file.txt").write_text(
+        "".join("line {}\n".format(i) for i in range(1, 10001))
+    )
+    run_git(repository, "add", "file.txt")
+    git = Git(FakeContentManager(str(repository)))
+    chunks = []
+
+    async def read_blob(*args):
+        async for chunk in blob.read_blob(*args, chunk_size=64):
+            chunks.append(chunk)
+            yield chunk
+
+    # When
+    with patch("jupyterlab_dvc.git.read_blob", read_blob):
+        region = await git.diff_lines(
+            "file.txt", {"special": "INDEX"}, str(repository), 2, 3
+        )
+
+    # Then
+    assert region == {"lines": ["line 2", "line 3"]}
+    assert len(chunks) == 1
+    git.close()
@@ -1,7 +1,18 @@
+import asyncio
+import subprocess
+
 import pytest
+import tornado
 from unittest.mock import patch
 
-from jupyterlab_dvc.git import execute, execution_lock
+from jupyterlab_dvc.git import (
+    ReadWriteLock,
+    execute,
+    find_repository,
+    is_read_only,
+    repository_lock,
+)
+from jupyterlab_dvc.scheduler import BACKGROUND, INTERACTIVE, scheduled_as
 
 
 @pytest.mark.asyncio
@@ -9,19 +20,169 @@ async def test_execute_waits_on_index_lock(tmp_path):
     lock_file = tmp_path / ".git/index.lock"
     lock_file.parent.mkdir(parents=True, exist_ok=True)
     lock_file.write_text("")
+    (tmp_path / "sub").mkdir()
+    locked = []
+    started = []
+    popen = subprocess.Popen
+
+    def remove_lock_file():
+        locked.append(repository_lock(str(tmp_path)).locked)
+        lock_file.unlink()
+
+    def start(*args, **kwargs):
+        started.append(lock_file.exists())
+        return popen(*args, **kwargs)
+
+    tornado.ioloop.IOLoop.current().call_later(0.2, remove_lock_file)
+    with patch("jupyterlab_dvc.git.subprocess.Popen", side_effect=start):
+        await execute(["git", "reset"], cwd=str(tmp_path / "sub"))
+
+    # The repository is not locked while waiting for the index
+    assert locked == [False]
+    # git starts once the index lock is released
+    assert started == [False]
+    assert not repository_lock(str(tmp_path)).locked
+
+
+@pytest.mark.asyncio
+async def test_execute_read_does_not_wait_on_index_lock(repository):
+    lock_file = repository / ".git/index.lock"
+    lock_file.write_text("")
+
+    with patch("jupyterlab_dvc.indexlock.IndexLockWaiter.wait") as wait:
+        await execute(["git", "log", "-1"], cwd=str(repository))
+
+    wait.assert_not_called()
+    assert lock_file.exists()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("priority, processes", [(BACKGROUND, 1), (INTERACTIVE, 2)])
+async def test_execute_coalesces_waiting_background_commands(
+    repository, priority, processes
+):
+    lock = repository_lock(str(repository))
+    await lock.acquire_write()
+
+    with patch("jupyterlab_dvc.git.subprocess.Popen", wraps=subprocess.Popen) as popen:
+        with scheduled_as(priority):
+            commands = [
+                asyncio.ensure_future(
+                    execute(["git", "status", "--porcelain"], cwd=str(repository))
+                )
+                for _ in range(2)
+            ]
+        await tornado.gen.sleep(0.1)
+        # Both commands wait for the lock
+        assert popen.call_count == 0
+        lock.release_write()
+        results = await asyncio.gather(*commands)
+
+    assert results[0] == results[1] == (0, "", "")
+    assert popen.call_count == processes
+
+
+def test_find_repository(tmp_path):
+    repo = tmp_path / "repo"
+    subfolder = repo / "sub" / "folder"
+    subfolder.mkdir(parents=True)
+    (repo / ".git").mkdir()
+
+    assert find_repository(str(subfolder)) == str(repo.resolve())
+    assert find_repository(str(repo)) == str(repo.resolve())
+    assert find_repository(str(tmp_path)) is None
+
+
+def test_repository_lock_per_repository(tmp_path):
+    for name in ("repo1", "repo2"):
+        (tmp_path / name / ".git").mkdir(parents=True)
+    (tmp_path / "repo1" / "sub").mkdir()
+
+    lock1 = repository_lock(str(tmp_path / "repo1"))
+    assert repository_lock(str(tmp_path / "repo1" / "sub")) is lock1
+    assert repository_lock(str(tmp_path / "repo2")) is not lock1
+
+
+@pytest.mark.parametrize(
+    "cmdline,expected",
+    [
+        (["git", "status", "--porcelain", "-u", "-z"], True),
+        (["git", "for-each-ref", "refs/heads/"], True),
+        (["git", "log", "-10"], True),
+        (["git", "config", "--list"], True),
+        (["git", "config", "-z", "--get-regexp", "^core\\.fsmonitor$"], True),
+        (["git", "branch", "-a"], True),
+        (["git", "fsmonitor--daemon", "status"], True),
+        (["git", "fsmonitor--daemon", "stop"], False),
+        (["git", "symbolic-ref", "HEAD"], True),
+        (["git", "symbolic-ref", "--short", "-q", "HEAD"], True),
+        (["git", "symbolic-ref", "HEAD", "refs/heads/feature"], False),
+        (["git", "symbolic-ref", "--delete", "HEAD"], False),
+        (["git", "config", "--add", "user.name", "John"], False),
+        (["git", "branch", "-D", "feature"], False),
+        (["git", "commit", "-m", "message"], False),
+        (["git", "checkout", "master"], False),
+        (["git", "reset", "--hard"], False),
+        (["ls", "-l"], False),
+    ],
+)
+def test_is_read_only(cmdline, expected):
+    assert is_read_only(cmdline) == expected
+
+
+@pytest.mark.asyncio
+async def test_read_write_lock_readers_share():
+    lock = ReadWriteLock()
+
+    await lock.acquire_read()
+    await lock.acquire_read(timeout=0.1)
+    with pytest.raises(tornado.util.TimeoutError):
+        await lock.acquire_write(timeout=0.1)
+
+    lock.release_read()
+    lock.release_read()
+    assert not lock.locked
+
+
+@pytest.mark.asyncio
+async def test_read_write_lock_writer_is_exclusive():
+    lock = ReadWriteLock()
+
+    await lock.acquire_write()
+    with pytest.raises(tornado.util.TimeoutError):
+        await lock.acquire_read(timeout=0.1)
+    with pytest.raises(tornado.util.TimeoutError):
+        await lock.acquire_write(timeout=0.1)
+
+    lock.release_write()
+    await lock.acquire_read(timeout=0.1)
+    lock.release_read()
+    assert not lock.locked
+
+
+@pytest.mark.asyncio
+async def test_read_write_lock_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    order = []
+
+    async def writer():
+        await lock.acquire_write()
+        order.append("writer")
+        lock.release_write()
+
+    async def reader():
+        await lock.acquire_read()
+        order.append("reader")
+        lock.release_read()
+
+    await lock.acquire_read()
+    tornado.ioloop.IOLoop.current().spawn_callback(writer)
+    await tornado.gen.sleep(0)
+    tornado.ioloop.IOLoop.current().spawn_callback(reader)
+    await tornado.gen.sleep(0)
+    assert order == []
 
-    async def remove_lock_file(*args):
-        assert "unlocked" not in repr(execution_lock)  # Check that the lock is working
-        lock_file.unlink()  # Raise an error for missing file
-        
-    with patch("tornado.gen.sleep") as sleep:
-        sleep.side_effect = remove_lock_file   # Remove the lock file instead of sleeping
-        
-        assert "unlock" in repr(execution_lock)
-        cmd = ["git", "dummy"]
-        kwargs = {"cwd": f"{tmp_path!s}"}
-        await execute(cmd, **kwargs)
-        assert "unlock" in repr(execution_lock)
-        
-        assert not lock_file.exists()
-        sleep.assert_called_once()
+    lock.release_read()
+    for _ in range(5):
+        await tornado.gen.sleep(0)
+    assert order == ["writer", "reader"]
@@ -4,6 +4,7 @@ from unittest.mock import ANY, Mock, call, patch
 
 import tornado
 
+from jupyterlab_dvc.git import MAX_BRANCH_PAGE_LIMIT
 from jupyterlab_dvc.handlers import (
     GitAllHistoryHandler,
     GitBranchHandler,
@@ -32,33 +33,28 @@ class TestAllHistory(ServerTest):
         branch = "branch_foo"
         log = "log_foo"
         status = "status_foo"
+        all_history = {
+            "code": show_top_level["code"],
+            "data": {
+                "show_top_level": show_top_level,
+                "branch": branch,
+                "log": log,
+                "status": status,
+            },
+        }
 
-        mock_git.show_top_level.return_value = tornado.gen.maybe_future(show_top_level)
-        mock_git.branch.return_value = tornado.gen.maybe_future(branch)
-        mock_git.log.return_value = tornado.gen.maybe_future(log)
-        mock_git.status.return_value = tornado.gen.maybe_future(status)
+        mock_git.all_history.return_value = tornado.gen.maybe_future(all_history)
 
         # When
         body = {"current_path": "test_path", "history_count": 25}
         response = self.tester.post(["all_history"], body=body)
 
         # Then
-        mock_git.show_top_level.assert_called_with("test_path")
-        mock_git.branch.assert_called_with("test_path")
-        mock_git.log.assert_called_with("test_path", 25)
-        mock_git.status.assert_called_with("test_path")
+        mock_git.all_history.assert_called_with("test_path", 25, None)
 
         assert response.status_code == 200
         payload = response.json()
-        assert payload == {
-            "code": show_top_level["code"],
-            "data": {
-                "show_top_level": show_top_level,
-                "branch": branch,
-                "log": log,
-                "status": status,
-            },
-        }
+        assert payload == all_history
 
 
 class TestBranch(ServerTest):
@@ -118,12 +114,62 @@ class TestBranch(ServerTest):
         response = self.tester.post(["branch"], body=body)
 
         # Then
-        mock_git.branch.assert_called_with("test_path")
+        mock_git.branch.assert_called_with("test_path", None, "substring", "name", 0, None)
 
         assert response.status_code == 200
         payload = response.json()
         assert payload == {"code": 0, "branches": branch["branches"]}
 
+    @patch("jupyterlab_dvc.handlers.GitBranchHandler.git")
+    def test_branch_handler_page(self, mock_git):
+        # Given
+        branch = {"code": 0, "branches": [], "total": 0, "next": None}
+        mock_git.branch.return_value = tornado.gen.maybe_future(branch)
+
+        # When
+        body = {
+            "current_path": "test_path",
+            "filter": "feature",
+            "match": "prefix",
+            "sort": "committerdate",
+            "offset": 50,
+            "limit": 50,
+        }
+        response = self.tester.post(["branch"], body=body)
+
+        # Then
+        mock_git.branch.assert_called_with(
+            "test_path", "feature", "prefix", "committerdate", 50, 50
+        )
+        assert response.status_code == 200
+        assert response.json() == branch
+
+    @patch("jupyterlab_dvc.handlers.GitBranchHandler.git")
+    def test_branch_handler_invalid_page(self, mock_git):
+        for page in ({"offset": "10"}, {"offset": -1}, {"limit": 1.5}, {"limit": True}):
+            # When
+            body = {"current_path": "test_path", **page}
+            with assert_http_error(400):
+                self.tester.post(["branch"], body=body)
+
+        # Then
+        mock_git.branch.assert_not_called()
+
+    @patch("jupyterlab_dvc.handlers.GitBranchHandler.git")
+    def test_branch_handler_limit_lowered(self, mock_git):
+        # Given
+        branch = {"code": 0, "branches": [], "total": 0, "next": None}
+        mock_git.branch.return_value = tornado.gen.maybe_future(branch)
+
+        # When
+        body = {"current_path": "test_path", "limit": 10 ** 9}
+        self.tester.post(["branch"], body=body)
+
+        # Then
+        mock_git.branch.assert_called_with(
+            "test_path", None, "substring", "name", 0, MAX_BRANCH_PAGE_LIMIT
+        )
+
 
 class TestLog(ServerTest):
     @patch("jupyterlab_dvc.handlers.GitLogHandler.git")
@@ -137,7 +183,7 @@ class TestLog(ServerTest):
         response = self.tester.post(["log"], body=body)
 
         # Then
-        mock_git.log.assert_called_with("test_path", 20)
+        mock_git.log.assert_called_with("test_path", 20, None)
 
         assert response.status_code == 200
         payload = response.json()
@@ -154,7 +200,7 @@ class TestLog(ServerTest):
         response = self.tester.post(["log"], body=body)
 
         # Then
-        mock_git.log.assert_called_with("test_path", 25)
+        mock_git.log.assert_called_with("test_path", 25, None)
 
         assert response.status_code == 200
         payload = response.json()
@@ -178,7 +224,9 @@ class TestPush(ServerTest):
         # Then
         mock_git.get_current_branch.assert_called_with("test_path")
         mock_git.get_upstream_branch.assert_called_with("test_path", "foo")
-        mock_git.push.assert_called_with(".", "HEAD:localbranch", "test_path", None)
+        mock_git.push.assert_called_with(
+            ".", "HEAD:localbranch", "test_path", None, None
+        )
 
         assert response.status_code == 200
         payload = response.json()
@@ -201,7 +249,7 @@ class TestPush(ServerTest):
         mock_git.get_current_branch.assert_called_with("test_path")
         mock_git.get_upstream_branch.assert_called_with("test_path", "foo")
         mock_git.push.assert_called_with(
-            "origin", "HEAD:remotebranch", "test_path", None
+            "origin", "HEAD:remotebranch", "test_path", None, None
         )
 
         assert response.status_code == 200
@@ -434,6 +482,55 @@ class TestDiffContent(ServerTest):
         assert payload["prev_content"] == ""
         assert payload["curr_content"] == ""
 
+    @patch("jupyterlab_dvc.git.execute")
+    def test_diffcontent_hunks(self, mock_execute):
+        # Given
+        top_repo_path = "path/to/repo"
+        filename = "my/file"
+
+        mock_execute.return_value = tornado.gen.maybe_future(
+            (0, "@@ -1,2 +1,2 @@\n-a\n+b\n c\n", "")
+        )
+
+        # When
+        body = {
+            "filename": filename,
+            "prev_ref": {"git": "previous"},
+            "curr_ref": {"special": "WORKING"},
+            "top_repo_path": top_repo_path,
+            "mode": "hunks",
+        }
+        response = self.tester.post(["diffcontent"], body=body)
+
+        # Then
+        assert response.status_code == 200
+        payload = response.json()
+        assert payload == {
+            "hunks": [
+                {
+                    "prev_start": 1,
+                    "prev_lines": 2,
+                    "curr_start": 1,
+                    "curr_lines": 2,
+                    "lines": ["-a", "+b", " c"],
+                }
+            ]
+        }
+        mock_execute.assert_called_once_with(
+            [
+                "git",
+                "diff",
+                "--no-color",
+                "--no-ext-diff",
+                "--diff-algorithm=histogram",
+                "-U3",
+                "previous",
+                "--",
+                filename,
+            ],
+            cwd=os.path.join(self.notebook_dir, top_repo_path),
+        )
+
     @patch("jupyterlab_dvc.git.execute")
     def test_diffcontent_binary(self, mock_execute):
         # Given
@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+import pytest
+import tornado
+
+from jupyterlab_dvc import inotify
+from jupyterlab_dvc.indexlock import IndexLockWaiter, needs_index
+
+
+@pytest.mark.parametrize(
+    "cmdline, expected",
+    [
+        (["git", "add", "file.txt"], True),
+        (["git", "commit", "-m", "message"], True),
+        (["git", "update-index", "--index-version", "4"], True),
+        (["git", "status", "--porcelain"], False),
+        (["git", "clone", "url"], False),
+        (["ls"], False),
+    ],
+)
+def test_needs_index(cmdline, expected):
+    assert needs_index(cmdline) == expected
+
+
+def test_lock_file_of_worktree(tmp_path):
+    git_dir = tmp_path / "main" / ".git" / "worktrees" / "feature"
+    git_dir.mkdir(parents=True)
+    worktree = tmp_path / "feature"
+    worktree.mkdir()
+    (worktree / ".git").write_text("gitdir: {!s}\n".format(git_dir))
+    waiter = IndexLockWaiter()
+
+    assert waiter.lock_file(str(worktree)) == str(git_dir / "index.lock")
+    assert waiter.lock_file(str(tmp_path / "missing")) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("notifications", [True, False])
+async def test_wait_for_index_lock(tmp_path, notifications):
+    lock_file = tmp_path / ".git" / "index.lock"
+    lock_file.parent.mkdir()
+    lock_file.write_text("")
+    waiter = IndexLockWaiter()
+    loop = tornado.ioloop.IOLoop.current()
+
+    with patch.object(inotify, "libc", inotify.libc if notifications else None):
+        loop.call_later(0.2, lock_file.unlink)
+        start = loop.time()
+        assert await waiter.wait(str(tmp_path), timeout=5)
+
+        assert loop.time() - start < 1
+        assert not lock_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_index_lock_timeout(tmp_path):
+    lock_file = tmp_path / ".git" / "index.lock"
+    lock_file.parent.mkdir()
+    lock_file.write_text("")
+    waiter = IndexLockWaiter()
+
+    assert not await waiter.wait(str(tmp_path), timeout=0.3)
+    # Without lock, there is nothing to wait for
+    lock_file.unlink()
+    assert await waiter.wait(str(tmp_path), timeout=0)
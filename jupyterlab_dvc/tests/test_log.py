@@ -0,0 +1,162 @@
+# python lib
+import os
+import time
+from unittest.mock import call, patch
+
+import pytest
+import tornado
+
+# local lib
+from jupyterlab_dvc import git as git_module
+from jupyterlab_dvc.commitcache import COMMIT_CACHE_MAX_ENTRIES
+from jupyterlab_dvc.git import Git
+
+from .testutils import FakeContentManager, run_git
+
+
+@pytest.fixture
+def repository(repository):
+    """Repository with a merged branch."""
+    timestamp = 1500000000
+
+    def commit(message):
+        nonlocal timestamp
+        # Distinct dates make the history order deterministic
+        timestamp += 60
+        date = "{} +0000".format(timestamp)
+        env = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+        run_git(repository, "commit", "--allow-empty", "-m", message, env=env)
+
+    for i in range(3):
+        commit("master {}".format(i))
+    run_git(repository, "checkout", "-b", "feature")
+    for i in range(3):
+        commit("feature {}".format(i))
+    run_git(repository, "checkout", "-")
+    for i in range(3, 6):
+        commit("master {}".format(i))
+    run_git(repository, "merge", "--no-ff", "-m", "Merge feature", "feature")
+    commit("master 6")
+    return repository
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("history_count", [1, 2, 3, 5, 20])
+async def test_log_pages(repository, history_count):
+    # Given
+    git = Git(FakeContentManager(str(repository)))
+    expected = run_git(repository, "log", "--pretty=format:%H").split()
+
+    # When
+    commits = []
+    after = None
+    for _ in range(len(expected) + 1):
+        page = await git.log("", history_count, after)
+        assert page["code"] == 0
+        assert len(page["commits"]) <= history_count
+        commits += page["commits"]
+        after = page["next"]
+        if after is None:
+            break
+
+    # Then
+    assert [commit["commit"] for commit in commits] == expected
+    assert [commit["pre_commit"] for commit in commits] == expected[1:] + [""]
+
+
+@pytest.mark.asyncio
+async def test_log():
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        now = int(time.time())
+        walk = "\n".join(["a" * 40 + " " + "b" * 40, "b" * 40 + " " + "c" * 40])
+        metadata = "\n".join(["a" * 40, "John Snow", str(now - 7200), "Winter is coming"])
+        mock_execute.side_effect = [
+            tornado.gen.maybe_future((0, walk, "")),
+            tornado.gen.maybe_future((0, metadata + "\x00", "")),
+        ]
+
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).log(
+            "test_curr_path", 1, "e" * 40 + "," + "a" * 40
+        )
+
+        # Then
+        mock_execute.assert_has_calls(
+            [
+                call(
+                    [
+                        "git",
+                        "log",
+                        "--pretty=format:%H %P",
+                        "-2",
+                        "e" * 40,
+                        "a" * 40,
+                    ],
+                    cwd="/bin/test_curr_path",
+                ),
+                call(
+                    [
+                        "git",
+                        "log",
+                        "--no-walk=unsorted",
+                        "-z",
+                        "--pretty=format:%H%n%an%n%at%n%s",
+                        "a" * 40,
+                    ],
+                    cwd="/bin/test_curr_path",
+                ),
+            ]
+        )
+        assert actual_response == {
+            "code": 0,
+            "commits": [
+                {
+                    "commit": "a" * 40,
+                    "author": "John Snow",
+                    "date": "2 hours ago",
+                    "commit_msg": "Winter is coming",
+                    "pre_commit": "b" * 40,
+                }
+            ],
+            "next": "e" * 40 + "," + "b" * 40,
+        }
+
+
+@pytest.mark.asyncio
+async def test_log_cache(repository):
+    # Given
+    git = Git(FakeContentManager(str(repository)))
+    first = await git.log("", 5)
+
+    # When
+    with patch("jupyterlab_dvc.git.execute", wraps=git_module.execute) as mock_execute:
+        second = await git.log("", 5)
+        details = await git.detailed_log(first["commits"][0]["commit"], "")
+        cached_details = await git.detailed_log(first["commits"][0]["commit"], "")
+
+    # Then
+    assert second == first
+    # Only the history walk and the first detailed log hit git
+    assert mock_execute.call_count == 2
+    assert cached_details == details
+    assert git.metrics()["commit_cache"] == {
+        "entries": 6,
+        "max_entries": COMMIT_CACHE_MAX_ENTRIES,
+        "hits": 6,
+        "misses": 6,
+        "on_disk": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_log_invalid_token():
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # When
+        actual_response = await Git(FakeContentManager("/bin")).log(
+            "test_curr_path", 10, "--output=/etc/passwd"
+        )
+
+        # Then
+        mock_execute.assert_not_called()
+        assert actual_response["code"] == -1
@@ -0,0 +1,240 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import tornado
+
+from jupyterlab_dvc.git import Git, execute
+from jupyterlab_dvc.pathspec import (
+    parse_git_version,
+    pathspec_argv_commands,
+    pathspec_command,
+    pathspec_input,
+)
+
+from .testutils import FakeContentManager, run_git, ServerTest
+
+
+def staged(repository):
+    output = run_git(repository, "diff", "--cached", "--name-only", "-z")
+    return sorted(name for name in output.split("\0") if name)
+
+
+@pytest.fixture
+def repository(repository):
+    run_git(repository, "commit", "--allow-empty", "-m", "First")
+    return repository
+
+
+def test_pathspec_input():
+    assert pathspec_input(["a.txt", "dossier/é.txt"]) == b"a.txt\x00dossier/\xc3\xa9.txt\x00"
+
+
+def test_pathspec_argv_commands():
+    assert pathspec_argv_commands("add", ["a.txt", "é.txt"]) == [
+        ["git", "add", "--", "a.txt", "é.txt"]
+    ]
+    assert pathspec_argv_commands("reset", ["a.txt", "b.txt", "c.txt"], max_bytes=12) == [
+        ["git", "reset", "--", "a.txt", "b.txt"],
+        ["git", "reset", "--", "c.txt"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "output, version",
+    [
+        ("git version 2.25.1\n", (2, 25)),
+        ("git version 2.39.2.windows.1\n", (2, 39)),
+        ("unknown", None),
+    ],
+)
+def test_parse_git_version(output, version):
+    assert parse_git_version(output) == version
+
+
+@pytest.mark.asyncio
+async def test_add_all_untracked_many_files(repository):
+    folder = repository / ("long_folder_name_" * 10)
+    folder.mkdir()
+    names = ["file_{:05}.txt".format(index) for index in range(3000)]
+    for name in names:
+        (folder / name).write_text("")
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    with patch("jupyterlab_dvc.git.execute", wraps=execute) as mock_execute:
+        response = await git.add_all_untracked(str(repository))
+
+    assert response == {"code": 0}
+    assert len(staged(repository)) == len(names)
+    # The command line does not grow with the number of files
+    cmdline = mock_execute.call_args_list[-1][0][0]
+    assert cmdline == ["git", "add", "--pathspec-from-file=-", "--pathspec-file-nul"]
+
+
+@pytest.mark.asyncio
+async def test_add_many_files_with_old_git(repository):
+    names = ["long_file_name_{:05}_".format(index) * 5 for index in range(1000)]
+    for name in names:
+        (repository / name).write_text("")
+    git = Git(FakeContentManager(str(repository.parent)))
+    # git older than 2.26 cannot read the files on its standard input
+    git._git_version = (2, 25)
+
+    with patch("jupyterlab_dvc.git.execute", wraps=execute) as mock_execute:
+        response = await git.add(names, str(repository))
+
+    assert response == {"code": 0}
+    assert len(staged(repository)) == len(names)
+    # The files are split in several command lines
+    assert mock_execute.call_count > 1
+    for call in mock_execute.call_args_list:
+        assert call[0][0][:3] == ["git", "add", "--"]
+        assert "input" not in call[1]
+
+
+@pytest.mark.asyncio
+async def test_add_literal_paths(repository):
+    for name in ("*.txt", "a.txt", "[a].txt", "a b.txt"):
+        (repository / name).write_text("")
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    assert await git.add(["*.txt", "a b.txt"], str(repository)) == {"code": 0}
+
+    assert staged(repository) == ["*.txt", "a b.txt"]
+
+
+@pytest.mark.asyncio
+async def test_reset_and_checkout_files(repository):
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (repository / name).write_text("first")
+    run_git(repository, "add", ".")
+    run_git(repository, "commit", "-m", "Files")
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (repository / name).write_text("second")
+    run_git(repository, "add", ".")
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    assert await git.reset(["a.txt", "b.txt"], str(repository)) == {"code": 0}
+    assert staged(repository) == ["c.txt"]
+    assert await git.checkout("a.txt", str(repository)) == {"code": 0}
+    assert (repository / "a.txt").read_text() == "first"
+    assert (repository / "b.txt").read_text() == "second"
+
+
+@pytest.mark.asyncio
+async def test_same_tick_mutations_are_batched(repository):
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (repository / name).write_text("")
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    with patch("jupyterlab_dvc.git.execute", wraps=execute) as mock_execute:
+        results = await asyncio.gather(
+            git.add("a.txt", str(repository)),
+            git.add(["b.txt", "a.txt"], str(repository)),
+            git.add(["c.txt"], str(repository)),
+        )
+
+    assert results == [{"code": 0}] * 3
+    mock_execute.assert_called_once()
+    assert mock_execute.call_args[0][0] == ["git", "add", "--", "a.txt", "b.txt", "c.txt"]
+    assert staged(repository) == ["a.txt", "b.txt", "c.txt"]
+    assert git.metrics()["pathspec_batches"] == {"requests": 3, "batches": 1, "retried": 0}
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_run_per_request(repository):
+    (repository / "a.txt").write_text("")
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    valid, invalid = await asyncio.gather(
+        git.add("a.txt", str(repository)), git.add("missing.txt", str(repository))
+    )
+
+    assert valid == {"code": 0}
+    assert invalid["code"] != 0
+    assert "missing.txt" in invalid["message"]
+    assert staged(repository) == ["a.txt"]
+    assert git.metrics()["pathspec_batches"]["retried"] == 2
+
+
+@pytest.mark.asyncio
+async def test_with_status(repository):
+    for name in ("a.txt", "b.txt"):
+        (repository / name).write_text("")
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    response = await git.with_status(
+        await git.add(["a.txt", "b.txt"], str(repository)), str(repository)
+    )
+
+    assert response["code"] == 0
+    assert response["status"]["code"] == 0
+    # Like the status endpoint, None if the index was refreshed by the status
+    assert "fingerprint" in response["status"]
+    assert sorted(f["to"] for f in response["status"]["files"]) == ["a.txt", "b.txt"]
+
+
+@pytest.mark.asyncio
+async def test_with_status_failed_mutation(repository):
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    response = await git.with_status(
+        await git.add("missing.txt", str(repository)), str(repository)
+    )
+
+    assert response["code"] != 0
+    assert "status" not in response
+
+
+class TestStatusResponse(ServerTest):
+    @patch("jupyterlab_dvc.git.execute")
+    def test_reset_files_with_status(self, mock_execute):
+        # Given
+        path = "test_path"
+        mock_execute.side_effect = [
+            tornado.gen.maybe_future((0, "", "")),
+            tornado.gen.maybe_future((0, " M a.txt\x00 M b.txt\x00", "")),
+        ]
+
+        # When
+        body = {
+            "top_repo_path": path,
+            "reset_all": False,
+            "filename": ["a.txt", "b.txt"],
+            "status": True,
+        }
+        response = self.tester.post(["reset"], body=body)
+
+        # Then
+        assert mock_execute.call_count == 2
+        assert mock_execute.call_args_list[0][0][0] == [
+            "git",
+            "reset",
+            "--",
+            "a.txt",
+            "b.txt",
+        ]
+        assert mock_execute.call_args_list[1][0][0][:2] == ["git", "status"]
+        payload = response.json()
+        assert payload["code"] == 0
+        assert [f["to"] for f in payload["status"]["files"]] == ["a.txt", "b.txt"]
+
+    @patch("jupyterlab_dvc.git.execute")
+    def test_checkout_files_without_status(self, mock_execute):
+        # Given
+        path = "test_path"
+        mock_execute.return_value = tornado.gen.maybe_future((0, "", ""))
+
+        # When
+        body = {
+            "top_repo_path": path,
+            "checkout_branch": False,
+            "checkout_all": False,
+            "filename": ["a.txt", "b.txt"],
+        }
+        response = self.tester.post(["checkout"], body=body)
+
+        # Then
+        mock_execute.assert_called_once()
+        assert mock_execute.call_args[0][0] == ["git", "checkout", "--", "a.txt", "b.txt"]
+        assert response.json() == {"code": 0}
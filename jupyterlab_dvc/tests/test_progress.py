@@ -0,0 +1,140 @@
+# python lib
+import sys
+
+import pytest
+import tornado
+
+# local lib
+from jupyterlab_dvc.git import Git, execute
+from jupyterlab_dvc.progress import Operation, Operations, parse_progress
+
+from .testutils import FakeContentManager, Listener, run_git
+
+
+@pytest.mark.parametrize(
+    "line,expected",
+    [
+        (
+            "Receiving objects:  45% (450/1000), 1.50 MiB | 512.00 KiB/s",
+            {
+                "type": "progress",
+                "phase": "Receiving objects",
+                "percent": 45,
+                "current": 450,
+                "total": 1000,
+                "bytes": 1572864,
+                "throughput": 524288,
+            },
+        ),
+        (
+            "remote: Counting objects: 100% (10/10), done.",
+            {
+                "type": "progress",
+                "phase": "Counting objects",
+                "percent": 100,
+                "current": 10,
+                "total": 10,
+                "bytes": None,
+                "throughput": None,
+            },
+        ),
+        (
+            "Writing objects: 100% (3/3), 230 bytes | 230.00 KiB/s, done.",
+            {
+                "type": "progress",
+                "phase": "Writing objects",
+                "percent": 100,
+                "current": 3,
+                "total": 3,
+                "bytes": 230,
+                "throughput": 235520,
+            },
+        ),
+        ("Cloning into 'repo'...", None),
+        ("fatal: repository 'foo' does not exist", None),
+    ],
+)
+def test_parse_progress(line, expected):
+    assert parse_progress(line) == expected
+
+
+@pytest.mark.asyncio
+async def test_execute_progress(tmp_path):
+    # Given
+    script = "\n".join(
+        [
+            "import sys",
+            "sys.stderr.write('Cloning into repo...\\n')",
+            "for i in range(1, 4):",
+            "    sys.stderr.write('\\rReceiving objects: {}% ({}/3)'.format(i * 33, i))",
+            "sys.stderr.write(', done.\\nwarning: something\\n')",
+            "print('output')",
+        ]
+    )
+    operation = Operation("clone")
+    messages = Listener()
+    operation.listeners.add(messages)
+
+    # When
+    code, output, error = await execute(
+        [sys.executable, "-c", script], cwd=str(tmp_path), progress=operation
+    )
+    await tornado.gen.sleep(0)
+
+    # Then
+    assert (code, output, error) == (
+        0,
+        "output\n",
+        "Cloning into repo...\nwarning: something",
+    )
+    assert [message["current"] for message in messages] == [1, 2, 3]
+    assert all(message["operation_id"] == "clone" for message in messages)
+
+
+@pytest.mark.asyncio
+async def test_execute_cancel(tmp_path):
+    # Given
+    operations = Operations()
+    loop = tornado.ioloop.IOLoop.current()
+
+    # When
+    with operations.run("sleep") as operation:
+        loop.call_later(0.2, operations.get("sleep").cancel)
+        start = loop.time()
+        code, _, _ = await execute(
+            [sys.executable, "-c", "import time; time.sleep(30)"],
+            cwd=str(tmp_path),
+            progress=operation,
+        )
+
+    # Then
+    assert code != 0
+    assert operation.cancelled
+    assert loop.time() - start < 10
+
+
+@pytest.mark.asyncio
+async def test_clone_progress(tmp_path):
+    # Given
+    source = tmp_path / "source"
+    source.mkdir()
+    run_git(source, "init")
+    (source / "file.txt").write_text("content")
+    run_git(source, "add", "-A")
+    run_git(source, "commit", "-m", "Winter is coming")
+    target = tmp_path / "target"
+    target.mkdir()
+    git = Git(FakeContentManager(str(tmp_path)))
+    messages = Listener()
+    git.operations.get("clone").listeners.add(messages)
+
+    # When
+    response = await git.clone("target", source.as_uri(), operation_id="clone")
+    await tornado.gen.sleep(0)
+
+    # Then
+    assert response == {"code": 0}
+    assert (target / "source" / "file.txt").read_text() == "content"
+    phases = {message.get("phase") for message in messages}
+    assert "Receiving objects" in phases
+    assert messages[-1] == {"type": "done", "cancelled": False, "operation_id": "clone"}
@@ -0,0 +1,186 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from jupyterlab_dvc.git import Git
+from jupyterlab_dvc.refs import RefReader, parse_config, parse_packed_refs
+
+from .testutils import FakeContentManager, run_git
+
+FIELDS = ["refname", "refname:short", "objectname", "upstream:short", "HEAD"]
+
+
+def age(path):
+    """Set the timestamps of the git folder in the past so that it is cached."""
+    for folder, _, files in os.walk(str(path / ".git")):
+        for name in [folder] + [os.path.join(folder, name) for name in files]:
+            os.utime(name, (0, 0))
+
+
+def for_each_ref(cwd):
+    output = run_git(
+        cwd,
+        "for-each-ref",
+        "--format=" + "%09".join("%({})".format(f) for f in FIELDS),
+        "refs/heads/",
+        "refs/remotes/",
+    )
+    return [line.split("\t") for line in output.splitlines()]
+
+
+@pytest.fixture
+def clone(tmp_path):
+    upstream = tmp_path / "upstream"
+    upstream.mkdir()
+    run_git(upstream, "init")
+    run_git(upstream, "commit", "--allow-empty", "-m", "First")
+    run_git(upstream, "branch", "feature/x")
+    run_git(tmp_path, "clone", str(upstream), "clone")
+    clone = tmp_path / "clone"
+    run_git(clone, "branch", "--track", "tracking", "origin/feature/x")
+    run_git(clone, "branch", "gone")
+    run_git(clone, "config", "branch.gone.remote", "origin")
+    run_git(clone, "config", "branch.gone.merge", "refs/heads/vanished")
+    run_git(clone, "branch", "local")
+    run_git(clone, "config", "branch.local.remote", ".")
+    run_git(clone, "config", "branch.local.merge", "refs/heads/gone")
+    # Ambiguous with a tag
+    run_git(clone, "branch", "v1")
+    run_git(clone, "tag", "v1")
+    return clone
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_for_each_ref(clone, packed):
+    if packed:
+        run_git(clone, "pack-refs", "--all")
+
+    refs = RefReader().read(str(clone))
+
+    assert refs.for_each_ref(FIELDS, ["refs/heads/", "refs/remotes/"]) == for_each_ref(
+        clone
+    )
+
+
+def test_upstream(clone):
+    refs = RefReader().read(str(clone))
+
+    for branch in ("master", "tracking", "gone", "local", "v1"):
+        upstream = refs.upstream(branch)
+        process = subprocess.run(
+            ["git", "rev-parse", "--abbrev-ref", "{}@{{upstream}}".format(branch)],
+            cwd=str(clone),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+        expected = process.stdout.strip() if process.returncode == 0 else None
+        actual = refs.shorten(upstream) if upstream in refs.refs else None
+        assert actual == expected, branch
+
+
+def test_worktree_head(clone, tmp_path):
+    worktree = tmp_path / "worktree"
+    run_git(clone, "worktree", "add", "-b", "other", str(worktree))
+
+    assert RefReader().read(str(worktree)).head == "refs/heads/other"
+    assert RefReader().read(str(clone)).head == "refs/heads/master"
+
+
+@pytest.mark.parametrize(
+    "setup",
+    [
+        lambda repo: run_git(repo, "config", "include.path", "other.config"),
+        lambda repo: run_git(repo, "config", "extensions.refStorage", "reftable"),
+        lambda repo: (repo / ".git" / "reftable").mkdir(),
+    ],
+)
+def test_unsupported_repository(clone, setup):
+    setup(clone)
+    reader = RefReader()
+
+    assert reader.read(str(clone)) is None
+    assert reader.stats()["unsupported"] == 1
+
+
+def test_refs_cache(clone):
+    reader = RefReader()
+    age(clone)
+
+    first = reader.read(str(clone))
+    assert reader.read(str(clone)) is first
+    run_git(clone, "branch", "new")
+    second = reader.read(str(clone))
+
+    assert "refs/heads/new" in second.refs
+    assert reader.stats()["hits"] == 1
+    assert reader.stats()["misses"] == 2
+
+
+def test_parse_config():
+    content = "\n".join(
+        [
+            "[core]",
+            "\tbare = false  # comment",
+            '[branch "with \\"quote\\""]',
+            '\tremote = "my remote" ; comment',
+            "\tmerge = refs/heads/main",
+            "[Remote \"origin\"] fetch = +refs/heads/*:refs/remotes/origin/*",
+            "\tfetch = refs/tags/*:refs/tags/*",
+            "\tprune",
+        ]
+    )
+
+    assert dict(parse_config(content)) == {
+        ("core", None, "bare"): ["false"],
+        ("branch", 'with "quote"', "remote"): ["my remote"],
+        ("branch", 'with "quote"', "merge"): ["refs/heads/main"],
+        ("remote", "origin", "fetch"): [
+            "+refs/heads/*:refs/remotes/origin/*",
+            "refs/tags/*:refs/tags/*",
+        ],
+        ("remote", "origin", "prune"): ["true"],
+    }
+
+
+def test_parse_packed_refs():
+    content = "\n".join(
+        [
+            "# pack-refs with: peeled fully-peeled sorted ",
+            "1" * 40 + " refs/heads/main",
+            "2" * 40 + " refs/tags/v1",
+            "^" + "3" * 40,
+        ]
+    )
+
+    assert parse_packed_refs(content) == {
+        "refs/heads/main": "1" * 40,
+        "refs/tags/v1": "2" * 40,
+    }
+
+
+@pytest.mark.asyncio
+async def test_git_branches_without_git(clone):
+    git = Git(FakeContentManager(str(clone.parent)))
+
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        branches = await git.branch(clone.name)
+        current = await git.get_current_branch(clone.name)
+        upstream = await git.get_upstream_branch(clone.name, current)
+
+    mock_execute.assert_not_called()
+    assert current == "master"
+    assert upstream == "origin/master"
+    assert branches["current_branch"]["name"] == "master"
+    assert [branch["name"] for branch in branches["branches"]] == [
+        "gone",
+        "local",
+        "master",
+        "tracking",
+        "heads/v1",
+        "origin/HEAD",
+        "origin/feature/x",
+        "origin/master",
+    ]
@@ -1,24 +1,21 @@
-import subprocess
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
+import pytest
+import tornado
+
+from jupyterlab_dvc.git import Git
 from jupyterlab_dvc.handlers import GitRemoteAddHandler
 
-from .testutils import assert_http_error, ServerTest
+from .testutils import assert_http_error, FakeContentManager, run_git, ServerTest
 
 
 class TestAddRemote(ServerTest):
-    @patch("subprocess.Popen")
-    def test_git_add_remote_success_no_name(self, popen):
+    @patch("jupyterlab_dvc.git.execute")
+    def test_git_add_remote_success_no_name(self, mock_execute):
         # Given
         path = "test_path"
         url = "http://github.com/myid/myrepository.git"
-        process_mock = Mock()
-        attrs = {
-            "communicate": Mock(return_value=(b"", b"",)),
-            "returncode": 0,
-        }
-        process_mock.configure_mock(**attrs)
-        popen.return_value = process_mock
+        mock_execute.return_value = tornado.gen.maybe_future((0, "", ""))
 
         # When
         body = {
@@ -28,13 +25,9 @@ class TestAddRemote(ServerTest):
         response = self.tester.post(["remote", "add"], body=body)
 
         # Then
-        popen.assert_called_once_with(
-            ["git", "remote", "add", "origin", url],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=path,
+        mock_execute.assert_called_once_with(
+            ["git", "remote", "add", "origin", url], cwd=path
         )
-        process_mock.communicate.assert_called_once_with()
 
         assert response.status_code == 201
         payload = response.json()
@@ -43,32 +36,22 @@ class TestAddRemote(ServerTest):
             "command": " ".join(["git", "remote", "add", "origin", url]),
         }
 
-    @patch("subprocess.Popen")
-    def test_git_add_remote_success(self, popen):
+    @patch("jupyterlab_dvc.git.execute")
+    def test_git_add_remote_success(self, mock_execute):
         # Given
         path = "test_path"
         url = "http://github.com/myid/myrepository.git"
         name = "distant"
-        process_mock = Mock()
-        attrs = {
-            "communicate": Mock(return_value=(b"", b"",)),
-            "returncode": 0,
-        }
-        process_mock.configure_mock(**attrs)
-        popen.return_value = process_mock
+        mock_execute.return_value = tornado.gen.maybe_future((0, "", ""))
 
         # When
         body = {"top_repo_path": path, "url": url, "name": name}
         response = self.tester.post(["remote", "add"], body=body)
 
         # Then
-        popen.assert_called_once_with(
-            ["git", "remote", "add", name, url],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=path,
+        mock_execute.assert_called_once_with(
+            ["git", "remote", "add", name, url], cwd=path
         )
-        process_mock.communicate.assert_called_once_with()
 
         assert response.status_code == 201
         payload = response.json()
@@ -77,20 +60,14 @@ class TestAddRemote(ServerTest):
             "command": " ".join(["git", "remote", "add", name, url]),
         }
 
-    @patch("subprocess.Popen")
-    def test_git_add_remote_failure(self, popen):
+    @patch("jupyterlab_dvc.git.execute")
+    def test_git_add_remote_failure(self, mock_execute):
         # Given
         path = "test_path"
         url = "http://github.com/myid/myrepository.git"
-        process_mock = Mock()
         error_msg = "Fake failure"
         error_code = 128
-        attrs = {
-            "communicate": Mock(return_value=(b"", bytes(error_msg, encoding="utf-8"))),
-            "returncode": error_code,
-        }
-        process_mock.configure_mock(**attrs)
-        popen.return_value = process_mock
+        mock_execute.return_value = tornado.gen.maybe_future((error_code, "", error_msg))
 
         # When
         body = {
@@ -101,10 +78,139 @@ class TestAddRemote(ServerTest):
             self.tester.post(["remote", "add"], body=body)
 
         # Then
-        popen.assert_called_once_with(
-            ["git", "remote", "add", "origin", url],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        mock_execute.assert_called_once_with(
+            ["git", "remote", "add", "origin", url], cwd=path
+        )
+
+    @patch("jupyterlab_dvc.git.execute")
+    def test_git_set_push_url(self, mock_execute):
+        # Given
+        path = "test_path"
+        url = "git@github.com:myid/myrepository.git"
+        mock_execute.return_value = tornado.gen.maybe_future((0, "", ""))
+
+        # When
+        body = {"top_repo_path": path, "name": "origin", "url": url, "push": True}
+        response = self.tester.post(["remote", "set_url"], body=body)
+
+        # Then
+        mock_execute.assert_called_once_with(
+            ["git", "remote", "set-url", "--push", "origin", url], cwd=path
+        )
+        assert response.status_code == 200
+
+    @patch("jupyterlab_dvc.git.execute")
+    def test_git_prune_remote_with_auth(self, mock_execute):
+        # Given
+        path = "test_path"
+        mock_execute.return_value = tornado.gen.maybe_future((0, "", ""))
+
+        # When
+        body = {
+            "top_repo_path": path,
+            "name": "origin",
+            "auth": {"username": "user", "password": "pass"},
+        }
+        response = self.tester.post(["remote", "prune"], body=body)
+
+        # Then
+        mock_execute.assert_called_once_with(
+            ["git", "remote", "prune", "origin"],
             cwd=path,
+            username="user",
+            password="pass",
         )
-        process_mock.communicate.assert_called_once_with()
+        assert response.status_code == 200
+
+
+@pytest.fixture
+def repository(repository):
+    run_git(repository, "remote", "add", "origin", "https://github.com/org/repo.git")
+    run_git(repository, "remote", "add", "my.fork", "https://github.com/me/repo.git")
+    run_git(
+        repository, "config", "--add", "remote.my.fork.pushurl", "git@github.com:me/repo.git"
+    )
+    run_git(
+        repository, "config", "--add", "remote.my.fork.pushurl", "git@gitlab.com:me/repo.git"
+    )
+    return repository
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_git", [False, True])
+async def test_remote_list(repository, with_git):
+    git = Git(FakeContentManager(str(repository.parent)))
+    expected = {
+        "code": 0,
+        "remotes": [
+            {
+                "name": "origin",
+                "url": "https://github.com/org/repo.git",
+                "push_urls": ["https://github.com/org/repo.git"],
+            },
+            {
+                "name": "my.fork",
+                "url": "https://github.com/me/repo.git",
+                "push_urls": ["git@github.com:me/repo.git", "git@gitlab.com:me/repo.git"],
+            },
+        ],
+    }
+
+    if with_git:
+        with patch.object(git, "_read_refs", return_value=None):
+            assert await git.remote_list(str(repository)) == expected
+    else:
+        with patch("jupyterlab_dvc.git.execute") as mock_execute:
+            assert await git.remote_list(str(repository)) == expected
+        mock_execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_remote_management(repository):
+    git = Git(FakeContentManager(str(repository.parent)))
+    top = str(repository)
+
+    assert (await git.remote_rename(top, "my.fork", "fork"))["code"] == 0
+    assert (await git.remote_set_url(top, "origin", "https://gitlab.com/org/repo.git"))[
+        "code"
+    ] == 0
+    assert (await git.remote_remove(top, "fork"))["code"] == 0
+    response = await git.remote_remove(top, "fork")
+
+    assert response["code"] != 0
+    assert "fork" in response["message"]
+    assert (await git.remote_list(top))["remotes"] == [
+        {
+            "name": "origin",
+            "url": "https://gitlab.com/org/repo.git",
+            "push_urls": ["https://gitlab.com/org/repo.git"],
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_remote_prune(tmp_path):
+    upstream = tmp_path / "upstream"
+    upstream.mkdir()
+    run_git(upstream, "init")
+    run_git(
+        upstream,
+        "-c",
+        "user.name=John Snow",
+        "-c",
+        "user.email=john@snow.com",
+        "commit",
+        "--allow-empty",
+        "-m",
+        "First",
+    )
+    run_git(upstream, "branch", "stale")
+    run_git(tmp_path, "clone", upstream.as_uri(), "clone")
+    run_git(upstream, "branch", "-D", "stale")
+    clone = tmp_path / "clone"
+    git = Git(FakeContentManager(str(tmp_path)))
+
+    response = await git.remote_prune(str(clone), "origin")
+
+    assert response == {"code": 0, "command": "git remote prune origin"}
+    assert not (clone / ".git" / "refs" / "remotes" / "origin" / "stale").exists()
@@ -0,0 +1,229 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from jupyterlab_dvc.git import Git, ignored_folders, list_ignored_folders
+
+from jupyterlab_dvc.repository import (
+    RepositoryResolver,
+    compute_fingerprint,
+    discover_repository,
+    find_git_dir,
+    find_repository,
+    read_index_header,
+)
+
+from .testutils import FakeContentManager, run_git
+
+
+@pytest.fixture
+def repository(repository):
+    (repository / "file.txt").write_text("first version\n")
+    (repository / "folder").mkdir()
+    (repository / "folder" / "other.txt").write_text("other\n")
+    run_git(repository, "add", "-A")
+    run_git(repository, "commit", "-m", "Initial commit")
+    return repository
+
+
+def test_find_repository(repository):
+    assert find_repository(str(repository / "folder")) == str(repository.resolve())
+    assert find_repository(str(repository.parent)) is None
+
+
+def test_find_git_dir(repository, tmp_path_factory):
+    assert find_git_dir(str(repository)) == str(repository / ".git")
+
+    worktree = tmp_path_factory.mktemp("worktree") / "feature"
+    run_git(repository, "worktree", "add", "-b", "feature", str(worktree))
+    assert os.path.isfile(str(worktree / ".git"))
+    assert find_git_dir(str(worktree)) == str(
+        repository / ".git" / "worktrees" / "feature"
+    )
+
+    assert find_git_dir(str(repository / "folder")) is None
+
+
+def test_read_index_header(repository, tmp_path_factory):
+    assert read_index_header(str(repository)) == (2, 2)
+    run_git(repository, "update-index", "--index-version", "4")
+    assert read_index_header(str(repository)) == (4, 2)
+
+    empty = tmp_path_factory.mktemp("empty")
+    run_git(empty, "init")
+    assert read_index_header(str(empty)) is None
+
+
+def test_fingerprint_is_stable(repository):
+    assert compute_fingerprint(str(repository)) is not None
+    assert compute_fingerprint(str(repository)) == compute_fingerprint(
+        str(repository)
+    )
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda repo: (repo / "folder" / "new.txt").write_text("new\n"),
+        lambda repo: (repo / "folder" / "other.txt").unlink(),
+        lambda repo: (repo / ".git" / "info" / "exclude").write_text("*.log\n"),
+        lambda repo: run_git(repo, "rm", "--cached", "-q", "file.txt"),
+        lambda repo: run_git(repo, "branch", "feature"),
+        lambda repo: run_git(repo, "checkout", "-q", "-b", "feature"),
+        lambda repo: run_git(repo, "commit", "--allow-empty", "-m", "Empty"),
+    ],
+)
+def test_fingerprint_detects_change(repository, change):
+    before = compute_fingerprint(str(repository))
+    change(repository)
+    assert compute_fingerprint(str(repository)) != before
+
+
+def test_fingerprint_expires(repository):
+    with patch("time.time", return_value=0):
+        before = compute_fingerprint(str(repository))
+        # Only the folders are inspected
+        (repository / "folder" / "other.txt").write_text("changed\n")
+        assert compute_fingerprint(str(repository)) == before
+    with patch("time.time", return_value=3600):
+        assert compute_fingerprint(str(repository)) != before
+
+
+def test_fingerprint_disabled(repository):
+    assert compute_fingerprint(str(repository), max_age=0) is None
+
+
+def test_fingerprint_skips_ignored_folders(repository):
+    (repository / "node_modules" / "package").mkdir(parents=True)
+    before = compute_fingerprint(str(repository), frozenset(["node_modules"]))
+
+    (repository / "node_modules" / "package" / "index.js").write_text("")
+
+    assert compute_fingerprint(str(repository), frozenset(["node_modules"])) == before
+    assert compute_fingerprint(str(repository)) != before
+
+
+def test_fingerprint_large_working_tree(repository):
+    with patch("jupyterlab_dvc.repository.MAX_FINGERPRINT_FOLDERS", 1):
+        assert compute_fingerprint(str(repository)) is None
+
+
+def test_fingerprint_not_a_repository(tmp_path):
+    assert compute_fingerprint(str(tmp_path)) is None
+
+
+@pytest.mark.asyncio
+async def test_list_ignored_folders(repository):
+    (repository / ".gitignore").write_text("build/\n*.log\n")
+    (repository / "folder" / "build" / "lib").mkdir(parents=True)
+    (repository / "folder" / "build" / "lib" / "out.o").write_text("")
+    (repository / "debug.log").write_text("")
+    top = str(repository)
+
+    assert await list_ignored_folders(top) == frozenset(["folder/build"])
+    hits = ignored_folders.stats()["hits"]
+    assert await list_ignored_folders(top) == frozenset(["folder/build"])
+    assert ignored_folders.stats()["hits"] == hits + 1
+
+    # The folders are listed again once the exclusions change
+    (repository / ".gitignore").write_text("*.log\n")
+    assert await list_ignored_folders(top) == frozenset()
+
+
+def rev_parse(path):
+    process = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel", "--show-prefix"],
+        cwd=str(path),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+    )
+    if process.returncode != 0:
+        return (None, "")
+    top_repo_path, prefix = process.stdout.split("\n")[:2]
+    return (top_repo_path, prefix)
+
+
+def age(*paths):
+    """Set the timestamps of paths in the past."""
+    for path in paths:
+        os.utime(str(path), (0, 0))
+
+
+def test_discover_repository(repository, tmp_path_factory):
+    worktree = tmp_path_factory.mktemp("worktree") / "feature"
+    run_git(repository, "worktree", "add", "-b", "feature", str(worktree))
+    (worktree / "folder" / "nested").mkdir()
+    outside = tmp_path_factory.mktemp("outside")
+
+    for path in (
+        repository,
+        repository / "folder",
+        worktree,
+        worktree / "folder" / "nested",
+        outside,
+    ):
+        resolution, _ = discover_repository(os.path.realpath(str(path)))
+        assert resolution == rev_parse(path)
+
+
+def test_discover_repository_ambiguous(repository, tmp_path):
+    bare = tmp_path / "bare.git"
+    run_git(tmp_path, "init", "--bare", str(bare))
+    run_git(repository, "config", "core.worktree", str(tmp_path))
+
+    assert discover_repository(str(bare)) is None
+    assert discover_repository(str(repository / ".git" / "refs")) is None
+    assert discover_repository(str(repository / "missing")) is None
+    # The working tree is not where .git is
+    assert discover_repository(str(repository / "folder")) is None
+
+
+def test_repository_resolver_cache(repository):
+    resolver = RepositoryResolver()
+    folder = repository / "folder"
+    age(repository, folder, repository / ".git")
+
+    assert resolver.resolve(str(folder)) == (str(repository.resolve()), "folder/")
+    assert resolver.resolve(str(folder)) == (str(repository.resolve()), "folder/")
+    assert resolver.stats()["hits"] == 1
+
+    # A nested repository appears
+    run_git(folder, "init")
+    assert resolver.resolve(str(folder)) == (str(folder.resolve()), "")
+    assert resolver.stats()["misses"] == 2
+
+
+def test_repository_resolver_recent_folders(repository):
+    resolver = RepositoryResolver()
+
+    # Folders just modified may change again within the timestamp granularity
+    resolver.resolve(str(repository))
+    resolver.resolve(str(repository))
+    assert resolver.stats()["hits"] == 0
+    assert resolver.stats()["entries"] == 0
+
+
+def test_repository_resolver_environment(repository):
+    resolver = RepositoryResolver()
+
+    with patch.dict(os.environ, {"GIT_DIR": str(repository / ".git")}):
+        assert resolver.resolve(str(repository)) is None
+    assert resolver.stats()["ambiguous"] == 1
+
+
+@pytest.mark.asyncio
+async def test_show_top_level_without_git(repository):
+    git = Git(FakeContentManager(str(repository.parent)))
+
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        top_level = await git.show_top_level(os.path.join(repository.name, "folder"))
+        prefix = await git.show_prefix(os.path.join(repository.name, "folder"))
+        outside = await git.show_top_level("")
+
+    mock_execute.assert_not_called()
+    assert top_level == {"code": 0, "top_repo_path": str(repository.resolve())}
+    assert prefix == {"code": 0, "under_repo_path": "folder/"}
+    assert outside["code"] == 128
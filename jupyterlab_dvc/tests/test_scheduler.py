@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+import tornado
+
+from jupyterlab_dvc.scheduler import (
+    BACKGROUND,
+    BACKGROUND_SHARE,
+    INTERACTIVE,
+    MUTATION,
+    CommandScheduler,
+    scheduled_as,
+    scheduling_class,
+)
+
+
+async def settle():
+    for _ in range(5):
+        await tornado.gen.sleep(0)
+
+
+class Command:
+    """A command holding its slot until released."""
+
+    def __init__(self, scheduler, name, repository, order, priority=None):
+        self.name = name
+        self.order = order
+        self.done = asyncio.Event()
+        self.task = asyncio.ensure_future(self.run(scheduler, repository, priority))
+
+    async def run(self, scheduler, repository, priority):
+        async with scheduler.slot(repository, priority):
+            self.order.append(self.name)
+            await self.done.wait()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_global_limit():
+    scheduler = CommandScheduler(max_commands=2, max_commands_per_repository=2)
+    order = []
+
+    commands = [Command(scheduler, i, "repo{}".format(i), order) for i in range(3)]
+    await settle()
+
+    assert order == [0, 1]
+    assert scheduler.stats()["running"] == 2
+    assert scheduler.stats()["queued"] == {MUTATION: 0, INTERACTIVE: 1, BACKGROUND: 0}
+
+    commands[0].done.set()
+    await settle()
+
+    assert order == [0, 1, 2]
+    for command in commands:
+        command.done.set()
+    await asyncio.gather(*(command.task for command in commands))
+    assert scheduler.stats()["running"] == 0
+    assert scheduler.stats()["executed"] == {MUTATION: 0, INTERACTIVE: 3, BACKGROUND: 0}
+    assert scheduler.stats()["max_queued"] == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_repository_limit():
+    scheduler = CommandScheduler(max_commands=3, max_commands_per_repository=1)
+    order = []
+
+    commands = [
+        Command(scheduler, "a1", "a", order),
+        Command(scheduler, "a2", "a", order),
+        Command(scheduler, "b1", "b", order),
+    ]
+    await settle()
+
+    # a2 waits for a1 but does not block the other repository
+    assert order == ["a1", "b1"]
+
+    commands[0].done.set()
+    await settle()
+
+    assert order == ["a1", "b1", "a2"]
+    for command in commands:
+        command.done.set()
+    await asyncio.gather(*(command.task for command in commands))
+
+
+@pytest.mark.asyncio
+async def test_scheduler_background_fair_share():
+    scheduler = CommandScheduler(max_commands=1, max_commands_per_repository=1)
+    order = []
+
+    blocker = Command(scheduler, "blocker", "repo", order)
+    await settle()
+    commands = [Command(scheduler, "b", "repo", order, BACKGROUND) for _ in range(2)]
+    commands += [Command(scheduler, "i", "repo", order) for _ in range(6)]
+    await settle()
+
+    blocker.done.set()
+    for command in commands:
+        command.done.set()
+    await asyncio.gather(*(command.task for command in commands))
+
+    # Interactive commands go first, but one slot out of BACKGROUND_SHARE is for background
+    assert BACKGROUND_SHARE == 4
+    assert order == ["blocker", "i", "i", "b", "i", "i", "i", "b", "i"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_mutation_first():
+    scheduler = CommandScheduler(max_commands=1, max_commands_per_repository=1)
+    order = []
+
+    blocker = Command(scheduler, "blocker", "repo", order)
+    await settle()
+    commands = [
+        Command(scheduler, "background", "repo", order, BACKGROUND),
+        Command(scheduler, "interactive", "repo", order),
+        Command(scheduler, "mutation", "repo", order, MUTATION),
+    ]
+    await settle()
+
+    blocker.done.set()
+    for command in commands:
+        command.done.set()
+    await asyncio.gather(*(command.task for command in commands))
+
+    assert order == ["blocker", "mutation", "interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_coalescing():
+    scheduler = CommandScheduler()
+    key = ("repo", ("git", "status"), None)
+
+    assert scheduler.waiting_command(key) is None
+    with scheduler.coalescing(key) as result:
+        shared = scheduler.waiting_command(key)
+        assert shared is result
+        scheduler.started(key, result)
+        # A started command is not shared anymore
+        assert scheduler.waiting_command(key) is None
+        result.set_result((0, "", ""))
+
+    assert await shared == (0, "", "")
+    assert scheduler.stats()["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancelled_waiter():
+    scheduler = CommandScheduler(max_commands=1, max_commands_per_repository=1)
+    order = []
+
+    first = Command(scheduler, "first", "repo", order)
+    second = Command(scheduler, "second", "repo", order)
+    await settle()
+    second.task.cancel()
+    await settle()
+
+    assert scheduler.stats()["queued"] == {MUTATION: 0, INTERACTIVE: 0, BACKGROUND: 0}
+    first.done.set()
+    await first.task
+    assert scheduler.stats()["running"] == 0
+    assert order == ["first"]
+
+
+def test_scheduled_as():
+    assert scheduling_class.get() == INTERACTIVE
+    with scheduled_as(BACKGROUND):
+        assert scheduling_class.get() == BACKGROUND
+    assert scheduling_class.get() == INTERACTIVE
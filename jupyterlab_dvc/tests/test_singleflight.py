@@ -0,0 +1,145 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import tornado
+
+from jupyterlab_dvc.git import Git
+from jupyterlab_dvc.singleflight import SingleFlight
+
+from .testutils import FakeContentManager
+
+
+class Operation:
+    """Operation returning a new result when released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        return {"code": 0, "call": call}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_in_flight_call():
+    flight = SingleFlight(lambda: 0)
+    operation = Operation()
+
+    calls = [asyncio.ensure_future(flight.run("key", operation)) for _ in range(3)]
+    other = asyncio.ensure_future(flight.run("other", operation))
+    await tornado.gen.sleep(0)
+    operation.release.set()
+    results = await asyncio.gather(*calls)
+
+    assert results == [{"code": 0, "call": 1}] * 3
+    # The calls sharing the result get their own copy
+    assert results[0] is not results[1]
+    assert (await other)["call"] == 2
+    assert flight.stats() == {"calls": 2, "shared": 2, "cached": 0, "ttl_s": 0}
+
+    # Completed calls are not shared without TTL
+    assert (await flight.run("key", operation))["call"] == 3
+
+
+@pytest.mark.asyncio
+async def test_single_flight_results_are_independent():
+    flight = SingleFlight(lambda: 0, ttl=60)
+    release = asyncio.Event()
+
+    async def operation():
+        await release.wait()
+        return {"code": 0, "files": [{"to": "a.txt"}]}
+
+    calls = [asyncio.ensure_future(flight.run("key", operation)) for _ in range(2)]
+    await tornado.gen.sleep(0)
+    release.set()
+    first, second = await asyncio.gather(*calls)
+    first["files"][0]["to"] = "b.txt"
+    first["files"].append({"to": "c.txt"})
+
+    assert second == {"code": 0, "files": [{"to": "a.txt"}]}
+    assert await flight.run("key", operation) == second
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_error():
+    flight = SingleFlight(lambda: 0)
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise ValueError("failure")
+
+    calls = [asyncio.ensure_future(flight.run("key", failing)) for _ in range(2)]
+    await tornado.gen.sleep(0)
+    release.set()
+
+    for call in calls:
+        with pytest.raises(ValueError):
+            await call
+
+
+@pytest.mark.asyncio
+async def test_single_flight_ttl():
+    generation = 0
+    flight = SingleFlight(lambda: generation, ttl=60)
+    operation = Operation()
+    operation.release.set()
+
+    first = await flight.run("key", operation)
+    second = await flight.run("key", operation)
+    generation += 1
+    third = await flight.run("key", operation)
+
+    assert first == second == {"code": 0, "call": 1}
+    # A repository was modified; the cached result is stale
+    assert third == {"code": 0, "call": 2}
+    assert flight.stats()["cached"] == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_ignores_older_generation():
+    generation = 0
+    flight = SingleFlight(lambda: generation)
+    operation = Operation()
+
+    first = asyncio.ensure_future(flight.run("key", operation))
+    await tornado.gen.sleep(0)
+    generation += 1
+    second = asyncio.ensure_future(flight.run("key", operation))
+    await tornado.gen.sleep(0)
+    operation.release.set()
+
+    assert (await first)["call"] == 1
+    assert (await second)["call"] == 2
+
+
+@pytest.mark.asyncio
+async def test_git_status_single_flight():
+    with patch("jupyterlab_dvc.git.execute") as mock_execute:
+        # Given
+        release = asyncio.Event()
+
+        async def execute(*args, **kwargs):
+            await release.wait()
+            return (0, " M file.txt\x00", "")
+
+        mock_execute.side_effect = execute
+        git = Git(FakeContentManager("/bin"))
+
+        # When
+        calls = [asyncio.ensure_future(git.status("repo")) for _ in range(3)]
+        await tornado.gen.sleep(0)
+        release.set()
+        results = await asyncio.gather(*calls)
+
+        # Then
+        mock_execute.assert_called_once()
+        assert results == [
+            {"code": 0, "files": [{"x": " ", "y": "M", "to": "file.txt", "from": "file.txt"}]}
+        ] * 3
+        assert git.metrics()["single_flight"]["shared"] == 2
@@ -74,3 +74,29 @@ async def test_status(output, expected):
         )
 
         assert {"code": 0, "files": expected} == actual_response
+
+
+@pytest.mark.asyncio
+async def test_status_not_modified(repository):
+    # Given
+    (repository / "untracked.txt").write_text("content")
+    git = Git(FakeContentManager(str(repository)))
+
+    # When
+    first = await git.status("", fingerprint="")
+    second = await git.status("", fingerprint=first["fingerprint"])
+    (repository / "other.txt").write_text("content")
+    third = await git.status("", fingerprint=first["fingerprint"])
+
+    # Then
+    assert first["files"] == [
+        {"x": "?", "y": "?", "to": "untracked.txt", "from": "untracked.txt"}
+    ]
+    assert first["fingerprint"]
+    assert second == {
+        "code": 0,
+        "not_modified": True,
+        "fingerprint": first["fingerprint"],
+    }
+    assert len(third["files"]) == 2
+    assert third["fingerprint"] != first["fingerprint"]
@@ -0,0 +1,197 @@
+# python lib
+import errno
+import os
+from unittest.mock import patch
+
+import pytest
+import tornado
+
+# local lib
+from jupyterlab_dvc import watcher
+from jupyterlab_dvc.watcher import RepositoryWatchers
+
+from .testutils import Listener, run_git
+
+
+@pytest.fixture
+def repository(repository):
+    run_git(repository, "config", "user.name", "John Snow")
+    run_git(repository, "config", "user.email", "john.snow@winterfell.north")
+    (repository / "folder").mkdir()
+    (repository / "folder" / "tracked.txt").write_text("content")
+    run_git(repository, "add", ".")
+    run_git(repository, "commit", "-q", "-m", "Winter is coming")
+    return repository
+
+
+async def next_message(messages, ignored=(), timeout=10):
+    deadline = tornado.ioloop.IOLoop.current().time() + timeout
+    while True:
+        while messages:
+            message = messages.pop(0)
+            if message["type"] not in ignored:
+                return message
+        if tornado.ioloop.IOLoop.current().time() > deadline:
+            raise AssertionError("No message received")
+        await tornado.gen.sleep(0.05)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("inotify", [True, False])
+async def test_watch_status(repository, inotify):
+    # Given
+    messages = Listener()
+    watchers = RepositoryWatchers(str(repository.parent))
+    with patch.object(watcher, "WATCHER_DEBOUNCE_S", 0.01), patch.object(
+        watcher, "WATCHER_POLL_INTERVAL_S", 0.05
+    ), patch.object(watcher, "_libc", watcher._libc if inotify else None):
+        if inotify and watcher._libc is None:
+            pytest.skip("inotify is not available")
+
+        # When
+        top = await watchers.subscribe(repository.name + "/folder", messages)
+        snapshot = await next_message(messages)
+        # The polling backend cannot tell whether HEAD changed
+        (repository / "folder" / "untracked.txt").write_text("content")
+        created = await next_message(messages, ignored=("head",))
+        (repository / "folder" / "untracked.txt").unlink()
+        deleted = await next_message(messages, ignored=("head",))
+        watchers.unsubscribe(top, messages)
+
+    # Then
+    assert top == str(repository)
+    assert snapshot == {"type": "status", "files": []}
+    assert created == {
+        "type": "status_delta",
+        "changed": [
+            {
+                "x": "?",
+                "y": "?",
+                "to": "folder/untracked.txt",
+                "from": "folder/untracked.txt",
+            }
+        ],
+        "removed": [],
+    }
+    assert deleted == {
+        "type": "status_delta",
+        "changed": [],
+        "removed": ["folder/untracked.txt"],
+    }
+    assert watchers._watchers == {}
+
+
+@pytest.mark.asyncio
+async def test_watch_head(repository):
+    # Given
+    messages = Listener()
+    watchers = RepositoryWatchers(str(repository))
+    if watcher._libc is None:
+        pytest.skip("inotify is not available")
+    with patch.object(watcher, "WATCHER_DEBOUNCE_S", 0.01):
+        top = await watchers.subscribe("", messages)
+        await next_message(messages)
+
+        # When
+        (repository / "folder" / "tracked.txt").write_text("modified")
+        modified = await next_message(messages)
+        (repository / "folder" / "new_folder").mkdir()
+        (repository / "folder" / "new_folder" / "untracked.txt").write_text("content")
+        untracked = await next_message(messages)
+        run_git(repository, "checkout", "-q", "-b", "feature")
+        head = await next_message(messages)
+        watchers.stop()
+
+    # Then
+    assert top == str(repository)
+    assert modified["changed"] == [
+        {"x": " ", "y": "M", "to": "folder/tracked.txt", "from": "folder/tracked.txt"}
+    ]
+    assert untracked["changed"] == [
+        {
+            "x": "?",
+            "y": "?",
+            "to": "folder/new_folder/untracked.txt",
+            "from": "folder/new_folder/untracked.txt",
+        }
+    ]
+    assert head == {"type": "head"}
+
+
+@pytest.mark.asyncio
+async def test_watch_not_a_repository(tmp_path):
+    # Given
+    messages = Listener()
+    watchers = RepositoryWatchers(str(tmp_path))
+
+    # When
+    top = await watchers.subscribe("", messages)
+
+    # Then
+    assert top is None
+    assert messages == []
+
+
+@pytest.mark.asyncio
+async def test_watch_skips_ignored_folders(repository):
+    # Given
+    messages = Listener()
+    watchers = RepositoryWatchers(str(repository))
+    if watcher._libc is None:
+        pytest.skip("inotify is not available")
+    (repository / ".gitignore").write_text("build/\n")
+    (repository / "build" / "output").mkdir(parents=True)
+    with patch.object(watcher, "WATCHER_DEBOUNCE_S", 0.01):
+        top = await watchers.subscribe("", messages)
+        await next_message(messages)
+
+        # When
+        (repository / "folder" / "new_build").mkdir()
+        (repository / "folder" / "new_build" / "untracked.txt").write_text("content")
+        await next_message(messages)
+        backend = watchers._watchers[top]._backend
+        folders = {folder for folder, _, _ in backend._watches.values()}
+        watchers.stop()
+
+    # Then
+    assert str(repository / "folder") in folders
+    assert str(repository / "folder" / "new_build") in folders
+    assert str(repository / "build") not in folders
+    assert str(repository / "build" / "output") not in folders
+
+
+@pytest.mark.asyncio
+async def test_watch_limit_falls_back_to_polling(repository):
+    # Given
+    messages = Listener()
+    watchers = RepositoryWatchers(str(repository))
+    if watcher._libc is None:
+        pytest.skip("inotify is not available")
+
+    def watch_tree(*args):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    with patch.object(watcher, "WATCHER_DEBOUNCE_S", 0.01), patch.object(
+        watcher, "WATCHER_POLL_INTERVAL_S", 0.05
+    ), patch.object(watcher, "watch_tree", watch_tree), patch.object(
+        watcher.app_log, "warning"
+    ) as warning:
+        # When
+        top = await watchers.subscribe("", messages)
+        await next_message(messages)
+        backend = watchers._watchers[top]._backend
+        (repository / "folder" / "untracked.txt").write_text("content")
+        created = await next_message(messages, ignored=("head",))
+        watchers.stop()
+
+    # Then
+    assert isinstance(backend, watcher.PollingBackend)
+    warning.assert_called_once()
+    assert created["changed"] == [
+        {
+            "x": "?",
+            "y": "?",
+            "to": "folder/untracked.txt",
+            "from": "folder/untracked.txt",
+        }
+    ]
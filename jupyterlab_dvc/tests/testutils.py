@@ -1,6 +1,7 @@
 """Helpers for tests"""
 
 import json
+import subprocess
 from typing import List
 from unittest.mock import patch
 
@@ -29,6 +30,37 @@ except ImportError:
 NS = "/git"
 
 
+def run_git(cwd, *args, env=None):
+    """Run a git command in a test folder.
+
+    Args:
+        cwd (Union[str, pathlib.Path]): Working directory
+        *args (str): git arguments
+        env (Optional[Dict[str, str]]): Environment variables
+    Returns:
+        str: The command output
+    """
+    return subprocess.run(
+        ["git", "-c", "user.name=John Snow", "-c", "user.email=john@snow.com"]
+        + list(args),
+        cwd=str(cwd),
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+        env=env,
+    ).stdout
+
+
+class Listener(list):
+    """Record the messages sent to a listener callback."""
+
+    __hash__ = object.__hash__
+
+    def __call__(self, message):
+        self.append(message)
+
+
 class APITester(object):
     """Wrapper for REST API requests"""
 
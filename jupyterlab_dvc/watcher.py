@@ -0,0 +1,509 @@
+"""
+Module watching repositories to push their status changes instead of polling
+"""
+import ctypes
+import errno
+import os
+
+import tornado
+import tornado.ioloop
+import tornado.locks
+from tornado.log import app_log
+
+from .git import execute, list_ignored_folders, parse_status
+from .inotify import (
+    IN_ATTRIB,
+    IN_CLOEXEC,
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_DELETE,
+    IN_DELETE_SELF,
+    IN_IGNORED,
+    IN_ISDIR,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    IN_NONBLOCK,
+    IN_Q_OVERFLOW,
+)
+from .inotify import libc as _libc
+from .inotify import parse_events
+from .repository import compute_fingerprint, find_common_dir, find_git_dir, find_repository
+from .scheduler import BACKGROUND, scheduled_as
+
+# Delay to gather file system events before refreshing the status
+WATCHER_DEBOUNCE_S = 0.2
+# Period of the stat scanning used when inotify is not available
+WATCHER_POLL_INTERVAL_S = 2
+# Above this number of changed paths, the whole status is recomputed
+MAX_INCREMENTAL_PATHS = 100
+
+# Events signaling a change in the watched folders
+WATCH_MASK = (
+    IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+
+
+class InotifyBackend:
+    """Watch a repository with inotify.
+
+    The working tree folders are watched recursively, ignored folders
+    excluded, as well as the git folder (not recursively) and the references.
+    The folders are walked and watched on a thread, not to block the server.
+    """
+
+    def __init__(self, top_repo_path, on_event, on_limit):
+        """
+        Args:
+            top_repo_path (str): Repository top-level folder
+            on_event (Callable[[Optional[Set[str]], bool, bool], None]): Callback
+                receiving the changed paths (None if unknown), whether the index
+                changed and whether HEAD or the references changed
+            on_limit (Callable[[], None]): Callback called when a new folder
+                cannot be watched because the watches limit is reached
+        Raises:
+            OSError: if inotify is not available
+        """
+        if _libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        self._top_repo_path = top_repo_path
+        self._on_event = on_event
+        self._on_limit = on_limit
+        # watch descriptor -> (folder, is in git folder, is watched recursively)
+        self._watches = {}
+        self._fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    async def start(self, ignored):
+        """Watch the repository.
+
+        Args:
+            ignored (Set[str]): Ignored folders, relative to the top-level folder
+                and "/" separated
+        Raises:
+            OSError: if the watches limit is reached
+        """
+        try:
+            git_dir = find_git_dir(self._top_repo_path)
+            if git_dir is not None:
+                common_dir = find_common_dir(git_dir)
+                await self._add_tree(git_dir, True, False)
+                if common_dir != git_dir:
+                    await self._add_tree(common_dir, True, False)
+                await self._add_tree(os.path.join(common_dir, "refs"), True)
+            await self._add_tree(self._top_repo_path, False, ignored=ignored)
+        except OSError:
+            self.stop()
+            raise
+
+        tornado.ioloop.IOLoop.current().add_handler(
+            self._fd, self._handle_events, tornado.ioloop.IOLoop.READ
+        )
+
+    def stop(self):
+        """Stop watching."""
+        if self._fd < 0:
+            return
+        try:
+            tornado.ioloop.IOLoop.current().remove_handler(self._fd)
+        except KeyError:
+            # Stopped before being started
+            pass
+        os.close(self._fd)
+        self._fd = -1
+
+    async def _add_tree(self, root, is_git, recursive=True, ignored=frozenset()):
+        fd = self._fd
+        watches = await tornado.ioloop.IOLoop.current().run_in_executor(
+            None, watch_tree, fd, root, recursive, ignored, self._top_repo_path
+        )
+        if self._fd == fd:
+            for wd, folder in watches:
+                self._watches[wd] = (folder, is_git, recursive)
+
+    async def _add_new_folders(self, folders, is_git):
+        """Watch the folders created in the watched folders, unless ignored."""
+        try:
+            if not is_git:
+                folders = await self._not_ignored(folders)
+            for folder in folders:
+                await self._add_tree(folder, is_git)
+        except OSError as error:
+            if error.errno == errno.ENOSPC:
+                self._on_limit()
+            else:
+                # The new folders content is unknown
+                self._on_event(None, False, False)
+
+    async def _not_ignored(self, folders):
+        relatives = [
+            os.path.relpath(folder, self._top_repo_path).replace(os.sep, "/")
+            for folder in folders
+        ]
+        with scheduled_as(BACKGROUND):
+            code, output, _ = await execute(
+                ["git", "check-ignore", "-z", "--stdin"],
+                cwd=self._top_repo_path,
+                input="".join(path + "\0" for path in relatives).encode("utf-8"),
+            )
+        # check-ignore fails with 1 if no folder is ignored
+        ignored = set(output.split("\0")) if code == 0 else set()
+        return [
+            folder
+            for folder, relative in zip(folders, relatives)
+            if relative not in ignored
+        ]
+
+    def _handle_events(self, fd, events):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        paths = set()
+        index_changed = False
+        head_changed = False
+        # is in git folder -> folders created in watched folders
+        new_folders = {True: [], False: []}
+        for wd, mask, name in parse_events(data):
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost
+                paths = None
+                index_changed = head_changed = True
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            folder, is_git, recursive = watch
+            path = os.path.join(folder, name) if name else folder
+
+            if recursive and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Nested repositories are not part of the working tree
+                if name != ".git":
+                    new_folders[is_git].append(path)
+
+            if is_git:
+                if name.endswith(".lock"):
+                    continue
+                if name == "index":
+                    index_changed = True
+                else:
+                    head_changed = True
+            elif paths is not None and name != ".git":
+                paths.add(path)
+
+        for is_git, folders in new_folders.items():
+            if folders:
+                tornado.ioloop.IOLoop.current().spawn_callback(
+                    self._add_new_folders, folders, is_git
+                )
+        if paths is None or paths or index_changed or head_changed:
+            self._on_event(paths, index_changed, head_changed)
+
+
+def watch_tree(fd, root, recursive, ignored, top_repo_path):
+    """Add inotify watches on a folder and its subfolders.
+
+    Nested repositories and ignored folders are skipped. It is meant to be run
+    on a thread; the folders vanishing meanwhile are skipped.
+
+    Args:
+        fd (int): inotify file descriptor
+        root (str): Folder
+        recursive (bool): Whether to watch the subfolders
+        ignored (Set[str]): Ignored folders, relative to top_repo_path and "/" separated
+        top_repo_path (str): Repository top-level folder
+    Returns:
+        List[Tuple[int, str]]: The watch descriptors and their folder
+    Raises:
+        OSError: if the watches limit is reached
+    """
+    watches = []
+    for folder, subfolders, _ in os.walk(root):
+        if ignored:
+            prefix = os.path.relpath(folder, top_repo_path).replace(os.sep, "/")
+            prefix = "" if prefix == os.curdir else prefix + "/"
+            subfolders[:] = [name for name in subfolders if prefix + name not in ignored]
+        # Nested repositories are not part of the working tree
+        subfolders[:] = [name for name in subfolders if name != ".git"]
+        wd = _libc.inotify_add_watch(fd, os.fsencode(folder), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                # The folder vanished or cannot be read
+                continue
+            raise OSError(code, os.strerror(code))
+        watches.append((wd, folder))
+        if not recursive:
+            break
+    return watches
+
+
+class PollingBackend:
+    """Watch a repository by periodically computing its fingerprint."""
+
+    def __init__(self, top_repo_path, on_event, fingerprint=None, ignored=frozenset()):
+        """
+        Args:
+            top_repo_path (str): Repository top-level folder
+            on_event (Callable[[Optional[Set[str]], bool, bool], None]): Callback
+                called with (None, True, True) when the repository changed
+            fingerprint (Optional[str]): Fingerprint of the current repository state
+            ignored (Set[str]): Ignored folders, relative to the top-level folder
+        """
+        self._top_repo_path = top_repo_path
+        self._on_event = on_event
+        self._fingerprint = fingerprint
+        self._ignored = ignored
+        self._callback = tornado.ioloop.PeriodicCallback(
+            self._check, WATCHER_POLL_INTERVAL_S * 1000
+        )
+        self._callback.start()
+
+    def stop(self):
+        """Stop watching."""
+        self._callback.stop()
+
+    async def _check(self):
+        fingerprint = await tornado.ioloop.IOLoop.current().run_in_executor(
+            None, compute_fingerprint, self._top_repo_path, self._ignored
+        )
+        if fingerprint is None or fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._on_event(None, True, True)
+
+
+class RepositoryWatcher:
+    """Keep the status of a repository up to date and push its changes to listeners.
+
+    Listeners are called with messages:
+    - {"type": "status", "files": [...]}: the complete status
+    - {"type": "status_delta", "changed": [...], "removed": [...]}: the modified
+      status entries and the paths no longer in the status
+    - {"type": "head"}: HEAD or the references changed
+    """
+
+    def __init__(self, top_repo_path):
+        """
+        Args:
+            top_repo_path (str): Repository top-level folder
+        """
+        self.top_repo_path = top_repo_path
+        self.listeners = set()
+        self.ready = tornado.locks.Event()
+        # Status entries keyed by path
+        self._files = {}
+        self._backend = None
+        self._flush_handle = None
+        self._refreshing = tornado.locks.Lock()
+        self._pending_paths = set()
+        self._pending_full = False
+        self._pending_head = False
+        self._ignored = frozenset()
+        self._stopped = False
+
+    async def start(self):
+        """Compute the initial status and start watching."""
+        try:
+            self._ignored = await list_ignored_folders(self.top_repo_path)
+            fingerprint = await tornado.ioloop.IOLoop.current().run_in_executor(
+                None, compute_fingerprint, self.top_repo_path, self._ignored
+            )
+            await self._refresh(None)
+            try:
+                backend = InotifyBackend(
+                    self.top_repo_path, self._on_event, self._on_watch_limit
+                )
+                await backend.start(self._ignored)
+            except OSError as error:
+                if error.errno == errno.ENOSPC:
+                    self._warn_watch_limit()
+                backend = PollingBackend(
+                    self.top_repo_path, self._on_event, fingerprint, self._ignored
+                )
+            if self._stopped:
+                backend.stop()
+            else:
+                self._backend = backend
+        finally:
+            self.ready.set()
+
+    def stop(self):
+        """Stop watching."""
+        self._stopped = True
+        if self._backend is not None:
+            self._backend.stop()
+            self._backend = None
+        if self._flush_handle is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._flush_handle)
+            self._flush_handle = None
+
+    def _warn_watch_limit(self):
+        app_log.warning(
+            "The inotify watches limit (fs.inotify.max_user_watches) is reached; "
+            "the repository %s is polled instead.",
+            self.top_repo_path,
+        )
+
+    def _on_watch_limit(self):
+        """Switch to polling; a new folder could not be watched."""
+        if not isinstance(self._backend, InotifyBackend):
+            return
+        self._warn_watch_limit()
+        self._backend.stop()
+        # Without fingerprint, the first check refreshes the whole status
+        self._backend = PollingBackend(
+            self.top_repo_path, self._on_event, None, self._ignored
+        )
+
+    def snapshot(self):
+        """Get the complete status message."""
+        return {"type": "status", "files": list(self._files.values())}
+
+    def _on_event(self, paths, index_changed, head_changed):
+        if paths is None or index_changed or head_changed:
+            self._pending_full = True
+        else:
+            self._pending_paths.update(
+                os.path.relpath(path, self.top_repo_path) for path in paths
+            )
+        self._pending_head = self._pending_head or head_changed
+
+        if self._flush_handle is None:
+            self._flush_handle = tornado.ioloop.IOLoop.current().call_later(
+                WATCHER_DEBOUNCE_S, self._flush
+            )
+
+    async def _flush(self):
+        async with self._refreshing:
+            self._flush_handle = None
+            paths, self._pending_paths = self._pending_paths, set()
+            full, self._pending_full = self._pending_full, False
+            head, self._pending_head = self._pending_head, False
+
+            if full or len(paths) > MAX_INCREMENTAL_PATHS:
+                paths = None
+            delta = await self._refresh(paths)
+
+            if delta is not None and (delta["changed"] or delta["removed"]):
+                self._notify(delta)
+            if head:
+                self._notify({"type": "head"})
+
+    async def _refresh(self, paths):
+        """Refresh the status of paths or of the whole repository.
+
+        Args:
+            paths (Optional[Set[str]]): Paths relative to the top-level folder
+        Returns:
+            Optional[dict]: The status delta message or None if the status failed
+        """
+        cmd = ["git", "status", "--porcelain", "-u", "-z"]
+        if paths is not None:
+            cmd += ["--"] + sorted(paths)
+        env = os.environ.copy()
+        # Do not refresh the index; its modification would trigger a new refresh
+        env["GIT_OPTIONAL_LOCKS"] = "0"
+        env["GIT_LITERAL_PATHSPECS"] = "1"
+        with scheduled_as(BACKGROUND):
+            code, output, _ = await execute(cmd, cwd=self.top_repo_path, env=env)
+        if code != 0:
+            return None
+
+        files = {entry["to"]: entry for entry in parse_status(output)}
+        if paths is None:
+            scope = set(self._files)
+        else:
+            scope = {
+                key
+                for key in self._files
+                if any(key == path or key.startswith(path + "/") for path in paths)
+            }
+
+        removed = [key for key in scope if key not in files]
+        changed = [
+            entry for key, entry in files.items() if self._files.get(key) != entry
+        ]
+        for key in removed:
+            del self._files[key]
+        self._files.update(files)
+        return {"type": "status_delta", "changed": changed, "removed": removed}
+
+    def _notify(self, message):
+        for listener in list(self.listeners):
+            listener(message)
+
+
+class RepositoryWatchers:
+    """Registry of the watched repositories.
+
+    A repository is watched as long as it has at least one listener.
+    """
+
+    def __init__(self, root_dir):
+        """
+        Args:
+            root_dir (str): Server root folder
+        """
+        self.root_dir = root_dir
+        self._watchers = {}
+
+    async def subscribe(self, current_path, listener):
+        """Subscribe to the status changes of a repository.
+
+        The listener immediately receives the complete status.
+
+        Args:
+            current_path (str): Path inside the repository
+            listener (Callable[[dict], None]): Callback receiving the messages
+        Returns:
+            Optional[str]: The repository top-level folder or None if current_path
+                is not in a repository
+        """
+        top_repo_path = find_repository(os.path.join(self.root_dir, current_path))
+        if top_repo_path is None:
+            return None
+
+        watcher = self._watchers.get(top_repo_path)
+        if watcher is None:
+            watcher = RepositoryWatcher(top_repo_path)
+            self._watchers[top_repo_path] = watcher
+            tornado.ioloop.IOLoop.current().spawn_callback(watcher.start)
+        watcher.listeners.add(listener)
+        await watcher.ready.wait()
+        if listener in watcher.listeners:
+            listener(watcher.snapshot())
+        return top_repo_path
+
+    def unsubscribe(self, top_repo_path, listener):
+        """Unsubscribe from the status changes of a repository.
+
+        Args:
+            top_repo_path (str): Repository top-level folder
+            listener (Callable[[dict], None]): Callback receiving the messages
+        """
+        watcher = self._watchers.get(top_repo_path)
+        if watcher is None:
+            return
+        watcher.listeners.discard(listener)
+        if not watcher.listeners:
+            watcher.stop()
+            del self._watchers[top_repo_path]
+
+    def stop(self):
+        """Stop watching all repositories."""
+        for watcher in self._watchers.values():
+            watcher.stop()
+        self._watchers.clear()
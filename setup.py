@@ -72,7 +72,6 @@ setup_args = dict(
     install_requires = [
         'notebook',
         'nbdime ~=2.0',
-        'pexpect'
     ],
     extras_require = {
         'test': [
@@ -14,6 +14,7 @@ import {
   listItemClass,
   listItemIconClass,
   listWrapperClass,
+  moreListItemClass,
   newBranchButtonClass,
   wrapperClass
 } from '../style/BranchMenu';
@@ -22,6 +23,9 @@ import { NewBranchDialog } from './NewBranchDialog';
 const CHANGES_ERR_MSG =
   'The current branch contains files with uncommitted changes. Please commit or discard these changes before switching to or creating another branch.';
 
+// Number of branches fetched at once; the following ones are fetched on demand
+const BRANCHES_PAGE_SIZE = 100;
+
 /**
  * Interface describing component properties.
  */
@@ -60,6 +64,11 @@ export interface IBranchMenuState {
    * Current list of branches.
    */
   branches: Git.IBranch[];
+
+  /**
+   * Offset of the next page of branches; null if all branches are listed.
+   */
+  next: number | null;
 }
 
 /**
@@ -84,7 +93,8 @@ export class BranchMenu extends React.Component<
       filter: '',
       branchDialog: false,
       current: repo ? this.props.model.currentBranch.name : '',
-      branches: repo ? this.props.model.branches : []
+      branches: repo ? this.props.model.branches : [],
+      next: null
     };
   }
 
@@ -93,6 +103,8 @@ export class BranchMenu extends React.Component<
    */
   componentDidMount(): void {
     this._addListeners();
+    // The model only knows about the first branches; list them all on demand
+    this._fetchBranches();
   }
 
   /**
@@ -100,6 +112,8 @@ export class BranchMenu extends React.Component<
    */
   componentWillUnmount(): void {
     this._removeListeners();
+    // Ignore the pending requests
+    this._request += 1;
   }
 
   /**
@@ -156,7 +170,21 @@ export class BranchMenu extends React.Component<
    * @returns array of React elements
    */
   private _renderItems(): React.ReactElement[] {
-    return this.state.branches.map(this._renderItem, this);
+    const items = this.state.branches.map(this._renderItem, this);
+    if (this.state.next !== null) {
+      items.push(
+        <ListItem
+          button
+          title="Show more branches"
+          className={moreListItemClass}
+          key="-more-"
+          onClick={this._onMoreClick}
+        >
+          More...
+        </ListItem>
+      );
+    }
+    return items;
   }
 
   /**
@@ -170,10 +198,7 @@ export class BranchMenu extends React.Component<
     branch: Git.IBranch,
     idx: number
   ): React.ReactElement | null {
-    // Perform a "simple" filter... (TODO: consider implementing fuzzy filtering)
-    if (this.state.filter && !branch.name.includes(this.state.filter)) {
-      return null;
-    }
+    // The branches are filtered by the server
     return (
       <ListItem
         button
@@ -196,7 +221,7 @@ export class BranchMenu extends React.Component<
    */
   private _addListeners(): void {
     // When the HEAD changes, decent probability that we've switched branches:
-    this.props.model.headChanged.connect(this._syncState, this);
+    this.props.model.headChanged.connect(this._onHeadChanged, this);
 
     // When the status changes, we may have checked out a new branch (e.g., via the command-line and not via the extension) or changed repositories:
     this.props.model.statusChanged.connect(this._syncState, this);
@@ -206,7 +231,7 @@ export class BranchMenu extends React.Component<
    * Removes model listeners.
    */
   private _removeListeners(): void {
-    this.props.model.headChanged.disconnect(this._syncState, this);
+    this.props.model.headChanged.disconnect(this._onHeadChanged, this);
     this.props.model.statusChanged.disconnect(this._syncState, this);
   }
 
@@ -215,30 +240,88 @@ export class BranchMenu extends React.Component<
    */
   private _syncState(): void {
     const repo = this.props.model.pathRepository;
+    if (!repo) {
+      this._request += 1;
+      this.setState({ current: '', branches: [], next: null });
+      return;
+    }
     this.setState({
-      current: repo ? this.props.model.currentBranch.name : '',
-      branches: repo ? this.props.model.branches : []
+      current: this.props.model.currentBranch.name
     });
   }
 
+  /**
+   * Callback invoked when the HEAD changes; the branches may have changed.
+   */
+  private _onHeadChanged(): void {
+    this._syncState();
+    this._fetchBranches();
+  }
+
+  /**
+   * Fetches the branches matching the menu filter.
+   *
+   * @param more - whether to fetch the next page instead of the first one
+   * @returns promise which resolves once the branches are listed
+   */
+  private async _fetchBranches(more = false): Promise<void> {
+    if (!this.props.model.pathRepository) {
+      return;
+    }
+    this._request += 1;
+    const request = this._request;
+    try {
+      const response = await this.props.model.listBranches({
+        filter: this.state.filter,
+        offset: more ? this.state.next : 0,
+        limit: BRANCHES_PAGE_SIZE
+      });
+      if (request !== this._request || response.code !== 0) {
+        // Outdated or failed request
+        return;
+      }
+      this.setState({
+        branches: more
+          ? this.state.branches.concat(response.branches)
+          : response.branches,
+        next: typeof response.next === 'number' ? response.next : null
+      });
+    } catch (err) {
+      console.error(err);
+    }
+  }
+
   /**
    * Callback invoked upon a change to the menu filter.
    *
    * @param event - event object
    */
   private _onFilterChange = (event: any): void => {
-    this.setState({
-      filter: event.target.value
-    });
+    this.setState(
+      {
+        filter: event.target.value
+      },
+      () => this._fetchBranches()
+    );
   };
 
   /**
    * Callback invoked to reset the menu filter.
    */
   private _resetFilter = (): void => {
-    this.setState({
-      filter: ''
-    });
+    this.setState(
+      {
+        filter: ''
+      },
+      () => this._fetchBranches()
+    );
+  };
+
+  /**
+   * Callback invoked upon clicking the item to show more branches.
+   */
+  private _onMoreClick = (): void => {
+    this._fetchBranches(true);
   };
 
   /**
@@ -317,4 +400,9 @@ export class BranchMenu extends React.Component<
       showErrorMessage('Error switching branch', err.message);
     }
   }
+
+  /**
+   * Counter of the branches requests; only the last response is used.
+   */
+  private _request = 0;
 }
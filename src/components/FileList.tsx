@@ -182,9 +182,9 @@ export class FileList extends React.Component<IFileListProps, IFileListState> {
     await this.props.model.reset();
   };
 
-  /** Reset a specific staged file */
-  resetStagedFile = async (file: string) => {
-    await this.props.model.reset(file);
+  /** Reset specific staged files */
+  resetStagedFile = async (...file: string[]) => {
+    await this.props.model.reset(...file);
   };
 
   /** Add all unstaged files */
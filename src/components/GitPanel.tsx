@@ -29,6 +29,10 @@ export interface IGitSessionNodeState {
   files: Git.IStatusFile[];
   inGitRepository: boolean;
   pastCommits: Git.ISingleCommitInfo[];
+  /**
+   * Continuation token of the next history page; null if fully loaded
+   */
+  nextCommits: string | null;
   tab: number;
 }
 
@@ -52,6 +56,7 @@ export class GitPanel extends React.Component<
       files: [],
       inGitRepository: false,
       pastCommits: [],
+      nextCommits: null,
       tab: 0
     };
   }
@@ -85,28 +90,58 @@ export class GitPanel extends React.Component<
     const { currentBranch } = this.props.model;
 
     this.setState({
-      branches: this.props.model.branches,
       currentBranch: currentBranch ? currentBranch.name : 'master'
     });
   };
 
   refreshHistory = async () => {
     if (this.props.model.pathRepository !== null) {
-      // Get git log for current branch
-      let logData = await this.props.model.log(this.props.settings.composite[
-        'historyCount'
-      ] as number);
+      // Get git log for current branch, and all the branches to tag the commits
+      // (the model only knows about the first branches)
+      const [logData, branchData] = await Promise.all([
+        this.props.model.log(this.props.settings.composite[
+          'historyCount'
+        ] as number),
+        this.props.model.listBranches({})
+      ]);
       let pastCommits = new Array<Git.ISingleCommitInfo>();
+      let nextCommits: string | null = null;
       if (logData.code === 0) {
         pastCommits = logData.commits;
+        nextCommits = logData.next || null;
       }
 
       this.setState({
-        pastCommits: pastCommits
+        branches: branchData.code === 0 ? branchData.branches : [],
+        pastCommits: pastCommits,
+        nextCommits: nextCommits
       });
     }
   };
 
+  loadMoreHistory = async () => {
+    const after = this.state.nextCommits;
+    if (after === null || this._loadingHistory) {
+      return;
+    }
+    this._loadingHistory = true;
+    try {
+      const logData = await this.props.model.log(
+        this.props.settings.composite['historyCount'] as number,
+        after
+      );
+      // Ignore the page if the history was refreshed meanwhile
+      if (logData.code === 0 && this.state.nextCommits === after) {
+        this.setState({
+          pastCommits: this.state.pastCommits.concat(logData.commits),
+          nextCommits: logData.next || null
+        });
+      }
+    } finally {
+      this._loadingHistory = false;
+    }
+  };
+
   refreshStatus = async () => {
     await this.props.model.refreshStatus();
   };
@@ -283,6 +318,8 @@ export class GitPanel extends React.Component<
       <HistorySideBar
         branches={this.state.branches}
         commits={this.state.pastCommits}
+        hasMore={this.state.nextCommits !== null}
+        onLoadMore={this.loadMoreHistory}
         model={this.props.model}
         renderMime={this.props.renderMime}
       />
@@ -409,4 +446,5 @@ export class GitPanel extends React.Component<
   }
 
   private _previousRepoPath: string = null;
+  private _loadingHistory = false;
 }
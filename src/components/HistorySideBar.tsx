@@ -14,6 +14,16 @@ export interface IHistorySideBarProps {
    */
   commits: Git.ISingleCommitInfo[];
 
+  /**
+   * Whether older commits can be loaded.
+   */
+  hasMore?: boolean;
+
+  /**
+   * Callback invoked to load the next page of commits.
+   */
+  onLoadMore?: () => void;
+
   /**
    * List of branches.
    */
@@ -30,6 +40,11 @@ export interface IHistorySideBarProps {
   renderMime: IRenderMimeRegistry;
 }
 
+/**
+ * Distance (in pixels) from the bottom of the list at which the next commits are loaded.
+ */
+const LOAD_MORE_THRESHOLD = 200;
+
 /**
  * Returns a React component for displaying commit history.
  *
@@ -39,7 +54,20 @@ export interface IHistorySideBarProps {
 export const HistorySideBar: React.FunctionComponent<IHistorySideBarProps> = (
   props: IHistorySideBarProps
 ): React.ReactElement => (
-  <ol className={historySideBarStyle}>
+  <ol
+    className={historySideBarStyle}
+    onScroll={(event: React.UIEvent<HTMLOListElement>) => {
+      const list = event.currentTarget;
+      if (
+        props.hasMore &&
+        props.onLoadMore &&
+        list.scrollHeight - list.scrollTop - list.clientHeight <
+          LOAD_MORE_THRESHOLD
+      ) {
+        props.onLoadMore();
+      }
+    }}
+  >
     {props.commits.map((commit: Git.ISingleCommitInfo) => (
       <PastCommitNode
         key={commit.commit}
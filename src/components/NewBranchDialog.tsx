@@ -27,6 +27,7 @@ import {
   listItemIconClass,
   listItemTitleClass,
   listWrapperClass,
+  moreListItemClass,
   nameInputClass,
   titleClass,
   titleWrapperClass
@@ -39,6 +40,9 @@ const BRANCH_DESC = {
     'The default branch. Pick this if you want to start fresh from the default branch.'
 };
 
+// Number of branches fetched at once; the following ones are fetched on demand
+const BRANCHES_PAGE_SIZE = 100;
+
 /**
  * Interface describing component properties.
  */
@@ -87,6 +91,11 @@ export interface INewBranchDialogState {
    * Current list of branches.
    */
   branches: Git.IBranch[];
+
+  /**
+   * Offset of the next page of branches; null if all branches are listed.
+   */
+  next: number | null;
 }
 
 /**
@@ -112,7 +121,8 @@ export class NewBranchDialog extends React.Component<
       base: repo ? this.props.model.currentBranch.name : '',
       filter: '',
       current: repo ? this.props.model.currentBranch.name : '',
-      branches: repo ? this.props.model.branches : []
+      branches: repo ? this.props.model.branches : [],
+      next: null
     };
   }
 
@@ -121,6 +131,21 @@ export class NewBranchDialog extends React.Component<
    */
   componentDidMount(): void {
     this._addListeners();
+    if (this.props.open) {
+      this._fetchBranches();
+    }
+  }
+
+  /**
+   * Callback invoked after updating a component.
+   *
+   * @param prevProps - previous component properties
+   */
+  componentDidUpdate(prevProps: INewBranchDialogProps): void {
+    // The model only knows about the first branches; list them all on demand
+    if (this.props.open && !prevProps.open) {
+      this._fetchBranches();
+    }
   }
 
   /**
@@ -128,6 +153,8 @@ export class NewBranchDialog extends React.Component<
    */
   componentWillUnmount(): void {
     this._removeListeners();
+    // Ignore the pending requests
+    this._request += 1;
   }
 
   /**
@@ -217,10 +244,24 @@ export class NewBranchDialog extends React.Component<
    */
   private _renderItems(): React.ReactElement[] {
     const current = this.props.model.currentBranch.name;
-    return this.state.branches
+    const items = this.state.branches
       .slice()
       .sort(comparator)
       .map(this._renderItem, this);
+    if (this.state.next !== null) {
+      items.push(
+        <ListItem
+          button
+          title="Show more branches"
+          className={moreListItemClass}
+          key="-more-"
+          onClick={this._onMoreClick}
+        >
+          More...
+        </ListItem>
+      );
+    }
+    return items;
 
     /**
      * Comparator function for sorting branches.
@@ -298,7 +339,7 @@ export class NewBranchDialog extends React.Component<
    */
   private _addListeners(): void {
     // When the HEAD changes, decent probability that we've switched branches:
-    this.props.model.headChanged.connect(this._syncState, this);
+    this.props.model.headChanged.connect(this._onHeadChanged, this);
 
     // When the status changes, we may have checked out a new branch (e.g., via the command-line and not via the extension) or changed repositories:
     this.props.model.statusChanged.connect(this._syncState, this);
@@ -308,7 +349,7 @@ export class NewBranchDialog extends React.Component<
    * Removes model listeners.
    */
   private _removeListeners(): void {
-    this.props.model.headChanged.disconnect(this._syncState, this);
+    this.props.model.headChanged.disconnect(this._onHeadChanged, this);
     this.props.model.statusChanged.disconnect(this._syncState, this);
   }
 
@@ -317,13 +358,59 @@ export class NewBranchDialog extends React.Component<
    */
   private _syncState(): void {
     const repo = this.props.model.pathRepository;
+    if (!repo) {
+      this._request += 1;
+      this.setState({ base: '', current: '', branches: [], next: null });
+      return;
+    }
     this.setState({
-      base: repo ? this.state.base : '',
-      current: repo ? this.props.model.currentBranch.name : '',
-      branches: repo ? this.props.model.branches : []
+      current: this.props.model.currentBranch.name
     });
   }
 
+  /**
+   * Callback invoked when the HEAD changes; the branches may have changed.
+   */
+  private _onHeadChanged(): void {
+    this._syncState();
+    if (this.props.open) {
+      this._fetchBranches();
+    }
+  }
+
+  /**
+   * Fetches the branches matching the filter.
+   *
+   * @param more - whether to fetch the next page instead of the first one
+   * @returns promise which resolves once the branches are listed
+   */
+  private async _fetchBranches(more = false): Promise<void> {
+    if (!this.props.model.pathRepository) {
+      return;
+    }
+    this._request += 1;
+    const request = this._request;
+    try {
+      const response = await this.props.model.listBranches({
+        filter: this.state.filter,
+        offset: more ? this.state.next : 0,
+        limit: BRANCHES_PAGE_SIZE
+      });
+      if (request !== this._request || response.code !== 0) {
+        // Outdated or failed request
+        return;
+      }
+      this.setState({
+        branches: more
+          ? this.state.branches.concat(response.branches)
+          : response.branches,
+        next: typeof response.next === 'number' ? response.next : null
+      });
+    } catch (err) {
+      console.error(err);
+    }
+  }
+
   /**
    * Callback invoked upon closing the dialog.
    *
@@ -343,18 +430,31 @@ export class NewBranchDialog extends React.Component<
    * @param event - event object
    */
   private _onFilterChange = (event: any): void => {
-    this.setState({
-      filter: event.target.value
-    });
+    this.setState(
+      {
+        filter: event.target.value
+      },
+      () => this._fetchBranches()
+    );
   };
 
   /**
    * Callback invoked to reset the menu filter.
    */
   private _resetFilter = (): void => {
-    this.setState({
-      filter: ''
-    });
+    this.setState(
+      {
+        filter: ''
+      },
+      () => this._fetchBranches()
+    );
+  };
+
+  /**
+   * Callback invoked upon clicking the item to show more branches.
+   */
+  private _onMoreClick = (): void => {
+    this._fetchBranches(true);
   };
 
   /**
@@ -449,4 +549,9 @@ export class NewBranchDialog extends React.Component<
       showErrorMessage('Error creating branch', err.message);
     }
   }
+
+  /**
+   * Counter of the branches requests; only the last response is used.
+   */
+  private _request = 0;
 }
@@ -1,4 +1,5 @@
 import { Mode } from '@jupyterlab/codemirror';
+import { URLExt } from '@jupyterlab/coreutils';
 import { ServerConnection } from '@jupyterlab/services';
 
 import * as React from 'react';
@@ -13,8 +14,36 @@ interface ICurrentReference {
   git?: string;
 }
 
+/**
+ * Size in bytes above which the diff is computed by the server
+ * and only its hunks are displayed
+ */
+export const HUNKS_DIFF_MIN_SIZE = 1024 * 1024;
+
+/**
+ * Hunk of a diff computed by the server
+ */
+interface IHunk {
+  prev_start: number;
+  prev_lines: number;
+  curr_start: number;
+  curr_lines: number;
+  /**
+   * Lines prefixed by ' ', '-' or '+'
+   */
+  lines: string[];
+}
+
 export interface IPlainTextDiffState {
   errorMessage: string;
+  /**
+   * Hunks of the diff, if computed by the server
+   */
+  hunks: IHunk[] | null;
+  /**
+   * Unchanged lines preceding each hunk, once expanded
+   */
+  expanded: { [index: number]: string[] };
 }
 
 export interface IPlainTextDiffProps extends IDiffProps {}
@@ -31,12 +60,12 @@ export class PlainTextDiff extends React.Component<
 > {
   constructor(props: IPlainTextDiffProps) {
     super(props);
-    this.state = { errorMessage: null };
+    this.state = { errorMessage: null, hunks: null, expanded: {} };
     this._mergeViewRef = React.createRef<HTMLDivElement>();
   }
 
   componentDidMount() {
-    this._performDiff(this.props.diffContext);
+    void this._performDiff(this.props.diffContext);
   }
 
   render() {
@@ -51,6 +80,16 @@ export class PlainTextDiff extends React.Component<
           </span>
         </div>
       );
+    } else if (this.state.hunks !== null) {
+      return (
+        <div className="jp-git-diff-Widget">
+          <div className="jp-git-diff-root">
+            <div className="jp-git-PlainText-diff jp-git-hunks-diff">
+              {this.state.hunks.map((hunk, index) => this._renderHunk(index))}
+            </div>
+          </div>
+        </div>
+      );
     } else {
       return (
         <div className="jp-git-diff-Widget">
@@ -67,52 +106,179 @@ export class PlainTextDiff extends React.Component<
    * to
    * @param diffContext the context in which to perform the diff
    */
-  private _performDiff(diffContext: IDiffContext): void {
+  private async _performDiff(diffContext: IDiffContext): Promise<void> {
     try {
-      // Resolve what API parameter to call.
-      let currentRefValue: ICurrentReference;
-      if ('specialRef' in diffContext.currentRef) {
-        currentRefValue = {
-          special: diffContext.currentRef.specialRef
-        };
-      } else {
-        currentRefValue = {
-          git: diffContext.currentRef.gitRef
-        };
-      }
-
-      httpGitRequest('/git/diffcontent', 'POST', {
+      // Large files are diffed by the server, only the hunks are fetched
+      const mode =
+        (await this._fileSize()) > HUNKS_DIFF_MIN_SIZE ? 'hunks' : 'content';
+      const response = await httpGitRequest('/git/diffcontent', 'POST', {
         filename: this.props.path,
         prev_ref: { git: diffContext.previousRef.gitRef },
-        curr_ref: currentRefValue,
-        top_repo_path: this.props.topRepoPath
-      }).then(response => {
-        response
-          .json()
-          .then(data => {
-            if (response.status !== 200) {
-              // Handle error
-              this.setState({
-                errorMessage:
-                  data.message || 'Unknown error. Please check the server log.'
-              });
-            } else {
-              this._addDiffViewer(data['prev_content'], data['curr_content']);
-            }
-          })
-          .catch(reason => {
-            console.error(reason);
-            // Handle error
-            this.setState({
-              errorMessage:
-                reason.message || 'Unknown error. Please check the server log.'
-            });
-          });
+        curr_ref: this._currentRef(),
+        top_repo_path: this.props.topRepoPath,
+        mode
       });
+      const data = await response.json();
+      if (response.status !== 200) {
+        // Handle error
+        this.setState({
+          errorMessage:
+            data.message || 'Unknown error. Please check the server log.'
+        });
+      } else if (mode === 'hunks') {
+        this.setState({ hunks: data['hunks'] });
+      } else {
+        this._addDiffViewer(data['prev_content'], data['curr_content']);
+      }
+    } catch (reason) {
+      console.error(reason);
+      // Handle error
+      this.setState({
+        errorMessage:
+          reason.message || 'Unknown error. Please check the server log.'
+      });
+    }
+  }
+
+  /**
+   * Resolve the API parameter of the current reference
+   */
+  private _currentRef(): ICurrentReference {
+    const currentRef = this.props.diffContext.currentRef;
+    if ('specialRef' in currentRef) {
+      return { special: currentRef.specialRef };
+    } else {
+      return { git: currentRef.gitRef };
+    }
+  }
+
+  /**
+   * Size of the file in the working tree, or 0 if unknown
+   */
+  private async _fileSize(): Promise<number> {
+    const settings = ServerConnection.makeSettings();
+    const url = URLExt.join(
+      settings.baseUrl,
+      'api/contents',
+      URLExt.encodeParts(URLExt.join(this.props.topRepoPath, this.props.path))
+    );
+    try {
+      const response = await ServerConnection.makeRequest(
+        url + '?content=0',
+        {},
+        settings
+      );
+      if (!response.ok) {
+        return 0;
+      }
+      const model = await response.json();
+      return model.size || 0;
     } catch (err) {
-      console.error(err);
-      throw ServerConnection.NetworkError;
+      return 0;
+    }
+  }
+
+  /**
+   * Fetch the unchanged lines preceding a hunk
+   *
+   * @param index the index of the hunk; the number of hunks for the lines
+   * after the last one
+   */
+  private async _expand(index: number): Promise<void> {
+    const hunks = this.state.hunks;
+    const start =
+      index === 0
+        ? 1
+        : hunks[index - 1].curr_start + hunks[index - 1].curr_lines;
+    const response = await httpGitRequest('/git/diffcontent', 'POST', {
+      filename: this.props.path,
+      ref: this._currentRef(),
+      top_repo_path: this.props.topRepoPath,
+      mode: 'lines',
+      start,
+      end: index < hunks.length ? hunks[index].curr_start - 1 : null
+    });
+    const data = await response.json();
+    if (response.status !== 200) {
+      this.setState({
+        errorMessage:
+          data.message || 'Unknown error. Please check the server log.'
+      });
+      return;
+    }
+    this.setState({
+      expanded: { ...this.state.expanded, [index]: data['lines'] }
+    });
+  }
+
+  /**
+   * Render a hunk preceded by the collapsed region before it
+   *
+   * @param index the index of the hunk
+   */
+  private _renderHunk(index: number) {
+    const hunks = this.state.hunks;
+    const hunk = hunks[index];
+    const previousEnd =
+      index === 0 ? 1 : hunks[index - 1].curr_start + hunks[index - 1].curr_lines;
+    const collapsed = hunk.curr_start - previousEnd;
+    const isLast = index === hunks.length - 1;
+    return (
+      <React.Fragment key={index}>
+        {this._renderRegion(index, collapsed)}
+        <pre className="jp-git-hunk">
+          {hunk.lines.map((line, lineIndex) => (
+            <div
+              key={lineIndex}
+              className={
+                line[0] === '+'
+                  ? 'jp-git-hunk-added'
+                  : line[0] === '-'
+                  ? 'jp-git-hunk-removed'
+                  : 'jp-git-hunk-context'
+              }
+            >
+              {line}
+            </div>
+          ))}
+        </pre>
+        {isLast && this._renderRegion(hunks.length, null)}
+      </React.Fragment>
+    );
+  }
+
+  /**
+   * Render a region of unchanged lines, collapsed until expanded
+   *
+   * @param index the index of the hunk following the region
+   * @param collapsed the number of lines in the region, null if unknown
+   */
+  private _renderRegion(index: number, collapsed: number | null) {
+    const lines = this.state.expanded[index];
+    if (lines !== undefined) {
+      return (
+        <pre className="jp-git-hunk">
+          {lines.map((line, lineIndex) => (
+            <div key={lineIndex} className="jp-git-hunk-context">
+              {' ' + line}
+            </div>
+          ))}
+        </pre>
+      );
+    }
+    if (collapsed === 0) {
+      return null;
     }
+    return (
+      <button
+        className="jp-git-hunk-expand"
+        onClick={() => this._expand(index)}
+      >
+        {collapsed === null
+          ? 'Show remaining lines'
+          : `Show ${collapsed} unchanged lines`}
+      </button>
+    );
   }
 
   /**
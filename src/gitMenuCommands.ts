@@ -23,6 +23,7 @@ export namespace CommandIDs {
   export const gitToggleSimpleStaging = 'git:toggle-simple-staging';
   export const gitAddRemote = 'git:add-remote';
   export const gitClone = 'git:clone';
+  export const gitAccelerateStatus = 'git:accelerate-status';
 }
 
 /**
@@ -148,6 +149,62 @@ export function addCommands(
     }
   });
 
+  /** Toggle the accelerated status mode of large repositories */
+  let accelerated = false;
+  const toggleAcceleration = async (enable: boolean) => {
+    try {
+      const result = await model.accelerateStatus(enable);
+      accelerated = result.enabled;
+      showDialog({
+        title: 'Accelerated status',
+        body: `Git status took ${result.before_s.toFixed(2)}s before and ${result.after_s.toFixed(2)}s after ${
+          enable ? 'enabling' : 'disabling'
+        } the accelerated status.`,
+        buttons: [Dialog.okButton()]
+      });
+    } catch (error) {
+      console.error(error);
+      showErrorMessage('Error when changing the accelerated status', error);
+    }
+  };
+
+  commands.addCommand(CommandIDs.gitAccelerateStatus, {
+    label: 'Accelerated status',
+    caption:
+      'Use the untracked cache, the index version 4 and the file system monitor to speed up git status',
+    isEnabled: () => model.pathRepository !== null,
+    isToggled: () => accelerated,
+    execute: () => toggleAcceleration(!accelerated)
+  });
+
+  // Offer the accelerated status when opening a large repository
+  const offered = new Set<string>();
+  model.repositoryChanged.connect(async (_, change) => {
+    accelerated = false;
+    const path = change.newValue;
+    if (path === null) {
+      return;
+    }
+    try {
+      const result = await model.accelerateStatus();
+      accelerated = result.enabled;
+      if (!result.large || result.enabled || offered.has(path)) {
+        return;
+      }
+      offered.add(path);
+      const answer = await showDialog({
+        title: 'Large repository',
+        body: `This repository tracks ${result.files} files. Do you want to enable the accelerated git status?`,
+        buttons: [Dialog.cancelButton(), Dialog.okButton({ label: 'Enable' })]
+      });
+      if (answer.button.accept) {
+        await toggleAcceleration(true);
+      }
+    } catch (error) {
+      console.error(error);
+    }
+  });
+
   /** Add git clone command */
   commands.addCommand(CommandIDs.gitClone, {
     label: 'Clone',
@@ -161,5 +161,7 @@ function createGitMenu(
 
   menu.addItem({ command: CommandIDs.gitToggleSimpleStaging });
 
+  menu.addItem({ command: CommandIDs.gitAccelerateStatus });
+
   return menu;
 }
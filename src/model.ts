@@ -1,5 +1,5 @@
 import { JupyterFrontEnd } from '@jupyterlab/application';
-import { IChangedArgs, PathExt } from '@jupyterlab/coreutils';
+import { IChangedArgs, PathExt, URLExt } from '@jupyterlab/coreutils';
 import { ServerConnection } from '@jupyterlab/services';
 import { ISettingRegistry } from '@jupyterlab/settingregistry';
 import { CommandRegistry } from '@lumino/commands';
@@ -14,6 +14,10 @@ import { Dialog, showErrorMessage } from '@jupyterlab/apputils';
 // Default refresh interval (in milliseconds) for polling the current Git status (NOTE: this value should be the same value as in the plugin settings schema):
 const DEFAULT_REFRESH_INTERVAL = 3000; // ms
 
+// Maximal number of branches fetched by the refresh; the branch menu, the new
+// branch dialog and the history fetch the others on demand
+const REFRESH_BRANCHES_LIMIT = 100;
+
 /** Main extension class */
 export class GitExtension implements IGitExtension {
   constructor(
@@ -56,6 +60,9 @@ export class GitExtension implements IGitExtension {
     });
     this._poll = poll;
 
+    // Push the status changes instead of polling them when possible
+    this._repositoryChanged.connect(() => this._watch(), this);
+
     /**
      * Callback invoked upon a change to plugin settings.
      *
@@ -73,7 +80,7 @@ export class GitExtension implements IGitExtension {
   }
 
   /**
-   * The list of branch in the current repo
+   * The first branches of the current repo; use listBranches to get them all
    */
   get branches() {
     return this._branches;
@@ -118,6 +125,13 @@ export class GitExtension implements IGitExtension {
     return this._readyPromise;
   }
 
+  /**
+   * A signal emitted when a clone, pull or push operation reports progress.
+   */
+  get operationProgress(): ISignal<IGitExtension, Git.IProgressMessage> {
+    return this._operationProgress;
+  }
+
   /**
    * A signal emitted when the current marking of the git repository changes.
    */
@@ -229,10 +243,11 @@ export class GitExtension implements IGitExtension {
     const response = await httpGitRequest('/git/add', 'POST', {
       add_all: !filename,
       filename: filename || '',
+      status: true,
       top_repo_path: path
     });
 
-    this.refreshStatus();
+    await this._updateStatus(response.clone());
     return Promise.resolve(response);
   }
 
@@ -355,7 +370,7 @@ export class GitExtension implements IGitExtension {
         url,
         name
       });
-      if (response.status !== 200) {
+      if (response.status !== 201) {
         const data = await response.text();
         throw new ServerConnection.ResponseError(response, data);
       }
@@ -364,6 +379,100 @@ export class GitExtension implements IGitExtension {
     }
   }
 
+  /**
+   * List the remotes of the current repository
+   *
+   * @returns Remotes with their fetch and push URLs
+   */
+  async listRemotes(): Promise<Git.IRemoteListResult> {
+    return this._remoteRequest('list', {});
+  }
+
+  /**
+   * Remove a remote and its remote-tracking branches
+   *
+   * @param name Remote name
+   */
+  async removeRemote(name: string): Promise<Git.IRemoteResult> {
+    return this._remoteRequest('remove', { name });
+  }
+
+  /**
+   * Rename a remote
+   *
+   * @param name Remote name
+   * @param newName New remote name
+   */
+  async renameRemote(
+    name: string,
+    newName: string
+  ): Promise<Git.IRemoteResult> {
+    return this._remoteRequest('rename', { name, new_name: newName });
+  }
+
+  /**
+   * Change the URL of a remote
+   *
+   * @param name Remote name
+   * @param url New remote URL
+   * @param push Whether to change the push URL instead of the fetch URL
+   */
+  async setRemoteUrl(
+    name: string,
+    url: string,
+    push = false
+  ): Promise<Git.IRemoteResult> {
+    return this._remoteRequest('set_url', { name, url, push });
+  }
+
+  /**
+   * Delete the remote-tracking branches whose branch was deleted on the remote
+   *
+   * @param name Remote name
+   * @param auth Optional authentication information for the remote repository
+   */
+  async pruneRemote(
+    name: string,
+    auth?: Git.IAuth
+  ): Promise<Git.IRemoteResult> {
+    return this._remoteRequest('prune', { name, auth });
+  }
+
+  /**
+   * Get or set the accelerated status mode of the current repository
+   *
+   * @param enable Whether to turn the mode on or off; if undefined, the mode is only reported
+   * @returns Accelerated status mode
+   */
+  async accelerateStatus(
+    enable?: boolean
+  ): Promise<Git.IAccelerateStatusResult> {
+    await this.ready;
+    const path = this.pathRepository;
+
+    if (path === null) {
+      return Promise.resolve({
+        code: -1,
+        message: 'Not in a git repository.'
+      });
+    }
+
+    try {
+      let body: JSONObject = { current_path: path };
+      if (enable !== undefined) {
+        body.enable = enable;
+      }
+      let response = await httpGitRequest('/git/accelerate_status', 'POST', body);
+      const data = await response.json();
+      if (response.status !== 200) {
+        throw new ServerConnection.ResponseError(response, data.message);
+      }
+      return data;
+    } catch (err) {
+      throw new ServerConnection.NetworkError(err);
+    }
+  }
+
   /**
    * Make request for all git info of the repository
    * (This API is also implicitly used to check if the current repo is a Git repo)
@@ -426,7 +535,8 @@ export class GitExtension implements IGitExtension {
       branchname: '',
       startpoint: '',
       checkout_all: true,
-      filename: '',
+      filename: '' as string | string[],
+      status: true,
       top_repo_path: path
     };
 
@@ -456,7 +566,7 @@ export class GitExtension implements IGitExtension {
         await this.refreshBranch();
         this._headChanged.emit();
       } else {
-        this.refreshStatus();
+        await this._updateStatus(response.clone());
       }
       return response.json();
     } catch (err) {
@@ -470,17 +580,20 @@ export class GitExtension implements IGitExtension {
    * @param path Local path in which the repository will be cloned
    * @param url Distant Git repository URL
    * @param auth Optional authentication information for the remote repository
+   * @param operationId Optional identifier to follow the operation progress
    */
   async clone(
     path: string,
     url: string,
-    auth?: Git.IAuth
+    auth?: Git.IAuth,
+    operationId?: string
   ): Promise<Git.ICloneResult> {
     try {
       let obj: Git.IGitClone = {
         current_path: path,
         clone_url: url,
-        auth
+        auth,
+        operation_id: await this._followOperation(operationId)
       };
 
       let response = await httpGitRequest('/git/clone', 'POST', obj);
@@ -613,6 +726,8 @@ export class GitExtension implements IGitExtension {
    * Make request for detailed git commit info of
    * commit 'hash'
    *
+   * The requests made during the same tick are sent as a single batch.
+   *
    * @param hash Commit hash
    */
   async detailedLog(hash: string): Promise<Git.ISingleCommitFilePathInfo> {
@@ -626,9 +741,55 @@ export class GitExtension implements IGitExtension {
       });
     }
 
+    let batch = this._pendingDetailedLogs;
+    if (batch === null || batch.path !== path) {
+      batch = { path, hashes: [], result: null };
+      this._pendingDetailedLogs = batch;
+      const current = batch;
+      current.result = Promise.resolve().then(() => {
+        if (this._pendingDetailedLogs === current) {
+          this._pendingDetailedLogs = null;
+        }
+        return this.detailedLogs(current.hashes, current.path);
+      });
+    }
+    if (batch.hashes.indexOf(hash) < 0) {
+      batch.hashes.push(hash);
+    }
+
+    const data = await batch.result;
+    if (data.code !== 0) {
+      return { code: data.code, message: data.message };
+    }
+    const log = data.commits.find(
+      commit => commit.commit === hash || commit.commit.startsWith(hash)
+    );
+    if (!log) {
+      return { code: -1, message: `Unknown commit ${hash}.` };
+    }
+    return log;
+  }
+
+  /**
+   * Make request for detailed git commit info of many commits
+   *
+   * @param hashes Commit hashes
+   * @param path Repository path; default to the current repository
+   */
+  async detailedLogs(
+    hashes: string[],
+    path: string | null = this.pathRepository
+  ): Promise<Git.IDetailedLogsResult> {
+    if (path === null) {
+      return Promise.resolve({
+        code: -1,
+        message: 'Not in a git repository.'
+      });
+    }
+
     try {
       let response = await httpGitRequest('/git/detailed_log', 'POST', {
-        selected_hash: hash,
+        selected_hashes: hashes,
         current_path: path
       });
       if (response.status !== 200) {
@@ -650,6 +811,14 @@ export class GitExtension implements IGitExtension {
     }
     this._isDisposed = true;
     this._poll.dispose();
+    if (this._watchSocket) {
+      this._watchSocket.close();
+      this._watchSocket = null;
+    }
+    if (this._progressSocket) {
+      this._progressSocket.close();
+      this._progressSocket = null;
+    }
     Signal.clearData(this);
   }
 
@@ -697,8 +866,12 @@ export class GitExtension implements IGitExtension {
    * Make request for git commit logs
    *
    * @param historyCount: Optional number of commits to get from git log
+   * @param after: Optional continuation token of the previous page
    */
-  async log(historyCount: number = 25): Promise<Git.ILogResult> {
+  async log(
+    historyCount: number = 25,
+    after?: string
+  ): Promise<Git.ILogResult> {
     await this.ready;
     const path = this.pathRepository;
 
@@ -712,7 +885,8 @@ export class GitExtension implements IGitExtension {
     try {
       let response = await httpGitRequest('/git/log', 'POST', {
         current_path: path,
-        history_count: historyCount
+        history_count: historyCount,
+        after: after || null
       });
       if (response.status !== 200) {
         const data = await response.json();
@@ -736,8 +910,25 @@ export class GitExtension implements IGitExtension {
     });
   }
 
+  /**
+   * Cancel a running clone, pull or push operation
+   *
+   * @param operationId Identifier of the operation
+   */
+  cancelOperation(operationId: string): void {
+    if (
+      this._progressSocket !== null &&
+      this._progressSocket.readyState === WebSocket.OPEN
+    ) {
+      this._progressSocket.send(JSON.stringify({ cancel: operationId }));
+    }
+  }
+
   /** Make request for the Git Pull API. */
-  async pull(auth?: Git.IAuth): Promise<Git.IPushPullResult> {
+  async pull(
+    auth?: Git.IAuth,
+    operationId?: string
+  ): Promise<Git.IPushPullResult> {
     await this.ready;
     const path = this.pathRepository;
 
@@ -754,7 +945,8 @@ export class GitExtension implements IGitExtension {
         auth,
         cancel_on_conflict: this._settings
           ? (this._settings.composite['cancelPullMergeConflict'] as boolean)
-          : false
+          : false,
+        operation_id: await this._followOperation(operationId)
       };
 
       let response = await httpGitRequest('/git/pull', 'POST', obj);
@@ -772,7 +964,10 @@ export class GitExtension implements IGitExtension {
   }
 
   /** Make request for the Git Push API. */
-  async push(auth?: Git.IAuth): Promise<Git.IPushPullResult> {
+  async push(
+    auth?: Git.IAuth,
+    operationId?: string
+  ): Promise<Git.IPushPullResult> {
     await this.ready;
     const path = this.pathRepository;
 
@@ -786,7 +981,8 @@ export class GitExtension implements IGitExtension {
     try {
       let obj: Git.IPushPull = {
         current_path: path,
-        auth
+        auth,
+        operation_id: await this._followOperation(operationId)
       };
 
       let response = await httpGitRequest('/git/push', 'POST', obj);
@@ -813,7 +1009,7 @@ export class GitExtension implements IGitExtension {
    * Make request for a list of all Git branches
    */
   async refreshBranch(): Promise<void> {
-    const response = await this._branch();
+    const response = await this._branch({ limit: REFRESH_BRANCHES_LIMIT });
 
     if (response.code === 0) {
       this._branches = response.branches;
@@ -837,41 +1033,41 @@ export class GitExtension implements IGitExtension {
     const path = this.pathRepository;
 
     if (path === null) {
+      this._statusFingerprint = '';
       this._setStatus([]);
       return Promise.resolve();
     }
 
     try {
       let response = await httpGitRequest('/git/status', 'POST', {
-        current_path: path
+        current_path: path,
+        fingerprint: this._statusFingerprint
       });
-      const data = await response.json();
+      const data: Git.IStatusResult = await response.json();
       if (response.status !== 200) {
-        console.error(data.message);
+        console.error((data as any).message);
         // TODO should we notify the user
+        this._statusFingerprint = '';
         this._setStatus([]);
       }
 
-      this._setStatus(
-        (data as Git.IStatusResult).files.map(file => {
-          return { ...file, status: decodeStage(file.x, file.y) };
-        })
-      );
+      this._applyStatus(data);
     } catch (err) {
       console.error(err);
       // TODO should we notify the user
+      this._statusFingerprint = '';
       this._setStatus([]);
     }
   }
 
   /**
-   * Make request to move one or all files from the staged to the unstaged area
+   * Make request to move one, several or all files from the staged to the unstaged area
    *
-   * @param filename - Path to a file to be reset. Leave blank to reset all
+   * @param filename - Paths of the files to be reset. Leave blank to reset all
    *
    * @returns a promise that resolves when the request is complete.
    */
-  async reset(filename?: string): Promise<Response> {
+  async reset(...filename: string[]): Promise<Response> {
     await this.ready;
     const path = this.pathRepository;
 
@@ -888,8 +1084,9 @@ export class GitExtension implements IGitExtension {
 
     try {
       let response = await httpGitRequest('/git/reset', 'POST', {
-        reset_all: filename === undefined,
-        filename: filename === undefined ? null : filename,
+        reset_all: filename.length === 0,
+        filename: filename.length === 0 ? null : filename,
+        status: true,
         top_repo_path: path
       });
       if (response.status !== 200) {
@@ -898,7 +1095,7 @@ export class GitExtension implements IGitExtension {
         });
       }
 
-      this.refreshStatus();
+      await this._updateStatus(response.clone());
       return response;
     } catch (err) {
       throw new ServerConnection.NetworkError(err);
@@ -980,11 +1177,24 @@ export class GitExtension implements IGitExtension {
   }
 
   /**
-   * Make request for a list of all git branches in the repository
+   * Make request for a page of the git branches
    *
+   * @param query Branches filter, order and page
+   * @returns The branches page
+   */
+  async listBranches(query: Git.IBranchQuery): Promise<Git.IBranchResult> {
+    return this._branch(query);
+  }
+
+  /**
+   * Make request for a list of git branches in the repository
+   *
+   * @param query Branches filter, order and page; all branches if not provided
    * @returns The repository branches
    */
-  protected async _branch(): Promise<Git.IBranchResult> {
+  protected async _branch(
+    query: Git.IBranchQuery = {}
+  ): Promise<Git.IBranchResult> {
     await this.ready;
     const path = this.pathRepository;
 
@@ -997,7 +1207,8 @@ export class GitExtension implements IGitExtension {
 
     try {
       let response = await httpGitRequest('/git/branch', 'POST', {
-        current_path: path
+        current_path: path,
+        ...query
       });
       if (response.status !== 200) {
         const data = await response.json();
@@ -1009,6 +1220,42 @@ export class GitExtension implements IGitExtension {
     }
   }
 
+  /**
+   * Make a request managing the remotes of the repository
+   *
+   * @param operation Remote operation; e.g. 'rename'
+   * @param body Operation parameters
+   * @returns The operation result
+   */
+  protected async _remoteRequest(
+    operation: string,
+    body: { [key: string]: any }
+  ): Promise<Git.IRemoteListResult> {
+    await this.ready;
+    const path = this.pathRepository;
+
+    if (path === null) {
+      return Promise.resolve({
+        code: -1,
+        message: 'Not in a git repository.'
+      });
+    }
+
+    try {
+      let response = await httpGitRequest(`/git/remote/${operation}`, 'POST', {
+        top_repo_path: path,
+        ...body
+      });
+      const data = await response.json();
+      if (response.status !== 200) {
+        throw new ServerConnection.ResponseError(response, data.message);
+      }
+      return data;
+    } catch (err) {
+      throw new ServerConnection.NetworkError(err);
+    }
+  }
+
   /**
    * Set repository status
    *
@@ -1019,6 +1266,170 @@ export class GitExtension implements IGitExtension {
     this._statusChanged.emit(this._status);
   }
 
+  /**
+   * Apply a status request result
+   *
+   * @param data Repository status
+   */
+  private _applyStatus(data: Git.IStatusResult): void {
+    if (data.not_modified) {
+      return;
+    }
+    this._statusFingerprint = data.fingerprint || '';
+
+    this._setStatus(
+      data.files.map(file => {
+        return { ...file, status: decodeStage(file.x, file.y) };
+      })
+    );
+  }
+
+  /**
+   * Apply the status returned by an index mutation,
+   * or request it if the response has none.
+   *
+   * @param response Mutation response
+   */
+  private async _updateStatus(response: Response): Promise<void> {
+    try {
+      const data = await response.json();
+      if (data.status && data.status.code === 0) {
+        this._applyStatus(data.status);
+        return;
+      }
+    } catch (err) {
+      console.error(err);
+    }
+    await this.refreshStatus();
+  }
+
+  /**
+   * Subscribe to the status changes of the current repository.
+   *
+   * The WebSocket is opened on the first subscription; polling
+   * resumes if it cannot be opened or is closed.
+   */
+  private _watch(): void {
+    if (this.isDisposed) {
+      return;
+    }
+    const path = this.pathRepository;
+    if (this._watchSocket === null) {
+      if (path === null || typeof WebSocket === 'undefined') {
+        return;
+      }
+      const settings = ServerConnection.makeSettings();
+      let socket: WebSocket;
+      try {
+        socket = new settings.WebSocket(URLExt.join(settings.wsUrl, 'git/watch'));
+      } catch (err) {
+        console.error(err);
+        return;
+      }
+      socket.onopen = () => {
+        this._subscribe();
+      };
+      socket.onmessage = (event: MessageEvent) => {
+        this._onWatchMessage(JSON.parse(event.data));
+      };
+      socket.onclose = () => {
+        if (this._watchSocket === socket) {
+          this._watchSocket = null;
+        }
+        if (!this.isDisposed) {
+          void this._poll.start();
+        }
+      };
+      this._watchSocket = socket;
+    } else if (this._watchSocket.readyState === WebSocket.OPEN) {
+      this._subscribe();
+    }
+  }
+
+  /**
+   * Subscribe to the progress of an operation before starting it.
+   *
+   * @param operationId Identifier of the operation
+   * @returns The identifier to send with the request, undefined if
+   * the progress cannot be followed
+   */
+  private async _followOperation(
+    operationId?: string
+  ): Promise<string | undefined> {
+    if (!operationId || typeof WebSocket === 'undefined') {
+      return undefined;
+    }
+    if (this._progressSocket === null) {
+      const settings = ServerConnection.makeSettings();
+      let socket: WebSocket;
+      try {
+        socket = new settings.WebSocket(
+          URLExt.join(settings.wsUrl, 'git/progress')
+        );
+      } catch (err) {
+        console.error(err);
+        return undefined;
+      }
+      socket.onmessage = (event: MessageEvent) => {
+        this._operationProgress.emit(JSON.parse(event.data));
+      };
+      socket.onclose = () => {
+        if (this._progressSocket === socket) {
+          this._progressSocket = null;
+        }
+      };
+      this._progressSocket = socket;
+    }
+    const socket = this._progressSocket;
+    if (socket.readyState === WebSocket.CONNECTING) {
+      await new Promise(resolve => {
+        socket.addEventListener('open', resolve);
+        socket.addEventListener('close', resolve);
+      });
+    }
+    if (socket.readyState !== WebSocket.OPEN) {
+      return undefined;
+    }
+    socket.send(JSON.stringify({ subscribe: operationId }));
+    return operationId;
+  }
+
+  private _subscribe(): void {
+    this._watchSocket.send(
+      JSON.stringify({ subscribe: this.pathRepository || '' })
+    );
+  }
+
+  private _onWatchMessage(message: Git.IWatchMessage): void {
+    const decode = (file: Git.IStatusFileResult): Git.IStatusFile => {
+      return { ...file, status: decodeStage(file.x, file.y) };
+    };
+    switch (message.type) {
+      case 'status':
+        void this._poll.stop();
+        this._statusFingerprint = '';
+        this._setStatus(message.files.map(decode));
+        break;
+      case 'status_delta': {
+        const updated = new Set(message.removed);
+        message.changed.forEach(file => updated.add(file.to));
+        this._setStatus(
+          this._status
+            .filter(file => !updated.has(file.to))
+            .concat(message.changed.map(decode))
+        );
+        break;
+      }
+      case 'head':
+        this.refreshBranch().then(() => this._headChanged.emit());
+        break;
+      case 'error':
+        // Not in a repository; fall back to polling
+        void this._poll.start();
+        break;
+    }
+  }
+
   private async _getServerRoot(): Promise<string> {
     try {
       const response = await httpGitRequest('/git/server_root', 'GET', null);
@@ -1050,6 +1461,7 @@ export class GitExtension implements IGitExtension {
   }
 
   private _status: Git.IStatusFile[] = [];
+  private _statusFingerprint = '';
   private _pathRepository: string | null = null;
   private _branches: Git.IBranch[];
   private _currentBranch: Git.IBranch;
@@ -1062,8 +1474,18 @@ export class GitExtension implements IGitExtension {
   private _readyPromise: Promise<void> = Promise.resolve();
   private _pendingReadyPromise = 0;
   private _poll: Poll;
+  private _pendingDetailedLogs: {
+    path: string;
+    hashes: string[];
+    result: Promise<Git.IDetailedLogsResult>;
+  } | null = null;
+  private _watchSocket: WebSocket | null = null;
+  private _progressSocket: WebSocket | null = null;
   private _settings: ISettingRegistry.ISettings | null;
   private _headChanged = new Signal<IGitExtension, void>(this);
+  private _operationProgress = new Signal<IGitExtension, Git.IProgressMessage>(
+    this
+  );
   private _markChanged = new Signal<IGitExtension, void>(this);
   private _repositoryChanged = new Signal<
     IGitExtension,
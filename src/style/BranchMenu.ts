@@ -127,3 +127,11 @@ export const listItemIconClass = style({
   backgroundRepeat: 'no-repeat',
   backgroundPosition: 'center'
 });
+
+export const moreListItemClass = style({
+  paddingTop: '4px!important',
+  paddingBottom: '4px!important',
+  paddingLeft: '31px!important',
+
+  color: 'var(--jp-ui-font-color2)!important'
+});
@@ -195,6 +195,14 @@ export const listItemClass = style({
   lineHeight: '1.5em'
 });
 
+export const moreListItemClass = style({
+  /* top | right | bottom | left */
+  padding: '4px 11px 4px 38px!important',
+
+  fontSize: 'var(--jp-ui-font-size1)',
+  color: 'var(--jp-ui-font-color2)!important'
+});
+
 export const activeListItemClass = style({
   color: 'white!important',
 
@@ -11,7 +11,7 @@ export const IGitExtension = new Token<IGitExtension>(EXTENSION_ID);
 /** Interface for extension class */
 export interface IGitExtension extends IDisposable {
   /**
-   * The list of branch in the current repo
+   * The first branches of the current repo; use listBranches to get them all
    */
   branches: Git.IBranch[];
 
@@ -25,6 +25,11 @@ export interface IGitExtension extends IDisposable {
    */
   readonly headChanged: ISignal<IGitExtension, void>;
 
+  /**
+   * A signal emitted when a clone, pull or push operation reports progress.
+   */
+  readonly operationProgress: ISignal<IGitExtension, Git.IProgressMessage>;
+
   /**
    * Top level path of the current git repository
    */
@@ -110,6 +115,57 @@ export interface IGitExtension extends IDisposable {
    */
   addRemote(url: string, name?: string): Promise<void>;
 
+  /**
+   * List the remotes of the current repository
+   *
+   * @returns Remotes with their fetch and push URLs
+   */
+  listRemotes(): Promise<Git.IRemoteListResult>;
+
+  /**
+   * Remove a remote and its remote-tracking branches
+   *
+   * @param name Remote name
+   */
+  removeRemote(name: string): Promise<Git.IRemoteResult>;
+
+  /**
+   * Rename a remote
+   *
+   * @param name Remote name
+   * @param newName New remote name
+   */
+  renameRemote(name: string, newName: string): Promise<Git.IRemoteResult>;
+
+  /**
+   * Change the URL of a remote
+   *
+   * @param name Remote name
+   * @param url New remote URL
+   * @param push Whether to change the push URL instead of the fetch URL
+   */
+  setRemoteUrl(
+    name: string,
+    url: string,
+    push?: boolean
+  ): Promise<Git.IRemoteResult>;
+
+  /**
+   * Delete the remote-tracking branches whose branch was deleted on the remote
+   *
+   * @param name Remote name
+   * @param auth Optional authentication information for the remote repository
+   */
+  pruneRemote(name: string, auth?: Git.IAuth): Promise<Git.IRemoteResult>;
+
+  /**
+   * Get or set the accelerated status mode of the current repository
+   *
+   * @param enable Whether to turn the mode on or off; if undefined, the mode is only reported
+   * @returns Accelerated status mode
+   */
+  accelerateStatus(enable?: boolean): Promise<Git.IAccelerateStatusResult>;
+
   /**
    * Make request for all git info of the repository
    * (This API is also implicitly used to check if the current repo is a Git repo)
@@ -139,9 +195,22 @@ export interface IGitExtension extends IDisposable {
    * @param path Local path in which the repository will be cloned
    * @param url Distant Git repository URL
    * @param auth Optional authentication information for the remote repository
+   * @param operationId Optional identifier to follow the operation progress
    * @returns Command execution status
    */
-  clone(path: string, url: string, auth?: Git.IAuth): Promise<Git.ICloneResult>;
+  clone(
+    path: string,
+    url: string,
+    auth?: Git.IAuth,
+    operationId?: string
+  ): Promise<Git.ICloneResult>;
+
+  /**
+   * Cancel a running clone, pull or push operation
+   *
+   * @param operationId Identifier of the operation
+   */
+  cancelOperation(operationId: string): void;
 
   /**
    * Make request to commit all staged files in repository
@@ -174,6 +243,14 @@ export interface IGitExtension extends IDisposable {
    */
   detailedLog(hash: string): Promise<Git.ISingleCommitFilePathInfo>;
 
+  /**
+   * Make request for detailed git commit info of many commits
+   *
+   * @param hashes Commit hashes
+   * @returns Detailed log result of each commit
+   */
+  detailedLogs(hashes: string[]): Promise<Git.IDetailedLogsResult>;
+
   /**
    * Gets the path of the file relative to the Jupyter server root.
    *
@@ -196,25 +273,28 @@ export interface IGitExtension extends IDisposable {
    * Make request for git commit logs
    *
    * @param historyCount: Optional number of commits to get from git log
+   * @param after: Optional continuation token of the previous page
    * @returns Repository logs
    */
-  log(historyCount?: number): Promise<Git.ILogResult>;
+  log(historyCount?: number, after?: string): Promise<Git.ILogResult>;
 
   /**
    * Make request for the Git Pull API.
    *
    * @param auth Optional authentication information for the remote repository
+   * @param operationId Optional identifier to follow the operation progress
    * @returns Command execution status
    */
-  pull(auth?: Git.IAuth): Promise<Git.IPushPullResult>;
+  pull(auth?: Git.IAuth, operationId?: string): Promise<Git.IPushPullResult>;
 
   /**
    * Make request for the Git Push API.
    *
    * @param auth Optional authentication information for the remote repository
+   * @param operationId Optional identifier to follow the operation progress
    * @returns Command execution status
    */
-  push(auth?: Git.IAuth): Promise<Git.IPushPullResult>;
+  push(auth?: Git.IAuth, operationId?: string): Promise<Git.IPushPullResult>;
 
   /**
    * General git refresh
@@ -226,6 +306,16 @@ export interface IGitExtension extends IDisposable {
    */
   refreshBranch(): Promise<void>;
 
+  /**
+   * Make request for a page of the git branches
+   *
+   * The current branch and its upstream come first on the first page.
+   *
+   * @param query Branches filter, order and page
+   * @returns The branches page
+   */
+  listBranches(query: Git.IBranchQuery): Promise<Git.IBranchResult>;
+
   /**
    * Request git status refresh
    */
@@ -240,13 +330,13 @@ export interface IGitExtension extends IDisposable {
   registerDiffProvider(filetypes: string[], callback: Git.IDiffCallback): void;
 
   /**
-   * Make request to move one or all files from the staged to the unstaged area
+   * Make request to move one, several or all files from the staged to the unstaged area
    *
    * If filename is not provided, all files will be reset.
    *
-   * @param filename Optional name of the file to add
+   * @param filename Optional names of the files to reset
    */
-  reset(filename?: string): Promise<Response>;
+  reset(...filename: string[]): Promise<Response>;
 
   /**
    * Make request to reset to selected commit
@@ -292,6 +382,14 @@ export namespace Git {
       log?: ILogResult;
       status?: IStatusResult;
     };
+    /**
+     * Repository fingerprint to send with the next request
+     */
+    fingerprint?: string | null;
+    /**
+     * True if the repository did not change since the request fingerprint
+     */
+    not_modified?: boolean;
   }
 
   /** Interface for GitShowTopLevel request result,
@@ -332,9 +430,9 @@ export namespace Git {
      */
     startpoint?: string;
     /**
-     * Filename
+     * Filename, or filenames to check out at once
      */
-    filename?: string;
+    filename?: string | string[];
   }
 
   /** Interface for GitCheckout request result.
@@ -364,6 +462,27 @@ export namespace Git {
     code: number;
     branches?: IBranch[];
     current_branch?: IBranch;
+    /**
+     * Number of branches matching the query; only for paginated results
+     */
+    total?: number;
+    /**
+     * Offset of the next page; only for paginated results
+     */
+    next?: number | null;
+  }
+
+  /** Interface for GitBranch request query
+   */
+  export interface IBranchQuery {
+    /**
+     * Text the branch names contain or start with
+     */
+    filter?: string;
+    match?: 'substring' | 'prefix';
+    sort?: 'name' | 'committerdate';
+    offset?: number;
+    limit?: number;
   }
 
   /** Interface for GitStatus request result,
@@ -389,6 +508,60 @@ export namespace Git {
   export interface IStatusResult {
     code: number;
     files?: IStatusFileResult[];
+    /**
+     * Repository fingerprint to send with the next request
+     */
+    fingerprint?: string | null;
+    /**
+     * True if the repository did not change since the request fingerprint
+     */
+    not_modified?: boolean;
+  }
+
+  /** Interface for GitAccelerateStatus request result
+   */
+  export interface IAccelerateStatusResult {
+    code: number;
+    /**
+     * Number of files in the index
+     */
+    files?: number | null;
+    index_version?: number | null;
+    /**
+     * Whether the accelerated mode is advised
+     */
+    large?: boolean;
+    /**
+     * Whether the builtin fsmonitor daemon is supported
+     */
+    fsmonitor?: boolean;
+    options?: { [key: string]: string | null };
+    enabled?: boolean;
+    /**
+     * Status duration in seconds before and after a mode change
+     */
+    before_s?: number;
+    after_s?: number;
+    message?: string;
+  }
+
+  /** Interface for the messages pushed by the /git/watch WebSocket
+   */
+  export interface IWatchMessage {
+    type: 'status' | 'status_delta' | 'head' | 'error';
+    /**
+     * Complete status - for 'status' messages
+     */
+    files?: IStatusFileResult[];
+    /**
+     * Status entries that changed - for 'status_delta' messages
+     */
+    changed?: IStatusFileResult[];
+    /**
+     * Paths no longer in the status - for 'status_delta' messages
+     */
+    removed?: string[];
+    message?: string;
   }
 
   /** Interface for GitLog request result,
@@ -422,6 +595,15 @@ export namespace Git {
     number_of_insertions?: string;
     number_of_deletions?: string;
     modified_files?: [ICommitModifiedFile];
+    message?: string;
+  }
+
+  /** Interface for the batch GitDetailedLog request result
+   */
+  export interface IDetailedLogsResult {
+    code: number;
+    commits?: Array<ISingleCommitFilePathInfo & { commit: string }>;
+    message?: string;
   }
 
   /** Interface for GitLog request result,
@@ -430,6 +612,10 @@ export namespace Git {
   export interface ILogResult {
     code: number;
     commits?: [ISingleCommitInfo];
+    /**
+     * Continuation token to get the next page; null on the last page
+     */
+    next?: string | null;
   }
 
   export interface IIdentity {
@@ -452,6 +638,7 @@ export namespace Git {
     current_path: string;
     clone_url: string;
     auth?: IAuth;
+    operation_id?: string;
   }
 
   /**
@@ -461,6 +648,34 @@ export namespace Git {
     current_path: string;
     auth?: IAuth;
     cancel_on_conflict?: boolean;
+    operation_id?: string;
+  }
+
+  /**
+   * Message sent over the progress WebSocket for a clone, pull or push operation
+   */
+  export interface IProgressMessage {
+    type: 'progress' | 'done';
+    operation_id: string;
+    /**
+     * Operation phase, e.g. 'Receiving objects' - for 'progress' messages
+     */
+    phase?: string;
+    percent?: number;
+    current?: number;
+    total?: number;
+    /**
+     * Amount of data transferred in bytes
+     */
+    bytes?: number | null;
+    /**
+     * Transfer rate in bytes/s
+     */
+    throughput?: number | null;
+    /**
+     * Whether the operation was cancelled - for 'done' messages
+     */
+    cancelled?: boolean;
   }
 
   /**
@@ -479,6 +694,37 @@ export namespace Git {
     message?: string;
   }
 
+  /**
+   * Remote description
+   */
+  export interface IRemote {
+    name: string;
+    /**
+     * Fetch URL
+     */
+    url: string;
+    push_urls: string[];
+  }
+
+  /**
+   * Structure for the result of the Git Remote List API.
+   */
+  export interface IRemoteListResult {
+    code: number;
+    remotes?: IRemote[];
+    command?: string;
+    message?: string;
+  }
+
+  /**
+   * Structure for the result of the Git Remote management APIs.
+   */
+  export interface IRemoteResult {
+    code: number;
+    command?: string;
+    message?: string;
+  }
+
   /**
    * Interface for a marker obj
    */
@@ -1,4 +1,5 @@
 import { Spinner } from '@jupyterlab/apputils';
+import { UUID } from '@lumino/coreutils';
 import { Widget } from '@lumino/widgets';
 import { AUTH_ERROR_MESSAGES } from '../git';
 import { Git, IGitExtension } from '../tokens';
@@ -16,6 +17,8 @@ export class GitPullPushDialog extends Widget {
   private _model: IGitExtension;
   private _body: HTMLElement;
   private _operation: Operation;
+  private _operationId: string;
+  private _progress: HTMLElement;
 
   /**
    * Instantiates the dialog and makes the relevant service API call.
@@ -31,9 +34,22 @@ export class GitPullPushDialog extends Widget {
     this._spinner = new Spinner();
     this.node.appendChild(this._spinner.node);
 
+    this._operationId = UUID.uuid4();
+    this._progress = this.createProgress();
+    this.node.appendChild(this._progress);
+    this._model.operationProgress.connect(this.handleProgress, this);
+
     this.executeGitApi(auth);
   }
 
+  /**
+   * Dispose of the resources held by the dialog.
+   */
+  dispose(): void {
+    this._model.operationProgress.disconnect(this.handleProgress, this);
+    super.dispose();
+  }
+
   /**
    * Executes the relevant service API depending on the _operation and handles response and errors.
    * @param currentFileBrowserPath the path to the current repo
@@ -42,7 +58,7 @@ export class GitPullPushDialog extends Widget {
     switch (this._operation) {
       case Operation.Pull:
         this._model
-          .pull(auth)
+          .pull(auth, this._operationId)
           .then(response => {
             this.handleResponse(response);
           })
@@ -50,7 +66,7 @@ export class GitPullPushDialog extends Widget {
         break;
       case Operation.Push:
         this._model
-          .push(auth)
+          .push(auth, this._operationId)
           .then(response => {
             this.handleResponse(response);
           })
@@ -69,6 +85,7 @@ export class GitPullPushDialog extends Widget {
   private async handleResponse(response: Git.IPushPullResult) {
     this.node.removeChild(this._spinner.node);
     this._spinner.dispose();
+    this._progress.remove();
     if (response.code !== 0) {
       if (
         AUTH_ERROR_MESSAGES.map(
@@ -85,6 +102,26 @@ export class GitPullPushDialog extends Widget {
     }
   }
 
+  /**
+   * Displays the progress reported by the server for the operation.
+   * @param model the git model
+   * @param message the progress message
+   */
+  private handleProgress(
+    model: IGitExtension,
+    message: Git.IProgressMessage
+  ): void {
+    if (message.operation_id !== this._operationId) {
+      return;
+    }
+    const text = this._progress.firstChild as HTMLElement;
+    if (message.type === 'progress') {
+      text.textContent = `${message.phase}: ${message.percent}% (${message.current}/${message.total})`;
+    } else {
+      this._progress.remove();
+    }
+  }
+
   private handleError(
     message: string = 'Unexpected failure. Please check your Jupyter server logs for more details.'
   ): void {
@@ -110,6 +147,20 @@ export class GitPullPushDialog extends Widget {
     label.appendChild(text);
     this._body.appendChild(label);
   }
+  private createProgress(): HTMLElement {
+    const node = document.createElement('div');
+    const text = document.createElement('span');
+    const cancel = document.createElement('button');
+    cancel.className = 'jp-mod-styled jp-mod-warn';
+    cancel.textContent = 'Cancel';
+    cancel.onclick = () => {
+      this._model.cancelOperation(this._operationId);
+    };
+    node.appendChild(text);
+    node.appendChild(cancel);
+    return node;
+  }
+
   private createBody(): HTMLElement {
     const node = document.createElement('div');
     node.className = 'jp-RedirectForm';
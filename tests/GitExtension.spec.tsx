@@ -276,6 +276,37 @@ describe('IGitExtension', () => {
     });
   });
 
+  describe('#reset', () => {
+    it('should reset the files at once and apply the returned status', async () => {
+      const files = [{ x: 'M', y: ' ', to: 'a.txt', from: 'a.txt' }];
+      mockResponses = {
+        ...mockResponses,
+        '/git/reset': {
+          body: () =>
+            JSON.stringify({
+              code: 0,
+              status: { code: 0, fingerprint: 'fingerprint', files }
+            })
+        }
+      };
+
+      model.pathRepository = '/path/to/server/repo';
+      await model.ready;
+      mockGit.httpGitRequest.mockClear();
+
+      await model.reset('a.txt', 'b.txt');
+
+      expect(mockGit.httpGitRequest).toHaveBeenCalledTimes(1);
+      expect(mockGit.httpGitRequest).toBeCalledWith('/git/reset', 'POST', {
+        reset_all: false,
+        filename: ['a.txt', 'b.txt'],
+        status: true,
+        top_repo_path: '/path/to/server/repo'
+      });
+      expect(model.status).toEqual([{ ...files[0], status: 'staged' }]);
+    });
+  });
+
   describe('#pull', () => {
     it('should emit headChanged signal if successful', async () => {
       mockResponses = {